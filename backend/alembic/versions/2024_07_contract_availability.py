@@ -0,0 +1,44 @@
+"""reject overlapping contracts with a GiST exclusion constraint
+
+Revision ID: 2024_07_contract_availability
+Revises: 2024_07_audit_partitions
+Create Date: 2024-12-12 00:00:00.000000
+
+"""
+from alembic import op
+from sqlalchemy import text
+
+# revision identifiers, used by Alembic.
+revision = '2024_07_contract_availability'
+down_revision = '2024_07_audit_partitions'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    connection = op.get_bind()
+
+    # btree_gist permite combinar unit_id (=) y el rango de fechas (&&) en un índice GiST
+    connection.execute(text("CREATE EXTENSION IF NOT EXISTS btree_gist"))
+
+    # La restricción no puede crearse si ya hay contratos solapados
+    overlaps = connection.execute(text("""
+        SELECT a.id, b.id, a.unit_id
+        FROM contracts a
+        JOIN contracts b ON a.unit_id = b.unit_id AND a.id < b.id
+        WHERE a.status IN ('active', 'renewed')
+          AND b.status IN ('active', 'renewed')
+          AND daterange(a.start_date, a.end_date, '[]') && daterange(b.start_date, b.end_date, '[]')
+    """)).fetchall()
+    if overlaps:
+        pairs = ", ".join(f"{a}/{b} (unit {unit})" for a, b, unit in overlaps)
+        raise RuntimeError(f"Overlapping active contracts must be resolved first: {pairs}")
+
+    connection.execute(text("""
+        ALTER TABLE contracts
+        ADD CONSTRAINT contracts_unit_period_excl
+        EXCLUDE USING gist (unit_id WITH =, daterange(start_date, end_date, '[]') WITH &&)
+        WHERE (status IN ('active', 'renewed'))
+    """))
+
+def downgrade():
+    op.drop_constraint('contracts_unit_period_excl', 'contracts')
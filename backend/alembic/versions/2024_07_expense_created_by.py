@@ -0,0 +1,25 @@
+"""creator of each expense
+
+Revision ID: 2024_07_expense_created_by
+Revises: 2024_07_loan_metrics
+Create Date: 2024-12-25 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '2024_07_expense_created_by'
+down_revision = '2024_07_loan_metrics'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column('expenses', sa.Column('created_by_id', sa.Integer(), nullable=True))
+    op.create_foreign_key('fk_expenses_created_by_id', 'expenses', 'users', ['created_by_id'], ['id'])
+    op.create_index('ix_expenses_created_by_id', 'expenses', ['created_by_id'])
+
+def downgrade():
+    op.drop_index('ix_expenses_created_by_id', table_name='expenses')
+    op.drop_constraint('fk_expenses_created_by_id', 'expenses', type_='foreignkey')
+    op.drop_column('expenses', 'created_by_id')
@@ -0,0 +1,45 @@
+"""batch-computed loan performance metrics
+
+Revision ID: 2024_07_loan_metrics
+Revises: 2024_07_stored_file_previews
+Create Date: 2024-12-24 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '2024_07_loan_metrics'
+down_revision = '2024_07_stored_file_previews'
+branch_labels = None
+depends_on = None
+
+COUNTS = (
+    'payments_due', 'completed_payments', 'on_time_payments',
+    'days_past_due_current', 'days_past_due_1_30', 'days_past_due_31_60',
+    'days_past_due_61_90', 'days_past_due_over_90', 'max_days_past_due',
+)
+AMOUNTS = ('on_time_rate', 'paid_to_date', 'principal_paid', 'interest_paid', 'late_fees_paid', 'loan_progress')
+
+def upgrade():
+    op.create_table(
+        'loan_metrics',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.text('now()')),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.text('now()')),
+        sa.Column('loan_id', sa.Integer(), nullable=False),
+        sa.Column('as_of', sa.Date(), nullable=False),
+        *[sa.Column(name, sa.Integer(), nullable=False, server_default='0') for name in COUNTS],
+        *[sa.Column(name, sa.Float(), nullable=False, server_default='0') for name in AMOUNTS],
+        sa.Column('last_payment_date', sa.Date(), nullable=True),
+        sa.Column('remaining_balance', sa.Float(), nullable=True),
+        sa.Column('projected_payoff_date', sa.Date(), nullable=True),
+        sa.ForeignKeyConstraint(['loan_id'], ['loans.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('loan_id')
+    )
+    op.create_index('ix_loan_metrics_id', 'loan_metrics', ['id'])
+
+def downgrade():
+    op.drop_index('ix_loan_metrics_id', table_name='loan_metrics')
+    op.drop_table('loan_metrics')
@@ -0,0 +1,114 @@
+"""partition audit_log by month and index it for history queries
+
+Revision ID: 2024_07_audit_partitions
+Revises: 2024_06_sync_tenants
+Create Date: 2024-12-10 00:00:00.000000
+
+"""
+from datetime import date
+from alembic import op
+from sqlalchemy import text
+
+# revision identifiers, used by Alembic.
+revision = '2024_07_audit_partitions'
+down_revision = '2024_06_sync_tenants'
+branch_labels = None
+depends_on = None
+
+# Months created ahead of today; afterwards AuditRetentionService keeps them
+PARTITIONS_AHEAD = 3
+
+def _add_months(month, months):
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+def upgrade():
+    connection = op.get_bind()
+
+    # 1. Apartar la tabla actual (sus índices conservan el nombre, se renombran)
+    connection.execute(text("ALTER TABLE audit_log RENAME TO audit_log_old"))
+    connection.execute(text("ALTER TABLE audit_log_old RENAME CONSTRAINT audit_log_pkey TO audit_log_old_pkey"))
+    connection.execute(text("DROP INDEX IF EXISTS ix_audit_log_entity_type"))
+    connection.execute(text("ALTER SEQUENCE audit_log_id_seq OWNED BY NONE"))
+
+    # 2. Tabla particionada por mes; la clave de partición forma parte de la PK
+    connection.execute(text("""
+        CREATE TABLE audit_log (
+            id INTEGER NOT NULL DEFAULT nextval('audit_log_id_seq'),
+            entity_type VARCHAR NOT NULL,
+            entity_id INTEGER NOT NULL,
+            action VARCHAR NOT NULL,
+            changes JSON,
+            performed_by INTEGER NOT NULL REFERENCES users(id),
+            performed_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT now(),
+            ip_address VARCHAR,
+            user_agent VARCHAR,
+            PRIMARY KEY (id, performed_at)
+        ) PARTITION BY RANGE (performed_at)
+    """))
+    connection.execute(text("ALTER SEQUENCE audit_log_id_seq OWNED BY audit_log.id"))
+    connection.execute(text("CREATE TABLE audit_log_default PARTITION OF audit_log DEFAULT"))
+
+    # 3. Una partición por mes desde la entrada más antigua
+    first = connection.execute(text(
+        "SELECT CAST(date_trunc('month', min(performed_at)) AS date) FROM audit_log_old"
+    )).scalar()
+    current = date.today().replace(day=1)
+    month = min(first or current, current)
+    last = _add_months(current, PARTITIONS_AHEAD)
+    while month <= last:
+        connection.execute(text(
+            f"CREATE TABLE audit_log_p{month:%Y%m} PARTITION OF audit_log "
+            f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{_add_months(month, 1):%Y-%m-%d}')"
+        ))
+        month = _add_months(month, 1)
+
+    # 4. Índices en la tabla padre (se crean en cada partición)
+    op.create_index(
+        'ix_audit_log_entity_performed_at', 'audit_log',
+        ['entity_type', 'entity_id', 'performed_at', 'id']
+    )
+    op.create_index(
+        'ix_audit_log_performed_by_performed_at', 'audit_log',
+        ['performed_by', 'performed_at', 'id']
+    )
+
+    # 5. Copiar los datos
+    connection.execute(text("""
+        INSERT INTO audit_log (id, entity_type, entity_id, action, changes,
+                               performed_by, performed_at, ip_address, user_agent)
+        SELECT id, entity_type, entity_id, action, changes,
+               performed_by, performed_at, ip_address, user_agent
+        FROM audit_log_old
+    """))
+    connection.execute(text("DROP TABLE audit_log_old"))
+
+def downgrade():
+    connection = op.get_bind()
+
+    connection.execute(text("ALTER SEQUENCE audit_log_id_seq OWNED BY NONE"))
+    connection.execute(text("ALTER TABLE audit_log RENAME TO audit_log_partitioned"))
+    connection.execute(text("""
+        CREATE TABLE audit_log (
+            id INTEGER NOT NULL DEFAULT nextval('audit_log_id_seq') PRIMARY KEY,
+            entity_type VARCHAR NOT NULL,
+            entity_id INTEGER NOT NULL,
+            action VARCHAR NOT NULL,
+            changes JSON,
+            performed_by INTEGER NOT NULL REFERENCES users(id),
+            performed_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT now(),
+            ip_address VARCHAR,
+            user_agent VARCHAR
+        )
+    """))
+    connection.execute(text("""
+        INSERT INTO audit_log (id, entity_type, entity_id, action, changes,
+                               performed_by, performed_at, ip_address, user_agent)
+        SELECT id, entity_type, entity_id, action, changes,
+               performed_by, performed_at, ip_address, user_agent
+        FROM audit_log_partitioned
+    """))
+    # Elimina también todas las particiones
+    connection.execute(text("DROP TABLE audit_log_partitioned"))
+    connection.execute(text("ALTER SEQUENCE audit_log_id_seq OWNED BY audit_log.id"))
+    op.create_index('ix_audit_log_entity_type', 'audit_log', ['entity_type'])
@@ -0,0 +1,53 @@
+"""add bank reconciliation review queue
+
+Revision ID: 2024_07_reconciliation_items
+Revises: 2024_07_contract_availability
+Create Date: 2024-12-19 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '2024_07_reconciliation_items'
+down_revision = '2024_07_contract_availability'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Cola de revisión de líneas de extracto sin conciliar
+    op.create_table(
+        'reconciliation_items',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.text('now()')),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.text('now()')),
+        sa.Column('statement_name', sa.String(), nullable=False),
+        sa.Column('line_number', sa.Integer(), nullable=False),
+        sa.Column('imported_by_id', sa.Integer(), nullable=True),
+        sa.Column('transaction_date', sa.Date(), nullable=False),
+        sa.Column('amount', sa.Float(), nullable=False),
+        sa.Column('reference', sa.String(), nullable=True),
+        sa.Column('description', sa.String(), nullable=True),
+        sa.Column('bank_transaction_id', sa.String(), nullable=True),
+        sa.Column(
+            'status',
+            sa.Enum('UNMATCHED', 'AMBIGUOUS', 'RESOLVED', 'IGNORED', name='reconciliationstatus'),
+            nullable=True
+        ),
+        sa.Column('reason', sa.String(), nullable=True),
+        sa.Column('candidate_payment_ids', sa.JSON(), nullable=True),
+        sa.Column('payment_id', sa.Integer(), nullable=True),
+        sa.Column('resolved_by_id', sa.Integer(), nullable=True),
+        sa.Column('resolved_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['imported_by_id'], ['users.id']),
+        sa.ForeignKeyConstraint(['payment_id'], ['payments.id']),
+        sa.ForeignKeyConstraint(['resolved_by_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_reconciliation_items_id', 'reconciliation_items', ['id'])
+    op.create_index('ix_reconciliation_items_status', 'reconciliation_items', ['status'])
+    op.create_index('ix_reconciliation_items_bank_transaction_id', 'reconciliation_items', ['bank_transaction_id'])
+
+def downgrade():
+    op.drop_table('reconciliation_items')
+    sa.Enum(name='reconciliationstatus').drop(op.get_bind(), checkfirst=True)
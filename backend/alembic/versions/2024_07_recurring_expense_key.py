@@ -0,0 +1,39 @@
+"""unique recurring expense instance per parent and date
+
+Revision ID: 2024_07_recurring_expense_key
+Revises: 2024_07_reconciliation_items
+Create Date: 2024-12-20 00:00:00.000000
+
+"""
+from alembic import op
+from sqlalchemy import text
+
+# revision identifiers, used by Alembic.
+revision = '2024_07_recurring_expense_key'
+down_revision = '2024_07_reconciliation_items'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    connection = op.get_bind()
+
+    # La restricción no puede crearse si ya hay instancias duplicadas
+    duplicates = connection.execute(text("""
+        SELECT parent_expense_id, date_incurred, count(*)
+        FROM expenses
+        WHERE parent_expense_id IS NOT NULL
+        GROUP BY parent_expense_id, date_incurred
+        HAVING count(*) > 1
+    """)).fetchall()
+    if duplicates:
+        keys = ", ".join(f"{parent} on {day} ({count})" for parent, day, count in duplicates)
+        raise RuntimeError(f"Duplicate recurring expense instances must be resolved first: {keys}")
+
+    op.create_unique_constraint(
+        'uq_expenses_parent_date_incurred',
+        'expenses',
+        ['parent_expense_id', 'date_incurred']
+    )
+
+def downgrade():
+    op.drop_constraint('uq_expenses_parent_date_incurred', 'expenses', type_='unique')
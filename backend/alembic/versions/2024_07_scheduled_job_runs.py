@@ -0,0 +1,32 @@
+"""last completed period of each scheduled job
+
+Revision ID: 2024_07_scheduled_job_runs
+Revises: 2024_07_expense_created_by
+Create Date: 2024-12-26 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '2024_07_scheduled_job_runs'
+down_revision = '2024_07_expense_created_by'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        'scheduled_job_runs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.text('now()')),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.text('now()')),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('period', sa.String(length=10), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('name')
+    )
+    op.create_index('ix_scheduled_job_runs_id', 'scheduled_job_runs', ['id'])
+
+def downgrade():
+    op.drop_index('ix_scheduled_job_runs_id', table_name='scheduled_job_runs')
+    op.drop_table('scheduled_job_runs')
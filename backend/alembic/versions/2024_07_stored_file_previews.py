@@ -0,0 +1,30 @@
+"""thumbnails and previews for stored files
+
+Revision ID: 2024_07_stored_file_previews
+Revises: 2024_07_stored_files
+Create Date: 2024-12-23 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '2024_07_stored_file_previews'
+down_revision = '2024_07_stored_files'
+branch_labels = None
+depends_on = None
+
+derivative_status = sa.Enum('READY', 'UNSUPPORTED', 'FAILED', name='derivativestatus')
+
+def upgrade():
+    derivative_status.create(op.get_bind(), checkfirst=True)
+    op.add_column('stored_files', sa.Column('thumbnail_path', sa.String(), nullable=True))
+    op.add_column('stored_files', sa.Column('preview_path', sa.String(), nullable=True))
+    # NULL = pendiente; los archivos ya subidos los procesa la tarea diaria
+    op.add_column('stored_files', sa.Column('derivative_status', derivative_status, nullable=True))
+
+def downgrade():
+    op.drop_column('stored_files', 'derivative_status')
+    op.drop_column('stored_files', 'preview_path')
+    op.drop_column('stored_files', 'thumbnail_path')
+    derivative_status.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,52 @@
+"""content-addressed storage for uploaded files
+
+Revision ID: 2024_07_stored_files
+Revises: 2024_07_vendor_stats
+Create Date: 2024-12-22 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '2024_07_stored_files'
+down_revision = '2024_07_vendor_stats'
+branch_labels = None
+depends_on = None
+
+# Tablas que referencian un archivo guardado
+REFERENCES = ('expense_attachments', 'loan_documents', 'contract_documents')
+
+def upgrade():
+    op.create_table(
+        'stored_files',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.text('now()')),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.text('now()')),
+        sa.Column('sha256', sa.String(length=64), nullable=False),
+        sa.Column('size', sa.BigInteger(), nullable=False),
+        sa.Column('content_type', sa.String(), nullable=True),
+        sa.Column('path', sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('sha256')
+    )
+    op.create_index('ix_stored_files_id', 'stored_files', ['id'])
+
+    # expense_attachments no existe en todas las instalaciones
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+    for name in REFERENCES:
+        if name not in existing:
+            continue
+        op.add_column(name, sa.Column('stored_file_id', sa.Integer(), nullable=True))
+        op.create_foreign_key(f'fk_{name}_stored_file_id', name, 'stored_files', ['stored_file_id'], ['id'])
+        op.create_index(f'ix_{name}_stored_file_id', name, ['stored_file_id'])
+
+def downgrade():
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+    for name in REFERENCES:
+        if name not in existing:
+            continue
+        op.drop_index(f'ix_{name}_stored_file_id', table_name=name)
+        op.drop_constraint(f'fk_{name}_stored_file_id', name, type_='foreignkey')
+        op.drop_column(name, 'stored_file_id')
+    op.drop_table('stored_files')
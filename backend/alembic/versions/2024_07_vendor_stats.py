@@ -0,0 +1,105 @@
+"""denormalised vendor rating and expense stats
+
+Revision ID: 2024_07_vendor_stats
+Revises: 2024_07_recurring_expense_key
+Create Date: 2024-12-21 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '2024_07_vendor_stats'
+down_revision = '2024_07_recurring_expense_key'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Valoraciones individuales (el modelo existía en el código pero no la tabla)
+    op.create_table(
+        'vendor_ratings',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.text('now()')),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.text('now()')),
+        sa.Column('vendor_id', sa.Integer(), nullable=False),
+        sa.Column('rating', sa.Float(), nullable=False),
+        sa.Column('rated_by', sa.Integer(), nullable=True),
+        sa.Column('rated_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('comment', sa.Text(), nullable=True),
+        sa.ForeignKeyConstraint(['vendor_id'], ['vendors.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['rated_by'], ['users.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_vendor_ratings_id', 'vendor_ratings', ['id'])
+    op.create_index('ix_vendor_ratings_vendor_id', 'vendor_ratings', ['vendor_id'])
+
+    # Estadísticas desnormalizadas del proveedor
+    op.add_column('vendors', sa.Column('rating_count', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('vendors', sa.Column('rating_sum', sa.Float(), nullable=False, server_default='0'))
+    op.add_column('vendors', sa.Column('average_rating', sa.Float(), nullable=True))
+    op.add_column('vendors', sa.Column('expense_count', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('vendors', sa.Column('expense_total', sa.Float(), nullable=False, server_default='0'))
+    op.add_column('vendors', sa.Column('last_expense_date', sa.Date(), nullable=True))
+    op.create_index(
+        'ix_vendors_average_rating',
+        'vendors',
+        [sa.text('average_rating DESC NULLS LAST'), 'id']
+    )
+    op.create_index('ix_expenses_vendor_id_date_incurred', 'expenses', ['vendor_id', 'date_incurred'])
+
+    # Valores iniciales a partir de los gastos existentes
+    op.execute("""
+        UPDATE vendors v SET
+            expense_count = s.expense_count,
+            expense_total = s.expense_total,
+            last_expense_date = s.last_expense_date
+        FROM (
+            SELECT vendor_id, count(*) AS expense_count,
+                   coalesce(sum(amount), 0) AS expense_total,
+                   max(date_incurred) AS last_expense_date
+            FROM expenses
+            WHERE vendor_id IS NOT NULL
+            GROUP BY vendor_id
+        ) s
+        WHERE v.id = s.vendor_id
+    """)
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION vendors_expense_stats() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.vendor_id IS NOT NULL THEN
+                UPDATE vendors SET
+                    expense_count = expense_count - 1,
+                    expense_total = expense_total - coalesce(OLD.amount, 0),
+                    last_expense_date = CASE
+                        WHEN OLD.date_incurred IS NOT NULL AND OLD.date_incurred >= last_expense_date THEN
+                            (SELECT max(date_incurred) FROM expenses WHERE vendor_id = OLD.vendor_id)
+                        ELSE last_expense_date
+                    END
+                WHERE id = OLD.vendor_id;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.vendor_id IS NOT NULL THEN
+                UPDATE vendors SET
+                    expense_count = expense_count + 1,
+                    expense_total = expense_total + coalesce(NEW.amount, 0),
+                    last_expense_date = greatest(last_expense_date, NEW.date_incurred)
+                WHERE id = NEW.vendor_id;
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER expenses_vendor_stats
+        AFTER INSERT OR DELETE OR UPDATE OF vendor_id, amount, date_incurred ON expenses
+        FOR EACH ROW EXECUTE FUNCTION vendors_expense_stats()
+    """)
+
+def downgrade():
+    op.execute("DROP TRIGGER IF EXISTS expenses_vendor_stats ON expenses")
+    op.execute("DROP FUNCTION IF EXISTS vendors_expense_stats()")
+    op.drop_index('ix_expenses_vendor_id_date_incurred', table_name='expenses')
+    op.drop_index('ix_vendors_average_rating', table_name='vendors')
+    for column in ('last_expense_date', 'expense_total', 'expense_count', 'average_rating', 'rating_sum', 'rating_count'):
+        op.drop_column('vendors', column)
+    op.drop_table('vendor_ratings')
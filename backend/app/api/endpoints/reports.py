@@ -1,7 +1,7 @@
 from typing import Dict, List, Optional, Any
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from app.api.deps import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_db
 from app.services.loan_report_service import LoanReportService
 from datetime import date
 import os
@@ -13,7 +13,7 @@ router = APIRouter()
 async def get_monthly_loan_report(
     year: int,
     month: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> Dict[str, Any]:
     """
     Obtener reporte mensual de préstamos.
@@ -49,13 +49,14 @@ async def get_monthly_loan_report(
 @router.get("/loans/{loan_id}/metrics")
 async def get_loan_metrics(
     loan_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> Dict[str, Any]:
     """
-    Obtener métricas de rendimiento para un préstamo específico
+    Obtener métricas de rendimiento para un préstamo específico, tal como
+    las dejó la última ejecución del cálculo mensual
     """
     try:
-        return await LoanReportService.generate_loan_performance_metrics(db, loan_id)
+        return await LoanReportService.get_loan_metrics(db, loan_id)
     except Exception as e:
         raise HTTPException(
             status_code=404,
@@ -66,7 +67,7 @@ async def get_loan_metrics(
 async def get_loans_summary(
     start_date: Optional[date] = Query(None),
     end_date: Optional[date] = Query(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> Dict[str, Any]:
     """
     Obtener resumen general de préstamos para un período específico
@@ -1,5 +1,7 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import properties, tenants
+from app.api.v1.endpoints import (
+    aggregations, downloads, imports, occupancy, properties, reconciliation, tenants
+)
 
 api_router = APIRouter()
 
@@ -15,4 +17,39 @@ api_router.include_router(
     tenants.router,
     prefix="/tenants",
     tags=["tenants"]
-)
\ No newline at end of file
+)
+
+# Descargas de archivos guardados (adjuntos, documentos, fotos)
+api_router.include_router(
+    downloads.router,
+    prefix="/downloads",
+    tags=["downloads"]
+)
+
+# Ocupación de unidades por período
+api_router.include_router(
+    occupancy.router,
+    prefix="/occupancy",
+    tags=["occupancy"]
+)
+
+# Importaciones masivas (CSV / NDJSON)
+api_router.include_router(
+    imports.router,
+    prefix="/imports",
+    tags=["imports"]
+)
+
+# Conciliación bancaria
+api_router.include_router(
+    reconciliation.router,
+    prefix="/reconciliation",
+    tags=["reconciliation"]
+)
+
+# Agregaciones de gastos y pagos
+api_router.include_router(
+    aggregations.router,
+    prefix="/aggregations",
+    tags=["aggregations"]
+)
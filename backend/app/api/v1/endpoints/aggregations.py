@@ -0,0 +1,42 @@
+from typing import Any, Dict, List, Literal, Optional
+from datetime import date
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ....core.config import settings
+from ....core.database import get_db
+from ....core.response_cache import CachedRoute, cache_response
+from ....core.security import get_current_user
+from ....schemas.aggregation import AggregationResult
+from ....services.aggregation_service import AggregationService
+
+router = APIRouter(route_class=CachedRoute)
+
+@router.get("/{fact}", response_model=AggregationResult)
+@cache_response("{fact}", ttl=settings.AGGREGATION_CACHE_TTL)
+async def aggregate(
+    fact: Literal["expenses", "payments"],
+    group_by: List[str] = Query(
+        [""],
+        description="Dimensiones separadas por comas (p. ej. property,month); repetir para varios agrupamientos, vacío o total para el total general"
+    ),
+    measures: List[str] = Query(["sum", "count"], description="sum, count, avg, min o max"),
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    property_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_db),
+    _: Dict[str, Any] = Depends(get_current_user)
+):
+    """
+    Agregados de gastos o pagos por varias combinaciones de dimensiones en
+    una sola consulta, p. ej. para todos los paneles de un dashboard.
+    """
+    return await AggregationService.aggregate(
+        db,
+        fact,
+        group_by,
+        measures,
+        start_date=start_date,
+        end_date=end_date,
+        property_id=property_id
+    )
@@ -1,54 +1,75 @@
-from typing import List, Optional
+from typing import Any, Dict, Optional
 from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from ....core.deps import get_db, get_current_active_superuser, get_current_active_user
-from ....schemas.audit import AuditLogCreate, AuditLogResponse
+from ....core.config import settings
+from ....core.database import get_db
+from ....core.security import check_permissions, get_current_user
+from ....schemas.audit_log import AuditLogPage
 from ....services.audit import AuditService
-from ....models.user import User
 
 router = APIRouter()
 
-@router.get("/resource-history/{resource_type}/{resource_id}", response_model=List[AuditLogResponse])
-def get_resource_history(
+async def _page(query) -> AuditLogPage:
+    try:
+        items, next_cursor = await query
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return AuditLogPage(items=items, next_cursor=next_cursor)
+
+@router.get("/resource-history/{resource_type}/{resource_id}", response_model=AuditLogPage)
+async def get_resource_history(
     resource_type: str,
     resource_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.AUDIT_PAGE_SIZE, ge=1, le=500),
+    db: AsyncSession = Depends(get_db),
+    current_user: Dict[str, Any] = Depends(get_current_user)
 ):
     """
-    Obtener historial de cambios de un recurso específico
+    Obtener historial de cambios de un recurso específico.
+    Paginado por cursor: ``next_cursor`` de una página se pasa como ``cursor``.
     """
-    return AuditService.get_resource_history(db, resource_type, resource_id)
+    return await _page(AuditService.get_resource_history(
+        db, resource_type, resource_id, cursor=cursor, limit=limit
+    ))
 
-@router.get("/user-actions/{user_id}", response_model=List[AuditLogResponse])
-def get_user_actions(
+@router.get("/user-actions/{user_id}", response_model=AuditLogPage)
+async def get_user_actions(
     user_id: int,
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_superuser)
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.AUDIT_PAGE_SIZE, ge=1, le=500),
+    db: AsyncSession = Depends(get_db),
+    current_user: Dict[str, Any] = Depends(check_permissions(["admin:read"]))
 ):
     """
-    Obtener acciones realizadas por un usuario (solo superusuarios)
+    Obtener acciones realizadas por un usuario (solo administradores)
     """
-    return AuditService.get_user_actions(db, user_id, start_date, end_date)
+    return await _page(AuditService.get_user_actions(
+        db, user_id, start_date, end_date, cursor=cursor, limit=limit
+    ))
 
-@router.get("/sensitive-operations", response_model=List[AuditLogResponse])
-def get_sensitive_operations(
+@router.get("/sensitive-operations", response_model=AuditLogPage)
+async def get_sensitive_operations(
     resource_type: Optional[str] = None,
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_superuser)
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.AUDIT_PAGE_SIZE, ge=1, le=500),
+    db: AsyncSession = Depends(get_db),
+    current_user: Dict[str, Any] = Depends(check_permissions(["admin:read"]))
 ):
     """
-    Obtener operaciones sensibles (solo superusuarios)
+    Obtener operaciones sensibles (solo administradores)
     """
-    return AuditService.get_sensitive_operations(
+    return await _page(AuditService.get_sensitive_operations(
         db,
         resource_type=resource_type,
         start_date=start_date,
-        end_date=end_date
-    )
+        end_date=end_date,
+        cursor=cursor,
+        limit=limit
+    ))
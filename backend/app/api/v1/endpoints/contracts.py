@@ -1,10 +1,12 @@
 from typing import List, Optional
 from datetime import date
-from fastapi import APIRouter, Depends, Query, Path, Body
+from fastapi import APIRouter, BackgroundTasks, Depends, Query, Path, Body, Request
 from sqlalchemy.orm import Session
 
-from ....core.deps import get_db
+from ....core.database import get_db
 from ....services.contract_service import ContractService
+from ....services.file_storage import FileStorageService, request_chunks
+from ....services.previews import PreviewService
 from ....models.contract import ContractStatus, PaymentMethod
 from ....schemas.contract import (
     Contract,
@@ -14,7 +16,8 @@ from ....schemas.contract import (
     Payment,
     PaymentCreate,
     ContractDocument,
-    ContractDocumentCreate
+    ContractDocumentCreate,
+    UnitAvailability
 )
 
 router = APIRouter()
@@ -29,6 +32,25 @@ async def create_contract(
     """
     return await ContractService.create_contract(db=db, contract=contract)
 
+@router.get("/availability", response_model=List[UnitAvailability])
+async def get_units_availability(
+    start_date: date = Query(..., description="Inicio del período (incluido)"),
+    end_date: date = Query(..., description="Fin del período (incluido)"),
+    unit_ids: Optional[List[int]] = Query(None, description="Unidades a consultar"),
+    property_id: Optional[int] = Query(None, description="Todas las unidades de una propiedad"),
+    db: Session = Depends(get_db)
+) -> List[UnitAvailability]:
+    """
+    Obtener los tramos libres y ocupados de varias unidades en un período.
+    """
+    return await ContractService.get_units_availability(
+        db=db,
+        start_date=start_date,
+        end_date=end_date,
+        unit_ids=unit_ids,
+        property_id=property_id
+    )
+
 @router.get("/{contract_id}", response_model=ContractWithDetails)
 async def get_contract(
     contract_id: int = Path(..., title="ID del contrato", ge=1),
@@ -152,6 +174,39 @@ async def add_contract_document(
         document=document
     )
 
+@router.post("/{contract_id}/documents/upload", response_model=ContractDocument)
+async def upload_contract_document(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    contract_id: int = Path(..., title="ID del contrato", ge=1),
+    document_type: str = Query(..., description="Contrato firmado, adenda, etc."),
+    is_signed: bool = Query(False),
+    signed_date: Optional[date] = Query(None),
+    db: Session = Depends(get_db)
+) -> ContractDocument:
+    """
+    Subir el archivo de un documento de contrato como cuerpo de la petición.
+    Se guarda a medida que llega; un contenido ya subido no se duplica. La
+    miniatura y la vista previa se generan después de responder.
+    """
+    stored_file = await FileStorageService.store(
+        db, request_chunks(request), request.headers.get("content-type")
+    )
+    document = await ContractService.add_contract_document(
+        db=db,
+        contract_id=contract_id,
+        document=ContractDocumentCreate(
+            document_type=document_type,
+            file_path=stored_file.path,
+            upload_date=date.today(),
+            is_signed=is_signed,
+            signed_date=signed_date
+        ),
+        stored_file_id=stored_file.id
+    )
+    background_tasks.add_task(PreviewService.generate, stored_file.id)
+    return document
+
 @router.get("/tenant/{tenant_id}", response_model=List[Contract])
 async def get_tenant_contracts(
     tenant_id: int = Path(..., title="ID del inquilino", ge=1),
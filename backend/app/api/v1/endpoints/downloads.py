@@ -0,0 +1,145 @@
+import mimetypes
+import os
+from typing import Any, Dict, Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_db
+from app.core.downloads import ROOT_UPLOADS, send_file
+from app.core.security import get_current_user
+from app.models.contract import ContractDocument
+from app.models.expense_attachment import ExpenseAttachment
+from app.models.loan import LoanDocument
+from app.models.maintenance import MaintenanceRequest
+from app.models.stored_file import StoredFile
+
+router = APIRouter()
+
+async def _document(db: AsyncSession, model, document_id: int):
+    """Registro con su archivo guardado (si se subió por FileStorageService)."""
+    result = await db.execute(
+        select(model, StoredFile)
+        .outerjoin(StoredFile, StoredFile.id == model.stored_file_id)
+        .where(model.id == document_id)
+    )
+    row = result.first()
+    if row is None or not row[0].file_path:
+        raise HTTPException(status_code=404, detail="Document not found")
+    return row
+
+async def _send_document(request: Request, path: str, stored_file, variant, inline: bool, **kwargs):
+    if variant is None:
+        return await send_file(
+            request,
+            ROOT_UPLOADS,
+            path,
+            content_hash=stored_file.sha256 if stored_file else None,
+            inline=inline,
+            **kwargs
+        )
+    # Miniatura o vista previa JPEG generada por PreviewService
+    derivative_path = getattr(stored_file, f"{variant}_path", None) if stored_file else None
+    if not derivative_path:
+        raise HTTPException(status_code=404, detail="Preview not available")
+    return await send_file(
+        request,
+        ROOT_UPLOADS,
+        derivative_path,
+        content_hash=f"{stored_file.sha256}-{variant}",
+        media_type="image/jpeg",
+        filename=f"{variant}.jpg",
+        inline=True
+    )
+
+def _document_name(document, stored_file) -> str:
+    # Los documentos no guardan el nombre original del archivo
+    extension = os.path.splitext(document.file_path)[1]
+    if stored_file and stored_file.content_type:
+        extension = mimetypes.guess_extension(stored_file.content_type) or extension
+    return f"{document.document_type or 'document'}-{document.id}{extension}"
+
+@router.get("/expense-attachments/{attachment_id}")
+async def download_expense_attachment(
+    attachment_id: int,
+    request: Request,
+    inline: bool = False,
+    variant: Optional[Literal["thumbnail", "preview"]] = None,
+    db: AsyncSession = Depends(get_db),
+    _: Dict[str, Any] = Depends(get_current_user)
+):
+    """
+    Descargar un adjunto de gasto. Admite Range, If-None-Match e
+    If-Modified-Since; con ``variant`` se sirve la miniatura o la vista previa.
+    """
+    attachment, stored_file = await _document(db, ExpenseAttachment, attachment_id)
+    return await _send_document(
+        request,
+        attachment.file_path,
+        stored_file,
+        variant,
+        inline,
+        media_type=attachment.file_type,
+        filename=attachment.file_name
+    )
+
+@router.get("/loan-documents/{document_id}")
+async def download_loan_document(
+    document_id: int,
+    request: Request,
+    inline: bool = False,
+    variant: Optional[Literal["thumbnail", "preview"]] = None,
+    db: AsyncSession = Depends(get_db),
+    _: Dict[str, Any] = Depends(get_current_user)
+):
+    """Descargar un documento de préstamo."""
+    document, stored_file = await _document(db, LoanDocument, document_id)
+    return await _send_document(
+        request,
+        document.file_path,
+        stored_file,
+        variant,
+        inline,
+        media_type=stored_file.content_type if stored_file else None,
+        filename=_document_name(document, stored_file)
+    )
+
+@router.get("/contract-documents/{document_id}")
+async def download_contract_document(
+    document_id: int,
+    request: Request,
+    inline: bool = False,
+    variant: Optional[Literal["thumbnail", "preview"]] = None,
+    db: AsyncSession = Depends(get_db),
+    _: Dict[str, Any] = Depends(get_current_user)
+):
+    """Descargar un documento de contrato."""
+    document, stored_file = await _document(db, ContractDocument, document_id)
+    return await _send_document(
+        request,
+        document.file_path,
+        stored_file,
+        variant,
+        inline,
+        media_type=stored_file.content_type if stored_file else None,
+        filename=_document_name(document, stored_file)
+    )
+
+@router.get("/maintenance/{request_id}/photos/{file_name}")
+async def download_maintenance_photo(
+    request_id: int,
+    file_name: str,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    _: Dict[str, Any] = Depends(get_current_user)
+):
+    """Descargar una foto del directorio de fotos de una solicitud de mantenimiento."""
+    maintenance = await db.get(MaintenanceRequest, request_id)
+    if not maintenance or not maintenance.photos_path or os.path.basename(file_name) != file_name:
+        raise HTTPException(status_code=404, detail="Photo not found")
+    return await send_file(
+        request,
+        ROOT_UPLOADS,
+        os.path.join(maintenance.photos_path, file_name),
+        inline=True
+    )
@@ -1,69 +1,77 @@
 from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, UploadFile, File
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app import crud, models, schemas
-from app.api import deps
-from app.core.security import get_current_active_user
+from app.core.database import get_db
+from app.crud.expense import expense as crud_expense
+from app.crud.expense_attachment import expense_attachment as crud_expense_attachment
+from app.models.user import User
+from app.schemas import expense_attachment as schemas
+from app.core.security import get_current_local_user
+from app.services.previews import PreviewService
 
 router = APIRouter()
 
 @router.post("/{expense_id}", response_model=schemas.ExpenseAttachment)
 async def create_attachment(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(get_db),
     expense_id: int,
     file: UploadFile = File(...),
-    current_user: models.User = Depends(get_current_active_user),
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_local_user),
 ) -> Any:
     """
-    Create new expense attachment.
+    Create new expense attachment. Thumbnail and preview are generated in
+    the background.
     """
-    expense = crud.expense.get(db=db, id=expense_id)
+    expense = await crud_expense.get(db=db, id=expense_id)
     if not expense:
         raise HTTPException(status_code=404, detail="Expense not found")
     
-    return await crud.expense_attachment.create_with_file(
+    attachment = await crud_expense_attachment.create_with_file(
         db=db,
         expense_id=expense_id,
         file=file,
         uploaded_by=current_user.id
     )
+    background_tasks.add_task(PreviewService.generate, attachment.stored_file_id)
+    return attachment
 
 @router.get("/{expense_id}", response_model=List[schemas.ExpenseAttachmentDetail])
-def read_attachments(
+async def read_attachments(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(get_db),
     expense_id: int,
-    current_user: models.User = Depends(get_current_active_user),
+    current_user: User = Depends(get_current_local_user),
 ) -> Any:
     """
     Retrieve attachments for a specific expense.
     """
-    expense = crud.expense.get(db=db, id=expense_id)
+    expense = await crud_expense.get(db=db, id=expense_id)
     if not expense:
         raise HTTPException(status_code=404, detail="Expense not found")
     
-    return crud.expense_attachment.get_by_expense(db=db, expense_id=expense_id)
+    return await crud_expense_attachment.get_by_expense(db=db, expense_id=expense_id)
 
 @router.delete("/{attachment_id}")
-def delete_attachment(
+async def delete_attachment(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(get_db),
     attachment_id: int,
-    current_user: models.User = Depends(get_current_active_user),
+    current_user: User = Depends(get_current_local_user),
 ) -> Any:
     """
     Delete an attachment.
     """
-    attachment = crud.expense_attachment.get(db=db, id=attachment_id)
+    attachment = await crud_expense_attachment.get(db=db, id=attachment_id)
     if not attachment:
         raise HTTPException(status_code=404, detail="Attachment not found")
     
     # Check if user has permission to delete the attachment
-    expense = crud.expense.get(db=db, id=attachment.expense_id)
+    expense = await crud_expense.get(db=db, id=attachment.expense_id)
     if not expense or (expense.created_by_id != current_user.id and not current_user.is_superuser):
         raise HTTPException(status_code=403, detail="Not enough permissions")
     
-    crud.expense_attachment.remove(db=db, id=attachment_id)
+    await crud_expense_attachment.remove(db=db, id=attachment_id)
     return {"status": "success"}
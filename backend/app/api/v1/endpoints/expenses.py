@@ -1,24 +1,27 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, BackgroundTasks
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, UploadFile, BackgroundTasks
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import date
 from datetime import datetime
 
-from app.api import deps
+from app.core.database import get_db
 from app.schemas import expense as schemas
-from app.crud import expense as crud
+from app.crud.expense import expense as crud_expense
 from app.core.security import get_current_active_user
 from app.models.user import User
 from app.core.expense_validation import expense_validator
 from app.services.expense_service import expense_service
+from app.services.file_storage import request_chunks
+from app.services.previews import PreviewService
 from app.services.notification_service import notification_service
+from app.core.response_cache import CachedRoute, cache_response
 
-router = APIRouter()
+router = APIRouter(route_class=CachedRoute)
 
 @router.post("/", response_model=schemas.Expense)
 async def create_expense(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(get_db),
     expense_in: schemas.ExpenseCreate,
     current_user: User = Depends(get_current_active_user)
 ):
@@ -32,8 +35,8 @@ async def create_expense(
     return await expense_service.create_expense(db, expense_in, current_user)
 
 @router.get("/", response_model=List[schemas.ExpenseDetail])
-def read_expenses(
-    db: Session = Depends(deps.get_db),
+async def read_expenses(
+    db: AsyncSession = Depends(get_db),
     skip: int = 0,
     limit: int = 100,
     property_id: Optional[int] = None,
@@ -59,7 +62,7 @@ def read_expenses(
         "is_recurring": is_recurring,
         "requires_approval": requires_approval
     }
-    expenses = crud.expense.get_multi_with_filters(
+    expenses = await crud_expense.get_multi_with_filters(
         db=db,
         skip=skip,
         limit=limit,
@@ -68,16 +71,17 @@ def read_expenses(
     return expenses
 
 @router.get("/{expense_id}", response_model=schemas.ExpenseDetail)
-def read_expense(
+@cache_response("expense:{expense_id}")
+async def read_expense(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(get_db),
     expense_id: int,
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Get expense by ID.
     """
-    expense = crud.expense.get(db=db, id=expense_id)
+    expense = await crud_expense.get(db=db, id=expense_id)
     if not expense:
         raise HTTPException(status_code=404, detail="Expense not found")
     return expense
@@ -85,7 +89,7 @@ def read_expense(
 @router.put("/{expense_id}", response_model=schemas.Expense)
 async def update_expense(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(get_db),
     expense_id: int,
     expense_in: schemas.ExpenseUpdate,
     current_user: User = Depends(get_current_active_user)
@@ -97,33 +101,40 @@ async def update_expense(
     expense_validator.validate_update(db, expense_id, expense_in, current_user)
     
     # Update expense
-    return await expense_service.update_expense(db, expense_id, expense_in, current_user)
+    return await expense_service.update_expense(
+        db,
+        expense_id=expense_id,
+        expense_in=expense_in,
+        current_user=current_user
+    )
 
 @router.delete("/{expense_id}")
-def delete_expense(
+async def delete_expense(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(get_db),
     expense_id: int,
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(get_current_active_user),
+    background_tasks: BackgroundTasks
 ):
     """
     Delete expense.
     """
-    expense = crud.expense.get(db=db, id=expense_id)
+    expense = await crud_expense.get(db=db, id=expense_id)
     if not expense:
         raise HTTPException(status_code=404, detail="Expense not found")
-    expense = crud.expense.remove(db=db, id=expense_id)
+    expense = await crud_expense.remove(db=db, id=expense_id)
+    background_tasks.add_task(expense_service.invalidate_cache, expense)
     return {"message": "Expense deleted successfully"}
 
 @router.post("/{expense_id}/approve", response_model=schemas.Expense)
 async def approve_expense(
     expense_id: int,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
     background_tasks: BackgroundTasks = BackgroundTasks()
 ):
     """Approve an expense."""
-    expense = expense_service.approve_expense(db, expense_id, current_user)
+    expense = await expense_service.approve_expense(db, expense_id=expense_id, current_user=current_user)
     
     # Send notification asynchronously
     await notification_service.notify_expense_approved(
@@ -136,17 +147,18 @@ async def approve_expense(
     return expense
 
 @router.post("/{expense_id}/reject", response_model=schemas.Expense)
-def reject_expense(
+async def reject_expense(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(get_db),
     expense_id: int,
     rejection_reason: str,
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(get_current_active_user),
+    background_tasks: BackgroundTasks
 ):
     """
     Reject an expense.
     """
-    expense = crud.expense.get(db=db, id=expense_id)
+    expense = await crud_expense.get(db=db, id=expense_id)
     if not expense:
         raise HTTPException(status_code=404, detail="Expense not found")
     if expense.status != schemas.ExpenseStatus.PENDING_APPROVAL:
@@ -158,22 +170,24 @@ def reject_expense(
         "approved_by": current_user.id,
         "approved_at": date.today()
     }
-    expense = crud.expense.update(db=db, db_obj=expense, obj_in=update_data)
+    expense = await crud_expense.update(db=db, db_obj=expense, obj_in=update_data)
+    background_tasks.add_task(expense_service.invalidate_cache, expense)
     return expense
 
 @router.post("/{expense_id}/recurring", response_model=schemas.Expense)
-def create_recurring_expense(
+async def create_recurring_expense(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(get_db),
     expense_id: int,
     recurrence_interval: schemas.RecurrenceInterval,
     recurrence_end_date: date,
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(get_current_active_user),
+    background_tasks: BackgroundTasks
 ):
     """
     Convert an expense to a recurring expense.
     """
-    expense = crud.expense.get(db=db, id=expense_id)
+    expense = await crud_expense.get(db=db, id=expense_id)
     if not expense:
         raise HTTPException(status_code=404, detail="Expense not found")
     if expense.is_recurring:
@@ -184,20 +198,21 @@ def create_recurring_expense(
         "recurrence_interval": recurrence_interval,
         "recurrence_end_date": recurrence_end_date
     }
-    expense = crud.expense.update(db=db, db_obj=expense, obj_in=update_data)
+    expense = await crud_expense.update(db=db, db_obj=expense, obj_in=update_data)
+    background_tasks.add_task(expense_service.invalidate_cache, expense)
     return expense
 
 @router.post("/{expense_id}/cancel", response_model=schemas.Expense)
 async def cancel_expense(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(get_db),
     expense_id: int,
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Cancel an expense.
     """
-    expense = crud.expense.get(db=db, id=expense_id)
+    expense = await crud_expense.get(db=db, id=expense_id)
     if not expense:
         raise HTTPException(status_code=404, detail="Expense not found")
     
@@ -212,37 +227,51 @@ async def cancel_expense(
 @router.post("/{expense_id}/attachments", response_model=schemas.ExpenseAttachment)
 async def add_attachment(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(get_db),
     expense_id: int,
-    attachment_in: schemas.ExpenseAttachmentCreate,
+    request: Request,
+    background_tasks: BackgroundTasks,
+    file_name: str = Query(..., min_length=1),
     current_user: User = Depends(get_current_active_user)
 ):
     """
-    Add attachment to expense.
+    Add attachment to expense. The file is sent as the raw request body and
+    streamed to storage as it arrives; its thumbnail and preview are
+    generated after the response is sent.
     """
-    return await expense_service.add_attachment(db, expense_id, attachment_in, current_user)
+    attachment = await expense_service.add_attachment(
+        db,
+        expense_id,
+        request_chunks(request),
+        file_name,
+        request.headers.get("content-type"),
+        current_user
+    )
+    background_tasks.add_task(PreviewService.generate, attachment.stored_file_id)
+    return attachment
 
 @router.get("/{expense_id}/attachments", response_model=List[schemas.ExpenseAttachment])
-def get_expense_attachments(
+async def get_expense_attachments(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(get_db),
     expense_id: int,
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Get all attachments for an expense.
     """
-    expense = crud.expense.get(db=db, id=expense_id)
+    expense = await crud_expense.get(db=db, id=expense_id)
     if not expense:
         raise HTTPException(status_code=404, detail="Expense not found")
     
-    attachments = crud.expense.get_attachments(db=db, expense_id=expense_id)
+    attachments = await crud_expense.get_attachments(db=db, expense_id=expense_id)
     return attachments
 
 @router.get("/summary", response_model=schemas.ExpenseSummary)
-def get_expense_summary(
+@cache_response("expenses")
+async def get_expense_summary(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(get_db),
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
     property_id: Optional[int] = None,
@@ -252,7 +281,7 @@ def get_expense_summary(
     """
     Get expense summary.
     """
-    return expense_service.get_expense_summary(
+    return await expense_service.get_expense_summary(
         db,
         start_date=start_date,
         end_date=end_date,
@@ -261,9 +290,10 @@ def get_expense_summary(
     )
 
 @router.get("/summary/category", response_model=List[schemas.ExpenseCategorySummary])
-def get_category_summary(
+@cache_response("expenses")
+async def get_category_summary(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(get_db),
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
     current_user: User = Depends(get_current_active_user)
@@ -271,12 +301,13 @@ def get_category_summary(
     """
     Get expense summary by category.
     """
-    return expense_service.get_category_summary(db, start_date=start_date, end_date=end_date)
+    return await expense_service.get_category_summary(db, start_date=start_date, end_date=end_date)
 
 @router.get("/summary/property", response_model=List[schemas.PropertyExpenseSummary])
-def get_property_summary(
+@cache_response("expenses")
+async def get_property_summary(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(get_db),
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
     current_user: User = Depends(get_current_active_user)
@@ -284,12 +315,13 @@ def get_property_summary(
     """
     Get expense summary by property.
     """
-    return expense_service.get_property_summary(db, start_date=start_date, end_date=end_date)
+    return await expense_service.get_property_summary(db, start_date=start_date, end_date=end_date)
 
 @router.get("/summary/vendor", response_model=List[schemas.VendorExpenseSummary])
-def get_vendor_summary(
+@cache_response("expenses")
+async def get_vendor_summary(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(get_db),
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
     current_user: User = Depends(get_current_active_user)
@@ -297,12 +329,24 @@ def get_vendor_summary(
     """
     Get expense summary by vendor.
     """
-    return expense_service.get_vendor_summary(db, start_date=start_date, end_date=end_date)
+    return await expense_service.get_vendor_summary(db, start_date=start_date, end_date=end_date)
+
+@router.post("/recurring/generate", response_model=schemas.RecurringGenerationResult)
+async def generate_recurring_expenses(
+    *,
+    db: AsyncSession = Depends(get_db),
+    since: Optional[date] = Query(None, description="Backfill missing instances from this date"),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Generate the due instances of all recurring expenses. Safe to rerun.
+    """
+    return await expense_service.generate_recurring_expenses(db, since=since)
 
 @router.get("/recurring", response_model=List[schemas.RecurringExpenseSummary])
-def get_recurring_expenses(
+async def get_recurring_expenses(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(get_db),
     skip: int = 0,
     limit: int = 100,
     current_user: User = Depends(get_current_active_user)
@@ -310,4 +354,4 @@ def get_recurring_expenses(
     """
     Get recurring expenses.
     """
-    return expense_service.get_recurring_expenses(db, current_user, skip=skip, limit=limit)
+    return await expense_service.get_recurring_expenses(db, current_user, skip=skip, limit=limit)
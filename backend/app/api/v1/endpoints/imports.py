@@ -0,0 +1,37 @@
+from typing import Any, Dict, Literal, Optional
+from fastapi import APIRouter, Depends, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ....core.database import get_db
+from ....core.security import get_current_user
+from ....schemas.bulk_import import ImportReport
+from ....services.bulk_import import FORMAT_CSV, FORMAT_NDJSON, BulkImportService
+
+router = APIRouter()
+
+@router.post("/{entity}", response_model=ImportReport)
+async def bulk_import(
+    entity: Literal["properties", "units", "tenants", "expenses"],
+    request: Request,
+    format: Optional[Literal["csv", "ndjson"]] = Query(
+        None, description="Formato del cuerpo; por defecto se deduce del Content-Type"
+    ),
+    dry_run: bool = Query(False, description="Validar sin guardar nada"),
+    db: AsyncSession = Depends(get_db),
+    current_user: Dict[str, Any] = Depends(get_current_user)
+):
+    """
+    Importar en bloque un archivo CSV (con cabecera) o NDJSON enviado como
+    cuerpo de la petición. El cuerpo se procesa a medida que llega.
+    """
+    if format is None:
+        content_type = request.headers.get("content-type", "")
+        format = FORMAT_NDJSON if "ndjson" in content_type or "jsonl" in content_type else FORMAT_CSV
+    return await BulkImportService.import_rows(
+        db,
+        entity,
+        request.stream(),
+        format,
+        dry_run=dry_run,
+        user_id=current_user["sub"]
+    )
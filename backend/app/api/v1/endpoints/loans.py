@@ -1,7 +1,8 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
-from sqlalchemy.orm import Session
-from app.api import deps
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_db
+from app.core.security import get_current_local_user
 from app.schemas.loan import (
     Loan, LoanCreate, LoanUpdate, LoanDetail,
     LoanDocument, LoanDocumentCreate,
@@ -11,6 +12,8 @@ from app.schemas.loan import (
 from app.models import LoanStatus, PaymentStatus
 from app.services.loan_service import LoanService
 from app.services.loan_payment_service import LoanPaymentService
+from app.services.file_storage import FileStorageService, request_chunks
+from app.services.previews import PreviewService
 from app.core.exceptions import NotFoundException, ValidationError
 
 router = APIRouter()
@@ -18,8 +21,8 @@ router = APIRouter()
 @router.post("/", response_model=Loan)
 async def create_loan(
     loan_data: LoanCreate,
-    db: Session = Depends(deps.get_db),
-    current_user = Depends(deps.get_current_active_user)
+    db: AsyncSession = Depends(get_db),
+    current_user = Depends(get_current_local_user)
 ):
     """Crear un nuevo préstamo"""
     try:
@@ -33,8 +36,8 @@ async def get_loans(
     limit: int = 100,
     property_id: Optional[int] = None,
     status: Optional[LoanStatus] = None,
-    db: Session = Depends(deps.get_db),
-    current_user = Depends(deps.get_current_active_user)
+    db: AsyncSession = Depends(get_db),
+    current_user = Depends(get_current_local_user)
 ):
     """Obtener lista de préstamos con filtros opcionales"""
     return await LoanService.get_loans(db, skip, limit, property_id, status)
@@ -42,8 +45,8 @@ async def get_loans(
 @router.get("/{loan_id}", response_model=LoanDetail)
 async def get_loan(
     loan_id: int,
-    db: Session = Depends(deps.get_db),
-    current_user = Depends(deps.get_current_active_user)
+    db: AsyncSession = Depends(get_db),
+    current_user = Depends(get_current_local_user)
 ):
     """Obtener detalles de un préstamo específico"""
     loan = await LoanService.get_loan(db, loan_id)
@@ -55,8 +58,8 @@ async def get_loan(
 async def update_loan(
     loan_id: int,
     loan_data: LoanUpdate,
-    db: Session = Depends(deps.get_db),
-    current_user = Depends(deps.get_current_active_user)
+    db: AsyncSession = Depends(get_db),
+    current_user = Depends(get_current_local_user)
 ):
     """Actualizar un préstamo existente"""
     try:
@@ -67,25 +70,30 @@ async def update_loan(
 @router.post("/{loan_id}/documents", response_model=LoanDocument)
 async def add_loan_document(
     loan_id: int,
-    document_type: str = Form(...),
-    description: Optional[str] = Form(None),
-    file: UploadFile = File(...),
-    db: Session = Depends(deps.get_db),
-    current_user = Depends(deps.get_current_active_user)
+    request: Request,
+    background_tasks: BackgroundTasks,
+    document_type: str = Query(...),
+    description: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_db),
+    current_user = Depends(get_current_local_user)
 ):
-    """Añadir un documento al préstamo"""
+    """Añadir un documento al préstamo; el archivo es el cuerpo de la petición"""
     try:
-        # Guardar el archivo
-        file_path = f"loans/{loan_id}/documents/{file.filename}"
-        # TODO: Implementar el guardado real del archivo
-        
+        stored_file = await FileStorageService.store(
+            db, request_chunks(request), request.headers.get("content-type")
+        )
         document_data = LoanDocumentCreate(
             document_type=document_type,
-            file_path=file_path,
+            file_path=stored_file.path,
             description=description
         )
         
-        return await LoanService.add_document(db, loan_id, document_data, current_user.id)
+        document = await LoanService.add_document(
+            db, loan_id, document_data, current_user.id, stored_file_id=stored_file.id
+        )
+        await db.commit()
+        background_tasks.add_task(PreviewService.generate, stored_file.id)
+        return document
     except (NotFoundException, ValidationError) as e:
         raise HTTPException(status_code=404 if isinstance(e, NotFoundException) else 400, detail=str(e))
 
@@ -93,8 +101,8 @@ async def add_loan_document(
 async def verify_loan_document(
     loan_id: int,
     document_id: int,
-    db: Session = Depends(deps.get_db),
-    current_user = Depends(deps.get_current_active_user)
+    db: AsyncSession = Depends(get_db),
+    current_user = Depends(get_current_local_user)
 ):
     """Verificar un documento de préstamo"""
     try:
@@ -105,8 +113,8 @@ async def verify_loan_document(
 @router.get("/{loan_id}/summary", response_model=LoanSummary)
 async def get_loan_summary(
     loan_id: int,
-    db: Session = Depends(deps.get_db),
-    current_user = Depends(deps.get_current_active_user)
+    db: AsyncSession = Depends(get_db),
+    current_user = Depends(get_current_local_user)
 ):
     """Obtener resumen del préstamo con información de pagos"""
     try:
@@ -117,8 +125,8 @@ async def get_loan_summary(
 @router.get("/{loan_id}/amortization", response_model=List[AmortizationEntry])
 async def get_amortization_schedule(
     loan_id: int,
-    db: Session = Depends(deps.get_db),
-    current_user = Depends(deps.get_current_active_user)
+    db: AsyncSession = Depends(get_db),
+    current_user = Depends(get_current_local_user)
 ):
     """Obtener tabla de amortización del préstamo"""
     try:
@@ -130,8 +138,8 @@ async def get_amortization_schedule(
 async def create_loan_payment(
     loan_id: int,
     payment_data: LoanPaymentCreate,
-    db: Session = Depends(deps.get_db),
-    current_user = Depends(deps.get_current_active_user)
+    db: AsyncSession = Depends(get_db),
+    current_user = Depends(get_current_local_user)
 ):
     """Registrar un nuevo pago de préstamo"""
     try:
@@ -143,8 +151,8 @@ async def create_loan_payment(
 async def process_loan_payment(
     loan_id: int,
     payment_id: int,
-    db: Session = Depends(deps.get_db),
-    current_user = Depends(deps.get_current_active_user)
+    db: AsyncSession = Depends(get_db),
+    current_user = Depends(get_current_local_user)
 ):
     """Procesar un pago pendiente"""
     try:
@@ -158,8 +166,8 @@ async def get_loan_payments(
     skip: int = 0,
     limit: int = 100,
     status: Optional[PaymentStatus] = None,
-    db: Session = Depends(deps.get_db),
-    current_user = Depends(deps.get_current_active_user)
+    db: AsyncSession = Depends(get_db),
+    current_user = Depends(get_current_local_user)
 ):
     """Obtener pagos de un préstamo con filtros opcionales"""
     return await LoanPaymentService.get_loan_payments(db, loan_id, skip, limit, status)
@@ -169,8 +177,8 @@ async def cancel_loan_payment(
     loan_id: int,
     payment_id: int,
     cancellation_reason: str,
-    db: Session = Depends(deps.get_db),
-    current_user = Depends(deps.get_current_active_user)
+    db: AsyncSession = Depends(get_db),
+    current_user = Depends(get_current_local_user)
 ):
     """Cancelar un pago pendiente"""
     try:
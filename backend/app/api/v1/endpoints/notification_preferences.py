@@ -1,55 +1,53 @@
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.api import deps
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_db
+from app.core.security import get_current_local_user
 from app.models.user import User
 from app.core.cache import notification_cache
 from app.schemas import notification_preference as schemas
-from app.crud import notification as notification_crud
+from app.crud.notification import notification_preference as preference_crud
 
 router = APIRouter()
 
 @router.get("/preferences", response_model=schemas.NotificationPreferenceResponse)
 async def get_notification_preferences(
-    db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_active_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_local_user)
 ):
     """
     Get current user's notification preferences.
     """
-    # Try to get from cache first
-    preferences = await notification_cache.get_user_preferences(current_user.id)
+    # Try the cache first; concurrent misses share one database load
+    preferences = await notification_cache.get_or_load_user_preferences(
+        current_user.id,
+        lambda: preference_crud.get_user_preferences(db, current_user.id)
+    )
     if not preferences:
-        # If not in cache, get from database
-        preferences = await notification_crud.get_user_preferences(db, current_user.id)
-        if preferences:
-            # Cache the preferences
-            await notification_cache.set_user_preferences(current_user.id, preferences)
-        else:
-            # Create default preferences if none exist
-            preferences_data = schemas.NotificationPreferenceCreate(
-                user_id=current_user.id,
-                preferences=schemas.create_default_preferences()
-            )
-            preferences = await notification_crud.create_user_preferences(
-                db,
-                preferences_data
-            )
-            await notification_cache.set_user_preferences(current_user.id, preferences)
+        # Create default preferences if none exist
+        preferences_data = schemas.NotificationPreferenceCreate(
+            user_id=current_user.id,
+            preferences=schemas.create_default_preferences()
+        )
+        preferences = await preference_crud.create_user_preferences(
+            db,
+            preferences_data
+        )
+        await notification_cache.set_user_preferences(current_user.id, preferences)
     
     return preferences
 
 @router.put("/preferences", response_model=schemas.NotificationPreferenceResponse)
 async def update_notification_preferences(
     preferences_update: schemas.NotificationPreferenceUpdate,
-    db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_active_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_local_user)
 ):
     """
     Update current user's notification preferences.
     """
     # Get existing preferences
-    current_preferences = await notification_crud.get_user_preferences(
+    current_preferences = await preference_crud.get_user_preferences(
         db,
         current_user.id
     )
@@ -60,7 +58,7 @@ async def update_notification_preferences(
         )
 
     # Update preferences
-    updated_preferences = await notification_crud.update_user_preferences(
+    updated_preferences = await preference_crud.update_user_preferences(
         db,
         current_preferences,
         preferences_update
@@ -73,8 +71,8 @@ async def update_notification_preferences(
 
 @router.post("/preferences/reset", response_model=schemas.NotificationPreferenceResponse)
 async def reset_notification_preferences(
-    db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_active_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_local_user)
 ):
     """
     Reset current user's notification preferences to default values.
@@ -85,15 +83,15 @@ async def reset_notification_preferences(
     )
     
     # Update or create preferences
-    preferences = await notification_crud.get_user_preferences(db, current_user.id)
+    preferences = await preference_crud.get_user_preferences(db, current_user.id)
     if preferences:
-        preferences = await notification_crud.update_user_preferences(
+        preferences = await preference_crud.update_user_preferences(
             db,
             preferences,
             preferences_data
         )
     else:
-        preferences = await notification_crud.create_user_preferences(
+        preferences = await preference_crud.create_user_preferences(
             db,
             preferences_data
         )
@@ -1,11 +1,12 @@
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from app.api import deps
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_db
+from app.core.security import get_current_local_user
 from app.models.user import User
-from app.core.cache import notification_cache
+from app.core.unread_counter import unread_counter
 from app.schemas.notification import NotificationResponse, NotificationStatus
-from app.crud import notification as notification_crud
+from app.crud.notification import notification as notification_crud
 
 router = APIRouter()
 
@@ -13,8 +14,8 @@ router = APIRouter()
 async def get_notifications(
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
-    db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_active_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_local_user)
 ):
     """
     Retrieve user's notifications with pagination.
@@ -28,64 +29,56 @@ async def get_notifications(
 
 @router.get("/unread/count", response_model=int)
 async def get_unread_count(
-    db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_active_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_local_user)
 ):
     """
     Get count of unread notifications.
     """
-    # Try to get from cache first
-    count = await notification_cache.get_unread_count(current_user.id)
-    if count is None:
-        count = await notification_crud.get_unread_count(db, current_user.id)
-        await notification_cache.set_unread_count(current_user.id, count)
-    return count
+    return await unread_counter.get(db, current_user.id)
 
 @router.post("/{notification_id}/read")
 async def mark_as_read(
     notification_id: int,
-    db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_active_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_local_user)
 ):
     """
     Mark a notification as read.
     """
-    notification = await notification_crud.mark_as_read(
-        db,
-        notification_id,
-        current_user.id
-    )
-    if not notification:
+    # Only an unread -> read transition changes the unread counter
+    if await notification_crud.mark_unread_as_read(db, notification_id, current_user.id):
+        await unread_counter.decrement(db, current_user.id)
+        return {"status": "success"}
+
+    notification = await notification_crud.get(db, notification_id)
+    if not notification or notification.user_id != current_user.id:
         raise HTTPException(
             status_code=404,
             detail="Notification not found"
         )
     
-    # Invalidate unread count cache
-    await notification_cache.invalidate_user_cache(current_user.id)
-    
     return {"status": "success"}
 
 @router.post("/read/all")
 async def mark_all_as_read(
-    db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_active_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_local_user)
 ):
     """
     Mark all notifications as read.
     """
     count = await notification_crud.mark_all_as_read(db, current_user.id)
     
-    # Invalidate unread count cache
-    await notification_cache.invalidate_user_cache(current_user.id)
+    await unread_counter.decrement(db, current_user.id, count)
     
     return {"status": "success", "marked_count": count}
 
 @router.delete("/{notification_id}")
 async def delete_notification(
     notification_id: int,
-    db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_active_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_local_user)
 ):
     """
     Delete a notification.
@@ -104,8 +97,8 @@ async def delete_notification(
     
     await notification_crud.remove(db, id=notification_id)
     
-    # Invalidate unread count cache if notification was unread
+    # Update the unread counter if the notification was unread
     if not notification.read_at:
-        await notification_cache.invalidate_user_cache(current_user.id)
+        await unread_counter.decrement(db, current_user.id)
     
     return {"status": "success"}
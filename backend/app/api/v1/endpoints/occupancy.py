@@ -0,0 +1,46 @@
+from typing import Any, Dict
+from datetime import date
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ....core.config import settings
+from ....core.database import get_db
+from ....core.response_cache import CachedRoute, cache_response
+from ....core.security import get_current_user
+from ....schemas.occupancy import OccupancyReport
+from ....services.occupancy_analytics import OccupancyAnalyticsService
+
+router = APIRouter(route_class=CachedRoute)
+
+@router.get("/", response_model=OccupancyReport)
+@cache_response("occupancy", ttl=settings.OCCUPANCY_CACHE_TTL)
+async def get_portfolio_occupancy(
+    start_date: date = Query(..., description="Inicio del período (incluido)"),
+    end_date: date = Query(..., description="Fin del período (incluido)"),
+    daily: bool = Query(False, description="Incluir unidades ocupadas por día"),
+    db: AsyncSession = Depends(get_db),
+    _: Dict[str, Any] = Depends(get_current_user)
+):
+    """
+    Ocupación, días vacíos, rotación y renta perdida de toda la cartera.
+    """
+    return await OccupancyAnalyticsService.get_occupancy(
+        db, start_date, end_date, include_daily=daily
+    )
+
+@router.get("/properties/{property_id}", response_model=OccupancyReport)
+@cache_response("occupancy", "property:{property_id}", ttl=settings.OCCUPANCY_CACHE_TTL)
+async def get_property_occupancy(
+    property_id: int,
+    start_date: date = Query(..., description="Inicio del período (incluido)"),
+    end_date: date = Query(..., description="Fin del período (incluido)"),
+    daily: bool = Query(False, description="Incluir unidades ocupadas por día"),
+    db: AsyncSession = Depends(get_db),
+    _: Dict[str, Any] = Depends(get_current_user)
+):
+    """
+    Ocupación, días vacíos, rotación y renta perdida de una propiedad y sus unidades.
+    """
+    return await OccupancyAnalyticsService.get_occupancy(
+        db, start_date, end_date, property_id=property_id, include_daily=daily
+    )
@@ -1,10 +1,11 @@
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query, BackgroundTasks, Request
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import date
 
-from ....core.deps import get_db, get_current_user
-from ....crud import payment as crud_payment
+from ....core.database import get_db
+from ....core.security import get_current_user
+from ....crud.payment import payment as crud_payment
 from ....crud import contract as crud_contract
 from ....schemas.payment import (
     Payment,
@@ -19,13 +20,14 @@ from ....models.payment import PaymentConcept
 from ....validations.payment import validate_payment_create, validate_payment_update
 from ....services.notifications import NotificationService, schedule_payment_reminders
 from ....services.audit import AuditService
+from ....core.response_cache import response_cache
 
 router = APIRouter()
 
 @router.post("/", response_model=PaymentResponse)
 async def create_payment(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     payment_in: PaymentCreate,
     current_user: User = Depends(get_current_user),
     request: Request,
@@ -40,7 +42,7 @@ async def create_payment(
     # Crear el pago con el usuario que lo procesa
     payment_data = payment_in.model_dump()
     payment_data["processed_by_id"] = current_user.id
-    payment = crud_payment.create(db, obj_in=payment_data)
+    payment = await crud_payment.create(db, obj_in=payment_data)
     
     # Enviar confirmación de pago si ya está pagado
     if payment.status == PaymentStatus.PAID:
@@ -51,7 +53,7 @@ async def create_payment(
         )
     
     # Registrar en auditoría
-    AuditService.log_action(
+    await AuditService.log_action(
         db=db,
         user_id=current_user.id,
         action="CREATE",
@@ -61,12 +63,13 @@ async def create_payment(
         ip_address=request.client.host,
         user_agent=request.headers.get("user-agent")
     )
+    await response_cache.invalidate("payments")
     
     return payment
 
 @router.get("/", response_model=List[PaymentDetail])
-def list_payments(
-    db: Session = Depends(get_db),
+async def list_payments(
+    db: AsyncSession = Depends(get_db),
     skip: int = 0,
     limit: int = 100,
     contract_id: Optional[int] = None,
@@ -91,18 +94,18 @@ def list_payments(
     if end_date:
         filters["payment_date__lte"] = end_date
     
-    return crud_payment.get_multi(db, skip=skip, limit=limit, filters=filters)
+    return await crud_payment.get_multi(db, skip=skip, limit=limit, filters=filters)
 
 @router.get("/{payment_id}", response_model=PaymentDetail)
-def get_payment(
+async def get_payment(
     payment_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: User = Depends(get_current_user)
 ):
     """
     Obtener un pago específico por ID.
     """
-    payment = crud_payment.get(db, id=payment_id)
+    payment = await crud_payment.get(db, id=payment_id)
     if not payment:
         raise HTTPException(
             status_code=404,
@@ -113,7 +116,7 @@ def get_payment(
 @router.put("/{payment_id}", response_model=PaymentResponse)
 async def update_payment(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     payment_id: int,
     payment_in: PaymentUpdate,
     current_user: User = Depends(get_current_user),
@@ -124,7 +127,7 @@ async def update_payment(
     Actualizar un pago existente.
     """
     # Obtener el pago actual para comparar cambios
-    current_payment = crud_payment.get(db, id=payment_id)
+    current_payment = await crud_payment.get(db, id=payment_id)
     if not current_payment:
         raise HTTPException(
             status_code=404,
@@ -137,7 +140,7 @@ async def update_payment(
     # Actualizar el pago
     payment_data = payment_in.model_dump(exclude_unset=True)
     payment_data["processed_by_id"] = current_user.id
-    updated_payment = crud_payment.update(db, db_obj=current_payment, obj_in=payment_data)
+    updated_payment = await crud_payment.update(db, db_obj=current_payment, obj_in=payment_data)
     
     # Enviar notificaciones según los cambios
     if payment_in.status:
@@ -161,7 +164,7 @@ async def update_payment(
         field: getattr(current_payment, field)
         for field in payment_in.dict(exclude_unset=True).keys()
     }
-    AuditService.log_action(
+    await AuditService.log_action(
         db=db,
         user_id=current_user.id,
         action="UPDATE",
@@ -172,13 +175,14 @@ async def update_payment(
         ip_address=request.client.host,
         user_agent=request.headers.get("user-agent")
     )
+    await response_cache.invalidate("payments")
     
     return updated_payment
 
 @router.delete("/{payment_id}", response_model=PaymentResponse)
-def delete_payment(
+async def delete_payment(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     payment_id: int,
     current_user: User = Depends(get_current_user),
     request: Request
@@ -186,18 +190,18 @@ def delete_payment(
     """
     Eliminar un pago.
     """
-    payment = crud_payment.get(db, id=payment_id)
+    payment = await crud_payment.get(db, id=payment_id)
     if not payment:
         raise HTTPException(
             status_code=404,
             detail=f"Payment with id {payment_id} not found"
         )
     
-    old_values = payment.__dict__
-    payment = crud_payment.remove(db, id=payment_id)
+    old_values = {k: v for k, v in payment.__dict__.items() if not k.startswith('_')}
+    payment = await crud_payment.remove(db, id=payment_id)
     
-    # Registrar en auditoría
-    AuditService.log_action(
+    # Registrar en auditoría; el borrado de un pago se escribe sin esperar al lote
+    await AuditService.log_action(
         db=db,
         user_id=current_user.id,
         action="DELETE",
@@ -205,15 +209,17 @@ def delete_payment(
         resource_id=payment_id,
         old_values=old_values,
         ip_address=request.client.host,
-        user_agent=request.headers.get("user-agent")
+        user_agent=request.headers.get("user-agent"),
+        sync=True
     )
+    await response_cache.invalidate("payments")
     
     return payment
 
 @router.get("/contract/{contract_id}/summary")
-def get_contract_payments_summary(
+async def get_contract_payments_summary(
     contract_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: User = Depends(get_current_user)
 ):
     """
@@ -228,7 +234,7 @@ def get_contract_payments_summary(
         )
     
     # Obtener todos los pagos del contrato
-    payments = crud_payment.get_multi(
+    payments = await crud_payment.get_multi(
         db,
         filters={"contract_id": contract_id}
     )
@@ -252,12 +258,12 @@ def get_contract_payments_summary(
 @router.post("/schedule-reminders")
 async def trigger_payment_reminders(
     background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: User = Depends(get_current_user)
 ):
     """
     Programar recordatorios de pago.
     Este endpoint puede ser llamado por un cron job diariamente.
     """
-    schedule_payment_reminders(db, background_tasks)
+    await schedule_payment_reminders(db, background_tasks)
     return {"message": "Payment reminders scheduled successfully"}
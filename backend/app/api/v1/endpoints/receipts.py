@@ -1,12 +1,14 @@
-from typing import Any
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
-from sqlalchemy.orm import Session
+from typing import Any, Dict
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.responses import FileResponse
 import os
 
-from ....core.deps import get_db, get_current_active_user
-from ....models.user import User
-from ....crud import crud_payment
+from ....core.config import settings
+from ....core.database import get_db
+from ....core.security import get_current_user
+from ....core.downloads import ROOT_STATIC, send_file
+from ....crud.payment import payment as crud_payment
 from ....services.receipts import ReceiptService
 
 router = APIRouter()
@@ -15,13 +17,13 @@ router = APIRouter()
 async def generate_receipt(
     payment_id: int,
     background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: Dict[str, Any] = Depends(get_current_user)
 ) -> Any:
     """
     Genera un recibo PDF para un pago específico
     """
-    payment = crud_payment.get(db, id=payment_id)
+    payment = await crud_payment.get(db, id=payment_id)
     if not payment:
         raise HTTPException(status_code=404, detail="Payment not found")
     
@@ -45,13 +47,14 @@ async def generate_receipt(
 @router.get("/{payment_id}/download")
 async def download_receipt(
     payment_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user: Dict[str, Any] = Depends(get_current_user)
 ) -> Any:
     """
-    Descarga un recibo existente
+    Descarga un recibo existente (admite Range y peticiones condicionales)
     """
-    payment = crud_payment.get(db, id=payment_id)
+    payment = await crud_payment.get(db, id=payment_id)
     if not payment:
         raise HTTPException(status_code=404, detail="Payment not found")
     
@@ -66,8 +69,9 @@ async def download_receipt(
         # Si no existe, generarlo
         receipt_path = await ReceiptService.generate_receipt_pdf(db, payment)
     
-    return FileResponse(
-        receipt_path,
-        media_type="application/pdf",
-        filename=os.path.basename(receipt_path)
+    return await send_file(
+        request,
+        ROOT_STATIC,
+        os.path.relpath(receipt_path, settings.STATIC_DIR),
+        media_type="application/pdf"
     )
@@ -0,0 +1,95 @@
+from typing import Any, Dict, List, Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, File, Query, UploadFile
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ....core.database import get_db
+from ....core.security import get_current_local_user, get_current_user
+from ....models.user import User
+from ....schemas.reconciliation import (
+    ReconciliationItem,
+    ReconciliationReport,
+    ReconciliationResolve,
+    ReconciliationStatus
+)
+from ....services.notifications import NotificationService
+from ....services.reconciliation import ReconciliationService
+
+router = APIRouter()
+
+@router.post("/statements", response_model=ReconciliationReport)
+async def upload_statement(
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(
+        None, regex="^(csv|ofx)$", description="Formato del extracto; por defecto según la extensión"
+    ),
+    dry_run: bool = Query(False, description="Calcular coincidencias sin guardar nada"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_local_user)
+):
+    """
+    Conciliar un extracto bancario (CSV u OFX) con los pagos pendientes.
+    Los pagos coincidentes se marcan como pagados; el resto de líneas pasa
+    a la cola de revisión.
+    """
+    if format is None:
+        format = "ofx" if (file.filename or "").lower().endswith((".ofx", ".qfx")) else "csv"
+    content = (await file.read()).decode("utf-8-sig", errors="replace")
+
+    report = await ReconciliationService.reconcile_statement(
+        db,
+        file.filename or "statement",
+        content,
+        format,
+        user_id=current_user.id,
+        dry_run=dry_run
+    )
+
+    # Confirmación a cada inquilino cuyo pago quedó conciliado
+    if not dry_run:
+        for match in report.matched:
+            background_tasks.add_task(
+                NotificationService.send_payment_confirmation,
+                db,
+                match.payment_id
+            )
+    return report
+
+@router.get("/review", response_model=List[ReconciliationItem])
+async def list_review_queue(
+    status: Optional[ReconciliationStatus] = None,
+    skip: int = 0,
+    limit: int = 100,
+    db: AsyncSession = Depends(get_db),
+    _: Dict[str, Any] = Depends(get_current_user)
+):
+    """
+    Listar las líneas de extracto sin conciliar o con varios pagos candidatos.
+    """
+    return await ReconciliationService.get_review_queue(db, status, skip=skip, limit=limit)
+
+@router.post("/review/{item_id}/resolve", response_model=ReconciliationItem)
+async def resolve_review_item(
+    item_id: int,
+    resolution: ReconciliationResolve,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_local_user)
+):
+    """
+    Asignar una línea de la cola a un pago pendiente, o descartarla.
+    """
+    item = await ReconciliationService.resolve_item(
+        db,
+        item_id,
+        current_user.id,
+        payment_id=resolution.payment_id,
+        ignore=resolution.ignore
+    )
+    if item.payment_id:
+        background_tasks.add_task(
+            NotificationService.send_payment_confirmation,
+            db,
+            item.payment_id
+        )
+    return item
@@ -1,28 +1,29 @@
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import date
 import json
 
-from ....core.deps import get_db, get_current_user
+from ....core.database import get_db
+from ....core.security import get_current_user
 from ....services.reports import PaymentReportService
 from ....schemas.user import User
 
 router = APIRouter()
 
 @router.get("/payments/account-statement/{contract_id}")
-def get_account_statement(
+async def get_account_statement(
     contract_id: int,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: User = Depends(get_current_user)
 ):
     """
     Obtener estado de cuenta detallado para un contrato específico.
     """
-    return PaymentReportService.generate_account_statement(
+    return await PaymentReportService.generate_account_statement(
         db,
         contract_id,
         start_date,
@@ -30,17 +31,17 @@ def get_account_statement(
     )
 
 @router.get("/payments/history/{contract_id}")
-def get_payment_history(
+async def get_payment_history(
     contract_id: int,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: User = Depends(get_current_user)
 ):
     """
     Obtener historial detallado de pagos para un contrato.
     """
-    return PaymentReportService.generate_payment_history(
+    return await PaymentReportService.generate_payment_history(
         db,
         contract_id,
         start_date,
@@ -48,31 +49,31 @@ def get_payment_history(
     )
 
 @router.get("/payments/late")
-def get_late_payments_report(
+async def get_late_payments_report(
     property_id: Optional[int] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: User = Depends(get_current_user)
 ):
     """
     Obtener reporte de pagos atrasados, opcionalmente filtrado por propiedad.
     """
-    return PaymentReportService.generate_late_payments_report(
+    return await PaymentReportService.generate_late_payments_report(
         db,
         property_id
     )
 
 @router.get("/payments/analytics")
-def get_payment_analytics(
+async def get_payment_analytics(
     property_id: Optional[int] = None,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: User = Depends(get_current_user)
 ):
     """
     Obtener análisis detallado de pagos y tendencias.
     """
-    return PaymentReportService.generate_payment_analytics(
+    return await PaymentReportService.generate_payment_analytics(
         db,
         property_id,
         start_date,
@@ -80,18 +81,18 @@ def get_payment_analytics(
     )
 
 @router.get("/payments/export/{contract_id}")
-def export_payment_history(
+async def export_payment_history(
     contract_id: int,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: User = Depends(get_current_user)
 ):
     """
     Exportar historial de pagos a Excel.
     """
     # Obtener datos
-    payment_history = PaymentReportService.generate_payment_history(
+    payment_history = await PaymentReportService.generate_payment_history(
         db,
         contract_id,
         start_date,
@@ -99,8 +100,7 @@ def export_payment_history(
     )
     
     # Exportar a Excel
-    excel_file = PaymentReportService.export_to_excel(
-        db,
+    excel_file = await PaymentReportService.export_to_excel(
         payment_history,
         f"Payment History - Contract {contract_id}"
     )
@@ -117,23 +117,22 @@ def export_payment_history(
     )
 
 @router.get("/payments/export-late")
-def export_late_payments(
+async def export_late_payments(
     property_id: Optional[int] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: User = Depends(get_current_user)
 ):
     """
     Exportar reporte de pagos atrasados a Excel.
     """
     # Obtener datos
-    late_payments = PaymentReportService.generate_late_payments_report(
+    late_payments = await PaymentReportService.generate_late_payments_report(
         db,
         property_id
     )
     
     # Exportar a Excel
-    excel_file = PaymentReportService.export_to_excel(
-        db,
+    excel_file = await PaymentReportService.export_to_excel(
         late_payments,
         "Late Payments Report"
     )
@@ -1,23 +1,26 @@
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query, BackgroundTasks
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import date
 
-from app.api import deps
+from app.core.database import get_db
 from app.schemas import vendor as schemas, expense as expense_schemas
-from app.services import vendor_service, notification_service
-from app.crud import expense as crud_expense
+from app.services import notification_service
+from app.services.vendor_service import vendor_service
+from app.crud.expense import expense as crud_expense
+from app.crud.vendor import vendor as crud_vendor
 from app.core.security import get_current_active_user
 from app.models.user import User
 from app.core.vendor_validation import vendor_validator
+from app.core.response_cache import CachedRoute, cache_response
 
-router = APIRouter()
+router = APIRouter(route_class=CachedRoute)
 
 @router.post("/", response_model=schemas.Vendor)
 async def create_vendor(
     *,
     vendor_in: schemas.VendorCreate,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
     background_tasks: BackgroundTasks = BackgroundTasks()
 ):
@@ -37,8 +40,8 @@ async def create_vendor(
     return vendor
 
 @router.get("/", response_model=List[schemas.Vendor])
-def read_vendors(
-    db: Session = Depends(deps.get_db),
+async def read_vendors(
+    db: AsyncSession = Depends(get_db),
     skip: int = 0,
     limit: int = 100,
     search: Optional[str] = None,
@@ -49,7 +52,7 @@ def read_vendors(
     """
     Retrieve vendors with optional filtering.
     """
-    vendors = vendor_service.get_multi(
+    vendors = await crud_vendor.get_multi(
         db=db,
         skip=skip,
         limit=limit,
@@ -61,17 +64,45 @@ def read_vendors(
     )
     return vendors
 
+@router.get("/top", response_model=List[schemas.VendorWithStats])
+@cache_response("vendors")
+async def get_top_vendors(
+    *,
+    db: AsyncSession = Depends(get_db),
+    skip: int = 0,
+    limit: int = 10,
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Get top rated vendors.
+    """
+    return await vendor_service.get_top_vendors(db, skip=skip, limit=limit)
+
+@router.get("/search", response_model=List[schemas.Vendor])
+async def search_vendors(
+    *,
+    db: AsyncSession = Depends(get_db),
+    query: str,
+    skip: int = 0,
+    limit: int = 10,
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Search vendors.
+    """
+    return await vendor_service.search_vendors(db, query, skip=skip, limit=limit)
+
 @router.get("/{vendor_id}", response_model=schemas.Vendor)
-def read_vendor(
+async def read_vendor(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(get_db),
     vendor_id: int,
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Get vendor by ID.
     """
-    vendor = vendor_service.get(db=db, id=vendor_id)
+    vendor = await crud_vendor.get(db=db, id=vendor_id)
     if not vendor:
         raise HTTPException(status_code=404, detail="Vendor not found")
     return vendor
@@ -79,7 +110,7 @@ def read_vendor(
 @router.put("/{vendor_id}", response_model=schemas.Vendor)
 async def update_vendor(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(get_db),
     vendor_id: int,
     vendor_in: schemas.VendorUpdate,
     current_user: User = Depends(get_current_active_user)
@@ -90,27 +121,29 @@ async def update_vendor(
     return await vendor_service.update_vendor(db, vendor_id, vendor_in, current_user)
 
 @router.delete("/{vendor_id}")
-def delete_vendor(
+async def delete_vendor(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(get_db),
     vendor_id: int,
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(get_current_active_user),
+    background_tasks: BackgroundTasks
 ):
     """
     Delete vendor.
     """
-    vendor = vendor_service.get(db=db, id=vendor_id)
+    vendor = await crud_vendor.get(db=db, id=vendor_id)
     if not vendor:
         raise HTTPException(status_code=404, detail="Vendor not found")
-    vendor_service.remove(db=db, id=vendor_id)
+    await crud_vendor.remove(db=db, id=vendor_id)
+    background_tasks.add_task(vendor_service.invalidate_cache, vendor_id)
     return {"message": "Vendor deleted successfully"}
 
 @router.post("/{vendor_id}/rate", response_model=schemas.Vendor)
 async def rate_vendor(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(get_db),
     vendor_id: int,
-    rating_in: schemas.VendorRating,
+    rating_in: schemas.VendorRatingCreate,
     current_user: User = Depends(get_current_active_user)
 ):
     """
@@ -119,48 +152,22 @@ async def rate_vendor(
     return await vendor_service.rate_vendor(db, vendor_id, rating_in, current_user)
 
 @router.get("/{vendor_id}/stats", response_model=schemas.VendorWithStats)
-def get_vendor_stats(
+@cache_response("vendor:{vendor_id}")
+async def get_vendor_stats(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(get_db),
     vendor_id: int,
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Get vendor statistics.
     """
-    return vendor_service.get_vendor_with_stats(db, vendor_id)
-
-@router.get("/top", response_model=List[schemas.VendorWithStats])
-def get_top_vendors(
-    *,
-    db: Session = Depends(deps.get_db),
-    skip: int = 0,
-    limit: int = 10,
-    current_user: User = Depends(get_current_active_user)
-):
-    """
-    Get top rated vendors.
-    """
-    return vendor_service.get_top_vendors(db, skip=skip, limit=limit)
-
-@router.get("/search", response_model=List[schemas.Vendor])
-def search_vendors(
-    *,
-    db: Session = Depends(deps.get_db),
-    query: str,
-    skip: int = 0,
-    limit: int = 10,
-    current_user: User = Depends(get_current_active_user)
-):
-    """
-    Search vendors.
-    """
-    return vendor_service.search_vendors(db, query, skip=skip, limit=limit)
+    return await vendor_service.get_vendor_with_stats(db, vendor_id)
 
 @router.get("/{vendor_id}/expenses", response_model=List[expense_schemas.ExpenseDetail])
-def get_vendor_expenses(
+async def get_vendor_expenses(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(get_db),
     vendor_id: int,
     skip: int = 0,
     limit: int = 100,
@@ -172,11 +179,11 @@ def get_vendor_expenses(
     """
     Get all expenses for a vendor.
     """
-    vendor = vendor_service.get(db=db, id=vendor_id)
+    vendor = await crud_vendor.get(db=db, id=vendor_id)
     if not vendor:
         raise HTTPException(status_code=404, detail="Vendor not found")
     
-    expenses = crud_expense.get_by_vendor_id(
+    expenses = await crud_expense.get_by_vendor_id(
         db=db,
         vendor_id=vendor_id,
         skip=skip,
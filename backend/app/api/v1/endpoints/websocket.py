@@ -34,8 +34,9 @@ async def notifications_websocket(
                 data = await websocket.receive_json()
                 
                 # Handle ping messages to keep connection alive
+                # (routed through the connection's send queue so it never races the writer task)
                 if data.get("type") == "ping":
-                    await websocket.send_json({"type": "pong"})
+                    notification_ws_manager.send_to_websocket(websocket, current_user.id, '{"type": "pong"}')
 
         except Exception as e:
             # Handle disconnection
@@ -1,10 +1,11 @@
 import logging
-from typing import Optional, Dict, Any
+from typing import Any, Awaitable, Callable, Dict, Optional
 from datetime import datetime, timedelta
 from fastapi_cache import FastAPICache
 from fastapi_cache.backends.redis import RedisBackend
 from fastapi_cache.decorator import cache
 from app.core.config import settings
+from app.core.tiered_cache import TwoTierCache
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -12,54 +13,74 @@ logger = logging.getLogger(__name__)
 class NotificationCache:
     """
     Cache manager for notification-related data.
+
+    Backed by a two-tier cache: an in-process LRU in front of Redis, kept
+    consistent across workers through pub/sub invalidation.
     """
     PREFERENCES_KEY = "notification_preferences:{user_id}"
-    UNREAD_COUNT_KEY = "unread_notifications_count:{user_id}"
     CACHE_TTL = 300  # 5 minutes
 
+    preferences = TwoTierCache("notification_preferences", ttl=CACHE_TTL)
+
+    @staticmethod
+    def _to_cacheable(preferences: Any) -> Any:
+        """
+        Convert ORM rows into plain dicts so they can be stored in Redis.
+        """
+        table = getattr(preferences, "__table__", None)
+        if table is None:
+            return preferences
+        return {
+            column.name: getattr(preferences, column.name)
+            for column in table.columns
+        }
+
     @staticmethod
     async def get_user_preferences(user_id: int) -> Optional[Dict[str, Any]]:
         """
         Get cached user notification preferences.
         """
         key = NotificationCache.PREFERENCES_KEY.format(user_id=user_id)
-        return await FastAPICache.get(key)
+        return await NotificationCache.preferences.get(key)
 
     @staticmethod
-    async def set_user_preferences(user_id: int, preferences: Dict[str, Any]):
+    async def set_user_preferences(user_id: int, preferences: Any):
         """
         Cache user notification preferences.
         """
         key = NotificationCache.PREFERENCES_KEY.format(user_id=user_id)
-        await FastAPICache.set(key, preferences, expire=NotificationCache.CACHE_TTL)
+        await NotificationCache.preferences.set(
+            key,
+            NotificationCache._to_cacheable(preferences)
+        )
 
     @staticmethod
-    async def get_unread_count(user_id: int) -> Optional[int]:
+    async def get_or_load_user_preferences(
+        user_id: int,
+        loader: Callable[[], Awaitable[Any]]
+    ) -> Optional[Dict[str, Any]]:
         """
-        Get cached unread notifications count.
+        Get user notification preferences, loading them once on a cache miss.
         """
-        key = NotificationCache.UNREAD_COUNT_KEY.format(user_id=user_id)
-        return await FastAPICache.get(key)
+        key = NotificationCache.PREFERENCES_KEY.format(user_id=user_id)
 
-    @staticmethod
-    async def set_unread_count(user_id: int, count: int):
-        """
-        Cache unread notifications count.
-        """
-        key = NotificationCache.UNREAD_COUNT_KEY.format(user_id=user_id)
-        await FastAPICache.set(key, count, expire=NotificationCache.CACHE_TTL)
+        async def load():
+            return NotificationCache._to_cacheable(await loader())
+
+        return await NotificationCache.preferences.get_or_load(key, load)
 
     @staticmethod
     async def invalidate_user_cache(user_id: int):
         """
         Invalidate all cached data for a user.
+
+        Unread counts are not cached here; see app.core.unread_counter.
         """
         keys = [
-            NotificationCache.PREFERENCES_KEY.format(user_id=user_id),
-            NotificationCache.UNREAD_COUNT_KEY.format(user_id=user_id)
+            NotificationCache.PREFERENCES_KEY.format(user_id=user_id)
         ]
         for key in keys:
-            await FastAPICache.delete(key)
+            await NotificationCache.preferences.delete(key)
 
 def setup_cache():
     """
@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import Dict, List, Optional
 import os
 from functools import lru_cache
 from pydantic import Field, field_validator
@@ -29,6 +29,10 @@ class Settings(BaseSettings):
     JWT_SECRET_KEY: str = "your-jwt-secret-key"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # Verified token claims are cached with their resolved permissions for
+    # up to AUTH_TOKEN_CACHE_TTL seconds, and never past the token's expiry
+    AUTH_TOKEN_CACHE_SIZE: int = 4096
+    AUTH_TOKEN_CACHE_TTL: float = 60.0
     
     # Clerk settings
     CLERK_SECRET_KEY: str = "your_clerk_secret_key"
@@ -77,6 +81,108 @@ class Settings(BaseSettings):
     ALERTMANAGER_SLACK_WEBHOOK: str = "your_slack_webhook_url"
     ALERTMANAGER_SLACK_CHANNEL: str = "#alerts"
     
+    # WebSocket settings
+    WEBSOCKET_SEND_QUEUE_SIZE: int = 100
+    WEBSOCKET_SEND_TIMEOUT: float = 5.0
+
+    # Pub/sub backplane settings ("redis" or "memory")
+    PUBSUB_BACKEND: str = "redis"
+    PUBSUB_CHANNEL_PREFIX: str = "rental"
+
+    # Notification digest settings (windows in seconds, keyed by notification type)
+    NOTIFICATION_DIGEST_ENABLED: bool = True
+    NOTIFICATION_DIGEST_DEFAULT_WINDOW: float = 300.0
+    NOTIFICATION_DIGEST_WINDOWS: Dict[str, float] = {}
+    NOTIFICATION_DIGEST_URGENT_TYPES: List[str] = []
+    NOTIFICATION_DIGEST_MAX_EVENTS: int = 500
+    NOTIFICATION_DIGEST_MAX_ITEMS: int = 50
+
+    # Two-tier cache settings (CACHE_BACKEND "redis" or "memory")
+    CACHE_BACKEND: str = "redis"
+    CACHE_LOCAL_MAX_ENTRIES: int = 1024
+    CACHE_LOCAL_TTL: float = 30.0
+    RESPONSE_CACHE_TTL: int = 60
+    # Occupancy analytics are cached per period; contract writes invalidate them
+    OCCUPANCY_CACHE_TTL: int = 900
+
+    # Unread notification counters ("redis" or "memory")
+    UNREAD_COUNTER_BACKEND: str = "redis"
+    UNREAD_COUNTER_TTL: int = 86400
+
+    # Per-request SQL instrumentation ("off", "sample" or "strict").
+    # N+1 detection runs on a sample of requests, or on every request in strict
+    # mode, where a repeated statement raises instead of logging a warning
+    SQL_INSTRUMENTATION_MODE: str = "sample"
+    SQL_INSTRUMENTATION_SAMPLE_RATE: float = 0.1
+    SQL_N_PLUS_ONE_THRESHOLD: int = 10
+
+    # Audit log writer. Entries are buffered and written in batches when
+    # AUDIT_BATCH_SIZE entries are pending or AUDIT_FLUSH_INTERVAL seconds
+    # have passed; actions in AUDIT_SYNC_ACTIONS (and AUDIT_BUFFERED=false)
+    # are written in the caller's transaction. Batches that cannot be written
+    # are appended to AUDIT_SPILL_PATH and replayed on startup
+    AUDIT_BUFFERED: bool = True
+    AUDIT_BATCH_SIZE: int = 200
+    AUDIT_FLUSH_INTERVAL: float = 1.0
+    AUDIT_SYNC_ACTIONS: List[str] = []
+    AUDIT_SPILL_PATH: str = "audit_spill.jsonl"
+
+    # audit_log is partitioned by month of performed_at. The retention job
+    # creates AUDIT_PARTITIONS_AHEAD months of partitions in advance and moves
+    # partitions older than AUDIT_RETENTION_MONTHS to gzipped JSONL files in
+    # AUDIT_ARCHIVE_DIR before dropping them
+    AUDIT_RETENTION_MONTHS: int = 24
+    AUDIT_PARTITIONS_AHEAD: int = 3
+    AUDIT_ARCHIVE_DIR: str = "audit_archive"
+    AUDIT_PAGE_SIZE: int = 50
+
+    # Bulk imports: rows are validated and COPYed to staging in batches of
+    # IMPORT_BATCH_SIZE; at most IMPORT_MAX_ERRORS row errors are reported
+    IMPORT_BATCH_SIZE: int = 5000
+    IMPORT_MAX_ERRORS: int = 1000
+
+    # Bank reconciliation: a statement line matches a pending payment of the
+    # same amount due within this many days of the transaction date
+    RECONCILIATION_DATE_WINDOW_DAYS: int = 5
+
+    # Expense/payment aggregation responses; invalidated on writes, the TTL
+    # bounds staleness from bulk jobs that do not invalidate
+    AGGREGATION_CACHE_TTL: int = 600
+
+    # File uploads (expense attachments, loan and contract documents) are
+    # streamed to UPLOAD_DIR in UPLOAD_CHUNK_SIZE chunks and stored once per
+    # SHA-256; bodies over UPLOAD_MAX_SIZE bytes are rejected with 413
+    UPLOAD_DIR: str = "uploads"
+    UPLOAD_MAX_SIZE: int = 25 * 1024 * 1024
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024
+    # Files placed by uploads whose transaction rolled back are swept once
+    # they are older than this many seconds
+    UPLOAD_ORPHAN_GRACE: int = 3600
+
+    # Downloads of stored files and generated documents (receipts) under
+    # STATIC_DIR. With DOWNLOAD_X_ACCEL_REDIRECT the app only authorises the
+    # request and nginx sends the file (docker/nginx internal locations);
+    # otherwise the app streams it in DOWNLOAD_CHUNK_SIZE reads
+    STATIC_DIR: str = "static"
+    DOWNLOAD_X_ACCEL_REDIRECT: bool = False
+    DOWNLOAD_CHUNK_SIZE: int = 256 * 1024
+
+    # Thumbnails and first-page previews of uploaded images and PDFs, rendered
+    # as JPEG (longest side in pixels) in a pool of PREVIEW_WORKERS processes;
+    # PDFs need pdftoppm (poppler-utils)
+    PREVIEW_THUMBNAIL_SIZE: int = 256
+    PREVIEW_SIZE: int = 1024
+    PREVIEW_WORKERS: int = 2
+    PREVIEW_TIMEOUT: int = 60
+
+    # Scheduled jobs run in-process, daily at SCHEDULER_DAILY_HOUR (server
+    # local time) and monthly after the daily run on the 1st; a Postgres
+    # advisory lock per job keeps workers from running it twice. Automatic
+    # changes (late fees) are recorded as SCHEDULER_USER_ID
+    SCHEDULER_ENABLED: bool = True
+    SCHEDULER_DAILY_HOUR: int = 3
+    SCHEDULER_USER_ID: int = 1
+    
     # Optional Nginx settings
     NGINX_HOST: str = "localhost"
     SSL_CERTIFICATE_PATH: str = "/etc/nginx/ssl/server.crt"
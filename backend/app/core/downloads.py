@@ -0,0 +1,206 @@
+import mimetypes
+import os
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Dict, Optional, Tuple
+from urllib.parse import quote
+import anyio
+from fastapi import HTTPException, Request, Response, status
+from starlette.concurrency import run_in_threadpool
+from starlette.types import Receive, Scope, Send
+from app.core.config import settings
+from app.core.response_cache import etag_matches
+
+# Storage roots files may be served from, with the nginx internal location
+# that maps to each one (see docker/nginx/conf.d/default.conf)
+ROOT_UPLOADS = "uploads"
+ROOT_STATIC = "static"
+ACCEL_LOCATIONS = {
+    ROOT_UPLOADS: "/_protected/uploads/",
+    ROOT_STATIC: "/_protected/static/",
+}
+
+def _root_directory(root: str) -> str:
+    return settings.UPLOAD_DIR if root == ROOT_UPLOADS else settings.STATIC_DIR
+
+def resolve_path(root: str, path: str) -> Tuple[str, str]:
+    """
+    Absolute and root-relative path of a stored file. Paths that escape the
+    root (``..``, symlinks, absolute paths elsewhere) are reported as missing.
+    """
+    directory = os.path.realpath(_root_directory(root))
+    full_path = os.path.realpath(os.path.join(directory, path))
+    if os.path.commonpath([directory, full_path]) != directory:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
+    return full_path, os.path.relpath(full_path, directory)
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    First and last byte of a single ``bytes=`` range. Returns None when the
+    whole file should be sent: no header, a malformed one or several ranges,
+    which RFC 9110 allows a server to ignore.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, _, last = header[6:].strip().partition("-")
+    try:
+        if not first:
+            # Suffix range: the last N bytes
+            length = int(last)
+            if length <= 0:
+                raise ValueError
+            start, end = max(size - length, 0), size - 1
+        else:
+            start = int(first)
+            end = int(last) if last else size - 1
+            if last and end < start:
+                return None
+    except ValueError:
+        return None
+    if start >= size:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail="Range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"}
+        )
+    return start, min(end, size - 1)
+
+def _if_range_matches(if_range: str, etag: str, last_modified: str) -> bool:
+    # If-Range needs a strong validator: a weak ETag never matches
+    if if_range.startswith('"'):
+        return not etag.startswith("W/") and if_range == etag
+    return if_range == last_modified
+
+def _not_modified(request: Request, etag: str, mtime: float) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag_matches(if_none_match, etag)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+class FileSliceResponse(Response):
+    """
+    Send ``length`` bytes of a file from ``offset`` without loading it into
+    memory: through the ASGI zero-copy extension when the server offers it,
+    otherwise in DOWNLOAD_CHUNK_SIZE reads.
+    """
+    def __init__(
+        self,
+        path: str,
+        offset: int,
+        length: int,
+        status_code: int = 200,
+        headers: Optional[Dict[str, str]] = None,
+        media_type: Optional[str] = None
+    ):
+        self.path = path
+        self.offset = offset
+        self.length = length
+        self.status_code = status_code
+        self.media_type = media_type
+        self.background = None
+        self.init_headers(headers)
+        self.headers["content-length"] = str(length)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers,
+        })
+        if scope["method"] == "HEAD" or not self.length:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        if "http.response.zerocopysend" in scope.get("extensions", {}):
+            with open(self.path, "rb") as file:
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": file.fileno(),
+                    "offset": self.offset,
+                    "count": self.length,
+                    "more_body": False,
+                })
+            return
+
+        async with await anyio.open_file(self.path, "rb") as file:
+            await file.seek(self.offset)
+            remaining = self.length
+            while remaining:
+                chunk = await file.read(min(settings.DOWNLOAD_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": bool(remaining)})
+        if remaining:
+            # The file shrank while being sent; close the body anyway
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+async def send_file(
+    request: Request,
+    root: str,
+    path: str,
+    *,
+    content_hash: Optional[str] = None,
+    media_type: Optional[str] = None,
+    filename: Optional[str] = None,
+    inline: bool = False
+) -> Response:
+    """
+    Serve a stored file with conditional requests and byte ranges.
+
+    ``content_hash`` (the SHA-256 of stored uploads) gives a strong ETag;
+    other files get a weak one from their size and modification time. With
+    DOWNLOAD_X_ACCEL_REDIRECT the body is left to nginx, which sends it with
+    sendfile and answers ranges itself; this only authorises the download
+    and answers revalidations.
+    """
+    full_path, relative_path = resolve_path(root, path)
+    try:
+        stat = await run_in_threadpool(os.stat, full_path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
+    if not os.path.isfile(full_path):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
+
+    etag = f'"{content_hash}"' if content_hash else f'W/"{int(stat.st_mtime):x}-{stat.st_size:x}"'
+    last_modified = formatdate(stat.st_mtime, usegmt=True)
+    filename = filename or os.path.basename(full_path)
+    media_type = media_type or mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    headers = {
+        "etag": etag,
+        "last-modified": last_modified,
+        "accept-ranges": "bytes",
+        # Downloads require authentication: browsers may keep them but must revalidate
+        "cache-control": "private, no-cache",
+        "content-disposition": f"{'inline' if inline else 'attachment'}; filename*=utf-8''{quote(filename)}",
+    }
+
+    if _not_modified(request, etag, stat.st_mtime):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    if settings.DOWNLOAD_X_ACCEL_REDIRECT:
+        headers["x-accel-redirect"] = ACCEL_LOCATIONS[root] + quote(relative_path)
+        return Response(headers=headers, media_type=media_type)
+
+    byte_range = parse_range(request.headers.get("range"), stat.st_size)
+    if_range = request.headers.get("if-range")
+    if byte_range and if_range and not _if_range_matches(if_range, etag, last_modified):
+        byte_range = None
+    if byte_range is None:
+        return FileSliceResponse(full_path, 0, stat.st_size, headers=headers, media_type=media_type)
+
+    start, end = byte_range
+    headers["content-range"] = f"bytes {start}-{end}/{stat.st_size}"
+    return FileSliceResponse(
+        full_path,
+        start,
+        end - start + 1,
+        status_code=status.HTTP_206_PARTIAL_CONTENT,
+        headers=headers,
+        media_type=media_type
+    )
@@ -3,81 +3,133 @@ Middleware personalizado para la aplicación.
 Incluye middleware para logging, manejo de errores y métricas.
 """
 
+import itertools
+import os
 import time
 from fastapi import Request
+from fastapi.responses import JSONResponse
 from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from .logger import logger
-from .exceptions import AppError
 
-class LoggingMiddleware(BaseHTTPMiddleware):
+REQUEST_ID_HEADER = b"x-request-id"
+
+# Prefijo aleatorio por proceso + contador: único entre workers y sin
+# llamadas al sistema por request
+_request_id_prefix = os.urandom(4).hex()
+_request_id_counter = itertools.count(1)
+
+def generate_request_id() -> str:
+    """Genera un ID de request único de forma barata."""
+    return f"{_request_id_prefix}-{next(_request_id_counter):x}"
+
+def get_request_id(scope: Scope) -> str:
+    """Obtiene (o asigna) el ID de la request guardado en el estado del scope."""
+    state = scope.setdefault("state", {})
+    request_id = state.get("request_id")
+    if request_id is None:
+        request_id = generate_request_id()
+        state["request_id"] = request_id
+    return request_id
+
+class LoggingMiddleware:
     """
-    Middleware para registrar información sobre las solicitudes HTTP.
-    Registra el tiempo de respuesta, método, ruta y código de estado.
+    Middleware ASGI para registrar información sobre las solicitudes HTTP.
+    Registra el tiempo de respuesta, método, ruta y código de estado, y
+    añade las cabeceras X-Process-Time y X-Request-ID sin envolver el cuerpo
+    de la respuesta (compatible con respuestas en streaming).
     """
-    async def dispatch(self, request: Request, call_next):
-        start_time = time.time()
-        
-        # Generar ID único para la request
-        request_id = str(time.time())
-        request.state.request_id = request_id
-        
-        # Log de inicio de request
-        logger.bind(request_id=request_id).info(
-            f"Started {request.method} {request.url.path}"
-        )
-        
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        request_id = get_request_id(scope)
+        method = scope["method"]
+        path = scope["path"]
+        status_code = 500
+
+        logger.bind(request_id=request_id).info(f"Started {method} {path}")
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                process_time = time.perf_counter() - start_time
+                headers = list(message.get("headers", []))
+                headers.append((b"x-process-time", str(process_time).encode()))
+                headers.append((REQUEST_ID_HEADER, request_id.encode()))
+                message["headers"] = headers
+            await send(message)
+
         try:
-            response = await call_next(request)
-            
-            # Calcular tiempo de proceso
-            process_time = time.time() - start_time
-            
-            # Log de fin de request
-            logger.bind(
-                request_id=request_id,
-                access=True
-            ).info(
-                f"Completed {request.method} {request.url.path} "
-                f"[{response.status_code}] in {process_time:.2f}s"
-            )
-            
-            # Agregar headers de rendimiento
-            response.headers["X-Process-Time"] = str(process_time)
-            response.headers["X-Request-ID"] = request_id
-            
-            return response
-            
+            await self.app(scope, receive, send_wrapper)
         except Exception as e:
-            # Log de error
             logger.bind(request_id=request_id).error(
-                f"Error processing {request.method} {request.url.path}: {str(e)}"
+                f"Error processing {method} {path}: {str(e)}"
             )
             raise
 
-class ErrorHandlingMiddleware(BaseHTTPMiddleware):
+        process_time = time.perf_counter() - start_time
+        logger.bind(
+            request_id=request_id,
+            access=True
+        ).info(
+            f"Completed {method} {path} [{status_code}] in {process_time:.2f}s"
+        )
+
+class ErrorHandlingMiddleware:
     """
-    Middleware para el manejo centralizado de errores.
-    Captura excepciones y las convierte en respuestas HTTP apropiadas.
+    Middleware ASGI para el manejo centralizado de errores.
+    Convierte excepciones no controladas en respuestas JSON, siempre que la
+    respuesta no haya empezado a enviarse.
     """
-    async def dispatch(self, request: Request, call_next):
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        response_started = False
+
+        async def send_wrapper(message: Message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
         try:
-            return await call_next(request)
-        except AppError as e:
-            # Manejar errores de aplicación personalizados
-            logger.bind(
-                request_id=request.state.request_id
-            ).error(f"Application error: {str(e)}")
-            return e.to_response()
+            await self.app(scope, receive, send_wrapper)
         except Exception as e:
-            # Manejar errores no esperados
-            logger.bind(
-                request_id=request.state.request_id
-            ).exception("Unexpected error occurred")
-            return {
-                "detail": "Internal server error",
-                "type": "InternalError",
-                "request_id": request.state.request_id
-            }
+            if response_started:
+                raise
+
+            request_id = get_request_id(scope)
+            status_code = getattr(e, "status_code", None)
+            if isinstance(status_code, int):
+                # Errores de aplicación con código HTTP propio
+                logger.bind(request_id=request_id).error(f"Application error: {str(e)}")
+                response = JSONResponse(
+                    status_code=status_code,
+                    content={"detail": getattr(e, "detail", str(e)), "request_id": request_id}
+                )
+            else:
+                logger.bind(request_id=request_id).exception("Unexpected error occurred")
+                response = JSONResponse(
+                    status_code=500,
+                    content={
+                        "detail": "Internal server error",
+                        "type": "InternalError",
+                        "request_id": request_id
+                    }
+                )
+            await response(scope, receive, send)
 
 class MetricsMiddleware(BaseHTTPMiddleware):
     """
@@ -8,11 +8,8 @@ from prometheus_client import (
     Counter, Histogram, Gauge,
     generate_latest, CONTENT_TYPE_LATEST
 )
-import sentry_sdk
-from sentry_sdk.integrations.fastapi import FastApiIntegration
-from sentry_sdk.integrations.sqlalchemy import SqlalchemyIntegration
 from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from .config import settings
 from .logger import logger
 import logging
@@ -27,6 +24,11 @@ logger = logging.getLogger(__name__)
 # Configuración de Sentry
 def init_sentry():
     """Inicializar Sentry para rastreo de errores"""
+    # Sentry se importa solo cuando se inicializa
+    import sentry_sdk
+    from sentry_sdk.integrations.fastapi import FastApiIntegration
+    from sentry_sdk.integrations.sqlalchemy import SqlalchemyIntegration
+
     sentry_sdk.init(
         dsn=settings.sentry_dsn,
         environment=settings.environment,
@@ -66,6 +68,41 @@ notification_total = Counter(
     ['type', 'channel', 'status']
 )
 
+websocket_dropped_connections_total = Counter(
+    'websocket_dropped_connections_total',
+    'WebSocket connections dropped by the server',
+    ['reason']
+)
+
+notification_digest_events_total = Counter(
+    'notification_digest_events_total',
+    'Notificaciones procesadas por la etapa de digest',
+    ['outcome']
+)
+
+cache_requests_total = Counter(
+    'cache_requests_total',
+    'Two-tier cache lookups by result',
+    ['namespace', 'result']
+)
+
+response_cache_requests_total = Counter(
+    'response_cache_requests_total',
+    'Cached GET responses by result (hit, miss, not_modified)',
+    ['route', 'result']
+)
+
+db_n_plus_one_total = Counter(
+    'db_n_plus_one_total',
+    'Sentencias SQL repetidas (N+1) detectadas por endpoint',
+    ['endpoint']
+)
+audit_entries_total = Counter(
+    'audit_entries_total',
+    'Entradas del log de auditoría por forma de escritura',
+    ['outcome']
+)
+
 # Histogramas
 request_duration_seconds = Histogram(
     'request_duration_seconds',
@@ -81,12 +118,44 @@ db_operation_duration_seconds = Histogram(
     buckets=[0.01, 0.05, 0.1, 0.5, 1.0]
 )
 
+db_queries_per_request = Histogram(
+    'db_queries_per_request',
+    'Consultas SQL ejecutadas por solicitud HTTP',
+    ['method', 'endpoint'],
+    buckets=[0, 1, 2, 5, 10, 20, 50, 100, 200, 500]
+)
+
+db_time_per_request_seconds = Histogram(
+    'db_time_per_request_seconds',
+    'Tiempo total en la base de datos por solicitud HTTP',
+    ['method', 'endpoint'],
+    buckets=[0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0]
+)
+
+audit_flush_batch_size = Histogram(
+    'audit_flush_batch_size',
+    'Entradas de auditoría escritas por lote',
+    buckets=[1, 5, 10, 50, 100, 200, 500, 1000]
+)
+
 notification_duration = Histogram(
     'notification_duration_seconds',
     'Time spent sending notifications',
     ['type', 'channel']
 )
 
+websocket_send_duration_seconds = Histogram(
+    'websocket_send_duration_seconds',
+    'Time spent writing a single message to a WebSocket',
+    buckets=[0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0]
+)
+
+websocket_send_queue_depth = Histogram(
+    'websocket_send_queue_depth',
+    'Outbound queue depth of a WebSocket connection observed on enqueue',
+    buckets=[0, 1, 2, 5, 10, 25, 50, 100, 250]
+)
+
 # Gauges
 active_requests = Gauge(
     'active_requests',
@@ -103,47 +172,72 @@ notification_queue_size = Gauge(
     'Number of notifications in queue'
 )
 
-class PrometheusMiddleware(BaseHTTPMiddleware):
-    """Middleware para recolectar métricas de Prometheus"""
-    
-    async def dispatch(self, request: Request, call_next):
-        start_time = time.time()
-        method = request.method
-        path = request.url.path
-        
+websocket_connections = Gauge(
+    'websocket_connections',
+    'Number of open notification WebSocket connections'
+)
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+def route_template(scope) -> str:
+    """
+    Plantilla de la ruta que atendió la request (p. ej. "/properties/{property_id}").
+    Solo está disponible una vez que el router ha procesado la request.
+    """
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+class PrometheusMiddleware:
+    """
+    Middleware ASGI para recolectar métricas de Prometheus.
+    Etiqueta por plantilla de ruta para mantener acotada la cardinalidad.
+    """
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        method = scope["method"]
+        status = 500
+
+        async def send_wrapper(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
         # Incrementar contadores
         active_requests.inc()
-        
+
         try:
-            response = await call_next(request)
-            
-            # Registrar métricas
-            duration = time.time() - start_time
-            status = response.status_code
-            
-            http_requests_total.labels(
-                method=method,
-                endpoint=path,
-                status=status
-            ).inc()
-            
-            request_duration_seconds.labels(
-                method=method,
-                endpoint=path
-            ).observe(duration)
-            
-            return response
-            
+            await self.app(scope, receive, send_wrapper)
         except Exception as e:
             # Registrar errores
             errors_total.labels(
                 type=type(e).__name__,
-                endpoint=path
+                endpoint=route_template(scope)
             ).inc()
             raise
-            
         finally:
             active_requests.dec()
+            # Registrar métricas
+            duration = time.perf_counter() - start_time
+            endpoint = route_template(scope)
+
+            http_requests_total.labels(
+                method=method,
+                endpoint=endpoint,
+                status=status
+            ).inc()
+
+            request_duration_seconds.labels(
+                method=method,
+                endpoint=endpoint
+            ).observe(duration)
 
 async def metrics_endpoint():
     """Endpoint para exponer métricas de Prometheus"""
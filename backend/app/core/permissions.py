@@ -1,4 +1,4 @@
-from typing import Dict, List, Set
+from typing import Dict, Iterable, List, Set, Tuple
 from enum import Enum
 from fastapi import HTTPException
 
@@ -46,10 +46,83 @@ class PermissionLevel(Enum):
     APPROVE = "approve"
     ADMIN = "admin"
 
+class PermissionMatrix:
+    """
+    Roles y permisos compilados a máscaras de bits: cada permiso es un bit y
+    cada rol la OR de los suyos. Comprobar varios permisos es un único AND
+    (``allows``) en lugar de recorrer listas de roles en cada petición.
+    """
+    def __init__(self, roles: Dict[str, List[str]], extra_permissions: Iterable[str] = ()):
+        self.bits: Dict[str, int] = {}
+        for permissions in roles.values():
+            self.require(permissions)
+        self.require(extra_permissions)
+        self.roles: Dict[str, int] = {
+            role: self.mask(permissions) for role, permissions in roles.items()
+        }
+        self._combinations: Dict[Tuple[str, ...], int] = {}
+
+    def require(self, permissions: Iterable[str]) -> int:
+        """
+        Máscara de permisos requeridos. Un permiso desconocido recibe un bit
+        propio que ningún rol concede, así que nunca se cumple por omisión.
+        """
+        mask = 0
+        for permission in permissions:
+            bit = self.bits.get(permission)
+            if bit is None:
+                bit = self.bits[permission] = 1 << len(self.bits)
+            mask |= bit
+        return mask
+
+    def mask(self, permissions: Iterable[str]) -> int:
+        """Máscara de permisos concedidos; los desconocidos se ignoran."""
+        mask = 0
+        for permission in permissions:
+            mask |= self.bits.get(permission, 0)
+        return mask
+
+    def for_roles(self, roles: Iterable[str]) -> int:
+        """Permisos de una combinación de roles, resuelta una sola vez."""
+        # Solo roles conocidos: el número de combinaciones está acotado
+        key = tuple(sorted({role for role in roles if role in self.roles}))
+        mask = self._combinations.get(key)
+        if mask is None:
+            mask = 0
+            for role in key:
+                mask |= self.roles.get(role, 0)
+            self._combinations[key] = mask
+        return mask
+
+    def resolve(self, roles: Iterable[str], permissions: Iterable[str]) -> int:
+        """Permisos efectivos: los de sus roles más los concedidos directamente."""
+        return self.for_roles(roles or ()) | self.mask(permissions or ())
+
+    def names(self, mask: int) -> Set[str]:
+        return {permission for permission, bit in self.bits.items() if mask & bit}
+
+    @staticmethod
+    def allows(mask: int, required: int) -> bool:
+        return mask & required == required
+
+# Compilada una vez al importar; la comparten modelos, servicios y endpoints
+role_permissions = PermissionMatrix(
+    ROLE_PERMISSIONS,
+    extra_permissions=[level.value for level in PermissionLevel]
+)
+_ASSIGNABLE_PERMISSIONS = role_permissions.names(role_permissions.for_roles(ROLE_PERMISSIONS))
+
 class ExpensePermission:
     def __init__(self, user, expense=None):
         self.user = user
         self.expense = expense
+        # Roles resueltos una vez por comprobación, no en cada can_*
+        self.permission_mask = user.permission_mask
+
+    def _has_permission(self, permission: PermissionLevel) -> bool:
+        return self.user.is_superuser or PermissionMatrix.allows(
+            self.permission_mask, role_permissions.bits[permission.value]
+        )
 
     def can_create(self) -> bool:
         return self.user.is_active
@@ -61,7 +134,7 @@ class ExpensePermission:
             self.user.is_active and
             (self.user.is_superuser or
              self.expense.created_by_id == self.user.id or
-             self.user.has_permission(PermissionLevel.READ))
+             self._has_permission(PermissionLevel.READ))
         )
 
     def can_update(self) -> bool:
@@ -71,7 +144,7 @@ class ExpensePermission:
             self.user.is_active and
             (self.user.is_superuser or
              self.expense.created_by_id == self.user.id or
-             self.user.has_permission(PermissionLevel.WRITE))
+             self._has_permission(PermissionLevel.WRITE))
         )
 
     def can_delete(self) -> bool:
@@ -88,7 +161,7 @@ class ExpensePermission:
             return False
         return (
             self.user.is_active and
-            self.user.has_permission(PermissionLevel.APPROVE) and
+            self._has_permission(PermissionLevel.APPROVE) and
             self.expense.created_by_id != self.user.id  # No self-approval
         )
 
@@ -112,16 +185,13 @@ def get_permissions_for_role(role: str) -> Set[str]:
     """
     Obtiene todos los permisos asociados a un rol específico
     """
-    return set(ROLE_PERMISSIONS.get(role, []))
+    return role_permissions.names(role_permissions.roles.get(role, 0))
 
 def get_all_permissions_for_roles(roles: List[str]) -> Set[str]:
     """
     Obtiene todos los permisos únicos para una lista de roles
     """
-    permissions = set()
-    for role in roles:
-        permissions.update(get_permissions_for_role(role))
-    return permissions
+    return role_permissions.names(role_permissions.for_roles(roles))
 
 def get_all_available_roles() -> List[str]:
     """
@@ -133,10 +203,7 @@ def get_all_available_permissions() -> Set[str]:
     """
     Retorna todos los permisos únicos disponibles en el sistema
     """
-    permissions = set()
-    for role_permissions in ROLE_PERMISSIONS.values():
-        permissions.update(role_permissions)
-    return permissions
+    return set(_ASSIGNABLE_PERMISSIONS)
 
 def validate_role(role: str) -> bool:
     """
@@ -148,7 +215,7 @@ def validate_permission(permission: str) -> bool:
     """
     Valida si un permiso existe en el sistema
     """
-    return permission in get_all_available_permissions()
+    return permission in _ASSIGNABLE_PERMISSIONS
 
 def get_role_hierarchy() -> Dict[str, Dict]:
     """
@@ -0,0 +1,228 @@
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from typing import Awaitable, Callable, Dict, Optional, Set, Union
+from app.core.config import settings
+from app.core.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+# Handlers receive (channel, message) and may be sync or async
+MessageHandler = Callable[[str, str], Union[None, Awaitable[None]]]
+
+class PubSubBackend(ABC):
+    """
+    Base class for the cross-worker message backplane.
+
+    Subscriptions are reference counted per channel so that several local
+    sockets of the same user share one backend subscription, and the backend
+    is only subscribed to channels that have at least one local listener.
+    Subclasses implement ``publish``, ``_backend_subscribe`` and
+    ``_backend_unsubscribe``.
+    """
+    def __init__(self):
+        self._handlers: Dict[str, MessageHandler] = {}
+        self._refcounts: Dict[str, int] = defaultdict(int)
+        self._subscribed: Set[str] = set()
+        self._lock: Optional[asyncio.Lock] = None
+
+    @staticmethod
+    def channel(*parts) -> str:
+        """
+        Build a namespaced channel name.
+        """
+        return ":".join([settings.PUBSUB_CHANNEL_PREFIX, *(str(part) for part in parts)])
+
+    @abstractmethod
+    async def publish(self, channel: str, message: str):
+        ...
+
+    async def subscribe(self, channel: str, handler: MessageHandler):
+        """
+        Add a listener for a channel, subscribing the backend on the first one.
+        """
+        self._handlers[channel] = handler
+        self._refcounts[channel] += 1
+        await self._reconcile(channel)
+
+    async def unsubscribe(self, channel: str):
+        """
+        Remove a listener for a channel, unsubscribing the backend on the last one.
+        """
+        if self._drop_reference(channel):
+            await self._reconcile(channel)
+
+    def release(self, channel: str):
+        """
+        Synchronous variant of ``unsubscribe`` for disconnect paths.
+        """
+        if self._drop_reference(channel):
+            asyncio.create_task(self._reconcile(channel))
+
+    def _drop_reference(self, channel: str) -> bool:
+        if self._refcounts.get(channel, 0) <= 0:
+            return False
+        self._refcounts[channel] -= 1
+        if self._refcounts[channel] == 0:
+            del self._refcounts[channel]
+            return True
+        return False
+
+    async def _reconcile(self, channel: str):
+        # Bring the backend subscription in line with the current refcount;
+        # running under a lock keeps quick disconnect/reconnect cycles ordered
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            wanted = self._refcounts.get(channel, 0) > 0
+            try:
+                if wanted and channel not in self._subscribed:
+                    await self._backend_subscribe(channel)
+                    self._subscribed.add(channel)
+                elif not wanted and channel in self._subscribed:
+                    await self._backend_unsubscribe(channel)
+                    self._subscribed.discard(channel)
+                    self._handlers.pop(channel, None)
+            except Exception as e:
+                logger.error(f"Error updating subscription for channel {channel}: {str(e)}")
+
+    @abstractmethod
+    async def _backend_subscribe(self, channel: str):
+        ...
+
+    @abstractmethod
+    async def _backend_unsubscribe(self, channel: str):
+        ...
+
+    async def _dispatch(self, channel: str, message: str):
+        handler = self._handlers.get(channel)
+        if handler is None:
+            return
+        try:
+            result = handler(channel, message)
+            if asyncio.iscoroutine(result):
+                await result
+        except Exception as e:
+            logger.error(f"Error handling message on channel {channel}: {str(e)}")
+
+    async def close(self):
+        self._handlers.clear()
+        self._refcounts.clear()
+        self._subscribed.clear()
+
+class InMemoryBroker:
+    """
+    Process-local broker shared by InMemoryPubSub instances.
+
+    Each InMemoryPubSub stands in for one worker, so tests can exercise
+    cross-worker delivery without a Redis server.
+    """
+    def __init__(self):
+        self.subscribers: Dict[str, Set["InMemoryPubSub"]] = defaultdict(set)
+
+    async def publish(self, channel: str, message: str) -> int:
+        receivers = list(self.subscribers.get(channel, ()))
+        for receiver in receivers:
+            await receiver._dispatch(channel, message)
+        return len(receivers)
+
+class InMemoryPubSub(PubSubBackend):
+    def __init__(self, broker: Optional[InMemoryBroker] = None):
+        super().__init__()
+        self.broker = broker or InMemoryBroker()
+
+    async def publish(self, channel: str, message: str):
+        await self.broker.publish(channel, message)
+
+    async def _backend_subscribe(self, channel: str):
+        self.broker.subscribers[channel].add(self)
+
+    async def _backend_unsubscribe(self, channel: str):
+        receivers = self.broker.subscribers.get(channel)
+        if receivers is not None:
+            receivers.discard(self)
+            if not receivers:
+                del self.broker.subscribers[channel]
+
+    async def close(self):
+        for channel in list(self._subscribed):
+            await self._backend_unsubscribe(channel)
+        await super().close()
+
+class RedisPubSub(PubSubBackend):
+    """
+    Redis pub/sub backplane. A single reader task per worker receives the
+    messages of every channel this worker is subscribed to.
+    """
+    def __init__(self, client=None):
+        super().__init__()
+        self._client = client
+        self._pubsub = None
+        self._reader: Optional[asyncio.Task] = None
+
+    def _get_client(self):
+        if self._client is None:
+            self._client = get_redis_client()
+        if self._pubsub is None:
+            self._pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        return self._client
+
+    async def publish(self, channel: str, message: str):
+        await self._get_client().publish(channel, message)
+
+    async def _backend_subscribe(self, channel: str):
+        self._get_client()
+        await self._pubsub.subscribe(channel)
+        if self._reader is None or self._reader.done():
+            self._reader = asyncio.create_task(self._read_loop())
+
+    async def _backend_unsubscribe(self, channel: str):
+        if self._pubsub is not None:
+            await self._pubsub.unsubscribe(channel)
+
+    async def _read_loop(self):
+        while True:
+            try:
+                message = await self._pubsub.get_message(timeout=1.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error reading from Redis pub/sub: {str(e)}")
+                await asyncio.sleep(1)
+                continue
+
+            if message is None or message.get("type") != "message":
+                continue
+            await self._dispatch(message["channel"], message["data"])
+
+    async def close(self):
+        if self._reader is not None:
+            self._reader.cancel()
+            self._reader = None
+        if self._pubsub is not None:
+            await self._pubsub.close()
+        self._pubsub = None
+        await super().close()
+
+def create_pubsub_backend(backend: Optional[str] = None) -> PubSubBackend:
+    """
+    Create the backplane configured by ``PUBSUB_BACKEND``.
+    """
+    backend = (backend or settings.PUBSUB_BACKEND).lower()
+    if backend == "memory":
+        return InMemoryPubSub()
+    if backend == "redis":
+        return RedisPubSub()
+    raise ValueError(f"Unknown pub/sub backend: {backend}")
+
+_pubsub: Optional[PubSubBackend] = None
+
+def get_pubsub() -> PubSubBackend:
+    """
+    Return the process-wide backplane shared by the notification managers.
+    """
+    global _pubsub
+    if _pubsub is None:
+        _pubsub = create_pubsub_backend()
+    return _pubsub
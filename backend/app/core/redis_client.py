@@ -0,0 +1,35 @@
+import logging
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_client = None
+
+def get_redis_client():
+    """
+    Return the process-wide asyncio Redis client built from the REDIS_* settings.
+    """
+    global _client
+    if _client is None:
+        from redis import asyncio as aioredis
+
+        _client = aioredis.Redis(
+            host=settings.REDIS_HOST,
+            port=settings.REDIS_PORT,
+            password=settings.REDIS_PASSWORD or None,
+            db=settings.REDIS_DB,
+            decode_responses=True
+        )
+    return _client
+
+async def close_redis_client():
+    """
+    Close the shared Redis client, if it was created.
+    """
+    global _client
+    if _client is not None:
+        try:
+            await _client.close()
+        except Exception as e:
+            logger.error(f"Error closing Redis client: {str(e)}")
+        _client = None
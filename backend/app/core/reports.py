@@ -2,20 +2,21 @@
 Módulo para la generación de reportes en diferentes formatos.
 """
 
-from typing import Dict, List, Any
-import pandas as pd
-from fpdf import FPDF
+from typing import TYPE_CHECKING, Dict, List, Any
 from datetime import datetime
 import io
 import json
 from fastapi.responses import StreamingResponse
 from app.core.i18n import i18n
 
+if TYPE_CHECKING:
+    import pandas as pd
+
 class ReportGenerator:
     def __init__(self):
         self.supported_formats = ["pdf", "excel", "csv"]
         
-    def _prepare_data(self, data: List[Dict], report_type: str) -> pd.DataFrame:
+    def _prepare_data(self, data: List[Dict], report_type: str) -> "pd.DataFrame":
         """
         Prepara los datos para el reporte.
         
@@ -26,6 +27,9 @@ class ReportGenerator:
         Returns:
             pd.DataFrame: DataFrame con los datos procesados
         """
+        # pandas se importa al primer uso para no cargarlo al arrancar los workers
+        import pandas as pd
+
         df = pd.DataFrame(data)
         
         # Aplica transformaciones específicas según el tipo de reporte
@@ -54,6 +58,8 @@ class ReportGenerator:
         Returns:
             bytes: PDF generado
         """
+        from fpdf import FPDF
+
         pdf = FPDF()
         pdf.add_page()
         
@@ -96,6 +102,8 @@ class ReportGenerator:
         Returns:
             bytes: Archivo Excel generado
         """
+        import pandas as pd
+
         df = self._prepare_data(data, report_type)
         
         # Traduce los nombres de las columnas
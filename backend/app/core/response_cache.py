@@ -0,0 +1,320 @@
+import hashlib
+import json
+import logging
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Iterable, Optional, Sequence, Set, Tuple
+from fastapi import Request, Response
+from fastapi.dependencies.models import Dependant
+from fastapi.dependencies.utils import solve_dependencies
+from fastapi.exceptions import RequestValidationError
+from fastapi.routing import APIRoute
+from app.core.config import settings
+from app.core.monitoring import response_cache_requests_total
+from app.core.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+RESPONSE_CACHE_ATTR = "__response_cache__"
+
+@dataclass
+class ResponseCachePolicy:
+    tags: Tuple[str, ...]
+    ttl: int
+
+@dataclass
+class CachedResponse:
+    body: bytes
+    status_code: int
+    media_type: Optional[str]
+    etag: str
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "body": self.body.decode("latin-1"),
+            "status_code": self.status_code,
+            "media_type": self.media_type,
+            "etag": self.etag
+        })
+
+    @classmethod
+    def from_json(cls, raw: str) -> "CachedResponse":
+        data = json.loads(raw)
+        return cls(
+            body=data["body"].encode("latin-1"),
+            status_code=data["status_code"],
+            media_type=data["media_type"],
+            etag=data["etag"]
+        )
+
+def compute_etag(body: bytes) -> str:
+    """
+    Strong ETag for a response body.
+    """
+    return f'"{hashlib.sha256(body).hexdigest()}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Check an If-None-Match header against an ETag (weak comparison, as RFC 9110 requires).
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+class InMemoryResponseStore:
+    """
+    Process-local store used in tests and when CACHE_BACKEND is "memory".
+    """
+    def __init__(self):
+        self.entries: Dict[str, Tuple[float, CachedResponse]] = {}
+        self.tags: Dict[str, Set[str]] = {}
+
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        expires_at, cached = entry
+        if expires_at <= time.monotonic():
+            del self.entries[key]
+            return None
+        return cached
+
+    async def set(self, key: str, cached: CachedResponse, tags: Sequence[str], ttl: int):
+        self.entries[key] = (time.monotonic() + ttl, cached)
+        for tag in tags:
+            self.tags.setdefault(tag, set()).add(key)
+
+    async def invalidate(self, tags: Iterable[str]) -> int:
+        removed = 0
+        for tag in tags:
+            for key in self.tags.pop(tag, ()):
+                if self.entries.pop(key, None) is not None:
+                    removed += 1
+        return removed
+
+class RedisResponseStore:
+    """
+    Redis store. Each tag is a set of the cache keys of the responses built
+    from that entity, so invalidation deletes exactly those entries.
+    """
+    PREFIX = "response-cache"
+
+    def __init__(self, client=None):
+        self._client = client
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = get_redis_client()
+        return self._client
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{self.PREFIX}:tag:{tag}"
+
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        raw = await self.client.get(key)
+        return CachedResponse.from_json(raw) if raw is not None else None
+
+    async def set(self, key: str, cached: CachedResponse, tags: Sequence[str], ttl: int):
+        pipe = self.client.pipeline(transaction=False)
+        pipe.set(key, cached.to_json(), ex=ttl)
+        for tag in tags:
+            pipe.sadd(self._tag_key(tag), key)
+            pipe.expire(self._tag_key(tag), ttl)
+        await pipe.execute()
+
+    async def invalidate(self, tags: Iterable[str]) -> int:
+        removed = 0
+        for tag in tags:
+            tag_key = self._tag_key(tag)
+            keys = await self.client.smembers(tag_key)
+            if keys:
+                removed += await self.client.delete(*keys)
+            await self.client.delete(tag_key)
+        return removed
+
+class ResponseCache:
+    """
+    Cache for GET responses keyed by route, path, query string and caller.
+
+    Stored entries carry entity tags (e.g. ``property:42``); services call
+    ``invalidate`` with the tags of the entities they write. Every cached
+    response gets a strong ETag, and a matching ``If-None-Match`` is answered
+    with 304 without running the endpoint. Hits and 304s are only served
+    once ``authorize`` has accepted the caller.
+    """
+    def __init__(self, store=None):
+        self._store = store
+
+    @property
+    def store(self):
+        if self._store is None:
+            if settings.CACHE_BACKEND.lower() == "memory":
+                self._store = InMemoryResponseStore()
+            else:
+                self._store = RedisResponseStore()
+        return self._store
+
+    @staticmethod
+    def key_for(request: Request, route_path: str) -> str:
+        # The credentials identify the caller, so responses are never shared
+        # between users; they are still re-checked on every hit
+        credentials = request.headers.get("authorization", "")
+        query = "&".join(
+            f"{name}={value}" for name, value in sorted(request.query_params.multi_items())
+        )
+        digest = hashlib.sha256(
+            "\n".join([route_path, request.url.path, query, credentials]).encode()
+        ).hexdigest()
+        return f"{RedisResponseStore.PREFIX}:{digest}"
+
+    async def serve(
+        self,
+        request: Request,
+        route_path: str,
+        policy: ResponseCachePolicy,
+        call_next: Callable,
+        authorize: Optional[Callable[[Request], Awaitable[None]]] = None
+    ) -> Response:
+        key = self.key_for(request, route_path)
+        try:
+            cached = await self.store.get(key)
+        except Exception as e:
+            logger.error(f"Error reading response cache: {str(e)}")
+            cached = None
+
+        if cached is not None and authorize is not None:
+            # A revoked token or a lost permission must not keep getting
+            # cached bodies; raises like the endpoint's own dependencies
+            await authorize(request)
+
+        if cached is None:
+            response = await call_next(request)
+            body = getattr(response, "body", None)
+            if response.status_code != 200 or body is None:
+                return response
+
+            cached = CachedResponse(
+                body=body,
+                status_code=response.status_code,
+                media_type=response.media_type,
+                etag=compute_etag(body)
+            )
+            tags = [tag.format(**request.path_params) for tag in policy.tags]
+            try:
+                await self.store.set(key, cached, tags, policy.ttl)
+            except Exception as e:
+                logger.error(f"Error writing response cache: {str(e)}")
+            result = "miss"
+        else:
+            result = "hit"
+
+        headers = {"ETag": cached.etag, "Cache-Control": "private, no-cache"}
+        if etag_matches(request.headers.get("if-none-match"), cached.etag):
+            response_cache_requests_total.labels(route=route_path, result="not_modified").inc()
+            return Response(status_code=304, headers=headers)
+
+        response_cache_requests_total.labels(route=route_path, result=result).inc()
+        return Response(
+            content=cached.body,
+            status_code=cached.status_code,
+            media_type=cached.media_type,
+            headers=headers
+        )
+
+    async def invalidate(self, *tags: str):
+        """
+        Drop every cached response that carries any of the given tags.
+        """
+        tags = [tag for tag in tags if tag]
+        if not tags:
+            return
+        try:
+            await self.store.invalidate(tags)
+        except Exception as e:
+            logger.error(f"Error invalidating response cache tags {tags}: {str(e)}")
+
+response_cache = ResponseCache()
+
+def cache_response(*tags: str, ttl: Optional[int] = None):
+    """
+    Mark a GET endpoint as cacheable.
+
+    Tags may reference path parameters, e.g. ``"property:{property_id}"``.
+    Only takes effect on routers created with ``route_class=CachedRoute``.
+    """
+    def decorator(endpoint):
+        setattr(
+            endpoint,
+            RESPONSE_CACHE_ATTR,
+            ResponseCachePolicy(tags=tags, ttl=ttl or settings.RESPONSE_CACHE_TTL)
+        )
+        return endpoint
+    return decorator
+
+def _uses_security(dependant: Dependant) -> bool:
+    return bool(dependant.security_requirements) or any(
+        _uses_security(sub_dependant) for sub_dependant in dependant.dependencies
+    )
+
+def auth_dependant(dependant: Dependant) -> Optional[Dependant]:
+    """
+    The dependencies of an endpoint that authenticate or authorize the caller,
+    i.e. those that read a security scheme such as ``get_current_user`` and
+    ``check_permissions``.
+    """
+    dependencies = [
+        sub_dependant for sub_dependant in dependant.dependencies
+        if _uses_security(sub_dependant)
+    ]
+    if not dependencies:
+        return None
+    return Dependant(dependencies=dependencies, path=dependant.path)
+
+class CachedRoute(APIRoute):
+    """
+    Route class that serves endpoints marked with ``cache_response`` from the response cache.
+
+    The endpoint's authentication and permission dependencies run before
+    every cache hit or 304; the rest of the endpoint only runs on a miss.
+    """
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+        policy: Optional[ResponseCachePolicy] = getattr(self.endpoint, RESPONSE_CACHE_ATTR, None)
+        if policy is None or "GET" not in self.methods:
+            return handler
+
+        route_path = self.path
+        authorize = self.get_authorizer()
+
+        async def cached_handler(request: Request) -> Response:
+            if request.method != "GET":
+                return await handler(request)
+            return await response_cache.serve(request, route_path, policy, handler, authorize)
+
+        return cached_handler
+
+    def get_authorizer(self) -> Optional[Callable[[Request], Awaitable[None]]]:
+        auth = auth_dependant(self.dependant)
+        if auth is None:
+            return None
+
+        async def authorize(request: Request):
+            _, errors, _, _, _ = await solve_dependencies(
+                request=request,
+                dependant=auth,
+                dependency_overrides_provider=self.dependency_overrides_provider
+            )
+            if errors:
+                raise RequestValidationError(errors)
+
+        return authorize
@@ -1,6 +1,7 @@
 """
 Security module for handling authentication and authorization
 """
+import time
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
 import jwt
@@ -8,8 +9,13 @@ from fastapi import HTTPException, status, Security, Depends
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 import httpx
 from jwt.exceptions import InvalidTokenError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from .config import settings
+from .database import get_db
+from .permissions import PermissionMatrix
 from .test_auth import get_test_user, verify_test_token
+from .tiered_cache import LocalLRUCache
 
 security = HTTPBearer(
     scheme_name="JWT",
@@ -73,11 +79,43 @@ async def verify_token(token: str) -> Dict[str, Any]:
                 detail=f"Error validating token: {str(e)}",
             )
 
+class TokenUser(dict):
+    """
+    Token claims together with the user's effective permissions, resolved
+    once per token into a ``token_permissions`` bitmask.
+    """
+    __slots__ = ("permission_mask",)
+
+    def __init__(self, claims: Dict[str, Any]):
+        super().__init__(claims)
+        self.permission_mask = permission_mask(claims)
+
+def permission_mask(user: Dict[str, Any]) -> int:
+    """Bitmask of the permissions granted directly or through roles in a set of claims."""
+    mask = getattr(user, "permission_mask", None)
+    if mask is None:
+        mask = token_permissions.resolve(user.get("roles", []), user.get("permissions", []))
+    return mask
+
+_token_cache = LocalLRUCache(
+    max_entries=settings.AUTH_TOKEN_CACHE_SIZE,
+    ttl=settings.AUTH_TOKEN_CACHE_TTL
+)
+
+def _cache_user(token: str, user_data: Dict[str, Any]) -> "TokenUser":
+    user = TokenUser(user_data)
+    expires_at = user_data.get("exp")
+    ttl = expires_at - time.time() if isinstance(expires_at, (int, float)) else None
+    if ttl is None or ttl > 0:
+        _token_cache.set(token, user, ttl)
+    return user
+
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Security(security)
 ) -> Dict[str, Any]:
     """
-    Get current user based on environment
+    Get current user based on environment. Verified tokens are cached with
+    their resolved permissions, so repeated requests skip verification.
     """
     if not credentials:
         raise HTTPException(
@@ -85,10 +123,14 @@ async def get_current_user(
             detail="Not authenticated"
         )
 
+    token = credentials.credentials
+    cached = _token_cache.get(token)
+    if isinstance(cached, TokenUser):
+        return cached
+
     if settings.ENVIRONMENT == "test":
-        return await get_test_user(credentials)
+        return _cache_user(token, await get_test_user(credentials))
     
-    token = credentials.credentials
     user_data = await verify_token(token)
     
     if not user_data:
@@ -103,16 +145,46 @@ async def get_current_user(
             detail="Inactive user",
         )
     
-    return user_data
+    return _cache_user(token, user_data)
+
+async def get_local_user(db: AsyncSession, user: Dict[str, Any]):
+    """
+    Local ``users`` row for a set of token claims, matched by email. Clerk's
+    ``sub`` is not a ``users.id``; returns None when there is no local account.
+    """
+    from app.models.user import User
+
+    email = user.get("email")
+    if not email:
+        return None
+    result = await db.execute(select(User).where(User.email == email))
+    return result.scalar_one_or_none()
+
+async def get_current_local_user(
+    db: AsyncSession = Depends(get_db),
+    user: Dict[str, Any] = Depends(get_current_user)
+):
+    """
+    Local ``users`` row of the authenticated user, for endpoints that write
+    integer user foreign keys.
+    """
+    local_user = await get_local_user(db, user)
+    if local_user is None or not local_user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No active local account for this user",
+        )
+    return local_user
 
 def check_permissions(required_permissions: list[str]):
     """
-    Check if user has required permissions
+    Check if user has required permissions. The requirement is compiled
+    when the route is declared; each check is a single bitwise AND.
     """
+    required = token_permissions.require(required_permissions)
+
     async def permission_checker(user: Dict[str, Any] = Depends(get_current_user)):
-        user_permissions = user.get('permissions', [])
-        
-        if not all(perm in user_permissions for perm in required_permissions):
+        if not PermissionMatrix.allows(permission_mask(user), required):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Not enough permissions"
@@ -161,6 +233,9 @@ ROLES = {
     ],
 }
 
+# Compiled once at import and shared by every check_permissions dependency
+token_permissions = PermissionMatrix(ROLES)
+
 def create_test_token(user_id: str = "test_user", role: str = "admin") -> str:
     """Create a test JWT token with specified user_id and role"""
     permissions = ROLES.get(role, [])
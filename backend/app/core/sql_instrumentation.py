@@ -0,0 +1,197 @@
+import logging
+import os
+import random
+import sys
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional
+from sqlalchemy import event
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.config import settings
+from app.core.monitoring import (
+    db_n_plus_one_total,
+    db_queries_per_request,
+    db_time_per_request_seconds,
+    route_template,
+)
+
+logger = logging.getLogger(__name__)
+
+MODE_OFF = "off"
+MODE_SAMPLE = "sample"
+MODE_STRICT = "strict"
+
+_APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) + os.sep
+_THIS_FILE = os.path.abspath(__file__)
+_START_TIMES_KEY = "sql_instrumentation_start_times"
+
+class NPlusOneError(RuntimeError):
+    """
+    Raised in strict mode when a request repeats the same statement too often.
+    """
+
+@dataclass
+class NPlusOneFinding:
+    statement: str
+    count: int
+    call_site: str
+
+@dataclass
+class QueryStats:
+    """
+    Queries issued while handling one request (or one ``track_queries`` block).
+    """
+    detect: bool = False
+    strict: bool = False
+    threshold: int = 10
+    count: int = 0
+    duration: float = 0.0
+    statements: Dict[str, int] = field(default_factory=dict)
+    findings: List[NPlusOneFinding] = field(default_factory=list)
+
+    def record(self, statement: str, duration: float):
+        self.count += 1
+        self.duration += duration
+        if not self.detect:
+            return
+
+        repeats = self.statements.get(statement, 0) + 1
+        self.statements[statement] = repeats
+        if repeats == self.threshold:
+            # Only the first crossing pays for the stack walk
+            finding = NPlusOneFinding(statement, repeats, _call_site())
+            self.findings.append(finding)
+            message = (
+                f"N+1 query: statement ran {self.threshold} times in one request "
+                f"from {finding.call_site}: {_shorten(statement)}"
+            )
+            if self.strict:
+                raise NPlusOneError(message)
+            logger.warning(message)
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.duration * 1000:.1f};desc="{self.count} queries"'
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("sql_query_stats", default=None)
+
+def current_query_stats() -> Optional[QueryStats]:
+    return _current_stats.get()
+
+def _shorten(statement: str, limit: int = 200) -> str:
+    statement = " ".join(statement.split())
+    return statement if len(statement) <= limit else statement[:limit] + "..."
+
+def _is_app_frame(frame) -> bool:
+    filename = frame.f_code.co_filename
+    return filename.startswith(_APP_ROOT) and filename != _THIS_FILE
+
+def _format_frame(frame) -> str:
+    filename = os.path.relpath(frame.f_code.co_filename, os.path.dirname(_APP_ROOT))
+    return f"{filename}:{frame.f_lineno} in {frame.f_code.co_name}"
+
+def _greenlet_parent_frame():
+    # AsyncSession runs the driver in a child greenlet, so the current stack
+    # stops at SQLAlchemy; the awaiting application code is on the stack of
+    # the parent greenlet, suspended where it switched to the child
+    try:
+        from greenlet import getcurrent
+    except ImportError:
+        return None
+    parent = getcurrent().parent
+    return parent.gr_frame if parent is not None else None
+
+def _call_site() -> str:
+    """
+    Innermost application frame that issued the current statement.
+    """
+    for frame in (sys._getframe(1), _greenlet_parent_frame()):
+        while frame is not None:
+            if _is_app_frame(frame):
+                return _format_frame(frame)
+            frame = frame.f_back
+    return "<unknown>"
+
+def _new_stats(mode: Optional[str] = None) -> QueryStats:
+    mode = (mode or settings.SQL_INSTRUMENTATION_MODE).lower()
+    strict = mode == MODE_STRICT
+    return QueryStats(
+        detect=strict or random.random() < settings.SQL_INSTRUMENTATION_SAMPLE_RATE,
+        strict=strict,
+        threshold=settings.SQL_N_PLUS_ONE_THRESHOLD
+    )
+
+@contextmanager
+def track_queries(mode: Optional[str] = None) -> Iterator[QueryStats]:
+    """
+    Collect query statistics for a block of code, e.g. a test or a background job.
+    """
+    stats = _new_stats(mode)
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_stats.get() is not None:
+        conn.info.setdefault(_START_TIMES_KEY, []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    if stats is None:
+        return
+    start_times = conn.info.get(_START_TIMES_KEY)
+    if not start_times:
+        return
+    stats.record(statement, time.perf_counter() - start_times.pop())
+
+def install_sql_instrumentation(engine):
+    """
+    Attach the query hooks to an engine (sync or async). Safe to call more than once.
+    """
+    engine = getattr(engine, "sync_engine", engine)
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+class SQLInstrumentationMiddleware:
+    """
+    ASGI middleware that counts the queries and database time of each request.
+
+    The totals are reported in a ``Server-Timing`` header and in Prometheus
+    histograms labelled by route template. Queries issued after the response
+    headers were sent (streaming bodies, background tasks) only reach the
+    histograms.
+    """
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or settings.SQL_INSTRUMENTATION_MODE.lower() == MODE_OFF:
+            await self.app(scope, receive, send)
+            return
+
+        stats = _new_stats()
+        token = _current_stats.set(stats)
+
+        async def send_wrapper(message: Message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", stats.server_timing().encode()))
+                message["headers"] = headers
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_stats.reset(token)
+            endpoint = route_template(scope)
+            db_queries_per_request.labels(method=scope["method"], endpoint=endpoint).observe(stats.count)
+            db_time_per_request_seconds.labels(
+                method=scope["method"],
+                endpoint=endpoint
+            ).observe(stats.duration)
+            if stats.findings:
+                db_n_plus_one_total.labels(endpoint=endpoint).inc(len(stats.findings))
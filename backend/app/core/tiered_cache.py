@@ -0,0 +1,216 @@
+import asyncio
+import json
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from app.core.config import settings
+from app.core.monitoring import cache_requests_total
+from app.core.pubsub import PubSubBackend, get_pubsub
+from app.core.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+class LocalLRUCache:
+    """
+    Bounded in-process LRU cache with a per-entry TTL.
+    """
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return _MISSING
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return _MISSING
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+class TwoTierCache:
+    """
+    Generic cache with an in-process LRU in front of Redis.
+
+    Reads try the local tier, then Redis, then the loader passed to
+    ``get_or_load``. Concurrent misses for the same key in a worker share a
+    single loader call. Writes and deletes publish the key on the pub/sub
+    backplane so other workers drop their local copy.
+
+    Values must be JSON serializable; ``None`` is never cached.
+    """
+    def __init__(
+        self,
+        namespace: str,
+        ttl: int = 300,
+        local_ttl: Optional[float] = None,
+        max_entries: Optional[int] = None,
+        remote: Optional[bool] = None,
+        bus: Optional[PubSubBackend] = None
+    ):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.local = LocalLRUCache(
+            max_entries=max_entries or settings.CACHE_LOCAL_MAX_ENTRIES,
+            ttl=local_ttl if local_ttl is not None else settings.CACHE_LOCAL_TTL
+        )
+        self.remote = settings.CACHE_BACKEND.lower() == "redis" if remote is None else remote
+        self._bus = bus
+        self._instance_id = uuid.uuid4().hex
+        self._subscribed = False
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    @property
+    def bus(self) -> PubSubBackend:
+        if self._bus is None:
+            self._bus = get_pubsub()
+        return self._bus
+
+    @property
+    def channel(self) -> str:
+        return PubSubBackend.channel("cache", self.namespace)
+
+    def _remote_key(self, key: str) -> str:
+        return f"cache:{self.namespace}:{key}"
+
+    async def _ensure_subscribed(self):
+        if not self._subscribed:
+            self._subscribed = True
+            await self.bus.subscribe(self.channel, self._on_invalidation)
+
+    def _on_invalidation(self, channel: str, message: str):
+        data = json.loads(message)
+        if data.get("origin") != self._instance_id:
+            self.local.delete(data["key"])
+
+    async def _publish_invalidation(self, key: str):
+        try:
+            await self.bus.publish(
+                self.channel,
+                json.dumps({"origin": self._instance_id, "key": key})
+            )
+        except Exception as e:
+            logger.error(f"Error publishing cache invalidation for {self.namespace}:{key}: {str(e)}")
+
+    async def get(self, key: str) -> Optional[Any]:
+        """
+        Get a cached value from the local tier or Redis.
+        """
+        await self._ensure_subscribed()
+        value = self.local.get(key)
+        if value is not _MISSING:
+            cache_requests_total.labels(namespace=self.namespace, result="local_hit").inc()
+            return value
+
+        if self.remote:
+            try:
+                raw = await get_redis_client().get(self._remote_key(key))
+            except Exception as e:
+                logger.error(f"Error reading cache key {self.namespace}:{key}: {str(e)}")
+                raw = None
+            if raw is not None:
+                value = json.loads(raw)
+                self.local.set(key, value, self.ttl)
+                cache_requests_total.labels(namespace=self.namespace, result="remote_hit").inc()
+                return value
+
+        cache_requests_total.labels(namespace=self.namespace, result="miss").inc()
+        return None
+
+    async def set(self, key: str, value: Any, ttl: Optional[int] = None):
+        """
+        Store a value in both tiers and evict stale copies on other workers.
+        """
+        if value is None:
+            return
+        await self._ensure_subscribed()
+        ttl = ttl or self.ttl
+        self.local.set(key, value, ttl)
+        if self.remote:
+            try:
+                await get_redis_client().set(
+                    self._remote_key(key),
+                    json.dumps(value, default=str),
+                    ex=ttl
+                )
+            except Exception as e:
+                logger.error(f"Error writing cache key {self.namespace}:{key}: {str(e)}")
+        await self._publish_invalidation(key)
+
+    async def delete(self, key: str):
+        """
+        Remove a value from both tiers on every worker.
+        """
+        await self._ensure_subscribed()
+        self.local.delete(key)
+        if self.remote:
+            try:
+                await get_redis_client().delete(self._remote_key(key))
+            except Exception as e:
+                logger.error(f"Error deleting cache key {self.namespace}:{key}: {str(e)}")
+        await self._publish_invalidation(key)
+
+    async def get_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: Optional[int] = None
+    ) -> Optional[Any]:
+        """
+        Get a cached value, computing it with ``loader`` on a miss.
+
+        Only one loader call per key runs at a time in this worker; other
+        callers wait for its result instead of stampeding the database.
+        """
+        value = await self.get(key)
+        if value is not None:
+            return value
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+
+        # A load for this key may have completed while we were reading Redis
+        value = self.local.get(key)
+        if value is not _MISSING:
+            return value
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await loader()
+            await self.set(key, value, ttl)
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else was waiting
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
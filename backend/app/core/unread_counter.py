@@ -0,0 +1,182 @@
+import logging
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, Dict, Optional
+from app.core.config import settings
+from app.core.redis_client import get_redis_client
+from app.core.websocket import NotificationWebsocketManager, notification_ws_manager
+
+logger = logging.getLogger(__name__)
+
+# Apply a delta only to an existing counter, clamping at zero. A missing key
+# returns nil so the caller rebuilds the counter from the database.
+INCR_IF_EXISTS_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return nil
+end
+local value = redis.call('INCRBY', KEYS[1], ARGV[1])
+if value < 0 then
+    redis.call('SET', KEYS[1], 0, 'KEEPTTL')
+    value = 0
+end
+return value
+"""
+
+class UnreadCounterStore(ABC):
+    """
+    Storage for per-user unread counters.
+    """
+    @abstractmethod
+    async def get(self, user_id: int) -> Optional[int]:
+        ...
+
+    @abstractmethod
+    async def set(self, user_id: int, count: int, ttl: int):
+        ...
+
+    @abstractmethod
+    async def incr(self, user_id: int, amount: int) -> Optional[int]:
+        """
+        Atomically add ``amount`` to an existing counter. Returns None when the
+        counter does not exist yet.
+        """
+
+class InMemoryUnreadCounterStore(UnreadCounterStore):
+    def __init__(self):
+        self.counts: Dict[int, int] = {}
+
+    async def get(self, user_id: int) -> Optional[int]:
+        return self.counts.get(user_id)
+
+    async def set(self, user_id: int, count: int, ttl: int):
+        self.counts[user_id] = count
+
+    async def incr(self, user_id: int, amount: int) -> Optional[int]:
+        if user_id not in self.counts:
+            return None
+        self.counts[user_id] = max(self.counts[user_id] + amount, 0)
+        return self.counts[user_id]
+
+class RedisUnreadCounterStore(UnreadCounterStore):
+    KEY = "unread_notifications:{user_id}"
+
+    def __init__(self, client=None):
+        self._client = client
+        self._incr_script = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = get_redis_client()
+        return self._client
+
+    def _key(self, user_id: int) -> str:
+        return self.KEY.format(user_id=user_id)
+
+    async def get(self, user_id: int) -> Optional[int]:
+        value = await self.client.get(self._key(user_id))
+        return int(value) if value is not None else None
+
+    async def set(self, user_id: int, count: int, ttl: int):
+        await self.client.set(self._key(user_id), count, ex=ttl)
+
+    async def incr(self, user_id: int, amount: int) -> Optional[int]:
+        if self._incr_script is None:
+            self._incr_script = self.client.register_script(INCR_IF_EXISTS_SCRIPT)
+        value = await self._incr_script(keys=[self._key(user_id)], args=[amount])
+        return int(value) if value is not None else None
+
+async def count_unread_notifications(db, user_id: int) -> int:
+    from app.crud.notification import notification as notification_crud
+
+    return await notification_crud.get_unread_count(db, user_id)
+
+class UnreadNotificationCounter:
+    """
+    Exact per-user unread notification counters.
+
+    Counters are adjusted atomically whenever a notification is created, read
+    or deleted, and every change is pushed to the user's websockets. A counter
+    that is missing (first use, eviction or expiry) is rebuilt from the
+    database; the TTL bounds how long any drift can survive.
+    """
+    def __init__(
+        self,
+        store: Optional[UnreadCounterStore] = None,
+        ws_manager: Optional[NotificationWebsocketManager] = None,
+        count_loader: Optional[Callable[..., Awaitable[int]]] = None,
+        ttl: Optional[int] = None
+    ):
+        self._store = store
+        self.ws_manager = ws_manager or notification_ws_manager
+        self.count_loader = count_loader or count_unread_notifications
+        self.ttl = ttl or settings.UNREAD_COUNTER_TTL
+
+    @property
+    def store(self) -> UnreadCounterStore:
+        if self._store is None:
+            if settings.UNREAD_COUNTER_BACKEND.lower() == "memory":
+                self._store = InMemoryUnreadCounterStore()
+            else:
+                self._store = RedisUnreadCounterStore()
+        return self._store
+
+    async def get(self, db, user_id: int) -> int:
+        """
+        Get the unread count of a user, rebuilding it from the database if needed.
+        """
+        try:
+            count = await self.store.get(user_id)
+        except Exception as e:
+            logger.error(f"Error reading unread counter for user {user_id}: {str(e)}")
+            return await self.count_loader(db, user_id)
+
+        if count is None:
+            count = await self.reconcile(db, user_id, push=False)
+        return count
+
+    async def reconcile(self, db, user_id: int, push: bool = True) -> int:
+        """
+        Reset a user's counter to the number of unread notifications in the database.
+        """
+        count = await self.count_loader(db, user_id)
+        try:
+            await self.store.set(user_id, count, self.ttl)
+        except Exception as e:
+            logger.error(f"Error storing unread counter for user {user_id}: {str(e)}")
+        if push:
+            await self._push(user_id, count)
+        return count
+
+    async def increment(self, db, user_id: int, amount: int = 1) -> Optional[int]:
+        """
+        Account for new unread notifications. Call after the change is committed.
+        """
+        return await self._apply(db, user_id, amount)
+
+    async def decrement(self, db, user_id: int, amount: int = 1) -> Optional[int]:
+        """
+        Account for notifications that were read or deleted. Call after the change is committed.
+        """
+        return await self._apply(db, user_id, -amount)
+
+    async def _apply(self, db, user_id: int, delta: int) -> Optional[int]:
+        if not delta:
+            return None
+        try:
+            count = await self.store.incr(user_id, delta)
+        except Exception as e:
+            logger.error(f"Error updating unread counter for user {user_id}: {str(e)}")
+            return None
+
+        if count is None:
+            return await self.reconcile(db, user_id)
+        await self._push(user_id, count)
+        return count
+
+    async def _push(self, user_id: int, count: int):
+        try:
+            await self.ws_manager.send_unread_count(user_id, count)
+        except Exception as e:
+            logger.error(f"Error pushing unread count to user {user_id}: {str(e)}")
+
+unread_counter = UnreadNotificationCounter()
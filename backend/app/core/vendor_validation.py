@@ -94,7 +94,7 @@ class VendorValidator:
         # Check if user has worked with vendor
         expenses = db.query(Expense).filter(
             Expense.vendor_id == vendor_id,
-            Expense.created_by == user.id
+            Expense.created_by_id == user.id
         ).first()
         
         if not expenses:
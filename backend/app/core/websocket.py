@@ -1,91 +1,282 @@
+import asyncio
+import json
 import logging
-from typing import Dict, Set
-from fastapi import WebSocket, WebSocketDisconnect
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Iterable, Optional, Tuple
+from fastapi import WebSocket
 from app.schemas.notification import NotificationResponse
+from app.core.config import settings
+from app.core.pubsub import PubSubBackend, get_pubsub
+from app.core.monitoring import (
+    websocket_connections,
+    websocket_dropped_connections_total,
+    websocket_send_duration_seconds,
+    websocket_send_queue_depth,
+)
 
 logger = logging.getLogger(__name__)
 
+# Close code sent to clients that cannot keep up with their outbound queue
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+UNREAD_COUNT_KEY = "unread_count"
+
+class WebsocketConnection:
+    """
+    A single websocket with a bounded outbound queue drained by its own writer task.
+
+    Producers never await the socket: they enqueue an already serialized payload
+    and return. Messages enqueued with a ``coalesce_key`` replace a pending
+    message with the same key instead of growing the queue.
+    """
+    def __init__(
+        self,
+        websocket: WebSocket,
+        user_id: int,
+        max_queue_size: int,
+        send_timeout: float,
+        on_close: Optional[Callable[["WebsocketConnection"], None]] = None
+    ):
+        self.websocket = websocket
+        self.user_id = user_id
+        self.max_queue_size = max_queue_size
+        self.send_timeout = send_timeout
+        self.on_close = on_close
+        self._queue: Deque[Tuple[Optional[str], str]] = deque()
+        self._wakeup = asyncio.Event()
+        self._writer: Optional[asyncio.Task] = None
+        self.closed = False
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._queue)
+
+    def start(self):
+        """
+        Start the writer task for this connection.
+        """
+        self._writer = asyncio.create_task(self._run())
+
+    def enqueue(self, payload: str, coalesce_key: Optional[str] = None) -> bool:
+        """
+        Queue a serialized message. Returns False when the queue is full.
+        """
+        if self.closed:
+            return False
+
+        if coalesce_key is not None:
+            for index, (key, _) in enumerate(self._queue):
+                if key == coalesce_key:
+                    self._queue[index] = (coalesce_key, payload)
+                    return True
+
+        if len(self._queue) >= self.max_queue_size:
+            return False
+
+        self._queue.append((coalesce_key, payload))
+        websocket_send_queue_depth.observe(len(self._queue))
+        self._wakeup.set()
+        return True
+
+    def close(self, code: Optional[int] = None):
+        """
+        Stop the writer task and optionally close the socket with the given code.
+        """
+        if self.closed:
+            return
+        self.closed = True
+        self._queue.clear()
+        if self._writer and self._writer is not asyncio.current_task():
+            self._writer.cancel()
+        if code is not None:
+            asyncio.create_task(self._close_socket(code))
+
+    async def _close_socket(self, code: int):
+        try:
+            await self.websocket.close(code=code)
+        except Exception:
+            pass
+
+    async def _run(self):
+        try:
+            while not self.closed:
+                if not self._queue:
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+                    continue
+
+                _, payload = self._queue.popleft()
+                start_time = time.perf_counter()
+                await asyncio.wait_for(
+                    self.websocket.send_text(payload),
+                    timeout=self.send_timeout
+                )
+                websocket_send_duration_seconds.observe(time.perf_counter() - start_time)
+        except asyncio.CancelledError:
+            pass
+        except asyncio.TimeoutError:
+            logger.warning(f"Websocket send to user {self.user_id} timed out, dropping connection")
+            websocket_dropped_connections_total.labels(reason="send_timeout").inc()
+        except Exception as e:
+            logger.error(f"Error sending to websocket of user {self.user_id}: {str(e)}")
+            websocket_dropped_connections_total.labels(reason="send_error").inc()
+        finally:
+            was_closed = self.closed
+            self.closed = True
+            if not was_closed and self.on_close:
+                self.on_close(self)
+
 class NotificationWebsocketManager:
-    def __init__(self):
-        # Store active connections: user_id -> Set[WebSocket]
-        self.active_connections: Dict[int, Set[WebSocket]] = {}
+    """
+    Delivers notifications to the websockets of every worker.
+
+    Outbound messages are published on a per-user channel of the pub/sub
+    backplane; each worker only subscribes to the channels of users that have
+    a socket open on it, so a message reaches exactly the workers that can
+    deliver it.
+    """
+    def __init__(
+        self,
+        max_queue_size: Optional[int] = None,
+        send_timeout: Optional[float] = None,
+        bus: Optional[PubSubBackend] = None
+    ):
+        # Store active connections: user_id -> {WebSocket: WebsocketConnection}
+        self.active_connections: Dict[int, Dict[WebSocket, WebsocketConnection]] = {}
+        self.max_queue_size = max_queue_size or settings.WEBSOCKET_SEND_QUEUE_SIZE
+        self.send_timeout = send_timeout or settings.WEBSOCKET_SEND_TIMEOUT
+        self._bus = bus
+
+    @property
+    def bus(self) -> PubSubBackend:
+        if self._bus is None:
+            self._bus = get_pubsub()
+        return self._bus
+
+    @staticmethod
+    def user_channel(user_id: int) -> str:
+        return PubSubBackend.channel("ws", "user", user_id)
 
     async def connect(self, websocket: WebSocket, user_id: int):
         """
         Connect a user's websocket.
         """
         await websocket.accept()
-        if user_id not in self.active_connections:
-            self.active_connections[user_id] = set()
-        self.active_connections[user_id].add(websocket)
+        connection = WebsocketConnection(
+            websocket,
+            user_id,
+            max_queue_size=self.max_queue_size,
+            send_timeout=self.send_timeout,
+            on_close=self._remove_connection
+        )
+        self.active_connections.setdefault(user_id, {})[websocket] = connection
+        connection.start()
+        websocket_connections.inc()
+        await self.bus.subscribe(self.user_channel(user_id), self._on_bus_message)
         logger.info(f"User {user_id} connected to notifications websocket")
 
     def disconnect(self, websocket: WebSocket, user_id: int):
         """
         Disconnect a user's websocket.
         """
-        if user_id in self.active_connections:
-            self.active_connections[user_id].discard(websocket)
-            if not self.active_connections[user_id]:
-                del self.active_connections[user_id]
+        connection = self.active_connections.get(user_id, {}).get(websocket)
+        if connection:
+            connection.close()
+            self._remove_connection(connection)
         logger.info(f"User {user_id} disconnected from notifications websocket")
 
+    def _remove_connection(self, connection: WebsocketConnection):
+        connections = self.active_connections.get(connection.user_id)
+        if not connections or connections.get(connection.websocket) is not connection:
+            return
+        del connections[connection.websocket]
+        if not connections:
+            del self.active_connections[connection.user_id]
+        websocket_connections.dec()
+        self.bus.release(self.user_channel(connection.user_id))
+
+    def _drop_slow_connection(self, connection: WebsocketConnection):
+        logger.warning(
+            f"Dropping slow websocket of user {connection.user_id} "
+            f"(queue depth {connection.queue_depth})"
+        )
+        websocket_dropped_connections_total.labels(reason="queue_full").inc()
+        connection.close(code=SLOW_CONSUMER_CLOSE_CODE)
+        self._remove_connection(connection)
+
+    def _enqueue(self, user_id: int, payload: str, coalesce_key: Optional[str] = None):
+        connections = self.active_connections.get(user_id)
+        if not connections:
+            return
+        for connection in list(connections.values()):
+            if not connection.enqueue(payload, coalesce_key):
+                self._drop_slow_connection(connection)
+
+    def _on_bus_message(self, channel: str, message: str):
+        user_id = int(channel.rsplit(":", 1)[1])
+        envelope = json.loads(message)
+        self._enqueue(user_id, envelope["payload"], envelope.get("coalesce_key"))
+
+    @staticmethod
+    def _envelope(payload: str, coalesce_key: Optional[str] = None) -> str:
+        return json.dumps({"payload": payload, "coalesce_key": coalesce_key})
+
+    async def _publish(self, user_id: int, message: str):
+        try:
+            await self.bus.publish(self.user_channel(user_id), message)
+        except Exception as e:
+            # Keep local sockets working when the backplane is unavailable
+            logger.error(f"Error publishing websocket message for user {user_id}: {str(e)}")
+            envelope = json.loads(message)
+            self._enqueue(user_id, envelope["payload"], envelope.get("coalesce_key"))
+
+    def send_to_websocket(self, websocket: WebSocket, user_id: int, payload: str):
+        """
+        Queue an already serialized message for a single connection.
+        """
+        connection = self.active_connections.get(user_id, {}).get(websocket)
+        if connection and not connection.enqueue(payload):
+            self._drop_slow_connection(connection)
+
+    @staticmethod
+    def serialize_notification(notification: NotificationResponse) -> str:
+        """
+        Serialize a notification once so it can be fanned out to many sockets.
+        """
+        return notification.model_dump_json()
+
     async def send_notification(self, user_id: int, notification: NotificationResponse):
         """
         Send a notification to a specific user through all their active connections.
         """
-        if user_id not in self.active_connections:
-            return
+        await self.send_payload(user_id, self.serialize_notification(notification))
 
-        # Convert notification to dict for JSON serialization
-        notification_data = notification.dict()
-        
-        disconnected = set()
-        for websocket in self.active_connections[user_id]:
-            try:
-                await websocket.send_json(notification_data)
-            except WebSocketDisconnect:
-                disconnected.add(websocket)
-            except Exception as e:
-                logger.error(f"Error sending notification to user {user_id}: {str(e)}")
-                disconnected.add(websocket)
-
-        # Clean up disconnected websockets
-        for websocket in disconnected:
-            self.active_connections[user_id].discard(websocket)
-        if not self.active_connections[user_id]:
-            del self.active_connections[user_id]
-
-    async def broadcast_notification(self, user_ids: Set[int], notification: NotificationResponse):
+    async def send_payload(self, user_id: int, payload: str, coalesce_key: Optional[str] = None):
+        """
+        Publish an already serialized message for all connections of a user.
+        """
+        await self._publish(user_id, self._envelope(payload, coalesce_key))
+
+    async def broadcast_notification(self, user_ids: Iterable[int], notification: NotificationResponse):
         """
         Broadcast a notification to multiple users.
+
+        The notification is serialized once and published on each user's
+        channel; the per-connection writer tasks perform the sends
+        concurrently, so a slow client never delays the others.
         """
-        for user_id in user_ids:
-            await self.send_notification(user_id, notification)
+        message = self._envelope(self.serialize_notification(notification))
+        await asyncio.gather(*(self._publish(user_id, message) for user_id in user_ids))
 
     async def send_unread_count(self, user_id: int, count: int):
         """
         Send unread notification count to a user.
-        """
-        if user_id not in self.active_connections:
-            return
 
-        count_data = {"type": "unread_count", "count": count}
-        
-        disconnected = set()
-        for websocket in self.active_connections[user_id]:
-            try:
-                await websocket.send_json(count_data)
-            except WebSocketDisconnect:
-                disconnected.add(websocket)
-            except Exception as e:
-                logger.error(f"Error sending unread count to user {user_id}: {str(e)}")
-                disconnected.add(websocket)
-
-        # Clean up disconnected websockets
-        for websocket in disconnected:
-            self.active_connections[user_id].discard(websocket)
-        if not self.active_connections[user_id]:
-            del self.active_connections[user_id]
+        Pending count updates are coalesced so a lagging client only receives
+        the latest value.
+        """
+        count_data = json.dumps({"type": UNREAD_COUNT_KEY, "count": count})
+        await self.send_payload(user_id, count_data, coalesce_key=UNREAD_COUNT_KEY)
 
 notification_ws_manager = NotificationWebsocketManager()
@@ -0,0 +1,103 @@
+import base64
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.crud.base import AsyncCRUDBase
+from app.models.audit_log import AuditLog
+from app.schemas.audit_log import AuditLogCreate
+
+def encode_cursor(entry: AuditLog) -> str:
+    raw = f"{entry.performed_at.isoformat()}|{entry.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Raises ValueError for a cursor not produced by ``encode_cursor``."""
+    try:
+        performed_at, id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(performed_at), int(id)
+    except (TypeError, UnicodeDecodeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+class CRUDAuditLog(AsyncCRUDBase[AuditLog, AuditLogCreate, AuditLogCreate]):
+    """
+    Audit log reads, newest first, paged by keyset on (performed_at, id)
+    instead of OFFSET, so every page is an index range scan whatever its depth.
+    """
+    async def _page(
+        self,
+        db: AsyncSession,
+        stmt,
+        *,
+        cursor: Optional[str],
+        limit: int
+    ) -> Tuple[List[AuditLog], Optional[str]]:
+        if cursor:
+            stmt = stmt.where(
+                tuple_(self.model.performed_at, self.model.id) < tuple_(*decode_cursor(cursor))
+            )
+        stmt = stmt.order_by(self.model.performed_at.desc(), self.model.id.desc()).limit(limit + 1)
+        result = await db.execute(stmt)
+        entries = result.scalars().all()
+
+        if len(entries) > limit:
+            entries = entries[:limit]
+            return entries, encode_cursor(entries[-1])
+        return entries, None
+
+    @staticmethod
+    def _period(stmt, model, start_date: Optional[datetime], end_date: Optional[datetime]):
+        # Bounds on the partition key also prune partitions outside the period
+        if start_date:
+            stmt = stmt.where(model.performed_at >= start_date)
+        if end_date:
+            stmt = stmt.where(model.performed_at <= end_date)
+        return stmt
+
+    async def get_entity_history(
+        self,
+        db: AsyncSession,
+        *,
+        entity_type: str,
+        entity_id: int,
+        cursor: Optional[str] = None,
+        limit: int = 50
+    ) -> Tuple[List[AuditLog], Optional[str]]:
+        stmt = select(self.model).where(
+            self.model.entity_type == entity_type,
+            self.model.entity_id == entity_id
+        )
+        return await self._page(db, stmt, cursor=cursor, limit=limit)
+
+    async def get_by_user(
+        self,
+        db: AsyncSession,
+        *,
+        user_id: int,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        cursor: Optional[str] = None,
+        limit: int = 50
+    ) -> Tuple[List[AuditLog], Optional[str]]:
+        stmt = select(self.model).where(self.model.performed_by == user_id)
+        stmt = self._period(stmt, self.model, start_date, end_date)
+        return await self._page(db, stmt, cursor=cursor, limit=limit)
+
+    async def get_by_actions(
+        self,
+        db: AsyncSession,
+        *,
+        actions: Sequence[Any],
+        entity_type: Optional[str] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        cursor: Optional[str] = None,
+        limit: int = 50
+    ) -> Tuple[List[AuditLog], Optional[str]]:
+        stmt = select(self.model).where(self.model.action.in_(actions))
+        if entity_type:
+            stmt = stmt.where(self.model.entity_type == entity_type)
+        stmt = self._period(stmt, self.model, start_date, end_date)
+        return await self._page(db, stmt, cursor=cursor, limit=limit)
+
+audit_log = CRUDAuditLog(AuditLog)
@@ -1,42 +1,76 @@
-from typing import Dict, List, Optional, Union, Any
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, between
-from datetime import date
+from typing import Dict, List, Optional, Tuple, Union, Any
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, or_, between, select
+from datetime import date, datetime
 from sqlalchemy import func, case
-from app.crud.base import CRUDBase
-from app.models.expense import Expense, ExpenseAttachment
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from app.crud.base import AsyncCRUDBase
+from app.models.expense import Expense, ExpenseStatus
+from app.models.expense_attachment import ExpenseAttachment
 from app.schemas.expense import ExpenseCreate, ExpenseUpdate, ExpenseSummary, ExpenseCategorySummary, PropertyExpenseSummary, VendorExpenseSummary, RecurringExpenseSummary
 from app.models.property import Property
 from app.models.vendor import Vendor
-from app.utils import save_upload_file
-from fastapi import UploadFile
+from app.models.stored_file import StoredFile
 from app.models.expense_category import ExpenseCategory
 
-class CRUDExpense(CRUDBase[Expense, ExpenseCreate, ExpenseUpdate]):
-    def create_with_owner(
+# Rows per INSERT, well under the 32767 bind parameters asyncpg accepts
+RECURRING_INSERT_BATCH = 1000
+
+def _category_summaries(rows) -> List[ExpenseCategorySummary]:
+    total_amount = sum(r.total_amount for r in rows)
+    return [
+        ExpenseCategorySummary(
+            category=r.expense_type,
+            total_amount=r.total_amount,
+            count=r.count,
+            percentage_of_total=(r.total_amount / total_amount * 100 if total_amount > 0 else 0)
+        )
+        for r in rows
+    ]
+
+class CRUDExpense(AsyncCRUDBase[Expense, ExpenseCreate, ExpenseUpdate]):
+    async def create_with_owner(
         self,
-        db: Session,
+        db: AsyncSession,
         *,
         obj_in: ExpenseCreate,
         owner_id: int
     ) -> Expense:
-        obj_in_data = obj_in.model_dump()
-        db_obj = self.model(**obj_in_data, created_by=owner_id)
-        db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
-        return db_obj
-
-    def get_multi_with_filters(
+        return await self.create(db, obj_in=obj_in, created_by_id=owner_id)
+
+    async def is_owner(self, db: AsyncSession, *, expense_id: int, user_id: Any) -> bool:
+        """
+        El dueño de un gasto es el dueño de la propiedad a la que se imputa.
+        """
+        stmt = (
+            select(Expense.id)
+            .join(Property, Property.id == Expense.property_id)
+            .where(Expense.id == expense_id, Property.user_id == str(user_id))
+        )
+        result = await db.execute(stmt)
+        return result.first() is not None
+
+    async def approve(self, db: AsyncSession, *, expense: Expense, approved_by: int) -> Expense:
+        return await self.update(
+            db,
+            db_obj=expense,
+            obj_in={
+                "status": ExpenseStatus.APPROVED,
+                "approved_by": approved_by,
+                "approved_at": date.today()
+            }
+        )
+
+    async def get_multi_with_filters(
         self,
-        db: Session,
+        db: AsyncSession,
         *,
         skip: int = 0,
         limit: int = 100,
         filters: Optional[Dict[str, Any]] = None
     ) -> List[Expense]:
-        query = db.query(self.model)
-        
+        stmt = select(self.model)
+
         if filters:
             # Filtros básicos
             basic_filters = [
@@ -46,118 +80,161 @@ class CRUDExpense(CRUDBase[Expense, ExpenseCreate, ExpenseUpdate]):
             for field in basic_filters:
                 value = filters.get(field)
                 if value is not None:
-                    query = query.filter(getattr(self.model, field) == value)
-            
+                    stmt = stmt.where(getattr(self.model, field) == value)
+
             # Filtro por rango de fechas
             start_date = filters.get("start_date")
             end_date = filters.get("end_date")
             if start_date and end_date:
-                query = query.filter(
+                stmt = stmt.where(
                     between(self.model.date_incurred, start_date, end_date)
                 )
             elif start_date:
-                query = query.filter(self.model.date_incurred >= start_date)
+                stmt = stmt.where(self.model.date_incurred >= start_date)
             elif end_date:
-                query = query.filter(self.model.date_incurred <= end_date)
-        
-        return query.offset(skip).limit(limit).all()
+                stmt = stmt.where(self.model.date_incurred <= end_date)
+
+        result = await db.execute(stmt.offset(skip).limit(limit))
+        return result.scalars().all()
 
-    def get_recurring_expenses_to_generate(
+    async def get_recurring_expenses_to_generate(
         self,
-        db: Session,
+        db: AsyncSession,
         *,
-        current_date: date
-    ) -> List[Expense]:
+        current_date: date,
+        since: Optional[date] = None
+    ) -> List[Tuple[Expense, Optional[date]]]:
         """
-        Obtiene los gastos recurrentes que necesitan generar nuevas instancias
-        basado en su intervalo de recurrencia y fecha final.
+        Recurring parents that may have instances due by ``current_date``,
+        each with the date of its latest generated instance (None if none).
+        With ``since`` every active parent is returned so that gaps from that
+        date on can be backfilled.
         """
-        return db.query(self.model).filter(
-            and_(
-                self.model.is_recurring == True,
-                self.model.recurrence_end_date >= current_date
+        last_instance = select(
+            self.model.parent_expense_id,
+            func.max(self.model.date_incurred).label("last_date")
+        ).where(
+            self.model.parent_expense_id.isnot(None)
+        ).group_by(
+            self.model.parent_expense_id
+        ).subquery()
+        last_date = func.coalesce(last_instance.c.last_date, self.model.date_incurred)
+
+        stmt = select(self.model, last_instance.c.last_date).outerjoin(
+            last_instance, last_instance.c.parent_expense_id == self.model.id
+        ).where(
+            self.model.is_recurring == True,
+            self.model.recurrence_interval.isnot(None),
+            self.model.date_incurred.isnot(None),
+            self.model.parent_expense_id.is_(None),
+            self.model.status != ExpenseStatus.CANCELLED
+        )
+        if since is None:
+            stmt = stmt.where(
+                last_date < current_date,
+                or_(
+                    self.model.recurrence_end_date.is_(None),
+                    self.model.recurrence_end_date > last_date
+                )
             )
-        ).all()
+        result = await db.execute(stmt.order_by(self.model.id))
+        return [(parent, last) for parent, last in result.all()]
 
-    def create_recurring_instance(
-        self,
-        db: Session,
-        *,
-        parent_expense: Expense,
-        new_date: date
-    ) -> Expense:
+    def recurring_instance_data(self, parent_expense: Expense, new_date: date) -> Dict[str, Any]:
         """
-        Crea una nueva instancia de un gasto recurrente.
+        Column values of the instance of a recurring expense on ``new_date``.
         """
-        expense_data = {
+        due_date = None
+        if parent_expense.due_date and parent_expense.date_incurred:
+            # Same payment term as the parent
+            due_date = new_date + (parent_expense.due_date - parent_expense.date_incurred)
+        return {
             "property_id": parent_expense.property_id,
             "unit_id": parent_expense.unit_id,
             "vendor_id": parent_expense.vendor_id,
+            "category_id": parent_expense.category_id,
             "description": parent_expense.description,
             "amount": parent_expense.amount,
             "expense_type": parent_expense.expense_type,
-            "status": "draft",
+            "status": ExpenseStatus.DRAFT,
             "date_incurred": new_date,
+            "due_date": due_date,
             "requires_approval": parent_expense.requires_approval,
+            "created_by_id": parent_expense.created_by_id,
             "parent_expense_id": parent_expense.id
         }
-        
-        db_obj = self.model(**expense_data)
-        db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
-        return db_obj
-
-    def cancel(self, db: Session, *, expense_id: int, user_id: int) -> Expense:
-        expense = self.get(db=db, id=expense_id)
+
+    async def create_recurring_instances(
+        self,
+        db: AsyncSession,
+        *,
+        instances: List[Dict[str, Any]]
+    ) -> int:
+        """
+        Bulk insert recurring instances, skipping those that already exist
+        (unique on parent_expense_id and date_incurred). Returns the number
+        of rows inserted; everything is committed at once.
+        """
+        inserted = 0
+        for start in range(0, len(instances), RECURRING_INSERT_BATCH):
+            stmt = pg_insert(self.model).values(
+                instances[start:start + RECURRING_INSERT_BATCH]
+            ).on_conflict_do_nothing(
+                index_elements=["parent_expense_id", "date_incurred"]
+            ).returning(self.model.id)
+            result = await db.execute(stmt)
+            inserted += len(result.all())
+        await db.commit()
+        return inserted
+
+    async def cancel(self, db: AsyncSession, *, expense_id: int, user_id: int) -> Expense:
+        expense = await self.get(db, id=expense_id)
         if expense:
             expense.status = "cancelled"
             expense.updated_by = user_id
             expense.updated_at = datetime.utcnow()
-            db.commit()
-            db.refresh(expense)
+            await db.commit()
+            await db.refresh(expense)
         return expense
 
     async def add_attachment(
         self,
-        db: Session,
+        db: AsyncSession,
         *,
         expense_id: int,
-        file: UploadFile,
+        stored_file: StoredFile,
+        file_name: str,
         uploaded_by: int
     ) -> ExpenseAttachment:
-        # Save file to storage
-        file_path = f"expenses/{expense_id}/{file.filename}"
-        await save_upload_file(file, file_path)
-        
-        # Create attachment record
+        # The content is already on disk (see FileStorageService.store)
         attachment = ExpenseAttachment(
             expense_id=expense_id,
-            file_path=file_path,
-            file_name=file.filename,
-            file_type=file.content_type,
-            file_size=len(await file.read()),
+            stored_file_id=stored_file.id,
+            file_path=stored_file.path,
+            file_name=file_name,
+            file_type=stored_file.content_type or "application/octet-stream",
+            file_size=stored_file.size,
             uploaded_by=uploaded_by
         )
         db.add(attachment)
-        db.commit()
-        db.refresh(attachment)
+        await db.commit()
+        await db.refresh(attachment)
         return attachment
 
-    def get_attachments(self, db: Session, expense_id: int) -> List[ExpenseAttachment]:
-        return db.query(ExpenseAttachment).filter(
-            ExpenseAttachment.expense_id == expense_id
-        ).all()
+    async def get_attachments(self, db: AsyncSession, expense_id: int) -> List[ExpenseAttachment]:
+        stmt = select(ExpenseAttachment).where(ExpenseAttachment.expense_id == expense_id)
+        result = await db.execute(stmt)
+        return result.scalars().all()
 
-    def get_summary(
+    async def get_summary(
         self,
-        db: Session,
+        db: AsyncSession,
         *,
         start_date: date,
         end_date: date,
         property_id: Optional[int] = None
     ) -> ExpenseSummary:
-        query = db.query(
+        stmt = select(
             func.sum(Expense.amount).label("total_amount"),
             func.count().label("total_count"),
             func.sum(case(
@@ -187,14 +264,14 @@ class CRUDExpense(CRUDBase[Expense, ExpenseCreate, ExpenseUpdate]):
             func.avg(
                 func.extract('epoch', Expense.payment_date - Expense.date_incurred) / 86400
             ).label("average_processing_time")
-        ).filter(
+        ).where(
             between(Expense.date_incurred, start_date, end_date)
         )
 
         if property_id:
-            query = query.filter(Expense.property_id == property_id)
+            stmt = stmt.where(Expense.property_id == property_id)
 
-        result = query.first()
+        result = (await db.execute(stmt)).first()
         return ExpenseSummary(
             total_amount=result.total_amount or 0,
             paid_amount=result.paid_amount or 0,
@@ -207,150 +284,146 @@ class CRUDExpense(CRUDBase[Expense, ExpenseCreate, ExpenseUpdate]):
             average_processing_time=result.average_processing_time
         )
 
-    def get_by_category(
+    async def get_type_summary(
         self,
-        db: Session,
+        db: AsyncSession,
         *,
         start_date: date,
         end_date: date,
         property_id: Optional[int] = None
     ) -> List[ExpenseCategorySummary]:
-        query = db.query(
+        stmt = select(
             Expense.expense_type,
             func.sum(Expense.amount).label("total_amount"),
             func.count().label("count")
-        ).filter(
+        ).where(
             between(Expense.date_incurred, start_date, end_date)
         ).group_by(
             Expense.expense_type
         )
 
         if property_id:
-            query = query.filter(Expense.property_id == property_id)
-
-        results = query.all()
-        total_amount = sum(r.total_amount for r in results)
+            stmt = stmt.where(Expense.property_id == property_id)
 
-        return [
-            ExpenseCategorySummary(
-                category=r.expense_type,
-                total_amount=r.total_amount,
-                count=r.count,
-                percentage_of_total=(r.total_amount / total_amount * 100 if total_amount > 0 else 0)
-            )
-            for r in results
-        ]
+        result = await db.execute(stmt)
+        return _category_summaries(result.all())
 
-    def get_by_property(
+    async def get_by_property(
         self,
-        db: Session,
+        db: AsyncSession,
         *,
         start_date: date,
         end_date: date
     ) -> List[PropertyExpenseSummary]:
-        query = db.query(
+        # Una sola consulta agrupada por propiedad y tipo en lugar de una por propiedad
+        stmt = select(
             Property.id,
             Property.name,
+            Expense.expense_type,
             func.sum(Expense.amount).label("total_amount"),
             func.count().label("count")
         ).join(
             Expense,
             Property.id == Expense.property_id
-        ).filter(
+        ).where(
             between(Expense.date_incurred, start_date, end_date)
         ).group_by(
             Property.id,
-            Property.name
+            Property.name,
+            Expense.expense_type
+        ).order_by(
+            Property.id
         )
 
-        results = query.all()
-        summaries = []
+        rows_by_property: Dict[int, list] = {}
+        names: Dict[int, str] = {}
+        for r in (await db.execute(stmt)).all():
+            rows_by_property.setdefault(r.id, []).append(r)
+            names[r.id] = r.name
 
-        for r in results:
-            categories = self.get_by_category(
-                db=db,
-                start_date=start_date,
-                end_date=end_date,
-                property_id=r.id
-            )
-            summaries.append(
-                PropertyExpenseSummary(
-                    property_id=r.id,
-                    property_name=r.name,
-                    total_amount=r.total_amount,
-                    count=r.count,
-                    categories=categories
-                )
+        return [
+            PropertyExpenseSummary(
+                property_id=property_id,
+                property_name=names[property_id],
+                total_amount=sum(r.total_amount for r in rows),
+                count=sum(r.count for r in rows),
+                categories=_category_summaries(rows)
             )
+            for property_id, rows in rows_by_property.items()
+        ]
 
-        return summaries
-
-    def get_by_vendor(
+    async def get_by_vendor(
         self,
-        db: Session,
+        db: AsyncSession,
         *,
         start_date: date,
         end_date: date,
         property_id: Optional[int] = None
     ) -> List[VendorExpenseSummary]:
-        query = db.query(
+        stmt = select(
             Vendor.id,
             Vendor.name,
+            Expense.expense_type,
             func.sum(Expense.amount).label("total_amount"),
-            func.count().label("count"),
-            func.avg(Expense.amount).label("average_amount")
+            func.count().label("count")
         ).join(
             Expense,
             Vendor.id == Expense.vendor_id
-        ).filter(
+        ).where(
             between(Expense.date_incurred, start_date, end_date)
         )
 
         if property_id:
-            query = query.filter(Expense.property_id == property_id)
+            stmt = stmt.where(Expense.property_id == property_id)
 
-        query = query.group_by(
+        stmt = stmt.group_by(
             Vendor.id,
-            Vendor.name
+            Vendor.name,
+            Expense.expense_type
+        ).order_by(
+            Vendor.id
         )
 
-        results = query.all()
-        summaries = []
+        rows_by_vendor: Dict[int, list] = {}
+        names: Dict[int, str] = {}
+        for r in (await db.execute(stmt)).all():
+            rows_by_vendor.setdefault(r.id, []).append(r)
+            names[r.id] = r.name
 
-        for r in results:
-            categories = self.get_by_category(
-                db=db,
-                start_date=start_date,
-                end_date=end_date,
-                property_id=property_id
-            )
+        summaries = []
+        for vendor_id, rows in rows_by_vendor.items():
+            total_amount = sum(r.total_amount for r in rows)
+            count = sum(r.count for r in rows)
             summaries.append(
                 VendorExpenseSummary(
-                    vendor_id=r.id,
-                    vendor_name=r.name,
-                    total_amount=r.total_amount,
-                    count=r.count,
-                    average_amount=r.average_amount,
-                    categories=categories
+                    vendor_id=vendor_id,
+                    vendor_name=names[vendor_id],
+                    total_amount=total_amount,
+                    count=count,
+                    average_amount=total_amount / count if count else 0,
+                    categories=_category_summaries(rows)
                 )
             )
 
         return summaries
 
-    def get_recurring(
+    async def get_recurring(
         self,
-        db: Session,
+        db: AsyncSession,
         *,
         start_date: Optional[date] = None,
         end_date: Optional[date] = None,
-        property_id: Optional[int] = None
+        property_id: Optional[int] = None,
+        user_id: Optional[Any] = None,
+        skip: int = 0,
+        limit: Optional[int] = None
     ) -> List[RecurringExpenseSummary]:
-        query = db.query(Expense).filter(
+        stmt = select(Expense).where(
             Expense.is_recurring == True
         )
 
         if start_date and end_date:
-            query = query.filter(
+            stmt = stmt.where(
                 or_(
                     between(Expense.date_incurred, start_date, end_date),
                     Expense.next_due_date.between(start_date, end_date)
@@ -358,9 +431,15 @@ class CRUDExpense(CRUDBase[Expense, ExpenseCreate, ExpenseUpdate]):
             )
 
         if property_id:
-            query = query.filter(Expense.property_id == property_id)
+            stmt = stmt.where(Expense.property_id == property_id)
 
-        expenses = query.all()
+        if user_id is not None:
+            stmt = stmt.join(Property, Property.id == Expense.property_id).where(
+                Property.user_id == str(user_id)
+            )
+
+        stmt = stmt.order_by(Expense.id).offset(skip).limit(limit)
+        expenses = (await db.execute(stmt)).scalars().all()
         return [
             RecurringExpenseSummary(
                 expense_id=e.id,
@@ -376,9 +455,9 @@ class CRUDExpense(CRUDBase[Expense, ExpenseCreate, ExpenseUpdate]):
             for e in expenses
         ]
 
-    def get_by_vendor_id(
+    async def get_by_vendor_id(
         self,
-        db: Session,
+        db: AsyncSession,
         *,
         vendor_id: int,
         skip: int = 0,
@@ -388,41 +467,45 @@ class CRUDExpense(CRUDBase[Expense, ExpenseCreate, ExpenseUpdate]):
         status: Optional[str] = None,
         created_by: Optional[int] = None
     ) -> List[Expense]:
-        query = db.query(self.model).filter(self.model.vendor_id == vendor_id)
+        stmt = select(self.model).where(self.model.vendor_id == vendor_id)
 
         if start_date and end_date:
-            query = query.filter(between(self.model.date_incurred, start_date, end_date))
+            stmt = stmt.where(between(self.model.date_incurred, start_date, end_date))
 
         if status:
-            query = query.filter(self.model.status == status)
+            stmt = stmt.where(self.model.status == status)
 
         if created_by:
-            query = query.filter(self.model.created_by == created_by)
+            stmt = stmt.where(self.model.created_by_id == created_by)
 
-        return query.offset(skip).limit(limit).all()
+        result = await db.execute(stmt.offset(skip).limit(limit))
+        return result.scalars().all()
 
-    def get_by_category(
+    async def get_by_category(
         self,
-        db: Session,
+        db: AsyncSession,
         *,
         category_id: int,
         skip: int = 0,
         limit: int = 100
     ) -> List[Expense]:
-        return db.query(Expense)\
-            .filter(Expense.category_id == category_id)\
-            .offset(skip)\
-            .limit(limit)\
-            .all()
+        stmt = (
+            select(Expense)
+            .where(Expense.category_id == category_id)
+            .offset(skip)
+            .limit(limit)
+        )
+        result = await db.execute(stmt)
+        return result.scalars().all()
 
-    def get_category_summary(
+    async def get_category_summary(
         self,
-        db: Session,
+        db: AsyncSession,
         *,
         start_date: Optional[date] = None,
         end_date: Optional[date] = None
     ) -> List[Dict[str, Any]]:
-        query = db.query(
+        stmt = select(
             ExpenseCategory.name.label("category"),
             func.count(Expense.id).label("count"),
             func.sum(Expense.amount).label("total_amount")
@@ -431,9 +514,9 @@ class CRUDExpense(CRUDBase[Expense, ExpenseCreate, ExpenseUpdate]):
         .group_by(ExpenseCategory.name)
 
         if start_date:
-            query = query.filter(Expense.date >= start_date)
+            stmt = stmt.where(Expense.date_incurred >= start_date)
         if end_date:
-            query = query.filter(Expense.date <= end_date)
+            stmt = stmt.where(Expense.date_incurred <= end_date)
 
         return [
             {
@@ -441,7 +524,7 @@ class CRUDExpense(CRUDBase[Expense, ExpenseCreate, ExpenseUpdate]):
                 "count": row.count,
                 "total_amount": float(row.total_amount) if row.total_amount else 0.0
             }
-            for row in query.all()
+            for row in (await db.execute(stmt)).all()
         ]
 
 expense = CRUDExpense(Expense)
@@ -1,70 +1,60 @@
 from typing import List, Optional
 from fastapi import UploadFile
-from sqlalchemy.orm import Session
-import os
-import shutil
-from datetime import datetime
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.crud.base import CRUDBase
+from app.crud.base import AsyncCRUDBase
 from app.models.expense_attachment import ExpenseAttachment
 from app.schemas.expense_attachment import ExpenseAttachmentCreate, ExpenseAttachmentUpdate
-from app.core.config import settings
+from app.services.file_storage import FileStorageService, upload_file_chunks
 
-class CRUDExpenseAttachment(CRUDBase[ExpenseAttachment, ExpenseAttachmentCreate, ExpenseAttachmentUpdate]):
+class CRUDExpenseAttachment(AsyncCRUDBase[ExpenseAttachment, ExpenseAttachmentCreate, ExpenseAttachmentUpdate]):
     async def create_with_file(
         self,
-        db: Session,
+        db: AsyncSession,
         *,
         expense_id: int,
         file: UploadFile,
         uploaded_by: int
     ) -> ExpenseAttachment:
-        """Create a new expense attachment with file upload."""
-        # Create upload directory if it doesn't exist
-        upload_dir = os.path.join(settings.UPLOAD_DIR, "expenses", str(expense_id))
-        os.makedirs(upload_dir, exist_ok=True)
-
-        # Generate unique filename
-        timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-        file_extension = os.path.splitext(file.filename)[1]
-        unique_filename = f"{timestamp}_{file.filename}"
-        file_path = os.path.join(upload_dir, unique_filename)
-
-        # Save file
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-
-        # Create attachment record
-        file_size = os.path.getsize(file_path)
+        """Create a new expense attachment, streaming the upload to storage."""
+        stored_file = await FileStorageService.store(
+            db, upload_file_chunks(file), file.content_type
+        )
         db_obj = ExpenseAttachment(
             expense_id=expense_id,
+            stored_file_id=stored_file.id,
             file_name=file.filename,
-            file_path=file_path,
-            file_type=file.content_type,
-            file_size=file_size,
+            file_path=stored_file.path,
+            file_type=file.content_type or "application/octet-stream",
+            file_size=stored_file.size,
             uploaded_by=uploaded_by
         )
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        await db.commit()
+        await db.refresh(db_obj)
         return db_obj
 
-    def get_by_expense(
+    async def get_by_expense(
         self,
-        db: Session,
+        db: AsyncSession,
         *,
         expense_id: int
     ) -> List[ExpenseAttachment]:
         """Get all attachments for a specific expense."""
-        return db.query(ExpenseAttachment)\
-            .filter(ExpenseAttachment.expense_id == expense_id)\
-            .all()
-
-    def remove(self, db: Session, *, id: int) -> ExpenseAttachment:
-        """Remove an attachment and its associated file."""
-        obj = db.query(ExpenseAttachment).get(id)
-        if obj and os.path.exists(obj.file_path):
-            os.remove(obj.file_path)
-        return super().remove(db, id=id)
+        result = await db.execute(
+            select(ExpenseAttachment).where(ExpenseAttachment.expense_id == expense_id)
+        )
+        return result.scalars().all()
+
+    async def remove(self, db: AsyncSession, *, id: int) -> Optional[ExpenseAttachment]:
+        """Remove an attachment record."""
+        obj = await db.get(ExpenseAttachment, id)
+        if obj:
+            # The content may be shared with other attachments; files nothing
+            # references any more are removed by FileStorageService.purge_unreferenced
+            await db.delete(obj)
+            await db.commit()
+        return obj
 
 expense_attachment = CRUDExpenseAttachment(ExpenseAttachment)
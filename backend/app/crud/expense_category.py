@@ -1,22 +1,26 @@
 from typing import List, Optional
-from fastapi.encoders import jsonable_encoder
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.crud.base import CRUDBase
+from app.crud.base import AsyncCRUDBase
 from app.models.expense_category import ExpenseCategory
 from app.schemas.expense_category import ExpenseCategoryCreate, ExpenseCategoryUpdate
 
-class CRUDExpenseCategory(CRUDBase[ExpenseCategory, ExpenseCategoryCreate, ExpenseCategoryUpdate]):
-    def get_by_name(self, db: Session, *, name: str) -> Optional[ExpenseCategory]:
-        return db.query(ExpenseCategory).filter(ExpenseCategory.name == name).first()
+class CRUDExpenseCategory(AsyncCRUDBase[ExpenseCategory, ExpenseCategoryCreate, ExpenseCategoryUpdate]):
+    async def get_by_name(self, db: AsyncSession, *, name: str) -> Optional[ExpenseCategory]:
+        result = await db.execute(select(ExpenseCategory).where(ExpenseCategory.name == name).limit(1))
+        return result.scalar_one_or_none()
     
-    def get_active_categories(self, db: Session) -> List[ExpenseCategory]:
-        return db.query(ExpenseCategory).filter(ExpenseCategory.is_active == True).all()
+    async def get_active_categories(self, db: AsyncSession) -> List[ExpenseCategory]:
+        result = await db.execute(select(ExpenseCategory).where(ExpenseCategory.is_active.is_(True)))
+        return result.scalars().all()
     
-    def get_root_categories(self, db: Session) -> List[ExpenseCategory]:
-        return db.query(ExpenseCategory).filter(ExpenseCategory.parent_id == None).all()
+    async def get_root_categories(self, db: AsyncSession) -> List[ExpenseCategory]:
+        result = await db.execute(select(ExpenseCategory).where(ExpenseCategory.parent_id.is_(None)))
+        return result.scalars().all()
     
-    def get_children(self, db: Session, *, parent_id: int) -> List[ExpenseCategory]:
-        return db.query(ExpenseCategory).filter(ExpenseCategory.parent_id == parent_id).all()
+    async def get_children(self, db: AsyncSession, *, parent_id: int) -> List[ExpenseCategory]:
+        result = await db.execute(select(ExpenseCategory).where(ExpenseCategory.parent_id == parent_id))
+        return result.scalars().all()
 
 expense_category = CRUDExpenseCategory(ExpenseCategory)
@@ -1,18 +1,19 @@
 from typing import Dict, List, Optional, Union
-from sqlalchemy.orm import Session
-from app.crud.base import CRUDBase
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.crud.base import AsyncCRUDBase
 from app.models.notification import Notification, NotificationPreference
-from app.schemas.notification import NotificationCreate, NotificationUpdate
+from app.schemas.notification import NotificationCreate, NotificationStatus, NotificationUpdate
 from app.schemas.notification_preference import (
     NotificationPreferenceCreate,
     NotificationPreferenceUpdate
 )
 from datetime import datetime
 
-class CRUDNotification(CRUDBase[Notification, NotificationCreate, NotificationUpdate]):
+class CRUDNotification(AsyncCRUDBase[Notification, NotificationCreate, NotificationUpdate]):
     async def create_with_user(
         self,
-        db: Session,
+        db: AsyncSession,
         *,
         obj_in: NotificationCreate
     ) -> Notification:
@@ -21,101 +22,135 @@ class CRUDNotification(CRUDBase[Notification, NotificationCreate, NotificationUp
 
     async def get_user_notifications(
         self,
-        db: Session,
+        db: AsyncSession,
         user_id: int,
         skip: int = 0,
         limit: int = 100
     ) -> List[Notification]:
-        return (
-            db.query(self.model)
-            .filter(self.model.user_id == user_id)
+        result = await db.execute(
+            select(self.model)
+            .where(self.model.user_id == user_id)
             .order_by(self.model.created_at.desc())
             .offset(skip)
             .limit(limit)
-            .all()
         )
+        return result.scalars().all()
 
     async def get_unread_count(
         self,
-        db: Session,
+        db: AsyncSession,
         user_id: int
     ) -> int:
-        return (
-            db.query(self.model)
-            .filter(
+        result = await db.execute(
+            select(func.count())
+            .select_from(self.model)
+            .where(
                 self.model.user_id == user_id,
                 self.model.read_at.is_(None)
             )
-            .count()
         )
+        return result.scalar_one()
 
     async def mark_as_read(
         self,
-        db: Session,
+        db: AsyncSession,
         notification_id: int,
         user_id: int
     ) -> Optional[Notification]:
-        notification = (
-            db.query(self.model)
-            .filter(
+        result = await db.execute(
+            select(self.model).where(
                 self.model.id == notification_id,
                 self.model.user_id == user_id
             )
-            .first()
         )
+        notification = result.scalar_one_or_none()
         if notification:
             notification.read_at = datetime.utcnow()
-            db.commit()
+            await db.commit()
         return notification
 
+    async def mark_unread_as_read(
+        self,
+        db: AsyncSession,
+        notification_id: int,
+        user_id: int
+    ) -> bool:
+        result = await db.execute(
+            update(self.model)
+            .where(
+                self.model.id == notification_id,
+                self.model.user_id == user_id,
+                self.model.read_at.is_(None)
+            )
+            .values(read_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        return result.rowcount > 0
+
     async def mark_all_as_read(
         self,
-        db: Session,
+        db: AsyncSession,
         user_id: int
     ) -> int:
-        result = (
-            db.query(self.model)
-            .filter(
+        result = await db.execute(
+            update(self.model)
+            .where(
                 self.model.user_id == user_id,
                 self.model.read_at.is_(None)
             )
-            .update(
-                {"read_at": datetime.utcnow()},
-                synchronize_session=False
-            )
+            .values(read_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        return result.rowcount
+
+    async def update_notification_status(
+        self,
+        db: AsyncSession,
+        notification_id: int,
+        status: NotificationStatus
+    ) -> None:
+        values = {"status": status}
+        if status == NotificationStatus.SENT:
+            values["sent_at"] = datetime.utcnow()
+        await db.execute(
+            update(self.model)
+            .where(self.model.id == notification_id)
+            .values(**values)
+            .execution_options(synchronize_session=False)
         )
-        db.commit()
-        return result
+        await db.commit()
 
     async def get_pending_reminders(
         self,
-        db: Session,
+        db: AsyncSession,
         current_time: datetime
     ) -> List[Notification]:
-        return (
-            db.query(self.model)
-            .filter(
+        result = await db.execute(
+            select(self.model).where(
                 self.model.send_at <= current_time,
                 self.model.sent_at.is_(None)
             )
-            .all()
         )
+        return result.scalars().all()
 
-class CRUDNotificationPreference(CRUDBase[NotificationPreference, NotificationPreferenceCreate, NotificationPreferenceUpdate]):
+class CRUDNotificationPreference(AsyncCRUDBase[NotificationPreference, NotificationPreferenceCreate, NotificationPreferenceUpdate]):
     async def get_user_preferences(
         self,
-        db: Session,
+        db: AsyncSession,
         user_id: int
     ) -> Optional[NotificationPreference]:
-        return (
-            db.query(NotificationPreference)
-            .filter(NotificationPreference.user_id == user_id)
-            .first()
+        result = await db.execute(
+            select(NotificationPreference)
+            .where(NotificationPreference.user_id == user_id)
+            .limit(1)
         )
+        return result.scalar_one_or_none()
 
     async def create_user_preferences(
         self,
-        db: Session,
+        db: AsyncSession,
         obj_in: NotificationPreferenceCreate
     ) -> NotificationPreference:
         preferences = NotificationPreference(
@@ -126,13 +161,13 @@ class CRUDNotificationPreference(CRUDBase[NotificationPreference, NotificationPr
             time_zone=obj_in.time_zone
         )
         db.add(preferences)
-        db.commit()
-        db.refresh(preferences)
+        await db.commit()
+        await db.refresh(preferences)
         return preferences
 
     async def update_user_preferences(
         self,
-        db: Session,
+        db: AsyncSession,
         db_obj: NotificationPreference,
         obj_in: Union[NotificationPreferenceUpdate, Dict]
     ) -> NotificationPreference:
@@ -143,8 +178,8 @@ class CRUDNotificationPreference(CRUDBase[NotificationPreference, NotificationPr
                 setattr(db_obj, field, value)
         
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        await db.commit()
+        await db.refresh(db_obj)
         return db_obj
 
 notification = CRUDNotification(Notification)
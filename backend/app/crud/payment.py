@@ -1,16 +1,16 @@
 from typing import Dict, List, Optional, Union, Any
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, case, func, select
 from datetime import date
 
-from ..crud.base import CRUDBase
+from ..crud.base import AsyncCRUDBase
 from ..models.payment import Payment
 from ..schemas.payment import PaymentCreate, PaymentUpdate
 
-class CRUDPayment(CRUDBase[Payment, PaymentCreate, PaymentUpdate]):
-    def get_multi(
+class CRUDPayment(AsyncCRUDBase[Payment, PaymentCreate, PaymentUpdate]):
+    async def get_multi(
         self,
-        db: Session,
+        db: AsyncSession,
         *,
         skip: int = 0,
         limit: int = 100,
@@ -25,7 +25,7 @@ class CRUDPayment(CRUDBase[Payment, PaymentCreate, PaymentUpdate]):
         - payment_date__gte: Fecha de pago mayor o igual que
         - payment_date__lte: Fecha de pago menor o igual que
         """
-        query = db.query(self.model)
+        stmt = select(self.model)
         
         if filters:
             conditions = []
@@ -39,13 +39,14 @@ class CRUDPayment(CRUDBase[Payment, PaymentCreate, PaymentUpdate]):
                         conditions.append(getattr(self.model, key) == value)
             
             if conditions:
-                query = query.filter(and_(*conditions))
+                stmt = stmt.where(and_(*conditions))
         
-        return query.offset(skip).limit(limit).all()
+        result = await db.execute(stmt.offset(skip).limit(limit))
+        return result.scalars().all()
 
-    def get_contract_payments(
+    async def get_contract_payments(
         self,
-        db: Session,
+        db: AsyncSession,
         *,
         contract_id: int,
         start_date: Optional[date] = None,
@@ -55,18 +56,19 @@ class CRUDPayment(CRUDBase[Payment, PaymentCreate, PaymentUpdate]):
         Obtener todos los pagos de un contrato específico,
         opcionalmente filtrados por rango de fechas.
         """
-        query = db.query(self.model).filter(self.model.contract_id == contract_id)
+        stmt = select(self.model).where(self.model.contract_id == contract_id)
         
         if start_date:
-            query = query.filter(self.model.payment_date >= start_date)
+            stmt = stmt.where(self.model.payment_date >= start_date)
         if end_date:
-            query = query.filter(self.model.payment_date <= end_date)
+            stmt = stmt.where(self.model.payment_date <= end_date)
         
-        return query.all()
+        result = await db.execute(stmt)
+        return result.scalars().all()
 
-    def get_pending_payments(
+    async def get_pending_payments(
         self,
-        db: Session,
+        db: AsyncSession,
         *,
         contract_id: Optional[int] = None,
         due_before: Optional[date] = None
@@ -77,20 +79,21 @@ class CRUDPayment(CRUDBase[Payment, PaymentCreate, PaymentUpdate]):
         """
         from ..models.payment import PaymentStatus
         
-        query = db.query(self.model).filter(
+        stmt = select(self.model).where(
             self.model.status == PaymentStatus.PENDING
         )
         
         if contract_id:
-            query = query.filter(self.model.contract_id == contract_id)
+            stmt = stmt.where(self.model.contract_id == contract_id)
         if due_before:
-            query = query.filter(self.model.due_date <= due_before)
+            stmt = stmt.where(self.model.due_date <= due_before)
         
-        return query.all()
+        result = await db.execute(stmt)
+        return result.scalars().all()
 
-    def get_late_payments(
+    async def get_late_payments(
         self,
-        db: Session,
+        db: AsyncSession,
         *,
         contract_id: Optional[int] = None
     ) -> List[Payment]:
@@ -99,18 +102,19 @@ class CRUDPayment(CRUDBase[Payment, PaymentCreate, PaymentUpdate]):
         """
         from ..models.payment import PaymentStatus
         
-        query = db.query(self.model).filter(
+        stmt = select(self.model).where(
             self.model.status == PaymentStatus.LATE
         )
         
         if contract_id:
-            query = query.filter(self.model.contract_id == contract_id)
+            stmt = stmt.where(self.model.contract_id == contract_id)
         
-        return query.all()
+        result = await db.execute(stmt)
+        return result.scalars().all()
 
-    def calculate_contract_balance(
+    async def calculate_contract_balance(
         self,
-        db: Session,
+        db: AsyncSession,
         *,
         contract_id: int
     ) -> Dict[str, float]:
@@ -123,21 +127,23 @@ class CRUDPayment(CRUDBase[Payment, PaymentCreate, PaymentUpdate]):
         """
         from ..models.payment import PaymentStatus
         
-        payments = self.get_contract_payments(db, contract_id=contract_id)
-        
-        total_paid = sum(
-            p.amount for p in payments 
-            if p.status == PaymentStatus.PAID
-        )
-        total_pending = sum(
-            p.amount for p in payments 
-            if p.status == PaymentStatus.PENDING
-        )
-        total_late = sum(
-            p.amount for p in payments 
-            if p.status == PaymentStatus.LATE
-        )
-        total_late_fees = sum(p.late_fee for p in payments)
+        def total(column, status=None):
+            if status is not None:
+                column = case((self.model.status == status, column), else_=0)
+            return func.coalesce(func.sum(column), 0)
+
+        # Un solo agregado en la base de datos en lugar de cargar todos los pagos
+        stmt = select(
+            total(self.model.amount, PaymentStatus.PAID).label("total_paid"),
+            total(self.model.amount, PaymentStatus.PENDING).label("total_pending"),
+            total(self.model.amount, PaymentStatus.LATE).label("total_late"),
+            total(self.model.late_fee).label("total_late_fees")
+        ).where(self.model.contract_id == contract_id)
+        totals = (await db.execute(stmt)).one()
+        total_paid = totals.total_paid
+        total_pending = totals.total_pending
+        total_late = totals.total_late
+        total_late_fees = totals.total_late_fees
         
         return {
             "total_paid": total_paid,
@@ -1,24 +1,22 @@
 from typing import Dict, List, Optional, Union
-from sqlalchemy.orm import Session
-from sqlalchemy import or_, func
-from sqlalchemy import DateTime
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import or_, func, select, update
 from datetime import datetime
-from app.crud.base import CRUDBase
+from app.crud.base import AsyncCRUDBase
 from app.models.vendor import Vendor, VendorRating
-from app.models.expense import Expense
 from app.schemas.vendor import VendorCreate, VendorUpdate, VendorWithStats
 
-class CRUDVendor(CRUDBase[Vendor, VendorCreate, VendorUpdate]):
-    def get_multi(
+class CRUDVendor(AsyncCRUDBase[Vendor, VendorCreate, VendorUpdate]):
+    async def get_multi(
         self,
-        db: Session,
+        db: AsyncSession,
         *,
         skip: int = 0,
         limit: int = 100,
         search: Optional[str] = None,
         filters: Optional[Dict] = None
     ) -> List[Vendor]:
-        query = db.query(self.model)
+        stmt = select(self.model)
         
         if search:
             search_filter = or_(
@@ -26,83 +24,98 @@ class CRUDVendor(CRUDBase[Vendor, VendorCreate, VendorUpdate]):
                 self.model.business_type.ilike(f"%{search}%"),
                 self.model.contact_person.ilike(f"%{search}%")
             )
-            query = query.filter(search_filter)
+            stmt = stmt.where(search_filter)
         
         if filters:
             for field, value in filters.items():
                 if value is not None and hasattr(self.model, field):
-                    query = query.filter(getattr(self.model, field) == value)
+                    stmt = stmt.where(getattr(self.model, field) == value)
         
-        return query.offset(skip).limit(limit).all()
+        result = await db.execute(stmt.offset(skip).limit(limit))
+        return result.scalars().all()
 
-    def update_rating(
+    async def update_rating(
         self,
-        db: Session,
+        db: AsyncSession,
         *,
         vendor_id: int,
         rating: float,
-        rated_by: int
-    ) -> Vendor:
-        # Create new rating
-        vendor_rating = VendorRating(
+        rated_by: int,
+        comment: Optional[str] = None
+    ) -> Optional[Vendor]:
+        """
+        Record a rating and fold it into the vendor's running totals with a
+        single UPDATE, so the cost does not grow with the number of ratings.
+        """
+        vendor = await self.get(db, id=vendor_id)
+        if not vendor:
+            return None
+
+        db.add(VendorRating(
             vendor_id=vendor_id,
             rating=rating,
             rated_by=rated_by,
-            rated_at=datetime.utcnow()
+            rated_at=datetime.utcnow(),
+            comment=comment
+        ))
+        # Computed from the stored columns so concurrent ratings don't lose updates
+        average = (Vendor.rating_sum + rating) / (Vendor.rating_count + 1)
+        await db.execute(
+            update(Vendor)
+            .where(Vendor.id == vendor_id)
+            .values(
+                rating_count=Vendor.rating_count + 1,
+                rating_sum=Vendor.rating_sum + rating,
+                average_rating=average,
+                rating=func.round(average)
+            )
+            .execution_options(synchronize_session=False)
         )
-        db.add(vendor_rating)
-        
-        # Update vendor's average rating
-        vendor = self.get(db=db, id=vendor_id)
-        if vendor:
-            ratings = db.query(VendorRating).filter(
-                VendorRating.vendor_id == vendor_id
-            ).all()
-            
-            total_rating = sum(r.rating for r in ratings)
-            vendor.rating = total_rating / len(ratings)
-            
-            db.commit()
-            db.refresh(vendor)
-        
+        await db.commit()
+        await db.refresh(vendor)
         return vendor
 
-    def get_with_stats(
+    def _with_stats(self, vendor: Vendor) -> VendorWithStats:
+        data = {key: value for key, value in vendor.__dict__.items() if not key.startswith("_")}
+        data.pop("expenses", None)
+        # Stored as nullable columns; the schema wants plain numbers
+        data.pop("rating_count", None)
+        return VendorWithStats(
+            **data,
+            total_expenses=vendor.expense_count or 0,
+            total_amount=vendor.expense_total or 0,
+            average_expense=(vendor.expense_total / vendor.expense_count) if vendor.expense_count else 0,
+            rating_count=vendor.rating_count or 0
+        )
+
+    async def get_with_stats(
         self,
-        db: Session,
+        db: AsyncSession,
         *,
         vendor_id: int
     ) -> Optional[VendorWithStats]:
-        vendor = self.get(db=db, id=vendor_id)
+        vendor = await self.get(db, id=vendor_id)
         if not vendor:
             return None
+        return self._with_stats(vendor)
 
-        # Get expense statistics
-        expense_stats = db.query(
-            func.count(Expense.id).label("total_expenses"),
-            func.sum(Expense.amount).label("total_amount"),
-            func.avg(Expense.amount).label("average_expense"),
-            func.max(Expense.date_incurred).label("last_expense_date")
-        ).filter(
-            Expense.vendor_id == vendor_id
-        ).first()
-
-        # Get rating statistics
-        rating_stats = db.query(
-            func.count(VendorRating.id).label("rating_count"),
-            func.avg(VendorRating.rating).label("average_rating")
-        ).filter(
-            VendorRating.vendor_id == vendor_id
-        ).first()
-
-        return VendorWithStats(
-            **vendor.__dict__,
-            total_expenses=expense_stats.total_expenses or 0,
-            total_amount=expense_stats.total_amount or 0,
-            average_expense=expense_stats.average_expense or 0,
-            last_expense_date=expense_stats.last_expense_date,
-            rating_count=rating_stats.rating_count or 0,
-            average_rating=rating_stats.average_rating
-        )
+    async def get_multi_with_stats(
+        self,
+        db: AsyncSession,
+        *,
+        skip: int = 0,
+        limit: int = 10,
+        order_by: str = "rating"
+    ) -> List[VendorWithStats]:
+        stmt = select(Vendor)
+        if order_by == "rating":
+            # Served by ix_vendors_average_rating
+            stmt = stmt.order_by(Vendor.average_rating.desc().nullslast(), Vendor.id)
+        elif order_by == "expenses":
+            stmt = stmt.order_by(Vendor.expense_total.desc(), Vendor.id)
+        else:
+            stmt = stmt.order_by(Vendor.id)
+        result = await db.execute(stmt.offset(skip).limit(limit))
+        return [self._with_stats(vendor) for vendor in result.scalars().all()]
 
 vendor = CRUDVendor(Vendor)
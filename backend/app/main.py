@@ -9,12 +9,19 @@ from fastapi.openapi.docs import (
 )
 from fastapi.openapi.utils import get_openapi
 from dotenv import load_dotenv
+import logging
 import os
 
 from .core.config import settings
+from .core.database import engine
+from .core.sql_instrumentation import SQLInstrumentationMiddleware, install_sql_instrumentation
 from .api.v1.api import api_router
+from .core.pubsub import get_pubsub
+from .core.redis_client import close_redis_client
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
 # Cargar variables de entorno
 load_dotenv()
 
@@ -84,6 +91,10 @@ app.add_middleware(
     expose_headers=["*"],
 )
 
+# Conteo de consultas SQL por request (Server-Timing y detección de N+1)
+install_sql_instrumentation(engine)
+app.add_middleware(SQLInstrumentationMiddleware)
+
 # Incluir todas las rutas bajo el prefijo /api/v1
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
@@ -178,4 +189,45 @@ async def global_exception_handler(request: Request, exc: Exception):
 @app.on_event("startup")
 async def startup_event():
     """Initialize application resources"""
-    pass
+    from .services.audit_writer import audit_writer
+    from .services.scheduler_service import start_scheduler
+
+    await audit_writer.recover()
+    start_scheduler()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release application resources"""
+    # Cada paso se aísla para que un fallo no deje recursos sin liberar;
+    # el registro de auditoría va primero porque es lo único que no se puede perder
+    async def close_audit_writer():
+        from .services.audit_writer import audit_writer
+        await audit_writer.close()
+
+    async def stop_scheduled_jobs():
+        from .services.scheduler_service import stop_scheduler
+        await stop_scheduler()
+
+    async def flush_digests():
+        from .services.notification_service import notification_service
+        await notification_service.digest.flush_all()
+
+    async def close_pubsub():
+        await get_pubsub().close()
+
+    async def close_preview_pool():
+        from .services.previews import shutdown_preview_pool
+        shutdown_preview_pool()
+
+    for step in (
+        close_audit_writer,
+        stop_scheduled_jobs,
+        flush_digests,
+        close_pubsub,
+        close_redis_client,
+        close_preview_pool,
+    ):
+        try:
+            await step()
+        except Exception:
+            logger.exception("Error during shutdown step %s", step.__name__)
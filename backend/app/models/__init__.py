@@ -5,11 +5,14 @@ from .tenant import Tenant
 from .tenant_related import TenantReference, TenantDocument
 from .contract import Contract, ContractStatus, PaymentFrequency, ContractDocument
 from .payment import Payment
+from .reconciliation import ReconciliationItem, ReconciliationStatus
+from .stored_file import StoredFile, DerivativeStatus
+from .scheduled_job_run import ScheduledJobRun
 from .expense import Expense, ExpenseType, ExpenseStatus
 from .maintenance import MaintenanceRequest, MaintenanceStatus, MaintenancePriority
 from .loan import (
     Loan, LoanType, LoanStatus, 
-    LoanDocument, LoanPayment,
+    LoanDocument, LoanPayment, LoanMetrics,
     PaymentMethod, PaymentStatus
 )
 
@@ -28,6 +31,11 @@ __all__ = [
     'PaymentFrequency',
     'ContractDocument',
     'Payment',
+    'ReconciliationItem',
+    'ReconciliationStatus',
+    'StoredFile',
+    'DerivativeStatus',
+    'ScheduledJobRun',
     'Expense',
     'ExpenseType',
     'ExpenseStatus',
@@ -39,6 +47,7 @@ __all__ = [
     'LoanStatus',
     'LoanDocument',
     'LoanPayment',
+    'LoanMetrics',
     'PaymentMethod',
     'PaymentStatus',
 ]
@@ -1,19 +1,39 @@
-from sqlalchemy import Column, Integer, String, DateTime, JSON, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, JSON, ForeignKey, Index, DDL, event
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
-from app.db.base_class import Base
+from app.core.database import Base
 
 class AuditLog(Base):
-    id = Column(Integer, primary_key=True, index=True)
+    __tablename__ = "audit_log"
+    __table_args__ = (
+        # History of one entity and actions of one user, newest first; "id"
+        # breaks ties between entries written in the same instant (keyset paging)
+        Index("ix_audit_log_entity_performed_at", "entity_type", "entity_id", "performed_at", "id"),
+        Index("ix_audit_log_performed_by_performed_at", "performed_by", "performed_at", "id"),
+        # Monthly partitions (audit_log_pYYYYMM) are managed by
+        # app.services.audit_retention
+        {"postgresql_partition_by": "RANGE (performed_at)"},
+    )
+
+    # The partition key has to be part of the primary key
+    id = Column(Integer, primary_key=True, autoincrement=True)
     entity_type = Column(String, nullable=False)  # e.g., 'expense', 'property', etc.
     entity_id = Column(Integer, nullable=False)
     action = Column(String, nullable=False)  # e.g., 'create', 'update', 'delete'
     changes = Column(JSON, nullable=True)  # Store changes in JSON format
     performed_by = Column(Integer, ForeignKey("users.id"), nullable=False)
-    performed_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    performed_at = Column(DateTime, primary_key=True, default=datetime.utcnow, nullable=False)
     ip_address = Column(String, nullable=True)
     user_agent = Column(String, nullable=True)
-    
+
     # Relationships
-    user = relationship("User", foreign_keys=[performed_by])
+    user = relationship("User", foreign_keys=[performed_by], back_populates="audit_logs")
+
+# Tables created with metadata.create_all (tests, fresh databases) get a
+# catch-all partition so inserts work before any monthly partition exists
+event.listen(
+    AuditLog.__table__,
+    "after_create",
+    DDL("CREATE TABLE IF NOT EXISTS audit_log_default PARTITION OF audit_log DEFAULT").execute_if(dialect="postgresql")
+)
@@ -1,6 +1,8 @@
-from sqlalchemy import Column, String, ForeignKey, Boolean, Float, Date, Integer, Enum, JSON
+from sqlalchemy import Column, String, ForeignKey, Boolean, Float, Date, Integer, Enum, JSON, DDL, event, func, literal_column
+from sqlalchemy.dialects.postgresql import ExcludeConstraint
 from sqlalchemy.orm import relationship
 from .base import BaseModel
+from .stored_file import HasStoredFile
 import enum
 
 class ContractStatus(str, enum.Enum):
@@ -10,6 +12,9 @@ class ContractStatus(str, enum.Enum):
     TERMINATED = "terminated"
     RENEWED = "renewed"
 
+# Estados en los que un contrato ocupa su unidad
+BOOKED_STATUSES = (ContractStatus.ACTIVE, ContractStatus.RENEWED)
+
 class PaymentFrequency(str, enum.Enum):
     MONTHLY = "monthly"
     BIMONTHLY = "bimonthly"
@@ -68,15 +73,39 @@ class Contract(BaseModel):
     payments = relationship("Payment", back_populates="contract", cascade="all, delete-orphan")
     documents = relationship("ContractDocument", back_populates="contract", cascade="all, delete-orphan")
 
-class ContractDocument(BaseModel):
+def booked_period(start_date, end_date):
+    """Rango de fechas de un contrato con ambos extremos incluidos."""
+    # El tipo de rango va en línea (no como parámetro) para que la expresión
+    # coincida con la del índice GiST y el planificador pueda usarlo
+    return func.daterange(start_date, end_date, literal_column("'[]'"))
+
+# Dos contratos vigentes de la misma unidad no pueden solaparse; el índice
+# GiST de la restricción resuelve además las consultas de disponibilidad
+Contract.__table__.append_constraint(ExcludeConstraint(
+    (Contract.unit_id, "="),
+    (booked_period(Contract.start_date, Contract.end_date), "&&"),
+    name="contracts_unit_period_excl",
+    using="gist",
+    where=Contract.status.in_(BOOKED_STATUSES)
+))
+event.listen(
+    Contract.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS btree_gist").execute_if(dialect="postgresql")
+)
+
+class ContractDocument(HasStoredFile, BaseModel):
     __tablename__ = "contract_documents"
+    download_path = "contract-documents"
     
     contract_id = Column(Integer, ForeignKey("contracts.id"))
     document_type = Column(String)  # Contrato firmado, adenda, etc.
     file_path = Column(String)
+    stored_file_id = Column(Integer, ForeignKey("stored_files.id"), nullable=True, index=True)
     upload_date = Column(Date)
     is_signed = Column(Boolean, default=False)
     signed_date = Column(Date, nullable=True)
     
     # Relación
     contract = relationship("Contract", back_populates="documents")
+    stored_file = relationship("StoredFile", lazy="joined")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, Float, ForeignKey, Date, Enum, Boolean, JSON, Text
+from sqlalchemy import Column, String, Integer, Float, ForeignKey, Date, Enum, Boolean, JSON, Text, UniqueConstraint, Index, DDL, event
 from sqlalchemy.orm import relationship
 from .base import BaseModel
 import enum
@@ -32,6 +32,12 @@ class RecurrenceInterval(str, enum.Enum):
 
 class Expense(BaseModel):
     __tablename__ = "expenses"
+    __table_args__ = (
+        # Una sola instancia por gasto recurrente y fecha: regenerar es idempotente
+        UniqueConstraint("parent_expense_id", "date_incurred", name="uq_expenses_parent_date_incurred"),
+        # Recalcular la última fecha de gasto de un proveedor (trigger de abajo)
+        Index("ix_expenses_vendor_id_date_incurred", "vendor_id", "date_incurred"),
+    )
 
     # Relaciones
     property_id = Column(Integer, ForeignKey("properties.id"))
@@ -39,6 +45,7 @@ class Expense(BaseModel):
     maintenance_ticket_id = Column(Integer, ForeignKey("maintenance_tickets.id"), nullable=True)
     vendor_id = Column(Integer, ForeignKey("vendors.id"), nullable=True)
     category_id = Column(Integer, ForeignKey("expensecategory.id"), nullable=True)
+    created_by_id = Column(Integer, ForeignKey("users.id"), nullable=True, index=True)
     
     # Información básica
     description = Column(String)
@@ -82,8 +89,55 @@ class Expense(BaseModel):
     maintenance_ticket = relationship("MaintenanceTicket", back_populates="expenses")
     vendor = relationship("Vendor", back_populates="expenses")
     approver = relationship("User", foreign_keys=[approved_by])
+    created_by = relationship("User", back_populates="expenses_created", foreign_keys=[created_by_id])
     category = relationship("ExpenseCategory", back_populates="expenses")
     child_expenses = relationship("Expense", backref=relationship("parent", remote_side="Expense.id"))
 
     def __repr__(self):
         return f"<Expense {self.description} - {self.amount}>"
+
+# Estadísticas de gastos del proveedor (vendors.expense_count, expense_total y
+# last_expense_date) mantenidas en la misma transacción que cada cambio de
+# gasto, incluidas las inserciones masivas (importaciones, recurrentes)
+VENDOR_EXPENSE_STATS_FUNCTION = """
+CREATE OR REPLACE FUNCTION vendors_expense_stats() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.vendor_id IS NOT NULL THEN
+        UPDATE vendors SET
+            expense_count = expense_count - 1,
+            expense_total = expense_total - coalesce(OLD.amount, 0),
+            last_expense_date = CASE
+                WHEN OLD.date_incurred IS NOT NULL AND OLD.date_incurred >= last_expense_date THEN
+                    (SELECT max(date_incurred) FROM expenses WHERE vendor_id = OLD.vendor_id)
+                ELSE last_expense_date
+            END
+        WHERE id = OLD.vendor_id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.vendor_id IS NOT NULL THEN
+        UPDATE vendors SET
+            expense_count = expense_count + 1,
+            expense_total = expense_total + coalesce(NEW.amount, 0),
+            last_expense_date = greatest(last_expense_date, NEW.date_incurred)
+        WHERE id = NEW.vendor_id;
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+
+VENDOR_EXPENSE_STATS_TRIGGER = """
+CREATE TRIGGER expenses_vendor_stats
+AFTER INSERT OR DELETE OR UPDATE OF vendor_id, amount, date_incurred ON expenses
+FOR EACH ROW EXECUTE FUNCTION vendors_expense_stats()
+"""
+
+event.listen(
+    Expense.__table__,
+    "after_create",
+    DDL(VENDOR_EXPENSE_STATS_FUNCTION).execute_if(dialect="postgresql")
+)
+event.listen(
+    Expense.__table__,
+    "after_create",
+    DDL(VENDOR_EXPENSE_STATS_TRIGGER).execute_if(dialect="postgresql")
+)
@@ -3,17 +3,24 @@ from sqlalchemy.orm import relationship
 from datetime import datetime
 
 from app.db.base_class import Base
+from app.models.stored_file import HasStoredFile
+
+class ExpenseAttachment(HasStoredFile, Base):
+    __tablename__ = "expense_attachments"
+    download_path = "expense-attachments"
 
-class ExpenseAttachment(Base):
     id = Column(Integer, primary_key=True, index=True)
     expense_id = Column(Integer, ForeignKey("expenses.id", ondelete="CASCADE"), nullable=False)
     file_name = Column(String, nullable=False)
     file_path = Column(String, nullable=False)
     file_type = Column(String, nullable=False)
     file_size = Column(Integer, nullable=False)  # size in bytes
+    stored_file_id = Column(Integer, ForeignKey("stored_files.id"), nullable=True, index=True)
     uploaded_by = Column(Integer, ForeignKey("users.id"), nullable=False)
     uploaded_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     
     # Relationships
     expense = relationship("Expense", back_populates="attachments")
     uploader = relationship("User", foreign_keys=[uploaded_by])
+    # Joined: list views need the preview paths without one query per row
+    stored_file = relationship("StoredFile", lazy="joined")
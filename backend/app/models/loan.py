@@ -1,6 +1,7 @@
 from sqlalchemy import Column, String, Float, Integer, ForeignKey, Boolean, Date, Enum, DateTime
 from sqlalchemy.orm import relationship
 from .base import BaseModel
+from .stored_file import HasStoredFile
 import enum
 from datetime import datetime
 
@@ -65,13 +66,16 @@ class Loan(BaseModel):
     property = relationship("Property", back_populates="loans")
     documents = relationship("LoanDocument", back_populates="loan", cascade="all, delete-orphan")
     payments = relationship("LoanPayment", back_populates="loan", cascade="all, delete-orphan")
+    metrics = relationship("LoanMetrics", back_populates="loan", uselist=False, passive_deletes=True)
 
-class LoanDocument(BaseModel):
+class LoanDocument(HasStoredFile, BaseModel):
     __tablename__ = "loan_documents"
+    download_path = "loan-documents"
     
     loan_id = Column(Integer, ForeignKey("loans.id"))
     document_type = Column(String)  # Contrato, Pagaré, etc.
     file_path = Column(String)
+    stored_file_id = Column(Integer, ForeignKey("stored_files.id"), nullable=True, index=True)
     upload_date = Column(Date)
     description = Column(String, nullable=True)
     is_verified = Column(Boolean, default=False)
@@ -81,6 +85,7 @@ class LoanDocument(BaseModel):
     # Relaciones
     loan = relationship("Loan", back_populates="documents")
     verified_by_user = relationship("User")
+    stored_file = relationship("StoredFile", lazy="joined")
 
 class LoanPayment(BaseModel):
     __tablename__ = "loan_payments"
@@ -102,3 +107,43 @@ class LoanPayment(BaseModel):
     # Relaciones
     loan = relationship("Loan", back_populates="payments")
     processor = relationship("User")
+
+class LoanMetrics(BaseModel):
+    """
+    Métricas de rendimiento de un préstamo, calculadas en lote por
+    LoanReportService.compute_loan_metrics (tarea mensual). El endpoint de
+    métricas lee esta fila en lugar de recalcularla.
+    """
+    __tablename__ = "loan_metrics"
+
+    loan_id = Column(Integer, ForeignKey("loans.id", ondelete="CASCADE"), nullable=False, unique=True)
+    as_of = Column(Date, nullable=False)  # Fecha de referencia del cálculo
+
+    # Cuotas vencidas a la fecha (sin las canceladas) y cómo se pagaron
+    payments_due = Column(Integer, nullable=False, default=0)
+    completed_payments = Column(Integer, nullable=False, default=0)
+    on_time_payments = Column(Integer, nullable=False, default=0)
+    on_time_rate = Column(Float, nullable=False, default=0.0)  # % de cuotas vencidas pagadas a tiempo
+
+    # Distribución de días de atraso de las cuotas vencidas
+    days_past_due_current = Column(Integer, nullable=False, default=0)
+    days_past_due_1_30 = Column(Integer, nullable=False, default=0)
+    days_past_due_31_60 = Column(Integer, nullable=False, default=0)
+    days_past_due_61_90 = Column(Integer, nullable=False, default=0)
+    days_past_due_over_90 = Column(Integer, nullable=False, default=0)
+    max_days_past_due = Column(Integer, nullable=False, default=0)
+
+    # Pagado hasta la fecha
+    paid_to_date = Column(Float, nullable=False, default=0.0)
+    principal_paid = Column(Float, nullable=False, default=0.0)
+    interest_paid = Column(Float, nullable=False, default=0.0)
+    late_fees_paid = Column(Float, nullable=False, default=0.0)
+    last_payment_date = Column(Date, nullable=True)
+
+    # Saldo y fin previsto con la cuota y el tipo actuales
+    remaining_balance = Column(Float, nullable=True)
+    loan_progress = Column(Float, nullable=False, default=0.0)
+    projected_payoff_date = Column(Date, nullable=True)
+
+    loan = relationship("Loan", back_populates="metrics")
+
@@ -0,0 +1,39 @@
+from sqlalchemy import Column, String, Float, Integer, ForeignKey, Date, Enum, JSON, DateTime
+from sqlalchemy.orm import relationship
+from .base import BaseModel
+import enum
+
+class ReconciliationStatus(str, enum.Enum):
+    UNMATCHED = "unmatched"  # Ningún pago pendiente coincide
+    AMBIGUOUS = "ambiguous"  # Varios pagos candidatos
+    RESOLVED = "resolved"  # Asignado a mano a un pago
+    IGNORED = "ignored"  # Descartado (no es un cobro de renta)
+
+class ReconciliationItem(BaseModel):
+    """Línea de extracto bancario pendiente de revisión manual."""
+    __tablename__ = "reconciliation_items"
+
+    # Origen
+    statement_name = Column(String, nullable=False)
+    line_number = Column(Integer, nullable=False)
+    imported_by_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+
+    # Datos del movimiento
+    transaction_date = Column(Date, nullable=False)
+    amount = Column(Float, nullable=False)
+    reference = Column(String, nullable=True)
+    description = Column(String, nullable=True)
+    bank_transaction_id = Column(String, nullable=True, index=True)
+
+    # Revisión
+    status = Column(Enum(ReconciliationStatus), default=ReconciliationStatus.UNMATCHED, index=True)
+    reason = Column(String, nullable=True)
+    candidate_payment_ids = Column(JSON, default=list)
+    payment_id = Column(Integer, ForeignKey("payments.id"), nullable=True)
+    resolved_by_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    resolved_at = Column(DateTime(timezone=True), nullable=True)
+
+    # Relaciones
+    payment = relationship("Payment")
+    imported_by = relationship("User", foreign_keys=[imported_by_id])
+    resolved_by = relationship("User", foreign_keys=[resolved_by_id])
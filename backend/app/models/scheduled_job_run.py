@@ -0,0 +1,15 @@
+from sqlalchemy import Column, String
+from .base import BaseModel
+
+class ScheduledJobRun(BaseModel):
+    """
+    Último periodo completado de cada tarea programada (SchedulerService).
+
+    Se consulta y actualiza bajo el bloqueo consultivo de la tarea, así que
+    un worker que llega tarde no repite una tarea ya hecha en ese periodo.
+    """
+    __tablename__ = "scheduled_job_runs"
+
+    name = Column(String, nullable=False, unique=True)
+    # Día (YYYY-MM-DD) para las diarias, mes (YYYY-MM) para las mensuales
+    period = Column(String(10), nullable=False)
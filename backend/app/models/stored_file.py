@@ -0,0 +1,51 @@
+from sqlalchemy import Column, String, BigInteger, Enum
+from .base import BaseModel
+from app.core.config import settings
+import enum
+
+class DerivativeStatus(str, enum.Enum):
+    READY = "ready"  # Miniatura y vista previa generadas
+    UNSUPPORTED = "unsupported"  # Ni imagen ni PDF
+    FAILED = "failed"  # Error al procesar (archivo dañado, demasiado grande...)
+
+class StoredFile(BaseModel):
+    """
+    Contenido de un archivo subido, guardado una sola vez por SHA-256.
+
+    Adjuntos de gastos y documentos de préstamos y contratos apuntan aquí
+    (stored_file_id); los que ya no tienen referencias los borra
+    FileStorageService.purge_unreferenced.
+    """
+    __tablename__ = "stored_files"
+
+    sha256 = Column(String(64), nullable=False, unique=True)
+    size = Column(BigInteger, nullable=False)
+    content_type = Column(String, nullable=True)
+    path = Column(String, nullable=False)  # Relativa a UPLOAD_DIR
+
+    # Derivados junto al original (PreviewService); sin estado = pendientes
+    thumbnail_path = Column(String, nullable=True)
+    preview_path = Column(String, nullable=True)
+    derivative_status = Column(Enum(DerivativeStatus), nullable=True)
+
+class HasStoredFile:
+    """
+    Registros cuyo archivo está en stored_files (relación ``stored_file``):
+    URLs de descarga de la miniatura y la vista previa, si ya existen.
+    """
+    # Ruta bajo /downloads del tipo de registro, p. ej. "expense-attachments"
+    download_path = ""
+
+    def _variant_url(self, variant: str):
+        stored_file = self.stored_file
+        if stored_file is None or getattr(stored_file, f"{variant}_path") is None:
+            return None
+        return f"{settings.API_V1_STR}/downloads/{self.download_path}/{self.id}?variant={variant}"
+
+    @property
+    def thumbnail_url(self):
+        return self._variant_url("thumbnail")
+
+    @property
+    def preview_url(self):
+        return self._variant_url("preview")
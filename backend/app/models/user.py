@@ -2,7 +2,7 @@ from sqlalchemy import Boolean, Column, Integer, String, Float, ARRAY
 from sqlalchemy.orm import relationship
 
 from app.db.base_class import Base
-from app.core.permissions import PermissionLevel, ROLE_PERMISSIONS
+from app.core.permissions import PermissionLevel, PermissionMatrix, role_permissions
 
 class User(Base):
     id = Column(Integer, primary_key=True, index=True)
@@ -34,31 +34,19 @@ class User(Base):
         """Check if user has specific role."""
         return role in self.roles or self.is_superuser
 
+    @property
+    def permission_mask(self) -> int:
+        """Direct and role-based permissions as a bitmask (see PermissionMatrix)."""
+        return role_permissions.resolve(self.roles, self.permissions)
+
     def has_permission(self, permission: PermissionLevel) -> bool:
         """Check if user has specific permission."""
         if self.is_superuser:
             return True
-            
-        permission_value = permission.value
-        # Check direct permissions
-        if permission_value in self.permissions:
-            return True
-            
-        # Check role-based permissions
-        for role in self.roles:
-            if role in ROLE_PERMISSIONS and permission_value in ROLE_PERMISSIONS[role]:
-                return True
-                
-        return False
+        return PermissionMatrix.allows(self.permission_mask, role_permissions.bits[permission.value])
 
     def get_all_permissions(self) -> set[str]:
         """Get all permissions for user including role-based ones."""
         if self.is_superuser:
             return set(perm.value for perm in PermissionLevel)
-            
-        permissions = set(self.permissions)
-        for role in self.roles:
-            if role in ROLE_PERMISSIONS:
-                permissions.update(ROLE_PERMISSIONS[role])
-                
-        return permissions
+        return role_permissions.names(self.permission_mask) | set(self.permissions or [])
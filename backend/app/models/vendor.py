@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, Boolean, Text
+from sqlalchemy import Column, String, Integer, Boolean, Text, Float, Date, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from .base import BaseModel
 
@@ -27,12 +27,40 @@ class Vendor(BaseModel):
     is_verified = Column(Boolean, default=False)
     rating = Column(Integer, nullable=True)  # Rating interno del proveedor (1-5)
     
+    # Estadísticas desnormalizadas: las valoraciones las actualiza
+    # CRUDVendor.update_rating y los gastos un trigger sobre expenses
+    rating_count = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_sum = Column(Float, nullable=False, default=0.0, server_default="0")
+    average_rating = Column(Float, nullable=True)
+    expense_count = Column(Integer, nullable=False, default=0, server_default="0")
+    expense_total = Column(Float, nullable=False, default=0.0, server_default="0")
+    last_expense_date = Column(Date, nullable=True)
+    
     # Notas y documentos
     notes = Column(Text, nullable=True)
     documents_path = Column(String, nullable=True)  # Ruta a documentos del proveedor
     
     # Relaciones
     expenses = relationship("Expense", back_populates="vendor")
+    ratings = relationship("VendorRating", back_populates="vendor", cascade="all, delete-orphan")
     
     def __repr__(self):
         return f"<Vendor {self.name}>"
+
+# Ranking de proveedores (VendorService.get_top_vendors) sin ordenar en memoria
+Index(
+    "ix_vendors_average_rating",
+    Vendor.average_rating.desc().nullslast(),
+    Vendor.id
+)
+
+class VendorRating(BaseModel):
+    __tablename__ = "vendor_ratings"
+
+    vendor_id = Column(Integer, ForeignKey("vendors.id", ondelete="CASCADE"), nullable=False, index=True)
+    rating = Column(Float, nullable=False)
+    rated_by = Column(Integer, ForeignKey("users.id"), nullable=True)
+    rated_at = Column(DateTime(timezone=True), nullable=False)
+    comment = Column(Text, nullable=True)
+
+    vendor = relationship("Vendor", back_populates="ratings")
@@ -1,6 +1,7 @@
 from typing import Dict
 from fastapi import APIRouter, Depends, HTTPException, status
-from ..core.security import get_current_user, check_permissions, ROLES
+from ..core.permissions import PermissionMatrix
+from ..core.security import get_current_user, check_permissions, permission_mask, token_permissions, ROLES
 from ..schemas.auth import UserResponse, RoleResponse
 
 router = APIRouter()
@@ -78,9 +79,13 @@ async def check_user_permissions(
     required_permissions = permissions.split(",")
     user_permissions = current_user.get("permissions", [])
     
+    # Sin registrar permisos nuevos: la lista viene de la petición
     has_permissions = all(
-        perm in user_permissions 
+        perm in token_permissions.bits
         for perm in required_permissions
+    ) and PermissionMatrix.allows(
+        permission_mask(current_user),
+        token_permissions.mask(required_permissions)
     )
     
     if not has_permissions:
@@ -12,8 +12,9 @@ from ..schemas.property import (
     PropertyWithUnits
 )
 from ..core.security import get_current_user, check_permissions
+from ..core.response_cache import CachedRoute, cache_response
 
-router = APIRouter()
+router = APIRouter(route_class=CachedRoute)
 
 @router.get(
     "/properties",
@@ -25,6 +26,7 @@ router = APIRouter()
     Requiere el permiso 'property:read'.
     """,
 )
+@cache_response("properties")
 async def get_properties(
     user_id: str | None = None,
     db: AsyncSession = Depends(get_db),
@@ -126,6 +128,7 @@ async def bulk_update_properties(
     Requiere el permiso 'property:read'.
     """,
 )
+@cache_response("property:{property_id}")
 async def get_property(
     property_id: int = Path(..., gt=0, description="ID de la propiedad"),
     db: AsyncSession = Depends(get_db),
@@ -196,6 +199,7 @@ async def delete_property(
     Requiere el permiso 'property:read'.
     """,
 )
+@cache_response("properties")
 async def get_property_metrics(
     db: AsyncSession = Depends(get_db),
     current_user: Dict = Depends(get_current_user),
@@ -216,6 +220,7 @@ async def get_property_metrics(
     Requiere el permiso 'property:read'.
     """,
 )
+@cache_response("properties")
 async def search_properties(
     q: str = Query(..., min_length=2, description="Término de búsqueda"),
     db: AsyncSession = Depends(get_db),
@@ -288,6 +293,7 @@ async def create_unit(
         }
     }
 )
+@cache_response("property:{principal_id}")
 async def get_property_units(
     principal_id: int = Path(..., gt=0, description="ID de la propiedad principal"),
     db: AsyncSession = Depends(get_db),
@@ -318,6 +324,7 @@ async def get_property_units(
         }
     }
 )
+@cache_response("property:{property_id}")
 async def get_property_with_units(
     property_id: int = Path(..., gt=0, description="ID de la propiedad"),
     db: AsyncSession = Depends(get_db),
@@ -0,0 +1,11 @@
+from typing import Any, Dict, List
+from pydantic import BaseModel
+
+class AggregationGroup(BaseModel):
+    dimensions: List[str]  # Vacío para el total general
+    rows: List[Dict[str, Any]]  # Valores de las dimensiones y de las medidas
+
+class AggregationResult(BaseModel):
+    fact: str
+    measures: List[str]
+    groups: List[AggregationGroup]
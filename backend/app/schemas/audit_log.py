@@ -1,4 +1,4 @@
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from datetime import datetime
 from pydantic import BaseModel
 
@@ -24,6 +24,11 @@ class AuditLogInDBBase(AuditLogBase):
 class AuditLog(AuditLogInDBBase):
     pass
 
+class AuditLogPage(BaseModel):
+    items: List[AuditLog]
+    # Pass as ``cursor`` to fetch the next (older) page; None on the last page
+    next_cursor: Optional[str] = None
+
 class AuditLogDetail(AuditLog):
     user: "UserBase"
 
@@ -0,0 +1,17 @@
+from typing import List, Optional
+from pydantic import BaseModel
+
+class ImportRowError(BaseModel):
+    row: int  # 1 = primera fila de datos
+    field: Optional[str] = None
+    message: str
+
+class ImportReport(BaseModel):
+    entity: str
+    dry_run: bool
+    total_rows: int
+    valid_rows: int
+    inserted: int  # En dry run: filas que se insertarían
+    skipped: int  # Válidas pero ya existentes (conflicto de clave única)
+    errors: List[ImportRowError]
+    errors_truncated: bool = False
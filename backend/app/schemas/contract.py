@@ -1,4 +1,4 @@
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Literal
 from datetime import date
 from pydantic import BaseModel, constr, confloat, conint
 from ..models.contract import ContractStatus, PaymentFrequency, PaymentMethod
@@ -40,6 +40,8 @@ class ContractDocument(ContractDocumentBase):
     contract_id: int
     created_at: date
     updated_at: date
+    thumbnail_url: Optional[str] = None
+    preview_url: Optional[str] = None
 
     class Config:
         orm_mode = True
@@ -108,6 +110,17 @@ class Contract(ContractBase):
 class ContractInDB(Contract):
     pass
 
+class AvailabilitySpan(BaseModel):
+    start_date: date
+    end_date: date  # Incluido
+    status: Literal["free", "occupied"]
+    contract_id: Optional[int] = None
+
+class UnitAvailability(BaseModel):
+    unit_id: int
+    is_available: bool  # Libre durante todo el período consultado
+    spans: List[AvailabilitySpan]
+
 class ContractWithDetails(Contract):
     tenant: "TenantBase"
     unit: "UnitBase"
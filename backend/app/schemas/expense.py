@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
 from typing import Optional, List, Dict, Any
-from datetime import date
+from datetime import date, datetime
 from enum import Enum
 from .base import BaseSchema
 from .expense_category import ExpenseCategory as ExpenseCategorySchema
@@ -114,8 +114,10 @@ class ExpenseAttachment(BaseSchema):
     file_type: str
     file_size: int
     uploaded_by: int
-    uploaded_at: date
+    uploaded_at: datetime
     description: Optional[str] = None
+    thumbnail_url: Optional[str] = None
+    preview_url: Optional[str] = None
 
 class ExpenseSummary(BaseModel):
     total_amount: float
@@ -160,8 +162,14 @@ class RecurringExpenseSummary(BaseModel):
     unit_id: Optional[int] = None
     vendor_id: Optional[int] = None
 
+class RecurringGenerationResult(BaseModel):
+    generated_until: date
+    parents: int  # Recurring expenses considered
+    due: int  # Occurrences due up to generated_until
+    generated: int  # New instances (the rest already existed)
+
 from .property import PropertyBase
 from .unit import UnitBase
 from .maintenance import MaintenanceTicketBase
 from .vendor import VendorBase
-from .auth import UserBase
+from .user import UserBase
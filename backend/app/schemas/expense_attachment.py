@@ -18,6 +18,8 @@ class ExpenseAttachmentInDBBase(ExpenseAttachmentBase):
     file_path: str
     uploaded_by: int
     uploaded_at: datetime
+    thumbnail_url: Optional[str] = None
+    preview_url: Optional[str] = None
 
     class Config:
         from_attributes = True
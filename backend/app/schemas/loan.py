@@ -87,6 +87,8 @@ class LoanDocument(LoanDocumentBase, BaseSchema):
     is_verified: bool = False
     verified_by: Optional[int] = None
     verified_at: Optional[datetime] = None
+    thumbnail_url: Optional[str] = None
+    preview_url: Optional[str] = None
 
     class Config:
         from_attributes = True
@@ -1,7 +1,44 @@
 from typing import Optional, Dict, Any
 from pydantic import BaseModel, Field
 from datetime import datetime
-from app.models.notification import NotificationType, NotificationStatus, NotificationPriority
+from enum import Enum
+
+class NotificationType(str, Enum):
+    SYSTEM = "system"
+    MAINTENANCE = "maintenance"
+    CONTRACT = "contract"
+    PAYMENT_RECEIVED = "payment_received"
+    PAYMENT_DUE = "payment_due"
+    PAYMENT_LATE = "payment_late"
+    LOAN_STATUS = "loan_status"
+    EXPENSE_CREATED = "expense_created"
+    EXPENSE_UPDATED = "expense_updated"
+    EXPENSE_APPROVED = "expense_approved"
+    EXPENSE_CANCELLED = "expense_cancelled"
+    EXPENSE_ATTACHMENT_ADDED = "expense_attachment_added"
+    EXPENSE_REMINDER = "expense_reminder"
+    RECURRING_EXPENSE_DUE = "recurring_expense_due"
+    VENDOR_CREATED = "vendor_created"
+    VENDOR_UPDATED = "vendor_updated"
+    VENDOR_RATED = "vendor_rated"
+
+class NotificationStatus(str, Enum):
+    UNREAD = "unread"
+    READ = "read"
+    SENT = "sent"
+    FAILED = "failed"
+
+class NotificationPriority(str, Enum):
+    LOW = "low"
+    NORMAL = "normal"
+    HIGH = "high"
+    URGENT = "urgent"
+
+class NotificationChannel(str, Enum):
+    EMAIL = "email"
+    PUSH = "push"
+    SMS = "sms"
+
 
 class NotificationBase(BaseModel):
     type: NotificationType
@@ -30,6 +67,9 @@ class NotificationOut(NotificationBase):
 class NotificationInDB(NotificationOut):
     pass
 
+class NotificationResponse(NotificationOut):
+    pass
+
 class WebSocketMessage(BaseModel):
     type: str = Field(..., description="Tipo de mensaje: notification, error, system")
     data: Dict[str, Any] = Field(..., description="Contenido del mensaje")
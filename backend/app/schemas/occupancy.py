@@ -0,0 +1,40 @@
+from typing import List, Optional
+from datetime import date
+from pydantic import BaseModel
+
+class MonthlyOccupancy(BaseModel):
+    month: str  # YYYY-MM
+    occupancy_rate: float
+
+class OccupancySummary(BaseModel):
+    units: int
+    occupied_days: int
+    vacancy_days: int
+    occupancy_rate: float
+    move_ins: int
+    move_outs: int
+    turnover_rate: float  # Salidas por cada 100 unidades
+    lost_rent: float  # Renta base no cobrada por días vacíos
+    monthly: List[MonthlyOccupancy]
+    daily: Optional[List[int]] = None  # Unidades ocupadas por día, si se pide
+
+class PropertyOccupancy(OccupancySummary):
+    property_id: int
+
+class UnitOccupancy(BaseModel):
+    unit_id: int
+    property_id: int
+    occupied_days: int
+    vacancy_days: int
+    occupancy_rate: float
+    move_ins: int
+    move_outs: int
+    lost_rent: float
+
+class OccupancyReport(BaseModel):
+    start_date: date
+    end_date: date
+    days: int
+    portfolio: OccupancySummary
+    properties: List[PropertyOccupancy]
+    units: List[UnitOccupancy]
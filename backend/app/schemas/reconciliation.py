@@ -0,0 +1,46 @@
+from typing import List, Optional
+from datetime import date, datetime
+from enum import Enum
+from pydantic import BaseModel
+from .base import BaseSchema
+
+class ReconciliationStatus(str, Enum):
+    UNMATCHED = "unmatched"
+    AMBIGUOUS = "ambiguous"
+    RESOLVED = "resolved"
+    IGNORED = "ignored"
+
+class ReconciliationMatch(BaseModel):
+    line_number: int
+    payment_id: int
+    transaction_date: date
+    amount: float
+
+class ReconciliationItem(BaseSchema):
+    statement_name: str
+    line_number: int
+    transaction_date: date
+    amount: float
+    reference: Optional[str] = None
+    description: Optional[str] = None
+    bank_transaction_id: Optional[str] = None
+    status: ReconciliationStatus
+    reason: Optional[str] = None
+    candidate_payment_ids: List[int] = []
+    payment_id: Optional[int] = None
+    resolved_by_id: Optional[int] = None
+    resolved_at: Optional[datetime] = None
+
+class ReconciliationResolve(BaseModel):
+    payment_id: Optional[int] = None  # Pago al que corresponde la línea
+    ignore: bool = False  # Descartar la línea sin asignarla
+
+class ReconciliationReport(BaseModel):
+    statement_name: str
+    dry_run: bool
+    total_lines: int
+    matched: List[ReconciliationMatch]
+    unmatched: int
+    ambiguous: int
+    duplicates: int  # Líneas ya importadas en un extracto anterior
+    errors: List[str]  # Líneas que no se pudieron leer
@@ -0,0 +1,21 @@
+from typing import Optional
+from pydantic import BaseModel, Field
+from ..models.unit import UnitType
+
+class UnitBase(BaseModel):
+    property_id: int
+    unit_number: str = Field(..., min_length=1)
+    floor: Optional[int] = None
+    unit_type: UnitType
+    bedrooms: int = Field(0, ge=0)
+    bathrooms: float = Field(0, ge=0)
+    total_area: Optional[float] = Field(None, gt=0)
+    furnished: bool = False
+    is_available: bool = True
+    is_active: bool = True
+    base_rent: Optional[float] = Field(None, ge=0)
+    description: Optional[str] = None
+    amenities: Optional[str] = None
+
+class UnitCreate(UnitBase):
+    pass
@@ -57,6 +57,10 @@ class VendorRating(BaseSchema):
     rated_at: date
     comment: Optional[str] = None
 
+class VendorRatingCreate(BaseModel):
+    rating: float = Field(..., ge=1, le=5)
+    comment: Optional[str] = None
+
 class VendorWithStats(Vendor):
     total_expenses: int
     total_amount: float
@@ -64,3 +68,9 @@ class VendorWithStats(Vendor):
     last_expense_date: Optional[date] = None
     rating_count: int
     average_rating: Optional[float] = None
+
+# ExpenseBase imports this module, so it is resolved once both are loaded
+from .expense import ExpenseBase
+
+Vendor.model_rebuild()
+VendorWithStats.model_rebuild()
@@ -1,33 +1,18 @@
 from datetime import datetime
-from typing import Dict, Any, Optional
-from sqlalchemy.orm import Session
-from sqlalchemy import Column, Integer, String, DateTime, JSON, ForeignKey
-from sqlalchemy.orm import relationship
+from typing import Dict, Any, List, Optional, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..models.base import BaseModel
-from ..core.security import get_password_hash
-from ..models.user import User
+from ..core.config import settings
+from ..crud.audit_log import audit_log as crud_audit_log
+from ..models.audit_log import AuditLog
+from .audit_writer import audit_writer
 
-class AuditLog(BaseModel):
-    __tablename__ = "audit_logs"
-    
-    user_id = Column(Integer, ForeignKey("users.id"))
-    action = Column(String, nullable=False)  # CREATE, UPDATE, DELETE
-    resource_type = Column(String, nullable=False)  # payment, contract, etc.
-    resource_id = Column(Integer)
-    old_values = Column(JSON, nullable=True)
-    new_values = Column(JSON, nullable=True)
-    ip_address = Column(String)
-    user_agent = Column(String)
-    timestamp = Column(DateTime, default=datetime.utcnow)
-    
-    # Relaciones
-    user = relationship("User", back_populates="audit_logs")
+SENSITIVE_ACTIONS = ["DELETE", "UPDATE_STATUS", "REFUND"]
 
 class AuditService:
     @staticmethod
-    def log_action(
-        db: Session,
+    async def log_action(
+        db: AsyncSession,
         user_id: int,
         action: str,
         resource_type: str,
@@ -35,80 +20,86 @@ class AuditService:
         old_values: Optional[Dict[str, Any]] = None,
         new_values: Optional[Dict[str, Any]] = None,
         ip_address: Optional[str] = None,
-        user_agent: Optional[str] = None
-    ) -> AuditLog:
+        user_agent: Optional[str] = None,
+        sync: bool = False
+    ) -> None:
         """
-        Registrar una acción en el log de auditoría
+        Registrar una acción en el log de auditoría.
+        Se escribe en lote salvo con ``sync=True`` (ver ``audit_service.log_action``).
         """
-        audit_log = AuditLog(
-            user_id=user_id,
-            action=action,
-            resource_type=resource_type,
-            resource_id=resource_id,
-            old_values=old_values,
-            new_values=new_values,
-            ip_address=ip_address,
-            user_agent=user_agent
-        )
-        
-        db.add(audit_log)
-        db.commit()
-        db.refresh(audit_log)
-        
-        return audit_log
+        entry = {
+            "entity_type": resource_type,
+            "entity_id": resource_id,
+            "action": action,
+            "changes": {"old": old_values, "new": new_values},
+            "performed_by": user_id,
+            "ip_address": ip_address,
+            "user_agent": user_agent
+        }
+
+        if sync or action in settings.AUDIT_SYNC_ACTIONS or not settings.AUDIT_BUFFERED:
+            await audit_writer.write(db, entry)
+        else:
+            await audit_writer.submit(entry)
 
     @staticmethod
-    def get_resource_history(
-        db: Session,
+    async def get_resource_history(
+        db: AsyncSession,
         resource_type: str,
-        resource_id: int
-    ) -> list[AuditLog]:
+        resource_id: int,
+        cursor: Optional[str] = None,
+        limit: int = settings.AUDIT_PAGE_SIZE
+    ) -> Tuple[List[AuditLog], Optional[str]]:
         """
-        Obtener historial de cambios de un recurso
+        Obtener historial de cambios de un recurso, paginado por cursor
         """
-        return db.query(AuditLog).filter(
-            AuditLog.resource_type == resource_type,
-            AuditLog.resource_id == resource_id
-        ).order_by(AuditLog.timestamp.desc()).all()
+        return await crud_audit_log.get_entity_history(
+            db,
+            entity_type=resource_type,
+            entity_id=resource_id,
+            cursor=cursor,
+            limit=limit
+        )
 
     @staticmethod
-    def get_user_actions(
-        db: Session,
+    async def get_user_actions(
+        db: AsyncSession,
         user_id: int,
         start_date: Optional[datetime] = None,
-        end_date: Optional[datetime] = None
-    ) -> list[AuditLog]:
+        end_date: Optional[datetime] = None,
+        cursor: Optional[str] = None,
+        limit: int = settings.AUDIT_PAGE_SIZE
+    ) -> Tuple[List[AuditLog], Optional[str]]:
         """
-        Obtener acciones realizadas por un usuario
+        Obtener acciones realizadas por un usuario, paginadas por cursor
         """
-        query = db.query(AuditLog).filter(AuditLog.user_id == user_id)
-        
-        if start_date:
-            query = query.filter(AuditLog.timestamp >= start_date)
-        if end_date:
-            query = query.filter(AuditLog.timestamp <= end_date)
-        
-        return query.order_by(AuditLog.timestamp.desc()).all()
+        return await crud_audit_log.get_by_user(
+            db,
+            user_id=user_id,
+            start_date=start_date,
+            end_date=end_date,
+            cursor=cursor,
+            limit=limit
+        )
 
     @staticmethod
-    def get_sensitive_operations(
-        db: Session,
+    async def get_sensitive_operations(
+        db: AsyncSession,
         resource_type: Optional[str] = None,
         start_date: Optional[datetime] = None,
-        end_date: Optional[datetime] = None
-    ) -> list[AuditLog]:
+        end_date: Optional[datetime] = None,
+        cursor: Optional[str] = None,
+        limit: int = settings.AUDIT_PAGE_SIZE
+    ) -> Tuple[List[AuditLog], Optional[str]]:
         """
         Obtener operaciones sensibles (DELETE, actualizaciones de estado, etc.)
         """
-        sensitive_actions = ["DELETE", "UPDATE_STATUS", "REFUND"]
-        
-        query = db.query(AuditLog).filter(AuditLog.action.in_(sensitive_actions))
-        
-        if resource_type:
-            query = query.filter(AuditLog.resource_type == resource_type)
-        if start_date:
-            query = query.filter(AuditLog.timestamp >= start_date)
-        if end_date:
-            query = query.filter(AuditLog.timestamp <= end_date)
-        
-        return query.order_by(AuditLog.timestamp.desc()).all()
+        return await crud_audit_log.get_by_actions(
+            db,
+            actions=SENSITIVE_ACTIONS,
+            entity_type=resource_type,
+            start_date=start_date,
+            end_date=end_date,
+            cursor=cursor,
+            limit=limit
+        )
@@ -0,0 +1,171 @@
+import gzip
+import json
+import logging
+import os
+import re
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = "audit_log"
+DEFAULT_PARTITION = "audit_log_default"
+_PARTITION_NAME = re.compile(r"^audit_log_p(\d{4})(\d{2})$")
+_EXPORT_CHUNK = 1000
+
+def month_start(day: date) -> date:
+    return date(day.year, day.month, 1)
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+def partition_name(month: date) -> str:
+    return f"audit_log_p{month:%Y%m}"
+
+def partition_month(name: str) -> Optional[date]:
+    match = _PARTITION_NAME.match(name)
+    if not match:
+        return None
+    return date(int(match.group(1)), int(match.group(2)), 1)
+
+def _write_lines(f, rows: List[Dict[str, Any]]):
+    for row in rows:
+        f.write((json.dumps(row, default=str) + "\n").encode())
+
+def _close_archive(f, tmp_path: str, path: str):
+    f.close()
+    with open(tmp_path, "rb") as done:
+        os.fsync(done.fileno())
+    os.replace(tmp_path, path)
+
+class AuditRetentionService:
+    """
+    Mantenimiento de las particiones mensuales de audit_log.
+
+    Crea por adelantado las particiones de los próximos meses y archiva las
+    que superan el periodo de retención: sus filas se exportan a un JSONL
+    comprimido y después la partición se separa (DETACH) y se elimina.
+    """
+
+    @staticmethod
+    async def list_partitions(db: AsyncSession) -> List[str]:
+        result = await db.execute(text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = CAST(:parent AS regclass) "
+            "ORDER BY c.relname"
+        ), {"parent": PARENT_TABLE})
+        return list(result.scalars().all())
+
+    @staticmethod
+    async def create_partition(db: AsyncSession, month: date):
+        """
+        Crear la partición de un mes, moviendo a ella las filas de ese mes que
+        hubieran caído en la partición por defecto.
+        """
+        name = partition_name(month)
+        bounds = {"start": datetime.combine(month, datetime.min.time()),
+                  "end": datetime.combine(add_months(month, 1), datetime.min.time())}
+
+        # Se crea fuera del padre y se adjunta después: ATTACH falla si la
+        # partición por defecto aún contiene filas del rango
+        await db.execute(text(
+            f"CREATE TABLE {name} (LIKE {PARENT_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+        ))
+        if DEFAULT_PARTITION in await AuditRetentionService.list_partitions(db):
+            await db.execute(text(
+                f"WITH moved AS ("
+                f"DELETE FROM {DEFAULT_PARTITION} "
+                f"WHERE performed_at >= :start AND performed_at < :end RETURNING *"
+                f") INSERT INTO {name} SELECT * FROM moved"
+            ), bounds)
+        await db.execute(text(
+            f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {name} "
+            f"FOR VALUES FROM ('{bounds['start']:%Y-%m-%d}') TO ('{bounds['end']:%Y-%m-%d}')"
+        ))
+        await db.commit()
+        logger.info(f"Creada partición de auditoría {name}")
+
+    @staticmethod
+    async def ensure_partitions(db: AsyncSession, ahead: Optional[int] = None) -> List[str]:
+        """
+        Crear las particiones del mes actual y de los ``ahead`` siguientes, y
+        las de cualquier mes con filas en la partición por defecto.
+        """
+        ahead = settings.AUDIT_PARTITIONS_AHEAD if ahead is None else ahead
+        existing = await AuditRetentionService.list_partitions(db)
+
+        current = month_start(date.today())
+        months = {add_months(current, i) for i in range(ahead + 1)}
+        if DEFAULT_PARTITION in existing:
+            result = await db.execute(text(
+                f"SELECT DISTINCT CAST(date_trunc('month', performed_at) AS date) FROM {DEFAULT_PARTITION}"
+            ))
+            months.update(result.scalars().all())
+
+        created = []
+        for month in sorted(months):
+            if partition_name(month) not in existing:
+                await AuditRetentionService.create_partition(db, month)
+                created.append(partition_name(month))
+        return created
+
+    @staticmethod
+    async def archive_partition(db: AsyncSession, name: str, archive_dir: str) -> str:
+        """
+        Exportar una partición a ``<archive_dir>/<name>.jsonl.gz`` y eliminarla.
+        """
+        await run_in_threadpool(os.makedirs, archive_dir, exist_ok=True)
+        path = os.path.join(archive_dir, f"{name}.jsonl.gz")
+        tmp_path = f"{path}.tmp"
+
+        f = await run_in_threadpool(gzip.open, tmp_path, "wb")
+        try:
+            result = await db.stream(text(f"SELECT * FROM {name} ORDER BY performed_at, id"))
+            async for rows in result.mappings().partitions(_EXPORT_CHUNK):
+                await run_in_threadpool(_write_lines, f, [dict(row) for row in rows])
+        except Exception:
+            f.close()
+            os.remove(tmp_path)
+            raise
+        await run_in_threadpool(_close_archive, f, tmp_path, path)
+
+        # Solo se elimina una vez el archivo está completo en disco
+        await db.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+        await db.execute(text(f"DROP TABLE {name}"))
+        await db.commit()
+
+        logger.info(f"Archivada partición de auditoría {name} en {path}")
+        return path
+
+    @staticmethod
+    async def archive_expired(
+        db: AsyncSession,
+        retention_months: Optional[int] = None,
+        archive_dir: Optional[str] = None
+    ) -> List[str]:
+        """
+        Archivar las particiones anteriores al periodo de retención.
+        """
+        retention_months = settings.AUDIT_RETENTION_MONTHS if retention_months is None else retention_months
+        archive_dir = archive_dir or settings.AUDIT_ARCHIVE_DIR
+        cutoff = add_months(month_start(date.today()), -retention_months)
+
+        archived = []
+        for name in await AuditRetentionService.list_partitions(db):
+            month = partition_month(name)
+            if month is not None and month < cutoff:
+                archived.append(await AuditRetentionService.archive_partition(db, name, archive_dir))
+        return archived
+
+    @staticmethod
+    async def run(db: AsyncSession) -> Dict[str, List[str]]:
+        """Tarea periódica: crear particiones futuras y archivar las caducadas"""
+        created = await AuditRetentionService.ensure_partitions(db)
+        archived = await AuditRetentionService.archive_expired(db)
+        return {"created": created, "archived": archived}
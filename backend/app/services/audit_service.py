@@ -1,27 +1,37 @@
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from fastapi import Request
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 import json
 import logging
 from datetime import datetime
 
+from app.core.config import settings
+from app.crud.audit_log import audit_log as crud_audit_log
 from app.models.audit_log import AuditLog
 from app.models.user import User
+from app.services.audit_writer import audit_writer
 
 logger = logging.getLogger(__name__)
 
 class AuditService:
     async def log_action(
         self,
-        db: Session,
+        db: AsyncSession,
         entity_type: str,
         entity_id: int,
         action: str,
         user: User,
         changes: Optional[Dict[str, Any]] = None,
-        request: Optional[Request] = None
-    ) -> AuditLog:
-        """Log an action in the audit log."""
+        request: Optional[Request] = None,
+        sync: bool = False
+    ) -> None:
+        """
+        Log an action in the audit log.
+
+        Entries are buffered and written in batches by the audit writer. With
+        ``sync=True`` (or for actions listed in AUDIT_SYNC_ACTIONS) the entry
+        is written through ``db`` and committed before returning.
+        """
         try:
             # Get IP address and user agent if request is provided
             ip_address = None
@@ -30,25 +40,24 @@ class AuditService:
                 ip_address = request.client.host
                 user_agent = request.headers.get("user-agent")
 
-            # Create audit log entry
-            audit_log = AuditLog(
-                entity_type=entity_type,
-                entity_id=entity_id,
-                action=action,
-                changes=changes,
-                performed_by=user.id,
-                ip_address=ip_address,
-                user_agent=user_agent
-            )
+            entry = {
+                "entity_type": entity_type,
+                "entity_id": entity_id,
+                "action": action,
+                "changes": changes,
+                "performed_by": user.id,
+                "ip_address": ip_address,
+                "user_agent": user_agent
+            }
 
-            db.add(audit_log)
-            db.commit()
-            db.refresh(audit_log)
+            if sync or action in settings.AUDIT_SYNC_ACTIONS or not settings.AUDIT_BUFFERED:
+                await audit_writer.write(db, entry)
+            else:
+                await audit_writer.submit(entry)
 
-            logger.info(
-                f"Audit log created: {action} on {entity_type} {entity_id} by user {user.id}"
+            logger.debug(
+                f"Audit log queued: {action} on {entity_type} {entity_id} by user {user.id}"
             )
-            return audit_log
 
         except Exception as e:
             logger.error(f"Error creating audit log: {str(e)}")
@@ -56,42 +65,40 @@ class AuditService:
 
     async def get_entity_history(
         self,
-        db: Session,
+        db: AsyncSession,
         entity_type: str,
-        entity_id: int
-    ) -> list[AuditLog]:
-        """Get the complete history of an entity."""
-        return db.query(AuditLog).filter(
-            AuditLog.entity_type == entity_type,
-            AuditLog.entity_id == entity_id
-        ).order_by(AuditLog.performed_at.desc()).all()
+        entity_id: int,
+        cursor: Optional[str] = None,
+        limit: int = settings.AUDIT_PAGE_SIZE
+    ) -> Tuple[List[AuditLog], Optional[str]]:
+        """Get one page of the history of an entity, newest first."""
+        return await crud_audit_log.get_entity_history(
+            db, entity_type=entity_type, entity_id=entity_id, cursor=cursor, limit=limit
+        )
 
     async def get_user_actions(
         self,
-        db: Session,
+        db: AsyncSession,
         user_id: int,
         start_date: Optional[datetime] = None,
-        end_date: Optional[datetime] = None
-    ) -> list[AuditLog]:
-        """Get all actions performed by a user."""
-        query = db.query(AuditLog).filter(AuditLog.performed_by == user_id)
-        
-        if start_date:
-            query = query.filter(AuditLog.performed_at >= start_date)
-        if end_date:
-            query = query.filter(AuditLog.performed_at <= end_date)
-            
-        return query.order_by(AuditLog.performed_at.desc()).all()
+        end_date: Optional[datetime] = None,
+        cursor: Optional[str] = None,
+        limit: int = settings.AUDIT_PAGE_SIZE
+    ) -> Tuple[List[AuditLog], Optional[str]]:
+        """Get one page of the actions performed by a user, newest first."""
+        return await crud_audit_log.get_by_user(
+            db, user_id=user_id, start_date=start_date, end_date=end_date, cursor=cursor, limit=limit
+        )
 
     async def audit_change(
         self,
-        db: Session,
+        db: AsyncSession,
         entity_type: str,
         entity_id: int,
         action: str,
         user_id: int,
         changes: Optional[Dict[str, Any]] = None
-    ) -> AuditLog:
+    ) -> None:
         """Helper function to audit changes."""
         user = User(id=user_id)  # Mock user for testing
         return await self.log_action(
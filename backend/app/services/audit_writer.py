@@ -0,0 +1,172 @@
+import asyncio
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Set
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.monitoring import audit_entries_total, audit_flush_batch_size
+from app.models.audit_log import AuditLog
+
+logger = logging.getLogger(__name__)
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+def _jsonable(entry: Dict[str, Any]) -> Dict[str, Any]:
+    # JSON round trip so that the "changes" column never holds model objects,
+    # dates or Decimals that the driver cannot serialise at flush time
+    return json.loads(json.dumps(entry, default=_json_default))
+
+class AuditWriter:
+    """
+    Buffered writer for the audit log.
+
+    Entries are queued in memory and written with one multi-row INSERT per
+    batch, in a session of their own, when ``batch_size`` entries are pending
+    or ``flush_interval`` seconds after the first one was queued. A batch that
+    cannot be written is appended to a spill file and replayed by
+    ``recover()``, so entries survive a database outage or a shutdown.
+
+    ``write()`` inserts an entry through the caller's session and commits it
+    before returning, for actions whose audit trail must never be delayed.
+    """
+    def __init__(
+        self,
+        session_factory: Optional[Callable[[], AsyncSession]] = None,
+        batch_size: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        spill_path: Optional[str] = None
+    ):
+        self._session_factory = session_factory
+        self.batch_size = batch_size or settings.AUDIT_BATCH_SIZE
+        self.flush_interval = settings.AUDIT_FLUSH_INTERVAL if flush_interval is None else flush_interval
+        self.spill_path = spill_path or settings.AUDIT_SPILL_PATH
+        self._buffer: List[Dict[str, Any]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self._lock = asyncio.Lock()
+
+    @property
+    def pending(self) -> int:
+        return len(self._buffer)
+
+    def _session(self) -> AsyncSession:
+        if self._session_factory is None:
+            from app.core.database import SessionLocal
+
+            self._session_factory = SessionLocal
+        return self._session_factory()
+
+    async def submit(self, entry: Dict[str, Any]):
+        """
+        Queue an entry; it is written with the next batch.
+        """
+        entry = _jsonable(entry)
+        entry.setdefault("performed_at", datetime.utcnow().isoformat())
+        self._buffer.append(entry)
+        audit_entries_total.labels(outcome="buffered").inc()
+
+        if len(self._buffer) >= self.batch_size:
+            await self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(
+                self.flush_interval, self._schedule_flush
+            )
+
+    async def write(self, db: AsyncSession, entry: Dict[str, Any]):
+        """
+        Insert an entry through the caller's session and commit it, together
+        with anything else pending in that transaction.
+        """
+        await db.execute(insert(AuditLog), [self._row(_jsonable(entry))])
+        await db.commit()
+        audit_entries_total.labels(outcome="sync").inc()
+
+    def _schedule_flush(self):
+        self._timer = None
+        task = asyncio.create_task(self.flush())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    @staticmethod
+    def _row(entry: Dict[str, Any]) -> Dict[str, Any]:
+        row = dict(entry)
+        if isinstance(row.get("performed_at"), str):
+            row["performed_at"] = datetime.fromisoformat(row["performed_at"])
+        return row
+
+    async def flush(self):
+        """
+        Write every pending entry.
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        async with self._lock:
+            while self._buffer:
+                batch = self._buffer[:self.batch_size]
+                del self._buffer[:self.batch_size]
+                await self._write_batch(batch)
+
+    async def _write_batch(self, batch: List[Dict[str, Any]]):
+        try:
+            async with self._session() as db:
+                await db.execute(insert(AuditLog), [self._row(entry) for entry in batch])
+                await db.commit()
+        except Exception as e:
+            logger.error(f"Error writing {len(batch)} audit entries, spilling to {self.spill_path}: {str(e)}")
+            self._spill(batch)
+            return
+        audit_flush_batch_size.observe(len(batch))
+        audit_entries_total.labels(outcome="written").inc(len(batch))
+
+    def _spill(self, batch: List[Dict[str, Any]]):
+        with open(self.spill_path, "a") as f:
+            for entry in batch:
+                f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        audit_entries_total.labels(outcome="spilled").inc(len(batch))
+
+    async def recover(self) -> int:
+        """
+        Replay the entries spilled by earlier failed batches.
+        """
+        # Moved aside first so that entries failing again are spilled to a fresh
+        # file; a replay file left by an interrupted recovery is kept and retried
+        replay_path = f"{self.spill_path}.replay"
+        if os.path.exists(self.spill_path):
+            with open(self.spill_path) as src, open(replay_path, "a") as dst:
+                dst.write(src.read())
+                dst.flush()
+                os.fsync(dst.fileno())
+            os.remove(self.spill_path)
+        if not os.path.exists(replay_path):
+            return 0
+
+        with open(replay_path) as f:
+            entries = [json.loads(line) for line in f if line.strip()]
+
+        async with self._lock:
+            for start in range(0, len(entries), self.batch_size):
+                await self._write_batch(entries[start:start + self.batch_size])
+        os.remove(replay_path)
+
+        logger.info(f"Replayed {len(entries)} spilled audit entries")
+        return len(entries)
+
+    async def close(self):
+        """
+        Write every pending entry, e.g. on shutdown.
+        """
+        await self.flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+audit_writer = AuditWriter()
@@ -0,0 +1,305 @@
+import codecs
+import csv
+import enum
+import json
+import logging
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Type
+from fastapi import HTTPException, status
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import JSON, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.response_cache import response_cache
+from app.models.expense import Expense
+from app.models.property import Property
+from app.models.tenant import Tenant
+from app.models.unit import Unit
+from app.schemas.bulk_import import ImportReport, ImportRowError
+from app.schemas.expense import ExpenseCreate
+from app.schemas.property import PropertyCreate
+from app.schemas.tenant import TenantCreate
+from app.schemas.unit import UnitCreate
+
+logger = logging.getLogger(__name__)
+
+FORMAT_CSV = "csv"
+FORMAT_NDJSON = "ndjson"
+
+# (número de fila, datos, error de formato)
+ParsedRow = Tuple[int, Optional[Dict[str, Any]], Optional[str]]
+
+@dataclass
+class ImportEntity:
+    model: Any
+    schema: Type[BaseModel]
+    # Respuestas cacheadas que dejan de ser válidas tras importar
+    cache_tags: Tuple[str, ...] = ()
+
+ENTITIES: Dict[str, ImportEntity] = {
+    "properties": ImportEntity(Property, PropertyCreate, ("properties",)),
+    "units": ImportEntity(Unit, UnitCreate, ("properties", "occupancy")),
+    "tenants": ImportEntity(Tenant, TenantCreate),
+    "expenses": ImportEntity(Expense, ExpenseCreate, ("expenses",)),
+}
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Líneas (con su salto de línea) de un cuerpo recibido por trozos."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line + "\n"
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+def _csv_value(value: str) -> Any:
+    value = value.strip()
+    # Listas y diccionarios (p. ej. tags de un gasto) van como JSON en la celda
+    if value[:1] in ("[", "{"):
+        try:
+            return json.loads(value)
+        except ValueError:
+            pass
+    return value
+
+async def iter_csv(lines: AsyncIterator[str]) -> AsyncIterator[ParsedRow]:
+    header = None
+    record = ""
+    row = 0
+    async for line in lines:
+        record += line
+        # Un número impar de comillas indica un campo entrecomillado que
+        # continúa en la línea siguiente
+        if record.count('"') % 2:
+            continue
+        values = next(csv.reader([record]), [])
+        record = ""
+        if not any(value.strip() for value in values):
+            continue
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+
+        row += 1
+        if len(values) != len(header):
+            yield row, None, f"Expected {len(header)} columns, got {len(values)}"
+            continue
+        # Las celdas vacías se omiten para que apliquen los valores por defecto
+        yield row, {name: _csv_value(value) for name, value in zip(header, values) if value.strip()}, None
+    if record.strip():
+        yield row + 1, None, "Unterminated quoted field"
+
+async def iter_ndjson(lines: AsyncIterator[str]) -> AsyncIterator[ParsedRow]:
+    row = 0
+    async for line in lines:
+        if not line.strip():
+            continue
+        row += 1
+        try:
+            data = json.loads(line)
+        except ValueError as e:
+            yield row, None, f"Invalid JSON: {str(e)}"
+            continue
+        if not isinstance(data, dict):
+            yield row, None, "Each line must be a JSON object"
+            continue
+        yield row, data, None
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+class _Importer:
+    """Estado de una importación: columnas, staging y errores acumulados."""
+    STAGING = "import_staging"
+
+    def __init__(self, db: AsyncSession, entity: ImportEntity, fixed: Dict[str, Any]):
+        self.db = db
+        self.entity = entity
+        self.table = entity.model.__table__
+        self.fixed = {name: value for name, value in fixed.items() if name in self.table.c}
+
+        fields = set(entity.schema.model_fields) | set(self.fixed)
+        self.columns = [c for c in self.table.columns if c.name in fields]
+        self.column_names = [c.name for c in self.columns]
+
+        # Valores por defecto del modelo (no del servidor) para las columnas
+        # que el esquema no trae: escalares o funciones Python van en cada
+        # fila; expresiones SQL (p. ej. now()) se aplican al fusionar
+        self.row_defaults: Dict[str, Any] = {}
+        self.sql_defaults: Dict[str, str] = {}
+        for column in self.table.columns:
+            default = column.default
+            if column.name in fields or column.primary_key or default is None:
+                continue
+            if default.is_clause_element:
+                self.sql_defaults[column.name] = str(default.arg.compile(dialect=postgresql.dialect()))
+            elif default.is_callable:
+                self.row_defaults[column.name] = default.arg(None)
+            else:
+                self.row_defaults[column.name] = default.arg
+        self.copy_columns = self.column_names + list(self.row_defaults) + ["_row"]
+        self.copy_types = {c.name: c.type for c in self.table.columns}
+
+        self.errors: List[ImportRowError] = []
+        self.error_count = 0
+        self.total_rows = 0
+        self.valid_rows = 0
+
+    def add_error(self, row: int, message: str, field: Optional[str] = None):
+        self.error_count += 1
+        if len(self.errors) < settings.IMPORT_MAX_ERRORS:
+            self.errors.append(ImportRowError(row=row, field=field, message=message))
+
+    def _copy_value(self, name: str, value: Any) -> Any:
+        if value is None:
+            return None
+        if isinstance(self.copy_types.get(name), JSON):
+            return json.dumps(value, default=str)
+        if isinstance(value, enum.Enum):
+            # SQLAlchemy guarda los enums por nombre
+            return value.name
+        return value
+
+    def validate(self, row: int, data: Dict[str, Any]) -> Optional[tuple]:
+        try:
+            values = self.entity.schema.model_validate(data).model_dump()
+        except ValidationError as e:
+            for error in e.errors():
+                self.add_error(row, error["msg"], ".".join(str(part) for part in error["loc"]) or None)
+            return None
+        values.update(self.fixed)
+        values.update(self.row_defaults)
+        return tuple(self._copy_value(name, values.get(name)) for name in self.copy_columns[:-1]) + (row,)
+
+    async def create_staging(self):
+        # Sin restricciones: las comprobaciones se hacen al fusionar
+        columns = ", ".join(_quote(name) for name in self.copy_columns[:-1])
+        await self.db.execute(text(
+            f"CREATE TEMP TABLE {self.STAGING} ON COMMIT DROP AS "
+            f"SELECT {columns} FROM {_quote(self.table.name)} WITH NO DATA"
+        ))
+        await self.db.execute(text(f"ALTER TABLE {self.STAGING} ADD COLUMN _row integer"))
+
+    async def copy(self, records: List[tuple]):
+        connection = await self.db.connection()
+        raw = await connection.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(
+            self.STAGING, records=records, columns=self.copy_columns
+        )
+
+    async def check_foreign_keys(self):
+        """Descartar del staging las filas que apuntan a registros inexistentes."""
+        for column in self.columns:
+            for foreign_key in column.foreign_keys:
+                target = foreign_key.column
+                result = await self.db.execute(text(
+                    f"DELETE FROM {self.STAGING} s WHERE s.{_quote(column.name)} IS NOT NULL "
+                    f"AND NOT EXISTS (SELECT 1 FROM {_quote(target.table.name)} t "
+                    f"WHERE t.{_quote(target.name)} = s.{_quote(column.name)}) "
+                    f"RETURNING s._row, s.{_quote(column.name)}"
+                ))
+                for row, value in sorted(result.all()):
+                    self.valid_rows -= 1
+                    self.add_error(row, f"{target.table.name} {value} not found", column.name)
+
+    async def merge(self) -> int:
+        columns = self.column_names + list(self.row_defaults)
+        target = ", ".join(_quote(name) for name in columns + list(self.sql_defaults))
+        source = ", ".join([_quote(name) for name in columns] + list(self.sql_defaults.values()))
+        result = await self.db.execute(text(
+            f"WITH inserted AS ("
+            f"INSERT INTO {_quote(self.table.name)} ({target}) "
+            f"SELECT {source} FROM {self.STAGING} ORDER BY _row "
+            f"ON CONFLICT DO NOTHING RETURNING 1"
+            f") SELECT count(*) FROM inserted"
+        ))
+        return result.scalar()
+
+class BulkImportService:
+    @staticmethod
+    async def import_rows(
+        db: AsyncSession,
+        entity_name: str,
+        chunks: AsyncIterator[bytes],
+        format: str,
+        dry_run: bool = False,
+        user_id: Optional[str] = None
+    ) -> ImportReport:
+        """
+        Importar filas CSV o NDJSON recibidas por trozos.
+
+        Las filas se validan con los esquemas Pydantic de cada entidad y las
+        válidas se cargan por lotes con COPY en una tabla temporal; al final
+        se descartan las que apuntan a registros inexistentes y el resto se
+        fusiona con un único INSERT ... SELECT. Las filas que chocan con una
+        clave única se omiten. En dry run todo se deshace al terminar.
+        """
+        entity = ENTITIES.get(entity_name)
+        if entity is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Unknown import entity: {entity_name}"
+            )
+        if format == FORMAT_CSV:
+            rows = iter_csv(iter_lines(chunks))
+        elif format == FORMAT_NDJSON:
+            rows = iter_ndjson(iter_lines(chunks))
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unsupported import format: {format}"
+            )
+
+        importer = _Importer(db, entity, {"user_id": user_id} if user_id else {})
+        try:
+            await importer.create_staging()
+            batch: List[tuple] = []
+            async for row, data, error in rows:
+                importer.total_rows = row
+                if error:
+                    importer.add_error(row, error)
+                    continue
+                record = importer.validate(row, data)
+                if record is None:
+                    continue
+                importer.valid_rows += 1
+                batch.append(record)
+                if len(batch) >= settings.IMPORT_BATCH_SIZE:
+                    await importer.copy(batch)
+                    batch = []
+            if batch:
+                await importer.copy(batch)
+
+            await importer.check_foreign_keys()
+            inserted = await importer.merge()
+
+            if dry_run:
+                await db.rollback()
+            else:
+                await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+
+        if not dry_run and inserted:
+            await response_cache.invalidate(*entity.cache_tags)
+        logger.info(
+            f"Import of {entity_name} ({'dry run' if dry_run else 'committed'}): "
+            f"{importer.total_rows} rows, {inserted} inserted, {importer.error_count} errors"
+        )
+
+        return ImportReport(
+            entity=entity_name,
+            dry_run=dry_run,
+            total_rows=importer.total_rows,
+            valid_rows=importer.valid_rows,
+            inserted=inserted,
+            skipped=importer.valid_rows - inserted,
+            errors=importer.errors,
+            errors_truncated=importer.error_count > len(importer.errors)
+        )
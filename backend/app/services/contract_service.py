@@ -1,13 +1,50 @@
-from typing import List, Optional, Dict
-from datetime import date, datetime
+from typing import Iterable, List, Optional, Dict, Tuple
+from datetime import date, datetime, timedelta
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import and_, select
+from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException, status
-from ..models.contract import Contract, ContractDocument, ContractStatus
+from ..core.response_cache import response_cache
+from ..models.contract import Contract, ContractDocument, ContractStatus, BOOKED_STATUSES, booked_period
 from ..models.payment import Payment, PaymentMethod
 from ..models.tenant import Tenant
 from ..models.unit import Unit
-from ..schemas.contract import ContractCreate, ContractUpdate, PaymentCreate, ContractDocumentCreate
+from ..schemas.contract import (
+    ContractCreate,
+    ContractUpdate,
+    PaymentCreate,
+    ContractDocumentCreate,
+    AvailabilitySpan,
+    UnitAvailability
+)
+
+OVERLAP_CONSTRAINT = "contracts_unit_period_excl"
+
+def availability_spans(
+    start_date: date,
+    end_date: date,
+    contracts: Iterable[Tuple[int, date, date]]
+) -> List[AvailabilitySpan]:
+    """
+    Dividir [start_date, end_date] en tramos libres y ocupados a partir de los
+    contratos (id, inicio, fin) de una unidad, ordenados por inicio.
+    """
+    spans = []
+    cursor = start_date
+    for contract_id, contract_start, contract_end in contracts:
+        occupied_start = max(contract_start, start_date)
+        occupied_end = min(contract_end, end_date)
+        if occupied_start > cursor:
+            spans.append(AvailabilitySpan(
+                start_date=cursor, end_date=occupied_start - timedelta(days=1), status="free"
+            ))
+        spans.append(AvailabilitySpan(
+            start_date=occupied_start, end_date=occupied_end, status="occupied", contract_id=contract_id
+        ))
+        cursor = max(cursor, occupied_end + timedelta(days=1))
+    if cursor <= end_date:
+        spans.append(AvailabilitySpan(start_date=cursor, end_date=end_date, status="free"))
+    return spans
 
 class ContractService:
     @staticmethod
@@ -69,14 +106,14 @@ class ContractService:
     @staticmethod
     async def validate_unit_availability(db: AsyncSession, unit_id: int, start_date: date, end_date: date):
         # Verificar contratos existentes que se superpongan con las fechas propuestas
+        # (búsqueda en el índice GiST de contracts_unit_period_excl)
         stmt = select(Contract).where(
             Contract.unit_id == unit_id,
-            Contract.status.in_([ContractStatus.ACTIVE, ContractStatus.RENEWED]),
-            Contract.end_date >= start_date,
-            Contract.start_date <= end_date
-        )
+            Contract.status.in_(BOOKED_STATUSES),
+            booked_period(Contract.start_date, Contract.end_date).op("&&")(booked_period(start_date, end_date))
+        ).limit(1)
         result = await db.execute(stmt)
-        existing_contract = result.scalar_one_or_none()
+        existing_contract = result.scalars().first()
         
         if existing_contract:
             raise HTTPException(
@@ -84,6 +121,77 @@ class ContractService:
                 detail=f"Unit is not available for the specified period. There is an existing contract from {existing_contract.start_date} to {existing_contract.end_date}"
             )
 
+    @staticmethod
+    async def commit_booking(db: AsyncSession):
+        """
+        Confirmar un cambio que ocupa una unidad. La base de datos rechaza los
+        solapamientos que la validación previa no ve (peticiones concurrentes).
+        Invalida las métricas de ocupación cacheadas.
+        """
+        try:
+            await db.commit()
+        except IntegrityError as e:
+            await db.rollback()
+            if OVERLAP_CONSTRAINT in str(e.orig):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Unit is not available for the specified period"
+                )
+            raise
+        await response_cache.invalidate("occupancy")
+
+    @staticmethod
+    async def get_units_availability(
+        db: AsyncSession,
+        start_date: date,
+        end_date: date,
+        unit_ids: Optional[List[int]] = None,
+        property_id: Optional[int] = None
+    ) -> List[UnitAvailability]:
+        """
+        Tramos libres y ocupados de varias unidades entre dos fechas (incluidas),
+        en una sola consulta.
+        """
+        if end_date < start_date:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="End date must not be before start date"
+            )
+        if not unit_ids and property_id is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Either unit_ids or property_id is required"
+            )
+
+        stmt = select(Unit.id, Contract.id, Contract.start_date, Contract.end_date).outerjoin(
+            Contract,
+            and_(
+                Contract.unit_id == Unit.id,
+                Contract.status.in_(BOOKED_STATUSES),
+                booked_period(Contract.start_date, Contract.end_date).op("&&")(booked_period(start_date, end_date))
+            )
+        )
+        if unit_ids:
+            stmt = stmt.where(Unit.id.in_(unit_ids))
+        if property_id is not None:
+            stmt = stmt.where(Unit.property_id == property_id)
+        result = await db.execute(stmt.order_by(Unit.id, Contract.start_date))
+
+        contracts_by_unit: Dict[int, List[Tuple[int, date, date]]] = {}
+        for unit_id, contract_id, contract_start, contract_end in result.all():
+            contracts = contracts_by_unit.setdefault(unit_id, [])
+            if contract_id is not None:
+                contracts.append((contract_id, contract_start, contract_end))
+
+        return [
+            UnitAvailability(
+                unit_id=unit_id,
+                is_available=not contracts,
+                spans=availability_spans(start_date, end_date, contracts)
+            )
+            for unit_id, contracts in contracts_by_unit.items()
+        ]
+
     @staticmethod
     async def create_contract(db: AsyncSession, contract: ContractCreate) -> Contract:
         # Validar las fechas del contrato
@@ -149,7 +257,7 @@ class ContractService:
         )
 
         db.add(new_contract)
-        await db.commit()
+        await ContractService.commit_booking(db)
         await db.refresh(new_contract)
 
         # Crear documentos si existen
@@ -211,7 +319,7 @@ class ContractService:
         for field, value in update_data.items():
             setattr(db_contract, field, value)
 
-        await db.commit()
+        await ContractService.commit_booking(db)
         await db.refresh(db_contract)
         return db_contract
 
@@ -244,6 +352,7 @@ class ContractService:
             db_contract.notes = termination_notes
 
         await db.commit()
+        await response_cache.invalidate("occupancy")
         await db.refresh(db_contract)
         return db_contract
 
@@ -285,7 +394,7 @@ class ContractService:
             db_contract.rent_amount = new_rent_amount
         db_contract.status = ContractStatus.RENEWED
 
-        await db.commit()
+        await ContractService.commit_booking(db)
         await db.refresh(db_contract)
         return db_contract
 
@@ -331,7 +440,8 @@ class ContractService:
     async def add_contract_document(
         db: AsyncSession,
         contract_id: int,
-        document: ContractDocumentCreate
+        document: ContractDocumentCreate,
+        stored_file_id: Optional[int] = None
     ) -> ContractDocument:
         stmt = select(Contract).where(Contract.id == contract_id)
         result = await db.execute(stmt)
@@ -343,7 +453,9 @@ class ContractService:
                 detail="Contract not found"
             )
 
-        db_document = ContractDocument(**document.dict(), contract_id=contract_id)
+        db_document = ContractDocument(
+            **document.dict(), contract_id=contract_id, stored_file_id=stored_file_id
+        )
         db.add(db_document)
         await db.commit()
         await db.refresh(db_document)
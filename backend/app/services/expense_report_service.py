@@ -2,7 +2,6 @@ from typing import List, Dict, Any, Optional
 from datetime import date, datetime, timedelta
 from sqlalchemy.orm import Session
 from sqlalchemy import func
-import pandas as pd
 import logging
 
 from app.crud import expense as crud_expense
@@ -161,6 +160,9 @@ class ExpenseReportService:
         file_path: str
     ) -> str:
         """Export expense data to Excel file."""
+        # pandas is only needed here; importing it lazily keeps worker startup light
+        import pandas as pd
+
         try:
             # Get expense data
             expenses = db.query(
@@ -1,27 +1,72 @@
-from typing import List, Optional, Dict, Any
-from datetime import date, datetime
-from sqlalchemy.orm import Session
+import calendar
+from typing import AsyncIterator, List, Optional, Dict, Any
+from datetime import date, datetime, timedelta
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, Request
 import logging
 
-from app.crud import expense as crud_expense
-from app.crud import property as crud_property
-from app.crud import vendor as crud_vendor
-from app.crud import expense_category as crud_expense_category
-from app.models.expense import Expense
+from app.crud.expense import expense as crud_expense
+from app.crud.vendor import vendor as crud_vendor
+from app.models.expense import Expense, RecurrenceInterval
+from app.models.expense_category import ExpenseCategory
+from app.models.property import Property
 from app.models.user import User
 from app.schemas import expense as schemas
 from app.core.expense_validation import expense_validator
 from app.services.notification_service import notification_service
 from app.services.audit_service import audit_service
+from app.services.file_storage import FileStorageService
 from app.core.permissions import ExpensePermission
+from app.core.response_cache import response_cache
 
 logger = logging.getLogger(__name__)
 
+RECURRENCE_DAYS = {RecurrenceInterval.DAILY: 1, RecurrenceInterval.WEEKLY: 7}
+RECURRENCE_MONTHS = {
+    RecurrenceInterval.MONTHLY: 1,
+    RecurrenceInterval.QUARTERLY: 3,
+    RecurrenceInterval.YEARLY: 12
+}
+
+def add_recurrence(anchor: date, interval: RecurrenceInterval, count: int) -> date:
+    """The ``count``-th occurrence after ``anchor``, clamped to the month end."""
+    if interval in RECURRENCE_DAYS:
+        return anchor + timedelta(days=RECURRENCE_DAYS[interval] * count)
+    year, month = divmod(anchor.month - 1 + RECURRENCE_MONTHS[interval] * count, 12)
+    year, month = anchor.year + year, month + 1
+    # Always from the anchor, so Jan 31 gives Feb 29 and then Mar 31
+    return date(year, month, min(anchor.day, calendar.monthrange(year, month)[1]))
+
+def recurrence_dates(anchor: date, interval: RecurrenceInterval, after: date, until: date) -> List[date]:
+    """Occurrences of a recurring expense strictly after ``after`` up to ``until``."""
+    if interval in RECURRENCE_DAYS:
+        count = (after - anchor).days // RECURRENCE_DAYS[interval]
+    else:
+        months = (after.year - anchor.year) * 12 + after.month - anchor.month
+        count = months // RECURRENCE_MONTHS[interval]
+    count = max(count, 1)
+
+    dates = []
+    occurrence = add_recurrence(anchor, interval, count)
+    while occurrence <= until:
+        if occurrence > after:
+            dates.append(occurrence)
+        count += 1
+        occurrence = add_recurrence(anchor, interval, count)
+    return dates
+
 class ExpenseService:
+    @staticmethod
+    async def invalidate_cache(expense: Expense):
+        """Drop cached responses built from this expense."""
+        tags = ["expenses", f"expense:{expense.id}"]
+        if expense.vendor_id:
+            tags += ["vendors", f"vendor:{expense.vendor_id}"]
+        await response_cache.invalidate(*tags)
+
     async def create_expense(
         self, 
-        db: Session, 
+        db: AsyncSession, 
         expense_in: schemas.ExpenseCreate, 
         current_user: User,
         request: Request = None
@@ -38,22 +83,23 @@ class ExpenseService:
 
             # Validate property exists if provided
             if expense_in.property_id:
-                property = crud_property.get(db, id=expense_in.property_id)
+                property = await db.get(Property, expense_in.property_id)
                 if not property:
                     raise HTTPException(status_code=404, detail="Property not found")
 
             # Validate vendor exists if provided
             if expense_in.vendor_id:
-                vendor = crud_vendor.get(db, id=expense_in.vendor_id)
+                vendor = await crud_vendor.get(db, id=expense_in.vendor_id)
                 if not vendor:
                     raise HTTPException(status_code=404, detail="Vendor not found")
 
             # Create expense
-            expense = crud_expense.create(
+            expense = await crud_expense.create(
                 db=db,
                 obj_in=expense_in,
                 created_by_id=current_user.id
             )
+            await self.invalidate_cache(expense)
 
             # Log action
             await audit_service.log_action(
@@ -70,7 +116,7 @@ class ExpenseService:
             await notification_service.notify_expense_created(
                 db=db,
                 expense=expense,
-                current_user=current_user
+                created_by=current_user
             )
 
             return expense
@@ -81,7 +127,7 @@ class ExpenseService:
 
     async def update_expense(
         self,
-        db: Session,
+        db: AsyncSession,
         *,
         expense_id: int,
         expense_in: schemas.ExpenseUpdate,
@@ -91,7 +137,7 @@ class ExpenseService:
         """Update expense with validation and notifications."""
         try:
             # Get existing expense
-            expense = crud_expense.get(db, id=expense_id)
+            expense = await crud_expense.get(db, id=expense_id)
             if not expense:
                 raise HTTPException(status_code=404, detail="Expense not found")
 
@@ -105,13 +151,13 @@ class ExpenseService:
 
             # Validate property exists if being updated
             if expense_in.property_id:
-                property = crud_property.get(db, id=expense_in.property_id)
+                property = await db.get(Property, expense_in.property_id)
                 if not property:
                     raise HTTPException(status_code=404, detail="Property not found")
 
             # Validate vendor exists if being updated
             if expense_in.vendor_id:
-                vendor = crud_vendor.get(db, id=expense_in.vendor_id)
+                vendor = await crud_vendor.get(db, id=expense_in.vendor_id)
                 if not vendor:
                     raise HTTPException(status_code=404, detail="Vendor not found")
 
@@ -122,7 +168,8 @@ class ExpenseService:
             }
             
             # Update expense
-            expense = crud_expense.update(db=db, db_obj=expense, obj_in=expense_in)
+            expense = await crud_expense.update(db=db, db_obj=expense, obj_in=expense_in)
+            await self.invalidate_cache(expense)
 
             # Log changes
             changes = audit_service.compare_objects(
@@ -143,7 +190,7 @@ class ExpenseService:
             await notification_service.notify_expense_updated(
                 db=db,
                 expense=expense,
-                current_user=current_user
+                updated_by=current_user
             )
 
             return expense
@@ -152,24 +199,26 @@ class ExpenseService:
             logger.error(f"Error updating expense: {str(e)}")
             raise
 
-    async def delete_expense(self, db: Session, expense_id: int, current_user: User) -> Expense:
+    async def delete_expense(self, db: AsyncSession, expense_id: int, current_user: User) -> Expense:
         """Delete an expense with validation."""
         try:
-            expense = crud_expense.get(db, id=expense_id)
+            expense = await crud_expense.get(db, id=expense_id)
             if not expense:
                 raise HTTPException(status_code=404, detail="Expense not found")
 
-            if not crud_expense.is_owner(db, expense_id=expense.id, user_id=current_user.id):
+            if not await crud_expense.is_owner(db, expense_id=expense.id, user_id=current_user.id):
                 raise HTTPException(status_code=403, detail="Not enough permissions")
 
-            return crud_expense.remove(db=db, id=expense_id)
+            removed = await crud_expense.remove(db=db, id=expense_id)
+            await self.invalidate_cache(expense)
+            return removed
         except Exception as e:
             logger.error(f"Error deleting expense: {str(e)}")
             raise
 
     async def approve_expense(
         self,
-        db: Session,
+        db: AsyncSession,
         *,
         expense_id: int,
         current_user: User,
@@ -177,7 +226,7 @@ class ExpenseService:
     ) -> Expense:
         """Approve expense with validation and notifications."""
         try:
-            expense = crud_expense.get(db, id=expense_id)
+            expense = await crud_expense.get(db, id=expense_id)
             if not expense:
                 raise HTTPException(status_code=404, detail="Expense not found")
 
@@ -197,11 +246,12 @@ class ExpenseService:
                 )
 
             # Approve expense
-            expense = crud_expense.approve(
+            expense = await crud_expense.approve(
                 db=db,
                 expense=expense,
                 approved_by=current_user.id
             )
+            await self.invalidate_cache(expense)
 
             # Log action
             await audit_service.log_action(
@@ -217,7 +267,7 @@ class ExpenseService:
             await notification_service.notify_expense_approved(
                 db=db,
                 expense=expense,
-                current_user=current_user
+                approved_by=current_user
             )
 
             return expense
@@ -226,10 +276,10 @@ class ExpenseService:
             logger.error(f"Error approving expense: {str(e)}")
             raise
 
-    async def cancel_expense(self, db: Session, expense_id: int, current_user: User) -> Expense:
+    async def cancel_expense(self, db: AsyncSession, expense_id: int, current_user: User) -> Expense:
         """Cancel an expense with validation."""
         try:
-            expense = crud_expense.get(db, id=expense_id)
+            expense = await crud_expense.get(db, id=expense_id)
             if not expense:
                 raise HTTPException(status_code=404, detail="Expense not found")
 
@@ -244,39 +294,48 @@ class ExpenseService:
                 "cancelled_by": current_user.id,
                 "cancelled_at": datetime.utcnow()
             }
-            return crud_expense.update(db=db, db_obj=expense, obj_in=update_data)
+            expense = await crud_expense.update(db=db, db_obj=expense, obj_in=update_data)
+            await self.invalidate_cache(expense)
+            return expense
         except Exception as e:
             logger.error(f"Error cancelling expense: {str(e)}")
             raise
 
     async def add_attachment(
         self, 
-        db: Session, 
+        db: AsyncSession, 
         expense_id: int, 
-        attachment_in: schemas.ExpenseAttachmentCreate, 
+        chunks: AsyncIterator[bytes],
+        file_name: str,
+        content_type: Optional[str],
         current_user: User
     ) -> schemas.ExpenseAttachment:
-        """Add an attachment to an expense."""
+        """Stream an uploaded file to storage and attach it to an expense."""
         try:
-            expense = crud_expense.get(db, id=expense_id)
+            expense = await crud_expense.get(db, id=expense_id)
             if not expense:
                 raise HTTPException(status_code=404, detail="Expense not found")
 
-            if not crud_expense.is_owner(db, expense_id=expense.id, user_id=current_user.id):
+            if not await crud_expense.is_owner(db, expense_id=expense.id, user_id=current_user.id):
                 raise HTTPException(status_code=403, detail="Not enough permissions")
 
-            return await crud_expense.add_attachment(
+            stored_file = await FileStorageService.store(db, chunks, content_type)
+            attachment = await crud_expense.add_attachment(
                 db=db,
                 expense_id=expense_id,
-                attachment_in=attachment_in
+                stored_file=stored_file,
+                file_name=file_name,
+                uploaded_by=current_user.id
             )
+            await self.invalidate_cache(expense)
+            return attachment
         except Exception as e:
             logger.error(f"Error adding attachment: {str(e)}")
             raise
 
-    def get_expense_summary(
+    async def get_expense_summary(
         self,
-        db: Session,
+        db: AsyncSession,
         *,
         start_date: date,
         end_date: date,
@@ -285,12 +344,11 @@ class ExpenseService:
     ) -> schemas.ExpenseSummary:
         """Get expense summary with optional filters."""
         try:
-            return crud_expense.get_summary(
+            return await crud_expense.get_summary(
                 db,
                 start_date=start_date,
                 end_date=end_date,
-                property_id=property_id,
-                category=category
+                property_id=property_id
             )
         except Exception as e:
             logger.error(f"Error getting expense summary: {str(e)}")
@@ -298,80 +356,80 @@ class ExpenseService:
 
     async def get_expenses_by_category(
         self,
-        db: Session,
+        db: AsyncSession,
         category_id: int,
         skip: int = 0,
         limit: int = 100
     ) -> List[Expense]:
         """Get all expenses for a specific category."""
-        category = crud_expense_category.get(db, id=category_id)
+        category = await db.get(ExpenseCategory, category_id)
         if not category:
             raise HTTPException(status_code=404, detail="Category not found")
         
-        return crud_expense.get_by_category(db, category_id=category_id, skip=skip, limit=limit)
+        return await crud_expense.get_by_category(db, category_id=category_id, skip=skip, limit=limit)
 
     async def get_category_summary(
         self,
-        db: Session,
+        db: AsyncSession,
         start_date: Optional[date] = None,
         end_date: Optional[date] = None
     ) -> List[Dict[str, Any]]:
         """Get expense summary grouped by category."""
-        return crud_expense.get_category_summary(
+        return await crud_expense.get_category_summary(
             db,
             start_date=start_date,
             end_date=end_date
         )
 
-    def get_category_summary_old(
+    async def get_category_summary_old(
         self,
-        db: Session,
+        db: AsyncSession,
         start_date: date,
         end_date: date
     ) -> List[schemas.ExpenseCategorySummary]:
         """Get expense summary by category."""
         try:
-            return crud_expense.get_category_summary(db, start_date=start_date, end_date=end_date)
+            return await crud_expense.get_category_summary(db, start_date=start_date, end_date=end_date)
         except Exception as e:
             logger.error(f"Error getting category summary: {str(e)}")
             raise
 
-    def get_property_summary(
+    async def get_property_summary(
         self,
-        db: Session,
+        db: AsyncSession,
         start_date: date,
         end_date: date
     ) -> List[schemas.PropertyExpenseSummary]:
         """Get expense summary by property."""
         try:
-            return crud_expense.get_property_summary(db, start_date=start_date, end_date=end_date)
+            return await crud_expense.get_by_property(db, start_date=start_date, end_date=end_date)
         except Exception as e:
             logger.error(f"Error getting property summary: {str(e)}")
             raise
 
-    def get_vendor_summary(
+    async def get_vendor_summary(
         self,
-        db: Session,
+        db: AsyncSession,
         start_date: date,
         end_date: date
     ) -> List[schemas.VendorExpenseSummary]:
         """Get expense summary by vendor."""
         try:
-            return crud_expense.get_vendor_summary(db, start_date=start_date, end_date=end_date)
+            return await crud_expense.get_by_vendor(db, start_date=start_date, end_date=end_date)
         except Exception as e:
             logger.error(f"Error getting vendor summary: {str(e)}")
             raise
 
-    def get_recurring_expenses(
+    async def get_recurring_expenses(
         self,
-        db: Session,
+        db: AsyncSession,
         current_user: User,
         skip: int = 0,
         limit: int = 10
     ) -> List[schemas.RecurringExpenseSummary]:
         """Get recurring expenses for a user."""
         try:
-            return crud_expense.get_recurring_expenses(
+            return await crud_expense.get_recurring(
                 db,
                 user_id=current_user.id,
                 skip=skip,
@@ -381,4 +439,47 @@ class ExpenseService:
             logger.error(f"Error getting recurring expenses: {str(e)}")
             raise
 
+    async def generate_recurring_expenses(
+        self,
+        db: AsyncSession,
+        current_date: Optional[date] = None,
+        since: Optional[date] = None
+    ) -> schemas.RecurringGenerationResult:
+        """
+        Generate every due instance of every recurring expense in one pass.
+
+        Each parent resumes from its latest instance, so missed runs are caught
+        up automatically; ``since`` also backfills gaps from that date on.
+        Instances are unique per parent and date, so reruns are no-ops.
+        """
+        current_date = current_date or date.today()
+        try:
+            parents = await crud_expense.get_recurring_expenses_to_generate(
+                db, current_date=current_date, since=since
+            )
+
+            instances = []
+            for parent, last_date in parents:
+                after = last_date or parent.date_incurred
+                if since:
+                    after = max(min(after, since - timedelta(days=1)), parent.date_incurred)
+                until = min(current_date, parent.recurrence_end_date or current_date)
+                for occurrence in recurrence_dates(parent.date_incurred, parent.recurrence_interval, after, until):
+                    instances.append(crud_expense.recurring_instance_data(parent, occurrence))
+
+            generated = await crud_expense.create_recurring_instances(db, instances=instances)
+            if generated:
+                await response_cache.invalidate("expenses")
+            logger.info(f"Generated {generated} recurring expense instances ({len(instances)} due)")
+
+            return schemas.RecurringGenerationResult(
+                generated_until=current_date,
+                parents=len(parents),
+                due=len(instances),
+                generated=generated
+            )
+        except Exception as e:
+            logger.error(f"Error generating recurring expenses: {str(e)}")
+            raise
+
 expense_service = ExpenseService()
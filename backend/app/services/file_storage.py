@@ -0,0 +1,226 @@
+import hashlib
+import logging
+import os
+import time
+import uuid
+from typing import AsyncIterator, List, Optional, Tuple
+from fastapi import HTTPException, Request, UploadFile, status
+from sqlalchemy import column, delete, exists, func, select, table
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.models.stored_file import StoredFile
+
+logger = logging.getLogger(__name__)
+
+# Tablas con stored_file_id que mantienen vivo un archivo guardado
+REFERENCES = [
+    table(name, column("stored_file_id"))
+    for name in ("expense_attachments", "loan_documents", "contract_documents")
+]
+
+def _too_large(max_size: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"File exceeds the maximum size of {max_size} bytes"
+    )
+
+def request_chunks(request: Request, max_size: Optional[int] = None) -> AsyncIterator[bytes]:
+    """
+    Cuerpo de la petición por trozos, a medida que llega. Si declara un
+    Content-Length mayor que el permitido se rechaza sin leer nada.
+    """
+    max_size = max_size or settings.UPLOAD_MAX_SIZE
+    length = request.headers.get("content-length", "")
+    if length.isdigit() and int(length) > max_size:
+        raise _too_large(max_size)
+    return request.stream()
+
+async def upload_file_chunks(file: UploadFile) -> AsyncIterator[bytes]:
+    """Contenido de un UploadFile (multipart) por trozos."""
+    while chunk := await file.read(settings.UPLOAD_CHUNK_SIZE):
+        yield chunk
+
+def blob_path(sha256: str) -> str:
+    """Ruta de un contenido relativa a UPLOAD_DIR, repartida en subdirectorios."""
+    return os.path.join("blobs", sha256[:2], sha256[2:4], sha256)
+
+def absolute_path(path: str) -> str:
+    return os.path.join(settings.UPLOAD_DIR, path)
+
+def _write(handle, digest, data: bytes):
+    # hashlib libera el GIL con bloques grandes: el hash no frena el event loop
+    digest.update(data)
+    handle.write(data)
+
+def _discard(handle, path: str):
+    handle.close()
+    if os.path.exists(path):
+        os.remove(path)
+
+def _place(tmp_path: str, path: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Atómico; si el contenido ya estaba, se sustituye por uno idéntico
+    os.replace(tmp_path, path)
+
+def _remove(path: str):
+    if os.path.exists(path):
+        os.remove(path)
+
+# Longitud de un SHA-256 en hexadecimal: prefijo del nombre de cada contenido
+# y de sus derivados (miniatura y vista previa)
+SHA256_HEX_LENGTH = 64
+# Contenidos consultados por consulta al buscar archivos sin fila
+ORPHAN_BATCH = 1000
+
+def _blob_files(root: str, cutoff: float) -> List[Tuple[str, str]]:
+    """(sha256, ruta) de los archivos bajo root modificados antes de cutoff."""
+    found = []
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            try:
+                if os.stat(path).st_mtime < cutoff:
+                    found.append((name[:SHA256_HEX_LENGTH], path))
+            except FileNotFoundError:
+                continue
+    return found
+
+def _remove_if_older(path: str, cutoff: float) -> bool:
+    # Se vuelve a comprobar: una subida puede haber colocado el mismo contenido
+    try:
+        if os.stat(path).st_mtime >= cutoff:
+            return False
+        os.remove(path)
+    except FileNotFoundError:
+        return False
+    return True
+
+class FileStorageService:
+    @staticmethod
+    async def store(
+        db: AsyncSession,
+        chunks: AsyncIterator[bytes],
+        content_type: Optional[str] = None,
+        max_size: Optional[int] = None
+    ) -> StoredFile:
+        """
+        Guardar un archivo recibido por trozos sin cargarlo entero en memoria.
+
+        Los trozos se escriben en un temporal desde el threadpool, en bloques
+        de UPLOAD_CHUNK_SIZE, calculando el SHA-256 a la vez; la subida se
+        corta en cuanto supera el tamaño máximo. Un contenido ya guardado no
+        se duplica: se devuelve el StoredFile existente. No hace commit; la
+        fila queda bloqueada hasta que se confirme el registro que la usa.
+        """
+        max_size = max_size or settings.UPLOAD_MAX_SIZE
+        tmp_dir = absolute_path("tmp")
+        await run_in_threadpool(os.makedirs, tmp_dir, exist_ok=True)
+        tmp_path = os.path.join(tmp_dir, uuid.uuid4().hex)
+
+        digest = hashlib.sha256()
+        size = 0
+        handle = await run_in_threadpool(open, tmp_path, "wb")
+        try:
+            buffer = bytearray()
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > max_size:
+                    raise _too_large(max_size)
+                buffer += chunk
+                if len(buffer) >= settings.UPLOAD_CHUNK_SIZE:
+                    await run_in_threadpool(_write, handle, digest, buffer)
+                    buffer = bytearray()
+            if buffer:
+                await run_in_threadpool(_write, handle, digest, buffer)
+            await run_in_threadpool(handle.close)
+            if not size:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Empty file"
+                )
+
+            sha256 = digest.hexdigest()
+            path = blob_path(sha256)
+            # Primero la fila (el DO UPDATE la bloquea): si una purga la tiene
+            # bloqueada se espera a que termine, y después se coloca el archivo
+            stmt = pg_insert(StoredFile).values(
+                sha256=sha256,
+                size=size,
+                content_type=content_type,
+                path=path
+            ).on_conflict_do_update(
+                index_elements=[StoredFile.sha256],
+                set_={"updated_at": func.now()}
+            ).returning(StoredFile.id)
+            stored_file_id = (await db.execute(stmt)).scalar_one()
+            await run_in_threadpool(_place, tmp_path, absolute_path(path))
+        except BaseException:
+            await run_in_threadpool(_discard, handle, tmp_path)
+            raise
+
+        return await db.get(StoredFile, stored_file_id, populate_existing=True)
+
+    @staticmethod
+    async def purge_unreferenced(db: AsyncSession, limit: int = 1000) -> int:
+        """
+        Borrar del disco y de la base de datos los archivos que ya no usa
+        ningún adjunto ni documento.
+
+        Las filas quedan bloqueadas mientras se borran los archivos: una subida
+        del mismo contenido espera y vuelve a crear fila y archivo después, y
+        las que una subida en curso tiene bloqueadas se saltan.
+        """
+        rows = (await db.execute(
+            select(StoredFile.id, StoredFile.path, StoredFile.thumbnail_path, StoredFile.preview_path)
+            .where(*[
+                ~exists().where(reference.c.stored_file_id == StoredFile.id)
+                for reference in REFERENCES
+            ])
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )).all()
+        if not rows:
+            return 0
+
+        for _, *paths in rows:
+            # Original y, si se generaron, miniatura y vista previa
+            for path in filter(None, paths):
+                await run_in_threadpool(_remove, absolute_path(path))
+        await db.execute(
+            delete(StoredFile)
+            .where(StoredFile.id.in_([row.id for row in rows]))
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        logger.info(f"Purged {len(rows)} unreferenced stored files")
+        return len(rows)
+
+    @staticmethod
+    async def purge_orphaned_blobs(db: AsyncSession, grace: Optional[int] = None) -> int:
+        """
+        Borrar de blobs/ los archivos que no tienen fila en stored_files.
+
+        store() coloca el archivo antes de que el llamador haga commit; si la
+        transacción se deshace, la fila nueva desaparece y el archivo queda
+        huérfano. Solo se tocan los archivos con más de UPLOAD_ORPHAN_GRACE
+        segundos, para no borrar los de subidas aún sin confirmar.
+        """
+        grace = settings.UPLOAD_ORPHAN_GRACE if grace is None else grace
+        cutoff = time.time() - grace
+        files = await run_in_threadpool(_blob_files, absolute_path("blobs"), cutoff)
+
+        removed = 0
+        for start in range(0, len(files), ORPHAN_BATCH):
+            batch = files[start:start + ORPHAN_BATCH]
+            known = set((await db.execute(
+                select(StoredFile.sha256)
+                .where(StoredFile.sha256.in_({sha256 for sha256, _ in batch}))
+            )).scalars())
+            for sha256, path in batch:
+                if sha256 not in known and await run_in_threadpool(_remove_if_older, path, cutoff):
+                    removed += 1
+        if removed:
+            logger.info(f"Purged {removed} orphaned blob files")
+        return removed
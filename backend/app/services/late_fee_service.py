@@ -1,13 +1,15 @@
 from datetime import date, timedelta
 from typing import Optional
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from app.models import Loan, LoanPayment, PaymentStatus
 from app.core.exceptions import ValidationError
 
 class LateFeeService:
     @staticmethod
     async def calculate_late_fee(
-        db: Session,
+        db: AsyncSession,
         payment: LoanPayment,
         calculation_date: Optional[date] = None
     ) -> float:
@@ -21,7 +23,7 @@ class LateFeeService:
         if calculation_date <= payment.due_date:
             return 0.0
 
-        loan = await db.query(Loan).filter(Loan.id == payment.loan_id).first()
+        loan = await db.get(Loan, payment.loan_id)
         if not loan:
             raise ValidationError("Préstamo no encontrado")
 
@@ -50,7 +52,7 @@ class LateFeeService:
 
     @staticmethod
     async def apply_late_fee(
-        db: Session,
+        db: AsyncSession,
         payment: LoanPayment,
         user_id: int
     ) -> LoanPayment:
@@ -80,15 +82,17 @@ class LateFeeService:
 
     @staticmethod
     async def update_late_payments(
-        db: Session,
+        db: AsyncSession,
         user_id: int
     ) -> int:
         """Actualizar multas para todos los pagos atrasados"""
         today = date.today()
-        pending_payments = await db.query(LoanPayment).filter(
+        # Los préstamos se cargan en bloque; calculate_late_fee los encuentra en la sesión
+        stmt = select(LoanPayment).where(
             LoanPayment.status == PaymentStatus.PENDING,
             LoanPayment.due_date < today
-        ).all()
+        ).options(selectinload(LoanPayment.loan))
+        pending_payments = (await db.execute(stmt)).scalars().all()
 
         updated_count = 0
         for payment in pending_payments:
@@ -1,18 +1,157 @@
 from datetime import date, datetime, timedelta
 from typing import Dict, List, Optional, Any
-from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_
-import pandas as pd
-from app.models import Loan, LoanPayment, PaymentStatus, LoanStatus
+from sqlalchemy import Date, case, func, and_, or_, literal, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models import Loan, LoanPayment, LoanMetrics, PaymentStatus, LoanStatus
 from app.core.exceptions import ValidationError
+import calendar
 import json
+import math
 import os
 from app.core.config import settings
 
+METRICS_UPSERT_BATCH = 1000
+METRICS_COLUMNS = [
+    column.name for column in LoanMetrics.__table__.columns
+    if column.name not in ("id", "loan_id", "created_at", "updated_at")
+]
+# Límites superiores (días) de los tramos de atraso; el último es abierto
+DAYS_PAST_DUE_BUCKETS = [
+    ("days_past_due_current", 0),
+    ("days_past_due_1_30", 30),
+    ("days_past_due_31_60", 60),
+    ("days_past_due_61_90", 90),
+    ("days_past_due_over_90", None),
+]
+# Columnas de loan_metrics que salen directamente de los agregados de pagos
+PAYMENT_TOTALS = [
+    "payments_due", "completed_payments", "on_time_payments",
+    *[name for name, _ in DAYS_PAST_DUE_BUCKETS],
+    "max_days_past_due", "paid_to_date", "principal_paid", "interest_paid", "late_fees_paid",
+]
+
+def loan_metrics_query(as_of: date, loan_ids: Optional[List[int]] = None):
+    """
+    Agregados de pagos por préstamo en una sola pasada sobre loan_payments,
+    unidos a los datos del préstamo necesarios para la proyección.
+    """
+    as_of_date = literal(as_of, Date)
+    completed = LoanPayment.status == PaymentStatus.COMPLETED
+    payment = select(
+        LoanPayment.loan_id,
+        LoanPayment.amount,
+        LoanPayment.principal_amount,
+        LoanPayment.interest_amount,
+        LoanPayment.late_fee,
+        LoanPayment.payment_date,
+        completed.label("completed"),
+        # Cuotas vencidas a la fecha, salvo las canceladas
+        and_(
+            LoanPayment.due_date <= as_of_date,
+            LoanPayment.status != PaymentStatus.CANCELLED
+        ).label("due"),
+        # Atraso: hasta el pago si se pagó, hasta la fecha si sigue pendiente
+        func.greatest(
+            case(
+                (completed, func.coalesce(LoanPayment.payment_date, LoanPayment.due_date) - LoanPayment.due_date),
+                else_=as_of_date - LoanPayment.due_date
+            ),
+            0
+        ).label("days_past_due")
+    ).subquery()
+    due, paid, days_past_due = payment.c.due, payment.c.completed, payment.c.days_past_due
+
+    buckets = []
+    lower = None
+    for name, upper in DAYS_PAST_DUE_BUCKETS:
+        conditions = [due]
+        if lower is not None:
+            conditions.append(days_past_due > lower)
+        if upper is not None:
+            conditions.append(days_past_due <= upper)
+        buckets.append(func.count().filter(and_(*conditions)).label(name))
+        lower = upper
+
+    totals = (
+        select(
+            payment.c.loan_id,
+            func.count().filter(due).label("payments_due"),
+            func.count().filter(paid).label("completed_payments"),
+            func.count().filter(and_(due, paid, days_past_due == 0)).label("on_time_payments"),
+            *buckets,
+            func.max(days_past_due).filter(due).label("max_days_past_due"),
+            func.sum(payment.c.amount).filter(paid).label("paid_to_date"),
+            func.sum(payment.c.principal_amount).filter(paid).label("principal_paid"),
+            func.sum(payment.c.interest_amount).filter(paid).label("interest_paid"),
+            func.sum(payment.c.late_fee).filter(paid).label("late_fees_paid"),
+            func.max(payment.c.payment_date).filter(paid).label("last_payment_date"),
+        )
+        .group_by(payment.c.loan_id)
+        .subquery()
+    )
+
+    stmt = select(
+        Loan.id,
+        Loan.principal_amount,
+        Loan.remaining_balance,
+        Loan.monthly_payment,
+        Loan.interest_rate,
+        Loan.next_payment_date,
+        totals
+    ).outerjoin(totals, totals.c.loan_id == Loan.id)
+    if loan_ids is not None:
+        return stmt.where(Loan.id.in_(loan_ids))
+    return stmt.where(Loan.status.in_([LoanStatus.ACTIVE, LoanStatus.DEFAULT]))
+
+def projected_payoff_date(
+    balance: Optional[float],
+    monthly_payment: Optional[float],
+    annual_rate: Optional[float],
+    next_payment_date: Optional[date],
+    as_of: date
+) -> Optional[date]:
+    """
+    Fecha de la última cuota si se sigue pagando la cuota actual al tipo
+    actual. None si no hay saldo o la cuota no cubre los intereses.
+    """
+    if not balance or balance <= 0 or not monthly_payment or monthly_payment <= 0:
+        return None
+    rate = (annual_rate or 0) / 12 / 100
+    if rate > 0:
+        if monthly_payment <= balance * rate:
+            return None
+        months = -math.log(1 - rate * balance / monthly_payment) / math.log(1 + rate)
+    else:
+        months = balance / monthly_payment
+    first = next_payment_date or as_of
+    year, month = divmod(first.month - 1 + max(math.ceil(months - 1e-9), 1) - 1, 12)
+    year, month = first.year + year, month + 1
+    return date(year, month, min(first.day, calendar.monthrange(year, month)[1]))
+
+def loan_metrics_row(row, as_of: date) -> Dict[str, Any]:
+    """Valores de loan_metrics para una fila de loan_metrics_query."""
+    # Sin pagos, el outer join deja los agregados a NULL
+    values = {name: getattr(row, name) or 0 for name in PAYMENT_TOTALS}
+    principal = row.principal_amount or 0
+    balance = row.remaining_balance
+    values.update(
+        loan_id=row.id,
+        as_of=as_of,
+        on_time_rate=values["on_time_payments"] / values["payments_due"] * 100 if values["payments_due"] else 0.0,
+        last_payment_date=row.last_payment_date,
+        remaining_balance=balance,
+        loan_progress=(principal - (balance or 0)) / principal * 100 if principal else 0.0,
+        projected_payoff_date=projected_payoff_date(
+            balance, row.monthly_payment, row.interest_rate, row.next_payment_date, as_of
+        )
+    )
+    return values
+
 class LoanReportService:
     @staticmethod
     async def generate_monthly_report(
-        db: Session,
+        db: AsyncSession,
         month: Optional[int] = None,
         year: Optional[int] = None
     ) -> Dict[str, Any]:
@@ -30,20 +169,26 @@ class LoanReportService:
             end_date = date(year, month + 1, 1)
 
         # Obtener todos los pagos del mes
-        payments = await db.query(LoanPayment).filter(
-            and_(
-                LoanPayment.payment_date >= start_date,
-                LoanPayment.payment_date < end_date
+        result = await db.execute(
+            select(LoanPayment).where(
+                and_(
+                    LoanPayment.payment_date >= start_date,
+                    LoanPayment.payment_date < end_date
+                )
             )
-        ).all()
+        )
+        payments = result.scalars().all()
 
         # Obtener todos los préstamos activos
-        loans = await db.query(Loan).filter(
-            or_(
-                Loan.status == LoanStatus.ACTIVE,
-                Loan.status == LoanStatus.DEFAULT
+        result = await db.execute(
+            select(Loan).where(
+                or_(
+                    Loan.status == LoanStatus.ACTIVE,
+                    Loan.status == LoanStatus.DEFAULT
+                )
             )
-        ).all()
+        )
+        loans = result.scalars().all()
 
         # Calcular estadísticas generales
         total_loans = len(loans)
@@ -105,7 +250,7 @@ class LoanReportService:
 
     @staticmethod
     async def calculate_next_month_projection(
-        db: Session,
+        db: AsyncSession,
         loans: List[Loan]
     ) -> Dict[str, float]:
         """Calcular proyección de pagos para el próximo mes"""
@@ -136,13 +281,17 @@ class LoanReportService:
 
     @staticmethod
     async def get_top_defaulters(
-        db: Session,
+        db: AsyncSession,
         limit: int = 5
     ) -> List[Dict[str, Any]]:
         """Obtener los préstamos con mayor morosidad"""
-        defaulted_loans = await db.query(Loan).filter(
-            Loan.status == LoanStatus.DEFAULT
-        ).order_by(Loan.remaining_balance.desc()).limit(limit).all()
+        result = await db.execute(
+            select(Loan)
+            .where(Loan.status == LoanStatus.DEFAULT)
+            .order_by(Loan.remaining_balance.desc())
+            .limit(limit)
+        )
+        defaulted_loans = result.scalars().all()
         
         return [{
             "loan_id": loan.id,
@@ -170,44 +319,76 @@ class LoanReportService:
         return filepath
 
     @staticmethod
-    async def generate_loan_performance_metrics(
-        db: Session,
+    async def compute_loan_metrics(
+        db: AsyncSession,
+        as_of: Optional[date] = None,
+        loan_ids: Optional[List[int]] = None
+    ) -> int:
+        """
+        Calcular y guardar en loan_metrics las métricas de todos los préstamos
+        activos y en mora (o de ``loan_ids``) con una sola consulta agrupada
+        sobre loan_payments. Devuelve el número de préstamos procesados.
+        """
+        as_of = as_of or date.today()
+        rows = (await db.execute(loan_metrics_query(as_of, loan_ids))).all()
+        values = [loan_metrics_row(row, as_of) for row in rows]
+
+        for start in range(0, len(values), METRICS_UPSERT_BATCH):
+            stmt = pg_insert(LoanMetrics).values(values[start:start + METRICS_UPSERT_BATCH])
+            await db.execute(stmt.on_conflict_do_update(
+                index_elements=[LoanMetrics.loan_id],
+                set_={
+                    **{name: stmt.excluded[name] for name in METRICS_COLUMNS},
+                    "updated_at": func.now()
+                }
+            ))
+        await db.commit()
+        return len(values)
+
+    @staticmethod
+    async def get_loan_metrics(
+        db: AsyncSession,
         loan_id: int
     ) -> Dict[str, Any]:
-        """Generar métricas de rendimiento para un préstamo específico"""
-        loan = await db.query(Loan).filter(Loan.id == loan_id).first()
-        if not loan:
-            raise ValidationError(f"Préstamo {loan_id} no encontrado")
-
-        payments = await db.query(LoanPayment).filter(
-            LoanPayment.loan_id == loan_id
-        ).all()
+        """
+        Métricas de rendimiento de un préstamo desde loan_metrics. Si aún no
+        se han calculado (préstamo nuevo), se calculan solo para él.
+        """
+        stmt = select(LoanMetrics, Loan).join(Loan, Loan.id == LoanMetrics.loan_id).where(LoanMetrics.loan_id == loan_id)
+        row = (await db.execute(stmt)).first()
+        if row is None:
+            if not await LoanReportService.compute_loan_metrics(db, loan_ids=[loan_id]):
+                raise ValidationError(f"Préstamo {loan_id} no encontrado")
+            row = (await db.execute(stmt)).first()
+        metrics, loan = row
 
-        # Calcular métricas
-        total_paid = sum(p.amount for p in payments if p.status == PaymentStatus.COMPLETED)
-        total_late_fees = sum(p.late_fee for p in payments if p.status == PaymentStatus.COMPLETED)
-        completed_payments = len([p for p in payments if p.status == PaymentStatus.COMPLETED])
-        late_payments = len([p for p in payments if p.status == PaymentStatus.LATE])
-        
-        # Calcular tasa de pagos a tiempo
-        on_time_rate = (completed_payments - late_payments) / completed_payments * 100 if completed_payments > 0 else 0
-        
-        # Calcular progreso del préstamo
-        progress = (loan.principal_amount - loan.remaining_balance) / loan.principal_amount * 100
-        
         return {
             "loan_id": loan_id,
+            "as_of": metrics.as_of.isoformat(),
             "metrics": {
-                "total_paid": round(total_paid, 2),
-                "total_late_fees": round(total_late_fees, 2),
-                "completed_payments": completed_payments,
-                "late_payments": late_payments,
-                "on_time_payment_rate": round(on_time_rate, 2),
-                "loan_progress": round(progress, 2)
+                "total_paid": round(metrics.paid_to_date, 2),
+                "principal_paid": round(metrics.principal_paid, 2),
+                "interest_paid": round(metrics.interest_paid, 2),
+                "total_late_fees": round(metrics.late_fees_paid, 2),
+                "payments_due": metrics.payments_due,
+                "completed_payments": metrics.completed_payments,
+                "on_time_payments": metrics.on_time_payments,
+                "on_time_payment_rate": round(metrics.on_time_rate, 2),
+                "loan_progress": round(metrics.loan_progress, 2),
+                "projected_payoff_date": metrics.projected_payoff_date.isoformat() if metrics.projected_payoff_date else None
+            },
+            "days_past_due": {
+                "current": metrics.days_past_due_current,
+                "1_30": metrics.days_past_due_1_30,
+                "31_60": metrics.days_past_due_31_60,
+                "61_90": metrics.days_past_due_61_90,
+                "over_90": metrics.days_past_due_over_90,
+                "max": metrics.max_days_past_due
             },
             "status": {
-                "current_status": loan.status.value,
-                "remaining_balance": round(loan.remaining_balance, 2),
+                "current_status": loan.status.value if loan.status else None,
+                "remaining_balance": round(loan.remaining_balance or 0, 2),
+                "last_payment_date": metrics.last_payment_date.isoformat() if metrics.last_payment_date else None,
                 "next_payment_date": loan.next_payment_date.isoformat() if loan.next_payment_date else None
             }
         }
@@ -129,7 +129,8 @@ class LoanService:
         db: Session,
         loan_id: int,
         document_data: LoanDocumentCreate,
-        user_id: int
+        user_id: int,
+        stored_file_id: Optional[int] = None
     ) -> LoanDocument:
         """Añadir un documento al préstamo"""
         loan = await LoanService.get_loan(db, loan_id)
@@ -140,6 +141,7 @@ class LoanService:
             loan_id=loan_id,
             document_type=document_data.document_type,
             file_path=document_data.file_path,
+            stored_file_id=stored_file_id,
             upload_date=date.today(),
             description=document_data.description
         )
@@ -0,0 +1,125 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+from app.core.config import settings
+from app.core.monitoring import notification_digest_events_total
+
+logger = logging.getLogger(__name__)
+
+URGENT_PRIORITY = "urgent"
+
+def _value(item: Any) -> Any:
+    return getattr(item, "value", item)
+
+class NotificationDigest:
+    """
+    Coalesces notifications into digests.
+
+    Events are buffered per user, channel and notification type. The first
+    event of a bucket opens a window; when it closes, the buffered events
+    are delivered as a single notification built by ``merge`` (a bucket with
+    one event is delivered unchanged). Urgent notifications and types with a
+    window of 0 are delivered immediately.
+    """
+    def __init__(
+        self,
+        deliver: Callable[[Any, Any], Awaitable[None]],
+        merge: Callable[[List[Any]], Any],
+        windows: Optional[Dict[str, float]] = None,
+        default_window: Optional[float] = None,
+        urgent_types: Optional[Iterable[str]] = None,
+        max_events: Optional[int] = None
+    ):
+        self.deliver = deliver
+        self.merge = merge
+        self.windows = dict(settings.NOTIFICATION_DIGEST_WINDOWS if windows is None else windows)
+        self.default_window = (
+            settings.NOTIFICATION_DIGEST_DEFAULT_WINDOW if default_window is None else default_window
+        )
+        self.urgent_types = set(
+            settings.NOTIFICATION_DIGEST_URGENT_TYPES if urgent_types is None else urgent_types
+        )
+        self.max_events = max_events or settings.NOTIFICATION_DIGEST_MAX_EVENTS
+        # (user_id, channel, type) -> (channel, buffered notifications)
+        self._buckets: Dict[Tuple[int, Any, Any], Tuple[Any, List[Any]]] = {}
+        self._timers: Dict[Tuple[int, Any, Any], asyncio.TimerHandle] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    @property
+    def pending(self) -> int:
+        return sum(len(notifications) for _, notifications in self._buckets.values())
+
+    def window_for(self, notification_type: Any) -> float:
+        return self.windows.get(_value(notification_type), self.default_window)
+
+    def is_urgent(self, notification: Any) -> bool:
+        return (
+            _value(notification.type) in self.urgent_types
+            or _value(getattr(notification, "priority", None)) == URGENT_PRIORITY
+        )
+
+    async def submit(self, notification: Any, channel: Any):
+        """
+        Queue a notification for a channel, or deliver it now if it bypasses the window.
+        """
+        window = self.window_for(notification.type)
+        if window <= 0 or self.is_urgent(notification):
+            notification_digest_events_total.labels(outcome="bypassed").inc()
+            await self._deliver(notification, channel)
+            return
+
+        key = (notification.user_id, _value(channel), _value(notification.type))
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            self._buckets[key] = (channel, [notification])
+            self._timers[key] = asyncio.get_running_loop().call_later(
+                window, self._schedule_flush, key
+            )
+        else:
+            bucket[1].append(notification)
+        notification_digest_events_total.labels(outcome="buffered").inc()
+
+        if len(self._buckets[key][1]) >= self.max_events:
+            await self.flush(key)
+
+    def _schedule_flush(self, key: Tuple[int, Any, Any]):
+        task = asyncio.create_task(self.flush(key))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def flush(self, key: Tuple[int, Any, Any]):
+        """
+        Deliver the buffered notifications of one bucket.
+        """
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        bucket = self._buckets.pop(key, None)
+        if bucket is None:
+            return
+
+        channel, notifications = bucket
+        if len(notifications) == 1:
+            notification = notifications[0]
+        else:
+            notification = self.merge(notifications)
+            notification_digest_events_total.labels(outcome="merged").inc(len(notifications))
+        await self._deliver(notification, channel)
+
+    async def flush_all(self):
+        """
+        Deliver every pending bucket, e.g. on shutdown.
+        """
+        for key in list(self._buckets):
+            await self.flush(key)
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _deliver(self, notification: Any, channel: Any):
+        try:
+            await self.deliver(notification, channel)
+        except Exception as e:
+            logger.error(
+                f"Failed to deliver {_value(channel)} notification "
+                f"to user {notification.user_id}: {str(e)}"
+            )
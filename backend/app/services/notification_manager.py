@@ -2,16 +2,42 @@ from datetime import datetime
 from typing import Dict, List, Optional, Any
 from sqlalchemy.orm import Session
 from fastapi import WebSocket
-from app.models import User, Notification, NotificationType, NotificationStatus
+from app.models.notification import Notification
+from app.models.user import User
+from app.schemas.notification import NotificationType, NotificationStatus
 from app.core.config import settings
+from app.core.pubsub import PubSubBackend, get_pubsub
+from app.core.unread_counter import unread_counter
 import json
 import logging
 
 logger = logging.getLogger(__name__)
 
 class NotificationManager:
-    def __init__(self):
+    """
+    Gestor de conexiones WebSocket con entrega entre workers.
+
+    Las notificaciones se publican en el bus pub/sub (un canal por usuario y
+    uno de broadcast); cada worker solo se suscribe a los canales de los
+    usuarios que tienen una conexión abierta en él.
+    """
+    def __init__(self, bus: Optional[PubSubBackend] = None):
         self.active_connections: Dict[int, List[WebSocket]] = {}
+        self._bus = bus
+
+    @property
+    def bus(self) -> PubSubBackend:
+        if self._bus is None:
+            self._bus = get_pubsub()
+        return self._bus
+
+    @staticmethod
+    def user_channel(user_id: int) -> str:
+        return PubSubBackend.channel("notifications", "user", user_id)
+
+    @staticmethod
+    def broadcast_channel() -> str:
+        return PubSubBackend.channel("notifications", "broadcast")
         
     async def connect(self, websocket: WebSocket, user_id: int):
         """Conectar un nuevo cliente WebSocket"""
@@ -19,14 +45,19 @@ class NotificationManager:
         if user_id not in self.active_connections:
             self.active_connections[user_id] = []
         self.active_connections[user_id].append(websocket)
+        await self.bus.subscribe(self.user_channel(user_id), self._on_user_message)
+        await self.bus.subscribe(self.broadcast_channel(), self._on_broadcast_message)
         logger.info(f"Nueva conexión WebSocket para usuario {user_id}")
 
     def disconnect(self, websocket: WebSocket, user_id: int):
         """Desconectar un cliente WebSocket"""
-        if user_id in self.active_connections:
-            self.active_connections[user_id].remove(websocket)
-            if not self.active_connections[user_id]:
+        connections = self.active_connections.get(user_id)
+        if connections and websocket in connections:
+            connections.remove(websocket)
+            if not connections:
                 del self.active_connections[user_id]
+            self.bus.release(self.user_channel(user_id))
+            self.bus.release(self.broadcast_channel())
         logger.info(f"Conexión WebSocket cerrada para usuario {user_id}")
 
     async def send_notification(
@@ -35,18 +66,12 @@ class NotificationManager:
         notification: Dict[str, Any]
     ):
         """Enviar notificación a un usuario específico"""
-        if user_id in self.active_connections:
-            disconnected = []
-            for websocket in self.active_connections[user_id]:
-                try:
-                    await websocket.send_json(notification)
-                except Exception as e:
-                    logger.error(f"Error enviando notificación: {str(e)}")
-                    disconnected.append(websocket)
-            
-            # Limpiar conexiones cerradas
-            for websocket in disconnected:
-                self.disconnect(websocket, user_id)
+        payload = json.dumps(notification, default=str)
+        try:
+            await self.bus.publish(self.user_channel(user_id), payload)
+        except Exception as e:
+            logger.error(f"Error publicando notificación: {str(e)}")
+            await self._send_local(user_id, payload)
 
     async def broadcast(
         self,
@@ -54,29 +79,41 @@ class NotificationManager:
         exclude_user: Optional[int] = None
     ):
         """Enviar notificación a todos los usuarios conectados"""
-        disconnected_users = []
-        for user_id, connections in self.active_connections.items():
+        message = json.dumps({
+            "exclude_user": exclude_user,
+            "payload": json.dumps(notification, default=str)
+        })
+        try:
+            await self.bus.publish(self.broadcast_channel(), message)
+        except Exception as e:
+            logger.error(f"Error publicando broadcast: {str(e)}")
+            await self._on_broadcast_message(self.broadcast_channel(), message)
+
+    async def _on_user_message(self, channel: str, message: str):
+        user_id = int(channel.rsplit(":", 1)[1])
+        await self._send_local(user_id, message)
+
+    async def _on_broadcast_message(self, channel: str, message: str):
+        envelope = json.loads(message)
+        exclude_user = envelope.get("exclude_user")
+        for user_id in list(self.active_connections):
             if exclude_user and user_id == exclude_user:
                 continue
-                
-            disconnected = []
-            for websocket in connections:
-                try:
-                    await websocket.send_json(notification)
-                except Exception as e:
-                    logger.error(f"Error en broadcast: {str(e)}")
-                    disconnected.append(websocket)
-            
-            # Limpiar conexiones cerradas
-            for websocket in disconnected:
-                self.disconnect(websocket, user_id)
-            
-            if not self.active_connections[user_id]:
-                disconnected_users.append(user_id)
-        
-        # Limpiar usuarios sin conexiones
-        for user_id in disconnected_users:
-            del self.active_connections[user_id]
+            await self._send_local(user_id, envelope["payload"])
+
+    async def _send_local(self, user_id: int, payload: str):
+        """Entregar un mensaje ya serializado a las conexiones locales del usuario"""
+        disconnected = []
+        for websocket in list(self.active_connections.get(user_id, [])):
+            try:
+                await websocket.send_text(payload)
+            except Exception as e:
+                logger.error(f"Error enviando notificación: {str(e)}")
+                disconnected.append(websocket)
+
+        # Limpiar conexiones cerradas
+        for websocket in disconnected:
+            self.disconnect(websocket, user_id)
 
     @staticmethod
     async def create_notification(
@@ -101,7 +138,9 @@ class NotificationManager:
         )
         
         db.add(notification)
-        await db.flush()
+        await db.commit()
+        # Solo cuenta como no leída una vez confirmada
+        await unread_counter.increment(db, user_id)
         
         return notification
 
@@ -120,7 +159,8 @@ class NotificationManager:
         if notification and notification.status == NotificationStatus.UNREAD:
             notification.status = NotificationStatus.READ
             notification.read_at = datetime.utcnow()
-            await db.flush()
+            await db.commit()
+            await unread_counter.decrement(db, user_id)
         
         return notification
 
@@ -156,8 +196,11 @@ class NotificationManager:
         ).first()
         
         if notification:
+            was_unread = notification.status == NotificationStatus.UNREAD
             await db.delete(notification)
-            await db.flush()
+            await db.commit()
+            if was_unread:
+                await unread_counter.decrement(db, user_id)
             return True
         
         return False
@@ -1,14 +1,33 @@
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
+from fastapi import BackgroundTasks
 from sqlalchemy.orm import Session
-from app.models import NotificationType, NotificationStatus, NotificationPriority
+from app.models.expense import Expense
+from app.models.expense_attachment import ExpenseAttachment
+from app.models.notification import Notification
+from app.models.user import User
+from app.models.vendor import Vendor
+from app.schemas.notification import (
+    NotificationType, NotificationStatus, NotificationPriority, NotificationChannel
+)
+from app.crud.notification import notification as notification_crud
+from app.crud.notification import notification_preference as preference_crud
 from app.services.notification_manager import notification_manager
 from app.core.config import settings
+from app.core.unread_counter import unread_counter
+from app.core.database import SessionLocal
+from app.services.notification_digest import NotificationDigest
 import logging
 
 logger = logging.getLogger(__name__)
 
 class NotificationService:
+    def __init__(self):
+        self.digest = NotificationDigest(
+            deliver=self._deliver_digest,
+            merge=self._build_digest
+        )
+
     @staticmethod
     async def send_loan_payment_notification(
         db: Session,
@@ -164,26 +183,26 @@ class NotificationService:
         self,
         db: Session,
         notification: Notification,
-        background_tasks: BackgroundTasks
+        background_tasks: Optional[BackgroundTasks] = None
     ) -> bool:
         """
         Send a notification through all configured channels.
+
+        Channels are sent after the response through the caller's
+        ``background_tasks``, or right away when there is no request.
         """
         try:
-            # Get user preferences from cache or database
-            preferences = await notification_cache.get_user_preferences(notification.user_id)
-            if not preferences:
-                preferences = await notification_crud.get_user_preferences(db, notification.user_id)
-                await notification_cache.set_user_preferences(notification.user_id, preferences)
+            channels = await self._get_user_channels(db, notification)
+            await self._store(db, notification, channels)
 
-            channels = self._get_enabled_channels(notification.type, preferences)
-            
-            for channel in channels:
+            if background_tasks is None:
+                await self._send_through_channels(db, notification, channels)
+            else:
                 background_tasks.add_task(
-                    self._send_through_channel,
+                    self._send_through_channels,
                     db,
                     notification,
-                    channel
+                    channels
                 )
             
             return True
@@ -191,51 +210,104 @@ class NotificationService:
             logger.error(f"Failed to send notification: {str(e)}")
             return False
 
-    async def _send_through_channel(
+    @staticmethod
+    async def _store(
+        db: Session,
+        notification: Notification,
+        channels: List[NotificationChannel]
+    ):
+        """
+        Save a new notification for the in-app list. The unread counter is
+        only updated once the row is committed.
+        """
+        if notification.id is not None:
+            return
+        notification.channels = [channel.value for channel in channels]
+        db.add(notification)
+        await db.commit()
+        await unread_counter.increment(db, notification.user_id)
+
+    async def _send_through_channels(
         self,
         db: Session,
         notification: Notification,
-        channel: NotificationChannel
+        channels: List[NotificationChannel]
     ):
+        """
+        Send a stored notification through its channels and record the outcome.
+        """
+        if not channels:
+            return
+        results = [
+            await self._send_through_channel(notification, channel)
+            for channel in channels
+        ]
+        await notification_crud.update_notification_status(
+            db,
+            notification.id,
+            NotificationStatus.SENT if any(results) else NotificationStatus.FAILED
+        )
+
+    @staticmethod
+    async def _send_through_channel(
+        notification: Notification,
+        channel: NotificationChannel
+    ) -> bool:
         """
         Send notification through a specific channel.
         """
+        # Each channel's SDK is only loaded when that channel is used
         try:
             if channel == NotificationChannel.EMAIL:
+                from app.core.email import email_manager
                 await email_manager.send_notification(notification)
             elif channel == NotificationChannel.PUSH:
+                from app.core.push import push_manager
                 await push_manager.send_notification(notification)
             elif channel == NotificationChannel.SMS:
+                from app.core.sms import sms_manager
                 await sms_manager.send_notification(notification)
-
-            await notification_crud.update_notification_status(
-                db,
-                notification.id,
-                channel,
-                NotificationStatus.SENT
-            )
+            return True
         except Exception as e:
             logger.error(f"Failed to send {channel} notification: {str(e)}")
-            await notification_crud.update_notification_status(
-                db,
-                notification.id,
-                channel,
-                NotificationStatus.FAILED
-            )
+            return False
+
+    async def _get_user_channels(
+        self,
+        db: Session,
+        notification: Notification
+    ) -> List[NotificationChannel]:
+        """
+        Channels the recipient has enabled for this type of notification.
+        """
+        from app.core.cache import notification_cache
+
+        # Get user preferences from cache or database
+        preferences = await notification_cache.get_or_load_user_preferences(
+            notification.user_id,
+            lambda: preference_crud.get_user_preferences(db, notification.user_id)
+        )
+        return self._get_enabled_channels(notification.type, preferences)
 
     def _get_enabled_channels(
         self,
         notification_type: NotificationType,
-        preferences: dict
+        preferences: Optional[dict]
     ) -> List[NotificationChannel]:
         """
         Get enabled notification channels based on user preferences.
         """
         channels = []
+        preferences = preferences or {}
         type_preferences = preferences.get(notification_type.value, {})
         
         for channel in NotificationChannel:
-            if type_preferences.get(channel.value, True):  # Default to True if not set
+            # Per-type setting first, then the user's switch for the channel
+            enabled = type_preferences.get(
+                channel.value,
+                preferences.get(f"{channel.value}_notifications", True)
+            )
+            if enabled:
                 channels.append(channel)
         
         return channels
@@ -252,15 +324,79 @@ class NotificationService:
             pending_notifications = await notification_crud.get_pending_reminders(db, current_time)
             
             for notification in pending_notifications:
-                await self.send_notification(db, notification, BackgroundTasks())
+                await self.send_notification(db, notification)
         except Exception as e:
             logger.error(f"Failed to send reminder notifications: {str(e)}")
 
+    async def _send_coalesced(
+        self,
+        db: Session,
+        notification: Notification,
+        background_tasks: Optional[BackgroundTasks] = None
+    ) -> bool:
+        """
+        Send a notification through the digest stage.
+
+        Events are merged per user, channels and type so batch operations
+        produce one stored notification and one message per channel per
+        window instead of one of each per event.
+        """
+        if not settings.NOTIFICATION_DIGEST_ENABLED:
+            return await self.send_notification(db, notification, background_tasks)
+
+        try:
+            channels = await self._get_user_channels(db, notification)
+            await self.digest.submit(notification, tuple(channels))
+            return True
+        except Exception as e:
+            logger.error(f"Failed to queue notification: {str(e)}")
+            return False
+
+    async def _deliver_digest(
+        self,
+        notification: Notification,
+        channels: Tuple[NotificationChannel, ...]
+    ):
+        """
+        Store and send a flushed digest; windows outlive the request, so use a new session.
+        """
+        async with SessionLocal() as db:
+            await self._store(db, notification, list(channels))
+            await self._send_through_channels(db, notification, list(channels))
+
+    def _build_digest(self, notifications: List[Notification]) -> Notification:
+        """
+        Merge notifications of the same type for one user into a single one.
+        """
+        first = notifications[0]
+        count = len(notifications)
+        shown = notifications[:settings.NOTIFICATION_DIGEST_MAX_ITEMS]
+
+        message = "\n".join(notification.message for notification in shown)
+        if count > len(shown):
+            message += f"\n... and {count - len(shown)} more."
+
+        return Notification(
+            user_id=first.user_id,
+            type=first.type,
+            title=f"{first.title} ({count})",
+            message=message,
+            priority=first.priority,
+            reference_type=first.reference_type,
+            data={
+                "digest": True,
+                "count": count,
+                "reference_ids": [notification.reference_id for notification in notifications],
+                "items": [notification.data for notification in shown]
+            }
+        )
+
     async def notify_expense_created(
         self,
         db: Session,
         expense: Expense,
-        created_by: User
+        created_by: User,
+        background_tasks: Optional[BackgroundTasks] = None
     ):
         """Send notification when expense is created."""
         # Notify approvers
@@ -281,13 +417,14 @@ class NotificationService:
                     "created_by": created_by.full_name
                 }
             )
-            await self.send_notification(db, notification, BackgroundTasks())
+            await self._send_coalesced(db, notification, background_tasks)
 
     async def notify_expense_updated(
         self,
         db: Session,
         expense: Expense,
-        updated_by: User
+        updated_by: User,
+        background_tasks: Optional[BackgroundTasks] = None
     ):
         """Send notification when expense is updated."""
         # Notify owner and approvers
@@ -308,17 +445,18 @@ class NotificationService:
                         "updated_by": updated_by.full_name
                     }
                 )
-                await self.send_notification(db, notification, BackgroundTasks())
+                await self._send_coalesced(db, notification, background_tasks)
 
     async def notify_expense_approved(
         self,
         db: Session,
         expense: Expense,
-        approved_by: User
+        approved_by: User,
+        background_tasks: Optional[BackgroundTasks] = None
     ):
         """Send notification when expense is approved."""
         notification = Notification(
-            user_id=expense.created_by,
+            user_id=expense.created_by_id,
             type=NotificationType.EXPENSE_APPROVED,
             title="Expense Approved",
             message=f"Your expense of ${expense.amount:.2f} has been approved.",
@@ -331,13 +469,14 @@ class NotificationService:
                 "approved_by": approved_by.full_name
             }
         )
-        await self.send_notification(db, notification, BackgroundTasks())
+        await self._send_coalesced(db, notification, background_tasks)
 
     async def notify_expense_cancelled(
         self,
         db: Session,
         expense: Expense,
-        cancelled_by: User
+        cancelled_by: User,
+        background_tasks: Optional[BackgroundTasks] = None
     ):
         """Send notification when expense is cancelled."""
         # Notify all stakeholders
@@ -358,14 +497,15 @@ class NotificationService:
                         "cancelled_by": cancelled_by.full_name
                     }
                 )
-                await self.send_notification(db, notification, BackgroundTasks())
+                await self._send_coalesced(db, notification, background_tasks)
 
     async def notify_attachment_added(
         self,
         db: Session,
         expense: Expense,
         attachment: ExpenseAttachment,
-        added_by: User
+        added_by: User,
+        background_tasks: Optional[BackgroundTasks] = None
     ):
         """Send notification when attachment is added to expense."""
         # Notify owner and approvers
@@ -386,13 +526,14 @@ class NotificationService:
                         "added_by": added_by.full_name
                     }
                 )
-                await self.send_notification(db, notification, BackgroundTasks())
+                await self._send_coalesced(db, notification, background_tasks)
 
     async def notify_vendor_created(
         self,
         db: Session,
         vendor: Vendor,
-        created_by: User
+        created_by: User,
+        background_tasks: Optional[BackgroundTasks] = None
     ):
         """Send notification when vendor is created."""
         # Notify admins
@@ -412,13 +553,14 @@ class NotificationService:
                         "created_by": created_by.full_name
                     }
                 )
-                await self.send_notification(db, notification, BackgroundTasks())
+                await self._send_coalesced(db, notification, background_tasks)
 
     async def notify_vendor_updated(
         self,
         db: Session,
         vendor: Vendor,
-        updated_by: User
+        updated_by: User,
+        background_tasks: Optional[BackgroundTasks] = None
     ):
         """Send notification when vendor is updated."""
         # Notify admins
@@ -438,14 +580,15 @@ class NotificationService:
                         "updated_by": updated_by.full_name
                     }
                 )
-                await self.send_notification(db, notification, BackgroundTasks())
+                await self._send_coalesced(db, notification, background_tasks)
 
     async def notify_vendor_rated(
         self,
         db: Session,
         vendor: Vendor,
         rating: float,
-        rated_by: User
+        rated_by: User,
+        background_tasks: Optional[BackgroundTasks] = None
     ):
         """Send notification when vendor is rated."""
         # Notify admins
@@ -466,7 +609,7 @@ class NotificationService:
                         "rated_by": rated_by.full_name
                     }
                 )
-                await self.send_notification(db, notification, BackgroundTasks())
+                await self._send_coalesced(db, notification, background_tasks)
 
     def _get_expense_approvers(self, db: Session, expense: Expense) -> List[User]:
         """Get list of users who can approve the expense."""
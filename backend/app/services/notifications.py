@@ -8,7 +8,7 @@ import json
 import logging
 
 from ..core.config import settings
-from ..crud import payment as crud_payment
+from ..crud.payment import payment as crud_payment
 from ..crud import contract as crud_contract
 from ..models.payment import PaymentStatus
 
@@ -61,7 +61,7 @@ class NotificationService:
         reminder_type: str
     ):
         """Enviar recordatorio de pago"""
-        payment = crud_payment.get(db, id=payment_id)
+        payment = await crud_payment.get(db, id=payment_id)
         if not payment:
             logger.error(f"Payment {payment_id} not found for reminder")
             return
@@ -100,7 +100,7 @@ class NotificationService:
         payment_id: int
     ):
         """Enviar confirmación de pago recibido"""
-        payment = crud_payment.get(db, id=payment_id)
+        payment = await crud_payment.get(db, id=payment_id)
         if not payment:
             logger.error(f"Payment {payment_id} not found for confirmation")
             return
@@ -133,7 +133,7 @@ class NotificationService:
         payment_id: int
     ):
         """Enviar alerta de pago atrasado"""
-        payment = crud_payment.get(db, id=payment_id)
+        payment = await crud_payment.get(db, id=payment_id)
         if not payment:
             logger.error(f"Payment {payment_id} not found for late payment alert")
             return
@@ -160,7 +160,7 @@ class NotificationService:
             template_data=template_data
         )
 
-def schedule_payment_reminders(
+async def schedule_payment_reminders(
     db: Session,
     background_tasks: BackgroundTasks
 ):
@@ -169,7 +169,7 @@ def schedule_payment_reminders(
     upcoming_date = today + timedelta(days=7)
     
     # Recordatorios de pagos próximos (7 días antes)
-    upcoming_payments = crud_payment.get_multi(
+    upcoming_payments = await crud_payment.get_multi(
         db,
         filters={
             "status": PaymentStatus.PENDING,
@@ -186,7 +186,7 @@ def schedule_payment_reminders(
         )
     
     # Recordatorios de pagos que vencen hoy
-    due_payments = crud_payment.get_multi(
+    due_payments = await crud_payment.get_multi(
         db,
         filters={
             "status": PaymentStatus.PENDING,
@@ -203,7 +203,7 @@ def schedule_payment_reminders(
         )
     
     # Alertas de pagos vencidos
-    overdue_payments = crud_payment.get_multi(
+    overdue_payments = await crud_payment.get_multi(
         db,
         filters={
             "status": PaymentStatus.LATE,
@@ -0,0 +1,182 @@
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from fastapi import HTTPException, status
+from sqlalchemy import and_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from app.models.contract import Contract, ContractStatus
+from app.models.unit import Unit
+
+# Los contratos vencidos o rescindidos ocuparon su unidad hasta su end_date
+# (al rescindir se ajusta al día de la rescisión); solo los borradores no cuentan
+OCCUPYING_STATUSES = [s for s in ContractStatus if s != ContractStatus.DRAFT]
+
+DAYS_PER_MONTH = 365 / 12
+
+@dataclass
+class Portfolio:
+    """Unidades y contratos de un período, cargados con una sola consulta."""
+    start_date: date
+    end_date: date
+    unit_ids: List[int] = field(default_factory=list)
+    property_ids: List[int] = field(default_factory=list)
+    base_rents: List[float] = field(default_factory=list)
+    # (índice de la unidad, inicio, fin) de cada contrato que toca el período
+    contracts: List[Tuple[int, date, date]] = field(default_factory=list)
+
+async def load_portfolio(
+    db: AsyncSession,
+    start_date: date,
+    end_date: date,
+    property_id: Optional[int] = None
+) -> Portfolio:
+    stmt = select(
+        Unit.id, Unit.property_id, Unit.base_rent, Contract.start_date, Contract.end_date
+    ).outerjoin(
+        Contract,
+        and_(
+            Contract.unit_id == Unit.id,
+            Contract.status.in_(OCCUPYING_STATUSES),
+            Contract.start_date <= end_date,
+            Contract.end_date >= start_date
+        )
+    ).where(Unit.is_active.is_(True), Unit.property_id.isnot(None))
+    if property_id is not None:
+        stmt = stmt.where(Unit.property_id == property_id)
+    result = await db.execute(stmt.order_by(Unit.property_id, Unit.id))
+
+    portfolio = Portfolio(start_date=start_date, end_date=end_date)
+    index: Dict[int, int] = {}
+    for unit_id, unit_property_id, base_rent, contract_start, contract_end in result.all():
+        if unit_id not in index:
+            index[unit_id] = len(portfolio.unit_ids)
+            portfolio.unit_ids.append(unit_id)
+            portfolio.property_ids.append(unit_property_id)
+            portfolio.base_rents.append(base_rent or 0.0)
+        if contract_start is not None and contract_end is not None:
+            portfolio.contracts.append((index[unit_id], contract_start, contract_end))
+    return portfolio
+
+def _rate(occupied, total) -> float:
+    return round(float(occupied) / float(total) * 100, 2) if total else 0.0
+
+def compute_occupancy(portfolio: Portfolio, include_daily: bool = False) -> Dict[str, Any]:
+    """
+    Ocupación diaria y mensual, días vacíos, rotación y renta perdida por
+    unidad, por propiedad y de la cartera completa.
+
+    Construye una matriz unidades x días con NumPy; CPU intensivo, se ejecuta
+    fuera del event loop (ver ``OccupancyAnalyticsService``).
+    """
+    # numpy se importa al primer uso para no cargarlo al arrancar los workers
+    import numpy as np
+
+    start, end = portfolio.start_date, portfolio.end_date
+    n_days = (end - start).days + 1
+    n_units = len(portfolio.unit_ids)
+
+    # Matriz de ocupación por diferencias: +1 el día de entrada, -1 el día
+    # siguiente a la salida, y suma acumulada a lo largo de los días
+    diff = np.zeros((n_units, n_days + 1), dtype=np.int32)
+    move_ins = np.zeros(n_units, dtype=np.int64)
+    move_outs = np.zeros(n_units, dtype=np.int64)
+    if portfolio.contracts:
+        units = np.array([c[0] for c in portfolio.contracts], dtype=np.int64)
+        starts = np.array([(c[1] - start).days for c in portfolio.contracts], dtype=np.int64)
+        ends = np.array([(c[2] - start).days for c in portfolio.contracts], dtype=np.int64)
+        np.add.at(diff, (units, np.clip(starts, 0, n_days)), 1)
+        np.add.at(diff, (units, np.clip(ends + 1, 0, n_days)), -1)
+        np.add.at(move_ins, units, (starts >= 0) & (starts < n_days))
+        np.add.at(move_outs, units, (ends >= 0) & (ends < n_days))
+    occupied = np.cumsum(diff, axis=1)[:, :n_days] > 0
+
+    occupied_days = occupied.sum(axis=1)
+    vacancy_days = n_days - occupied_days
+    daily_rent = np.asarray(portfolio.base_rents, dtype=np.float64) / DAYS_PER_MONTH
+    lost_rent = vacancy_days * daily_rent
+
+    # Primer día de cada mes dentro del período, para agregar por columnas
+    month_starts, labels = [0], [f"{start:%Y-%m}"]
+    cursor = date(start.year + start.month // 12, start.month % 12 + 1, 1)
+    while cursor <= end:
+        month_starts.append((cursor - start).days)
+        labels.append(f"{cursor:%Y-%m}")
+        cursor = date(cursor.year + cursor.month // 12, cursor.month % 12 + 1, 1)
+    month_starts = np.array(month_starts)
+    month_days = np.diff(np.append(month_starts, n_days))
+
+    def summary(mask) -> Dict[str, Any]:
+        unit_count = int(mask.sum())
+        counts = occupied[mask].sum(axis=0) if unit_count else np.zeros(n_days, dtype=np.int64)
+        monthly = np.add.reduceat(counts, month_starts)
+        data = {
+            "units": unit_count,
+            "occupied_days": int(occupied_days[mask].sum()),
+            "vacancy_days": int(vacancy_days[mask].sum()),
+            "occupancy_rate": _rate(occupied_days[mask].sum(), unit_count * n_days),
+            "move_ins": int(move_ins[mask].sum()),
+            "move_outs": int(move_outs[mask].sum()),
+            "turnover_rate": _rate(move_outs[mask].sum(), unit_count),
+            "lost_rent": round(float(lost_rent[mask].sum()), 2),
+            "monthly": [
+                {"month": label, "occupancy_rate": _rate(value, unit_count * days)}
+                for label, value, days in zip(labels, monthly, month_days)
+            ]
+        }
+        if include_daily:
+            data["daily"] = [int(value) for value in counts]
+        return data
+
+    property_ids = np.asarray(portfolio.property_ids, dtype=np.int64)
+    return {
+        "start_date": start,
+        "end_date": end,
+        "days": n_days,
+        "portfolio": summary(np.ones(n_units, dtype=bool)),
+        "properties": [
+            {"property_id": int(property_id), **summary(property_ids == property_id)}
+            for property_id in np.unique(property_ids)
+        ],
+        "units": [
+            {
+                "unit_id": unit_id,
+                "property_id": portfolio.property_ids[i],
+                "occupied_days": int(occupied_days[i]),
+                "vacancy_days": int(vacancy_days[i]),
+                "occupancy_rate": _rate(occupied_days[i], n_days),
+                "move_ins": int(move_ins[i]),
+                "move_outs": int(move_outs[i]),
+                "lost_rent": round(float(lost_rent[i]), 2)
+            }
+            for i, unit_id in enumerate(portfolio.unit_ids)
+        ]
+    }
+
+class OccupancyAnalyticsService:
+    MAX_DAYS = 3660
+
+    @staticmethod
+    async def get_occupancy(
+        db: AsyncSession,
+        start_date: date,
+        end_date: date,
+        property_id: Optional[int] = None,
+        include_daily: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Métricas de ocupación de la cartera (o de una propiedad) en un período.
+        """
+        if end_date < start_date:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="End date must not be before start date"
+            )
+        if end_date - start_date >= timedelta(days=OccupancyAnalyticsService.MAX_DAYS):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"The period cannot exceed {OccupancyAnalyticsService.MAX_DAYS} days"
+            )
+
+        portfolio = await load_portfolio(db, start_date, end_date, property_id)
+        return await run_in_threadpool(compute_occupancy, portfolio, include_daily)
@@ -0,0 +1,149 @@
+import asyncio
+import logging
+import os
+import subprocess
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.stored_file import StoredFile, DerivativeStatus
+from app.services.file_storage import absolute_path
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_SUFFIX = ".thumb.jpg"
+PREVIEW_SUFFIX = ".preview.jpg"
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+def _get_executor() -> ProcessPoolExecutor:
+    # Se crea al primer uso para no arrancar procesos en cada worker web
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=settings.PREVIEW_WORKERS)
+    return _executor
+
+def shutdown_preview_pool():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+def _render_pdf_page(source: str, size: int, workdir: str, timeout: int) -> str:
+    """Primera página de un PDF como PNG con pdftoppm (poppler-utils)."""
+    prefix = os.path.join(workdir, "page")
+    subprocess.run(
+        ["pdftoppm", "-f", "1", "-l", "1", "-singlefile", "-png", "-scale-to", str(size), source, prefix],
+        check=True,
+        capture_output=True,
+        timeout=timeout
+    )
+    return prefix + ".png"
+
+def _save_jpeg(image, path: str):
+    tmp_path = f"{path}.tmp"
+    image.save(tmp_path, "JPEG", quality=80, optimize=True, progressive=True)
+    os.replace(tmp_path, path)
+
+def render_derivatives(
+    source: str,
+    thumbnail_path: str,
+    preview_path: str,
+    thumbnail_size: int,
+    preview_size: int,
+    timeout: int
+) -> bool:
+    """
+    Miniatura y vista previa JPEG de una imagen o de la primera página de un
+    PDF. Se ejecuta en un proceso del pool: CPU intensivo y sin acceso a la
+    base de datos. Devuelve False si el archivo no es una imagen ni un PDF.
+    """
+    # Pillow se importa en el proceso del pool, no en los workers web
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    with open(source, "rb") as f:
+        is_pdf = f.read(5) == b"%PDF-"
+
+    with tempfile.TemporaryDirectory() as workdir:
+        if is_pdf:
+            try:
+                page = _render_pdf_page(source, preview_size, workdir, timeout)
+            except FileNotFoundError:
+                # Sin poppler-utils instalado no hay vista previa de PDFs
+                return False
+            image = Image.open(page)
+        else:
+            try:
+                image = Image.open(source)
+            except UnidentifiedImageError:
+                return False
+
+        with image:
+            # En JPEG decodifica directamente a una escala reducida
+            image.draft("RGB", (preview_size, preview_size))
+            image = ImageOps.exif_transpose(image).convert("RGB")
+            image.thumbnail((preview_size, preview_size))
+            _save_jpeg(image, preview_path)
+            image.thumbnail((thumbnail_size, thumbnail_size))
+            _save_jpeg(image, thumbnail_path)
+    return True
+
+class PreviewService:
+    @staticmethod
+    async def generate(stored_file_id: int):
+        """
+        Generar miniatura y vista previa de un archivo guardado, junto al
+        original (``<sha256>.thumb.jpg`` y ``<sha256>.preview.jpg``).
+
+        Pensado para BackgroundTasks tras una subida: usa su propia sesión y
+        no hace nada si el contenido (compartido por hash) ya se procesó.
+        """
+        async with SessionLocal() as db:
+            stored_file = await db.get(StoredFile, stored_file_id)
+            if stored_file is None or stored_file.derivative_status is not None:
+                return
+            await PreviewService._generate(db, stored_file)
+
+    @staticmethod
+    async def _generate(db: AsyncSession, stored_file: StoredFile):
+        thumbnail_path = stored_file.path + THUMBNAIL_SUFFIX
+        preview_path = stored_file.path + PREVIEW_SUFFIX
+        loop = asyncio.get_running_loop()
+        try:
+            rendered = await loop.run_in_executor(
+                _get_executor(),
+                render_derivatives,
+                absolute_path(stored_file.path),
+                absolute_path(thumbnail_path),
+                absolute_path(preview_path),
+                settings.PREVIEW_THUMBNAIL_SIZE,
+                settings.PREVIEW_SIZE,
+                settings.PREVIEW_TIMEOUT
+            )
+        except Exception as e:
+            logger.warning(f"Could not render previews for stored file {stored_file.id}: {str(e)}")
+            stored_file.derivative_status = DerivativeStatus.FAILED
+        else:
+            if rendered:
+                stored_file.thumbnail_path = thumbnail_path
+                stored_file.preview_path = preview_path
+                stored_file.derivative_status = DerivativeStatus.READY
+            else:
+                stored_file.derivative_status = DerivativeStatus.UNSUPPORTED
+        await db.commit()
+
+    @staticmethod
+    async def generate_missing(db: AsyncSession, limit: int = 100) -> int:
+        """Procesar archivos sin derivados (p. ej. subidos antes o con el worker caído)."""
+        stored_files = (await db.execute(
+            select(StoredFile)
+            .where(StoredFile.derivative_status.is_(None))
+            .order_by(StoredFile.id)
+            .limit(limit)
+        )).scalars().all()
+        for stored_file in stored_files:
+            await PreviewService._generate(db, stored_file)
+        return len(stored_files)
@@ -6,11 +6,24 @@ from datetime import date, datetime
 from ..models.property import Property, PropertyStatus, PropertyType
 from ..schemas.property import PropertyCreate, PropertyUpdate, PropertyWithUnits
 from fastapi import HTTPException, status
+from ..core.response_cache import response_cache
 
 class PropertyService:
     def __init__(self, db: AsyncSession):
         self.db = db
 
+    @staticmethod
+    async def _invalidate_cache(*properties: Property):
+        """
+        Invalida las respuestas cacheadas de las propiedades modificadas
+        """
+        tags = {"properties"}
+        for property in properties:
+            tags.add(f"property:{property.id}")
+            if property.parent_property_id:
+                tags.add(f"property:{property.parent_property_id}")
+        await response_cache.invalidate(*tags)
+
     async def get_properties(
         self,
         user_id: str | None = None,
@@ -110,6 +123,7 @@ class PropertyService:
         self.db.add(new_property)
         await self.db.commit()
         await self.db.refresh(new_property)
+        await self._invalidate_cache(new_property)
         
         return new_property
 
@@ -140,6 +154,7 @@ class PropertyService:
         
         await self.db.commit()
         await self.db.refresh(property)
+        await self._invalidate_cache(property)
         
         return property
 
@@ -149,6 +164,7 @@ class PropertyService:
         """
         property = await self.get_property(property_id)
         
+        units = []
         # Si es una propiedad principal, también desactivar sus unidades
         if property.property_type == PropertyType.PRINCIPAL:
             units_query = select(Property).where(
@@ -165,6 +181,7 @@ class PropertyService:
         
         property.is_active = False
         await self.db.commit()
+        await self._invalidate_cache(property, *units)
         return True
 
     async def get_property_metrics(self) -> Dict[str, Any]:
@@ -263,6 +280,7 @@ class PropertyService:
         property.status = status_enum
         await self.db.commit()
         await self.db.refresh(property)
+        await self._invalidate_cache(property)
         
         return property
 
@@ -302,6 +320,7 @@ class PropertyService:
         # Refrescar todas las propiedades
         for property in properties:
             await self.db.refresh(property)
+        await self._invalidate_cache(*properties)
         
         return properties
 
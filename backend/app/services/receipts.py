@@ -1,14 +1,9 @@
 from datetime import datetime
 from typing import Optional
 from fastapi import HTTPException
-from sqlalchemy.orm import Session
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 import os
-import qrcode
 from io import BytesIO
 
 from ..models.payment import Payment
@@ -26,6 +21,8 @@ class ReceiptService:
     @staticmethod
     def generate_receipt_qr(payment: Payment, receipt_number: str) -> bytes:
         """Genera un código QR con la información del pago"""
+        import qrcode
+
         qr_data = (
             f"Receipt: {receipt_number}\n"
             f"Date: {payment.payment_date}\n"
@@ -48,18 +45,41 @@ class ReceiptService:
 
     @staticmethod
     async def generate_receipt_pdf(
-        db: Session,
+        db: AsyncSession,
         payment: Payment,
         output_path: Optional[str] = None
     ) -> str:
         """Genera un PDF con el recibo de pago"""
         # Obtener datos relacionados
-        contract = db.query(Contract).filter(Contract.id == payment.contract_id).first()
-        tenant = db.query(Tenant).filter(Tenant.id == payment.tenant_id).first()
+        contract = await db.get(Contract, payment.contract_id)
+        tenant = await db.get(Tenant, payment.tenant_id)
         
         if not contract or not tenant:
             raise HTTPException(status_code=404, detail="Contract or tenant not found")
         
+        # reportlab es síncrono y costoso: el PDF se genera en un hilo
+        return await run_in_threadpool(
+            ReceiptService._build_receipt_pdf,
+            payment,
+            contract,
+            tenant,
+            output_path
+        )
+
+    @staticmethod
+    def _build_receipt_pdf(
+        payment: Payment,
+        contract: Contract,
+        tenant: Tenant,
+        output_path: Optional[str]
+    ) -> str:
+        # reportlab se importa al primer uso para no cargarlo al arrancar los workers
+        from reportlab.lib import colors
+        from reportlab.lib.pagesizes import letter
+        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+        from reportlab.lib.styles import getSampleStyleSheet
+        from reportlab.lib.units import inch
+
         # Generar número de recibo
         receipt_number = ReceiptService.generate_receipt_number(payment)
         
@@ -153,12 +173,12 @@ class ReceiptService:
 
     @staticmethod
     async def send_receipt_email(
-        db: Session,
+        db: AsyncSession,
         payment: Payment,
         receipt_path: str
     ) -> None:
         """Envía el recibo por email al inquilino"""
-        tenant = db.query(Tenant).filter(Tenant.id == payment.tenant_id).first()
+        tenant = await db.get(Tenant, payment.tenant_id)
         if not tenant:
             raise HTTPException(status_code=404, detail="Tenant not found")
         
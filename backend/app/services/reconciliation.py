@@ -0,0 +1,503 @@
+import csv
+import io
+import re
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+from fastapi import HTTPException, status
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.response_cache import response_cache
+from app.models.contract import Contract
+from app.models.payment import Payment, PaymentMethod, PaymentStatus
+from app.models.reconciliation import ReconciliationItem, ReconciliationStatus
+from app.models.tenant import Tenant
+from app.schemas.reconciliation import ReconciliationMatch, ReconciliationReport
+from app.services.audit import AuditService
+
+# Pagos que pueden conciliarse con un cobro del banco
+OPEN_STATUSES = (PaymentStatus.PENDING, PaymentStatus.LATE)
+
+# Nombres de columna aceptados en extractos CSV
+CSV_COLUMNS = {
+    "transaction_date": ("date", "fecha", "transaction_date", "booking_date", "value_date", "fecha_valor"),
+    "amount": ("amount", "importe", "monto", "credit", "abono"),
+    "reference": ("reference", "referencia", "ref"),
+    "description": ("description", "descripcion", "concepto", "memo", "name", "payer"),
+    "bank_transaction_id": ("id", "transaction_id", "fitid", "movimiento"),
+}
+
+DATE_FORMATS = ("%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%Y%m%d")
+
+@dataclass
+class StatementLine:
+    line_number: int
+    transaction_date: date
+    amount: float
+    reference: Optional[str] = None
+    description: Optional[str] = None
+    bank_transaction_id: Optional[str] = None
+
+@dataclass
+class PendingPayment:
+    id: int
+    amount: float
+    due_date: date
+    reference_number: Optional[str] = None
+    tenant_name: Optional[str] = None
+
+@dataclass
+class MatchResult:
+    line: StatementLine
+    status: str  # "matched" o un ReconciliationStatus de la cola de revisión
+    payment_id: Optional[int] = None
+    candidates: List[int] = field(default_factory=list)
+    reason: Optional[str] = None
+
+def _parse_date(value: str) -> date:
+    value = value.strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value[:10] if fmt != "%Y%m%d" else value[:8], fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Invalid date: {value}")
+
+def _parse_amount(value: str) -> float:
+    value = re.sub(r"[^\d,.\-]", "", value)
+    # El último separador es el decimal: "1.234,56" y "1,234.56"
+    if "," in value and value.rfind(",") > value.rfind("."):
+        value = value.replace(".", "").replace(",", ".")
+    else:
+        value = value.replace(",", "")
+    return float(value)
+
+def _normalize(value: Optional[str]) -> str:
+    return re.sub(r"[^0-9a-z]", "", value.lower()) if value else ""
+
+def _words(value: Optional[str]) -> set:
+    return {word for word in (_normalize(w) for w in (value or "").split()) if word}
+
+def _cents(amount: float) -> int:
+    return int(round(amount * 100))
+
+def parse_csv_statement(content: str) -> Tuple[List[StatementLine], List[str]]:
+    """Líneas de abono de un extracto CSV y errores de las que no se pudieron leer."""
+    # Los bancos europeos separan con ";" porque la coma es el separador decimal
+    first_line = content.split("\n", 1)[0]
+    delimiter = max((",", ";", "\t"), key=first_line.count)
+    reader = csv.reader(io.StringIO(content), delimiter=delimiter)
+    header = [_normalize(name) for name in next(reader, [])]
+
+    positions: Dict[str, int] = {}
+    for key, aliases in CSV_COLUMNS.items():
+        for alias in aliases:
+            if _normalize(alias) in header:
+                positions[key] = header.index(_normalize(alias))
+                break
+    if "transaction_date" not in positions or "amount" not in positions:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="The statement must have date and amount columns"
+        )
+
+    lines, errors = [], []
+    for number, values in enumerate(reader, start=1):
+        if not any(value.strip() for value in values):
+            continue
+        data = {
+            key: values[position].strip() if position < len(values) else ""
+            for key, position in positions.items()
+        }
+        try:
+            amount = _parse_amount(data["amount"])
+            transaction_date = _parse_date(data["transaction_date"])
+        except ValueError as e:
+            errors.append(f"Line {number}: {str(e)}")
+            continue
+        # Solo los abonos pueden ser cobros de renta
+        if amount <= 0:
+            continue
+        lines.append(StatementLine(
+            line_number=number,
+            transaction_date=transaction_date,
+            amount=amount,
+            reference=data.get("reference") or None,
+            description=data.get("description") or None,
+            bank_transaction_id=data.get("bank_transaction_id") or None
+        ))
+    return lines, errors
+
+def parse_ofx_statement(content: str) -> Tuple[List[StatementLine], List[str]]:
+    """Líneas de abono de un extracto OFX (SGML 1.x o XML 2.x)."""
+    lines, errors = [], []
+    blocks = re.findall(r"<STMTTRN>(.*?)</STMTTRN>", content, re.S | re.I)
+    for number, block in enumerate(blocks, start=1):
+        # En OFX 1.x los elementos no se cierran: el valor llega hasta el fin de línea
+        tags = {tag.upper(): value.strip() for tag, value in re.findall(r"<(\w+)>([^<\r\n]*)", block)}
+        try:
+            amount = _parse_amount(tags.get("TRNAMT", ""))
+            transaction_date = _parse_date(tags.get("DTPOSTED", ""))
+        except ValueError as e:
+            errors.append(f"Transaction {number}: {str(e)}")
+            continue
+        if amount <= 0:
+            continue
+        lines.append(StatementLine(
+            line_number=number,
+            transaction_date=transaction_date,
+            amount=amount,
+            reference=tags.get("REFNUM") or tags.get("CHECKNUM") or None,
+            description=" ".join(filter(None, [tags.get("NAME"), tags.get("MEMO")])) or None,
+            bank_transaction_id=tags.get("FITID") or None
+        ))
+    return lines, errors
+
+class PaymentIndex:
+    """
+    Índices en memoria de los pagos pendientes: por referencia (hash) y, por
+    importe, una lista ordenada por vencimiento para buscar por ventana de
+    fechas con bisect.
+    """
+    def __init__(self, payments: List[PendingPayment]):
+        self.by_reference: Dict[str, List[PendingPayment]] = defaultdict(list)
+        by_amount: Dict[int, List[PendingPayment]] = defaultdict(list)
+        for payment in payments:
+            if _normalize(payment.reference_number):
+                self.by_reference[_normalize(payment.reference_number)].append(payment)
+            by_amount[_cents(payment.amount)].append(payment)
+
+        self.by_amount: Dict[int, Tuple[List[int], List[PendingPayment]]] = {}
+        for cents, group in by_amount.items():
+            group.sort(key=lambda p: (p.due_date, p.id))
+            self.by_amount[cents] = ([p.due_date.toordinal() for p in group], group)
+
+    def find_by_reference(self, line: StatementLine) -> List[PendingPayment]:
+        found = self.by_reference.get(_normalize(line.reference), [])
+        if found:
+            return found
+        # Muchos bancos solo traen la referencia dentro del concepto
+        for word in _words(line.description):
+            if word in self.by_reference:
+                return self.by_reference[word]
+        return []
+
+    def find_in_window(self, cents: int, start: date, end: date) -> List[PendingPayment]:
+        ordinals, group = self.by_amount.get(cents, ([], []))
+        return group[bisect_left(ordinals, start.toordinal()):bisect_right(ordinals, end.toordinal())]
+
+def _tenant_matches(payment: PendingPayment, words: set) -> bool:
+    name = _words(payment.tenant_name)
+    return bool(name) and name <= words
+
+def match_lines(
+    lines: List[StatementLine],
+    payments: List[PendingPayment],
+    window_days: int
+) -> List[MatchResult]:
+    """
+    Asignar cada línea a lo sumo a un pago y cada pago a lo sumo a una línea.
+
+    Primero por referencia; si la línea no trae ninguna conocida, por importe
+    exacto con vencimiento dentro de la ventana, desempatando por el nombre
+    del inquilino en el concepto. Lo que no queda claro va a revisión.
+    """
+    index = PaymentIndex(payments)
+    window = timedelta(days=window_days)
+    claimed = set()
+    results = []
+
+    for line in lines:
+        cents = _cents(line.amount)
+        by_reference = index.find_by_reference(line)
+        if by_reference:
+            same_amount = [p for p in by_reference if _cents(p.amount) == cents]
+            candidates = [p for p in same_amount if p.id not in claimed]
+            if len(candidates) == 1:
+                claimed.add(candidates[0].id)
+                results.append(MatchResult(line, "matched", payment_id=candidates[0].id))
+                continue
+            if candidates:
+                reason = "Reference matches several payments"
+            elif same_amount:
+                reason = "Payment already matched by another line"
+            else:
+                reason = "Reference matches a payment with a different amount"
+            results.append(MatchResult(
+                line,
+                ReconciliationStatus.AMBIGUOUS,
+                candidates=[p.id for p in (candidates or by_reference)],
+                reason=reason
+            ))
+            continue
+
+        candidates = [
+            p for p in index.find_in_window(cents, line.transaction_date - window, line.transaction_date + window)
+            if p.id not in claimed
+        ]
+        if len(candidates) > 1:
+            words = _words(line.description)
+            by_tenant = [p for p in candidates if _tenant_matches(p, words)]
+            if by_tenant:
+                candidates = by_tenant
+
+        if len(candidates) == 1:
+            claimed.add(candidates[0].id)
+            results.append(MatchResult(line, "matched", payment_id=candidates[0].id))
+        elif candidates:
+            results.append(MatchResult(
+                line,
+                ReconciliationStatus.AMBIGUOUS,
+                candidates=[p.id for p in candidates],
+                reason="Several pending payments with the same amount and date"
+            ))
+        else:
+            results.append(MatchResult(
+                line,
+                ReconciliationStatus.UNMATCHED,
+                reason="No pending payment with this amount and date"
+            ))
+    return results
+
+class ReconciliationService:
+    @staticmethod
+    async def load_pending_payments(db: AsyncSession, until: date) -> List[PendingPayment]:
+        """Pagos abiertos con vencimiento hasta ``until``, bloqueados hasta el commit."""
+        result = await db.execute(
+            select(
+                Payment.id, Payment.amount, Payment.due_date, Payment.reference_number,
+                Tenant.first_name, Tenant.last_name
+            )
+            .join(Contract, Payment.contract_id == Contract.id)
+            .outerjoin(Tenant, Contract.tenant_id == Tenant.id)
+            .where(Payment.status.in_(OPEN_STATUSES), Payment.due_date <= until)
+            .with_for_update(of=Payment)
+        )
+        return [
+            PendingPayment(
+                id=payment_id,
+                amount=amount or 0.0,
+                due_date=due_date,
+                reference_number=reference_number,
+                tenant_name=" ".join(filter(None, [first_name, last_name])) or None
+            )
+            for payment_id, amount, due_date, reference_number, first_name, last_name in result.all()
+            if due_date is not None
+        ]
+
+    @staticmethod
+    async def reconcile_statement(
+        db: AsyncSession,
+        statement_name: str,
+        content: str,
+        format: str,
+        user_id: Optional[int] = None,
+        dry_run: bool = False
+    ) -> ReconciliationReport:
+        """
+        Conciliar un extracto bancario con los pagos pendientes.
+
+        Los pagos coincidentes se marcan como pagados en una sola transacción
+        con un UPDATE por lotes; las líneas sin pago claro quedan en la cola
+        de revisión.
+        """
+        if format == "csv":
+            lines, errors = parse_csv_statement(content)
+        elif format == "ofx":
+            lines, errors = parse_ofx_statement(content)
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unsupported statement format: {format}"
+            )
+
+        # Las líneas ya importadas (mismo identificador del banco) se ignoran
+        transaction_ids = {line.bank_transaction_id for line in lines if line.bank_transaction_id}
+        seen = set()
+        if transaction_ids:
+            result = await db.execute(
+                select(ReconciliationItem.bank_transaction_id)
+                .where(ReconciliationItem.bank_transaction_id.in_(transaction_ids))
+            )
+            seen = set(result.scalars().all())
+        new_lines = [line for line in lines if line.bank_transaction_id not in seen]
+
+        window = settings.RECONCILIATION_DATE_WINDOW_DAYS
+        payments = []
+        if new_lines:
+            until = max(line.transaction_date for line in new_lines) + timedelta(days=window)
+            payments = await ReconciliationService.load_pending_payments(db, until)
+        results = match_lines(new_lines, payments, window)
+        matched = [r for r in results if r.status == "matched"]
+
+        try:
+            if matched:
+                await db.execute(update(Payment), [
+                    {
+                        "id": r.payment_id,
+                        "status": PaymentStatus.PAID,
+                        "payment_date": r.line.transaction_date,
+                        "payment_method": PaymentMethod.BANK_TRANSFER,
+                        "processed_by_id": user_id
+                    }
+                    for r in matched
+                ])
+            # Los movimientos conciliados también se guardan (ya resueltos)
+            # para reconocerlos si el extracto se vuelve a subir
+            db.add_all([
+                ReconciliationItem(
+                    statement_name=statement_name,
+                    line_number=r.line.line_number,
+                    imported_by_id=user_id,
+                    transaction_date=r.line.transaction_date,
+                    amount=r.line.amount,
+                    reference=r.line.reference,
+                    description=r.line.description,
+                    bank_transaction_id=r.line.bank_transaction_id,
+                    status=ReconciliationStatus.RESOLVED if r.status == "matched" else r.status,
+                    reason=r.reason,
+                    candidate_payment_ids=r.candidates,
+                    payment_id=r.payment_id
+                )
+                for r in results
+                if r.status != "matched" or r.line.bank_transaction_id
+            ])
+            if dry_run:
+                await db.rollback()
+            else:
+                await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+
+        if not dry_run and matched:
+            await response_cache.invalidate("payments")
+        if not dry_run:
+            for r in matched:
+                await AuditService.log_action(
+                    db=db,
+                    user_id=user_id,
+                    action="RECONCILE",
+                    resource_type="payment",
+                    resource_id=r.payment_id,
+                    new_values={
+                        "status": PaymentStatus.PAID.value,
+                        "payment_date": r.line.transaction_date.isoformat(),
+                        "statement": statement_name,
+                        "line": r.line.line_number
+                    }
+                )
+
+        return ReconciliationReport(
+            statement_name=statement_name,
+            dry_run=dry_run,
+            total_lines=len(lines),
+            matched=[
+                ReconciliationMatch(
+                    line_number=r.line.line_number,
+                    payment_id=r.payment_id,
+                    transaction_date=r.line.transaction_date,
+                    amount=r.line.amount
+                )
+                for r in matched
+            ],
+            unmatched=sum(1 for r in results if r.status == ReconciliationStatus.UNMATCHED),
+            ambiguous=sum(1 for r in results if r.status == ReconciliationStatus.AMBIGUOUS),
+            duplicates=len(lines) - len(new_lines),
+            errors=errors
+        )
+
+    @staticmethod
+    async def get_review_queue(
+        db: AsyncSession,
+        status_filter: Optional[ReconciliationStatus] = None,
+        skip: int = 0,
+        limit: int = 100
+    ) -> List[ReconciliationItem]:
+        """Líneas pendientes de revisión (sin asignar ni descartar)."""
+        statuses = [status_filter] if status_filter else [
+            ReconciliationStatus.UNMATCHED, ReconciliationStatus.AMBIGUOUS
+        ]
+        result = await db.execute(
+            select(ReconciliationItem)
+            .where(ReconciliationItem.status.in_(statuses))
+            .order_by(ReconciliationItem.transaction_date, ReconciliationItem.id)
+            .offset(skip)
+            .limit(limit)
+        )
+        return result.scalars().all()
+
+    @staticmethod
+    async def resolve_item(
+        db: AsyncSession,
+        item_id: int,
+        user_id: int,
+        payment_id: Optional[int] = None,
+        ignore: bool = False
+    ) -> ReconciliationItem:
+        """Asignar una línea de la cola a un pago (que se marca pagado) o descartarla."""
+        item = await db.get(ReconciliationItem, item_id)
+        if not item:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Reconciliation item with id {item_id} not found"
+            )
+        if item.status not in (ReconciliationStatus.UNMATCHED, ReconciliationStatus.AMBIGUOUS):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Reconciliation item has already been reviewed"
+            )
+
+        if ignore:
+            item.status = ReconciliationStatus.IGNORED
+        else:
+            if payment_id is None:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="A payment is required to resolve the item"
+                )
+            result = await db.execute(
+                select(Payment).where(Payment.id == payment_id).with_for_update()
+            )
+            payment = result.scalar_one_or_none()
+            if not payment:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Payment with id {payment_id} not found"
+                )
+            if payment.status not in OPEN_STATUSES:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Only pending or late payments can be reconciled"
+                )
+            payment.status = PaymentStatus.PAID
+            payment.payment_date = item.transaction_date
+            payment.payment_method = PaymentMethod.BANK_TRANSFER
+            payment.processed_by_id = user_id
+            item.status = ReconciliationStatus.RESOLVED
+            item.payment_id = payment_id
+
+        item.resolved_by_id = user_id
+        item.resolved_at = datetime.now(timezone.utc)
+        await db.commit()
+        await db.refresh(item)
+        if not ignore:
+            await response_cache.invalidate("payments")
+
+        if not ignore:
+            await AuditService.log_action(
+                db=db,
+                user_id=user_id,
+                action="RECONCILE",
+                resource_type="payment",
+                resource_id=payment_id,
+                new_values={
+                    "status": PaymentStatus.PAID.value,
+                    "payment_date": item.transaction_date.isoformat(),
+                    "reconciliation_item": item_id
+                }
+            )
+        return item
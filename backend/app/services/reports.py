@@ -1,34 +1,49 @@
 from datetime import date, datetime, timedelta
 from typing import List, Dict, Optional, Any
-from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
-import pandas as pd
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, and_, select
+from sqlalchemy.orm import selectinload
+from starlette.concurrency import run_in_threadpool
 from io import BytesIO
 
-from ..crud import payment as crud_payment
-from ..crud import contract as crud_contract
 from ..models.payment import Payment, PaymentStatus
 from ..models.contract import Contract
+from ..models.unit import Unit
+
+# AsyncSession no carga relaciones de forma perezosa: lo que usan los reportes se pide aquí
+_CONTRACT_DETAILS = (
+    selectinload(Contract.tenant),
+    selectinload(Contract.unit).selectinload(Unit.property),
+)
 
 class PaymentReportService:
     @staticmethod
-    def generate_account_statement(
-        db: Session,
+    def _contract_payments(
+        contract_id: int,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
+    ):
+        stmt = select(Payment).where(Payment.contract_id == contract_id)
+        if start_date:
+            stmt = stmt.where(Payment.payment_date >= start_date)
+        if end_date:
+            stmt = stmt.where(Payment.payment_date <= end_date)
+        return stmt
+
+    @staticmethod
+    async def generate_account_statement(
+        db: AsyncSession,
         contract_id: int,
         start_date: Optional[date] = None,
         end_date: Optional[date] = None
     ) -> Dict[str, Any]:
         """Generar estado de cuenta para un contrato específico"""
         # Obtener todos los pagos del período
-        payments = crud_payment.get_contract_payments(
-            db,
-            contract_id=contract_id,
-            start_date=start_date,
-            end_date=end_date
-        )
+        stmt = PaymentReportService._contract_payments(contract_id, start_date, end_date)
+        payments = (await db.execute(stmt)).scalars().all()
         
         # Obtener información del contrato
-        contract = crud_contract.get(db, id=contract_id)
+        contract = await db.get(Contract, contract_id, options=_CONTRACT_DETAILS)
         
         # Calcular totales
         total_paid = sum(p.amount for p in payments if p.status == PaymentStatus.PAID)
@@ -66,19 +81,16 @@ class PaymentReportService:
         }
 
     @staticmethod
-    def generate_payment_history(
-        db: Session,
+    async def generate_payment_history(
+        db: AsyncSession,
         contract_id: int,
         start_date: Optional[date] = None,
         end_date: Optional[date] = None
     ) -> List[Dict[str, Any]]:
         """Generar historial detallado de pagos"""
-        payments = crud_payment.get_contract_payments(
-            db,
-            contract_id=contract_id,
-            start_date=start_date,
-            end_date=end_date
-        )
+        stmt = PaymentReportService._contract_payments(contract_id, start_date, end_date)
+        stmt = stmt.options(selectinload(Payment.processed_by))
+        payments = (await db.execute(stmt)).scalars().all()
         
         return [{
             "payment_id": p.id,
@@ -93,17 +105,21 @@ class PaymentReportService:
         } for p in payments]
 
     @staticmethod
-    def generate_late_payments_report(
-        db: Session,
+    async def generate_late_payments_report(
+        db: AsyncSession,
         property_id: Optional[int] = None
     ) -> List[Dict[str, Any]]:
         """Generar reporte de pagos atrasados"""
-        query = db.query(Payment).filter(Payment.status == PaymentStatus.LATE)
+        stmt = (
+            select(Payment)
+            .where(Payment.status == PaymentStatus.LATE)
+            .options(selectinload(Payment.contract).options(*_CONTRACT_DETAILS))
+        )
         
         if property_id:
-            query = query.join(Contract).filter(Contract.property_id == property_id)
+            stmt = stmt.join(Contract).join(Unit).where(Unit.property_id == property_id)
         
-        late_payments = query.all()
+        late_payments = (await db.execute(stmt)).scalars().all()
         
         return [{
             "payment_id": p.id,
@@ -118,33 +134,47 @@ class PaymentReportService:
         } for p in late_payments]
 
     @staticmethod
-    def generate_payment_analytics(
-        db: Session,
+    async def generate_payment_analytics(
+        db: AsyncSession,
         property_id: Optional[int] = None,
         start_date: Optional[date] = None,
         end_date: Optional[date] = None
     ) -> Dict[str, Any]:
         """Generar análisis de pagos y tendencias"""
-        query = db.query(Payment)
+        stmt = select(
+            Payment.payment_date,
+            Payment.amount,
+            Payment.status,
+            Payment.late_fee,
+            Payment.concept
+        )
         
         if property_id:
-            query = query.join(Contract).filter(Contract.property_id == property_id)
+            stmt = stmt.join(Contract).join(Unit).where(Unit.property_id == property_id)
         
         if start_date:
-            query = query.filter(Payment.payment_date >= start_date)
+            stmt = stmt.where(Payment.payment_date >= start_date)
         if end_date:
-            query = query.filter(Payment.payment_date <= end_date)
-        
-        payments = query.all()
+            stmt = stmt.where(Payment.payment_date <= end_date)
         
-        # Convertir a DataFrame para análisis
-        df = pd.DataFrame([{
+        rows = [{
             "payment_date": p.payment_date,
             "amount": p.amount,
             "status": p.status.value,
             "late_fee": p.late_fee,
             "concept": p.concept.value
-        } for p in payments])
+        } for p in (await db.execute(stmt)).all()]
+        
+        # El análisis con pandas es CPU puro: se hace en un hilo para no bloquear el event loop
+        return await run_in_threadpool(PaymentReportService._payment_analytics, rows)
+
+    @staticmethod
+    def _payment_analytics(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+        # pandas se importa al primer uso para no cargarlo al arrancar los workers
+        import pandas as pd
+
+        # Convertir a DataFrame para análisis
+        df = pd.DataFrame(rows)
         
         if df.empty:
             return {
@@ -183,7 +213,7 @@ class PaymentReportService:
         late_fee_avg = late_payments["late_fee"].mean() if not late_payments.empty else 0
         
         return {
-            "total_payments": len(payments),
+            "total_payments": len(rows),
             "payment_trends": monthly_trends,
             "status_distribution": status_dist,
             "concept_distribution": concept_dist,
@@ -194,12 +224,17 @@ class PaymentReportService:
         }
 
     @staticmethod
-    def export_to_excel(
-        db: Session,
+    async def export_to_excel(
         data: List[Dict[str, Any]],
         sheet_name: str = "Payments Report"
     ) -> BytesIO:
         """Exportar datos a Excel"""
+        return await run_in_threadpool(PaymentReportService._build_excel, data, sheet_name)
+
+    @staticmethod
+    def _build_excel(data: List[Dict[str, Any]], sheet_name: str) -> BytesIO:
+        import pandas as pd
+
         df = pd.DataFrame(data)
         output = BytesIO()
         
@@ -1,50 +1,129 @@
+import asyncio
+import zlib
 from datetime import date, datetime, timedelta
-from typing import List
-from sqlalchemy.orm import Session
-from fastapi import BackgroundTasks
-from app.models import Loan, LoanPayment, PaymentStatus, LoanStatus
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+from sqlalchemy import func, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models import Loan, LoanPayment, PaymentStatus, LoanStatus, ScheduledJobRun
 from app.services.late_fee_service import LateFeeService
 from app.services.notification_service import NotificationService
 from app.services.loan_report_service import LoanReportService
+from app.services.audit_retention import AuditRetentionService
+from app.services.expense_service import expense_service
+from app.services.file_storage import FileStorageService
+from app.services.previews import PreviewService
 from app.core.config import settings
+from app.core.database import SessionLocal, engine
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Una tarea programada recibe su propia sesión
+Job = Callable[[AsyncSession], Awaitable[Any]]
+
+_scheduler_task: Optional[asyncio.Task] = None
+
 class SchedulerService:
     @staticmethod
-    async def schedule_daily_tasks(
-        db: Session,
-        background_tasks: BackgroundTasks,
-        system_user_id: int
-    ):
-        """Programar tareas diarias"""
+    async def run_job(name: str, job: Job, period: str) -> bool:
+        """
+        Ejecutar una tarea con su propia sesión. Un bloqueo consultivo de
+        Postgres evita que varios workers la ejecuten a la vez; bajo ese
+        bloqueo se comprueba y registra el último periodo completado, para
+        que un worker que llega después no la repita. Un fallo se registra
+        sin afectar a las demás tareas y no marca el periodo como hecho.
+        """
+        lock_key = zlib.crc32(f"scheduler:{name}".encode())
         try:
-            # Actualizar multas por pagos tardíos
-            updated_count = await LateFeeService.update_late_payments(db, system_user_id)
-            logger.info(f"Actualizadas {updated_count} multas por pagos tardíos")
+            async with engine.connect() as lock_conn:
+                acquired = (await lock_conn.execute(
+                    text("SELECT pg_try_advisory_lock(:key)"), {"key": lock_key}
+                )).scalar()
+                if not acquired:
+                    logger.info(f"Tarea {name} en curso en otro worker, se omite")
+                    return False
+                try:
+                    last_period = (await lock_conn.execute(
+                        select(ScheduledJobRun.period).where(ScheduledJobRun.name == name)
+                    )).scalar()
+                    if last_period == period:
+                        logger.info(f"Tarea {name} ya ejecutada para {period}, se omite")
+                        return False
+
+                    async with SessionLocal() as db:
+                        result = await job(db)
+
+                    stmt = pg_insert(ScheduledJobRun).values(name=name, period=period)
+                    await lock_conn.execute(stmt.on_conflict_do_update(
+                        index_elements=[ScheduledJobRun.name],
+                        set_={"period": stmt.excluded.period, "updated_at": func.now()}
+                    ))
+                    await lock_conn.commit()
+                    logger.info(f"Tarea {name} completada para {period}: {result}")
+                    return True
+                finally:
+                    await lock_conn.execute(
+                        text("SELECT pg_advisory_unlock(:key)"), {"key": lock_key}
+                    )
+        except Exception:
+            logger.exception(f"Error en la tarea programada {name}")
+            return False
 
-            # Enviar recordatorios de pagos próximos (7 días antes)
-            await SchedulerService.send_upcoming_payment_reminders(db)
+    @staticmethod
+    def daily_jobs() -> List[Tuple[str, Job]]:
+        return [
+            # Multas por pagos tardíos
+            ("late_fees", lambda db: LateFeeService.update_late_payments(db, settings.SCHEDULER_USER_ID)),
+            # Recordatorios de pagos próximos (7 días antes) y de los que vencen hoy
+            ("upcoming_payment_reminders", SchedulerService.send_upcoming_payment_reminders),
+            ("due_payment_reminders", SchedulerService.send_due_payment_reminders),
+            # Alertas de pagos vencidos
+            ("overdue_payment_alerts", SchedulerService.send_overdue_payment_alerts),
+            # Instancias vencidas de gastos recurrentes (idempotente)
+            ("recurring_expenses", expense_service.generate_recurring_expenses),
+            # Archivos subidos que ya no usa ningún adjunto ni documento
+            ("purge_unreferenced_files", FileStorageService.purge_unreferenced),
+            # Archivos colocados por subidas cuya transacción se deshizo
+            ("purge_orphaned_blobs", FileStorageService.purge_orphaned_blobs),
+            # Miniaturas pendientes (subidas con el pool caído o anteriores)
+            ("missing_previews", PreviewService.generate_missing),
+        ]
 
-            # Enviar recordatorios de pagos que vencen hoy
-            await SchedulerService.send_due_payment_reminders(db)
+    @staticmethod
+    async def run_daily_tasks(day: Optional[date] = None) -> None:
+        """Ejecutar las tareas diarias del día indicado (hoy), cada una por separado"""
+        period = (day or date.today()).isoformat()
+        for name, job in SchedulerService.daily_jobs():
+            await SchedulerService.run_job(name, job, period)
 
-            # Enviar alertas de pagos vencidos
-            await SchedulerService.send_overdue_payment_alerts(db)
+    @staticmethod
+    def next_run(now: datetime) -> datetime:
+        """Próxima ejecución diaria a SCHEDULER_DAILY_HOUR"""
+        run_at = now.replace(hour=settings.SCHEDULER_DAILY_HOUR, minute=0, second=0, microsecond=0)
+        if run_at <= now:
+            run_at += timedelta(days=1)
+        return run_at
 
-        except Exception as e:
-            logger.error(f"Error en tareas programadas: {str(e)}")
-            raise
+    @staticmethod
+    async def run_forever() -> None:
+        while True:
+            now = datetime.now()
+            run_at = SchedulerService.next_run(now)
+            await asyncio.sleep((run_at - now).total_seconds())
+            await SchedulerService.run_daily_tasks(run_at.date())
+            # Las mensuales, el primer día de cada mes tras las diarias
+            if run_at.day == 1:
+                await SchedulerService.run_monthly_tasks(run_at.date())
 
     @staticmethod
-    async def send_upcoming_payment_reminders(db: Session):
+    async def send_upcoming_payment_reminders(db: AsyncSession):
         """Enviar recordatorios de pagos próximos"""
         upcoming_date = date.today() + timedelta(days=7)
-        payments = await db.query(LoanPayment).filter(
+        payments = (await db.execute(select(LoanPayment).where(
             LoanPayment.status == PaymentStatus.PENDING,
             LoanPayment.due_date == upcoming_date
-        ).all()
+        ))).scalars().all()
 
         for payment in payments:
             try:
@@ -58,13 +137,13 @@ class SchedulerService:
                 logger.error(f"Error enviando recordatorio de pago próximo {payment.id}: {str(e)}")
 
     @staticmethod
-    async def send_due_payment_reminders(db: Session):
+    async def send_due_payment_reminders(db: AsyncSession):
         """Enviar recordatorios de pagos que vencen hoy"""
         today = date.today()
-        payments = await db.query(LoanPayment).filter(
+        payments = (await db.execute(select(LoanPayment).where(
             LoanPayment.status == PaymentStatus.PENDING,
             LoanPayment.due_date == today
-        ).all()
+        ))).scalars().all()
 
         for payment in payments:
             try:
@@ -78,13 +157,13 @@ class SchedulerService:
                 logger.error(f"Error enviando recordatorio de pago que vence hoy {payment.id}: {str(e)}")
 
     @staticmethod
-    async def send_overdue_payment_alerts(db: Session):
+    async def send_overdue_payment_alerts(db: AsyncSession):
         """Enviar alertas de pagos vencidos"""
         today = date.today()
-        payments = await db.query(LoanPayment).filter(
+        payments = (await db.execute(select(LoanPayment).where(
             LoanPayment.status == PaymentStatus.LATE,
             LoanPayment.due_date < today
-        ).all()
+        ))).scalars().all()
 
         for payment in payments:
             try:
@@ -100,42 +179,30 @@ class SchedulerService:
                 logger.error(f"Error enviando alerta de pago vencido {payment.id}: {str(e)}")
 
     @staticmethod
-    async def schedule_monthly_tasks(db: Session):
-        """Programar tareas mensuales"""
-        try:
-            # Generar reportes mensuales
-            today = date.today()
-            report = await LoanReportService.generate_monthly_report(
-                db,
-                month=today.month,
-                year=today.year
-            )
-            logger.info(f"Reporte mensual generado para {today.month}/{today.year}")
-
-            # Actualizar estados de préstamos
-            await SchedulerService.update_loan_statuses(db)
-
-            # Generar métricas de rendimiento para todos los préstamos activos
-            loans = await db.query(Loan).filter(
-                Loan.status.in_([LoanStatus.ACTIVE, LoanStatus.DEFAULT])
-            ).all()
-            
-            for loan in loans:
-                try:
-                    metrics = await LoanReportService.generate_loan_performance_metrics(db, loan.id)
-                    logger.info(f"Métricas generadas para préstamo {loan.id}")
-                except Exception as e:
-                    logger.error(f"Error generando métricas para préstamo {loan.id}: {str(e)}")
+    def monthly_jobs() -> List[Tuple[str, Job]]:
+        return [
+            # Reporte mensual de préstamos
+            ("monthly_loan_report", LoanReportService.generate_monthly_report),
+            # Estados de préstamos (vencidos y pagados)
+            ("loan_statuses", SchedulerService.update_loan_statuses),
+            # Particiones del log de auditoría: crear las próximas y archivar las caducadas
+            ("audit_retention", AuditRetentionService.run),
+            # Métricas de rendimiento de los préstamos activos y en mora, en lote
+            ("loan_metrics", LoanReportService.compute_loan_metrics),
+        ]
 
-        except Exception as e:
-            logger.error(f"Error en tareas mensuales: {str(e)}")
-            raise
+    @staticmethod
+    async def run_monthly_tasks(month: Optional[date] = None) -> None:
+        """Ejecutar las tareas mensuales del mes indicado (el actual), cada una por separado"""
+        period = (month or date.today()).strftime("%Y-%m")
+        for name, job in SchedulerService.monthly_jobs():
+            await SchedulerService.run_job(name, job, period)
 
     @staticmethod
-    async def update_loan_statuses(db: Session):
+    async def update_loan_statuses(db: AsyncSession):
         """Actualizar estados de préstamos"""
         today = date.today()
-        loans = await db.query(Loan).all()
+        loans = (await db.execute(select(Loan))).scalars().all()
 
         for loan in loans:
             try:
@@ -153,3 +220,19 @@ class SchedulerService:
                 logger.error(f"Error actualizando estado del préstamo {loan.id}: {str(e)}")
 
         await db.commit()
+
+def start_scheduler() -> None:
+    """Arrancar las tareas programadas en segundo plano (startup de la app)"""
+    global _scheduler_task
+    if settings.SCHEDULER_ENABLED and _scheduler_task is None:
+        _scheduler_task = asyncio.create_task(SchedulerService.run_forever())
+
+async def stop_scheduler() -> None:
+    global _scheduler_task
+    if _scheduler_task is not None:
+        _scheduler_task.cancel()
+        try:
+            await _scheduler_task
+        except asyncio.CancelledError:
+            pass
+        _scheduler_task = None
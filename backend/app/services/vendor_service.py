@@ -1,18 +1,24 @@
 from typing import List, Optional
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException
 
-from app.crud import vendor as crud_vendor
-from app.crud import expense as crud_expense
+from app.crud.vendor import vendor as crud_vendor
+from app.crud.expense import expense as crud_expense
 from app.models.user import User
 from app.schemas import vendor as schemas
 from app.core.vendor_validation import vendor_validator
 from app.services.notification_service import notification_service
+from app.core.response_cache import response_cache
 
 class VendorService:
+    @staticmethod
+    async def invalidate_cache(vendor_id: int):
+        """Drop cached responses built from this vendor."""
+        await response_cache.invalidate("vendors", f"vendor:{vendor_id}")
+
     @staticmethod
     async def create_vendor(
-        db: Session,
+        db: AsyncSession,
         vendor_in: schemas.VendorCreate,
         current_user: User
     ) -> schemas.Vendor:
@@ -21,7 +27,8 @@ class VendorService:
         vendor_validator.validate_create(db, vendor_in, current_user)
         
         # Create vendor
-        vendor = crud_vendor.create(db=db, obj_in=vendor_in)
+        vendor = await crud_vendor.create(db=db, obj_in=vendor_in)
+        await VendorService.invalidate_cache(vendor.id)
         
         # Send notifications
         await notification_service.notify_vendor_created(db, vendor, current_user)
@@ -30,7 +37,7 @@ class VendorService:
 
     @staticmethod
     async def update_vendor(
-        db: Session,
+        db: AsyncSession,
         vendor_id: int,
         vendor_in: schemas.VendorUpdate,
         current_user: User
@@ -40,16 +47,17 @@ class VendorService:
         vendor_validator.validate_update(db, vendor_id, vendor_in, current_user)
         
         # Get existing vendor
-        vendor = crud_vendor.get(db=db, id=vendor_id)
+        vendor = await crud_vendor.get(db=db, id=vendor_id)
         if not vendor:
             raise HTTPException(status_code=404, detail="Vendor not found")
         
         # Update vendor
-        updated_vendor = crud_vendor.update(
+        updated_vendor = await crud_vendor.update(
             db=db,
             db_obj=vendor,
             obj_in=vendor_in
         )
+        await VendorService.invalidate_cache(vendor_id)
         
         # Send notifications
         await notification_service.notify_vendor_updated(db, updated_vendor, current_user)
@@ -58,9 +66,9 @@ class VendorService:
 
     @staticmethod
     async def rate_vendor(
-        db: Session,
+        db: AsyncSession,
         vendor_id: int,
-        rating_in: schemas.VendorRating,
+        rating_in: schemas.VendorRatingCreate,
         current_user: User
     ) -> schemas.Vendor:
         """Rate a vendor with notifications."""
@@ -68,11 +76,16 @@ class VendorService:
         vendor_validator.validate_rating_update(db, vendor_id, rating_in.rating, current_user)
         
         # Update vendor rating
-        vendor = crud_vendor.update_rating(
+        vendor = await crud_vendor.update_rating(
             db=db,
             vendor_id=vendor_id,
-            rating=rating_in.rating
+            rating=rating_in.rating,
+            rated_by=current_user.id,
+            comment=rating_in.comment
         )
+        if not vendor:
+            raise HTTPException(status_code=404, detail="Vendor not found")
+        await VendorService.invalidate_cache(vendor_id)
         
         # Send notifications
         await notification_service.notify_vendor_rated(db, vendor, rating_in.rating, current_user)
@@ -80,21 +93,21 @@ class VendorService:
         return vendor
 
     @staticmethod
-    def get_vendor_with_stats(
-        db: Session,
+    async def get_vendor_with_stats(
+        db: AsyncSession,
         vendor_id: int
     ) -> schemas.VendorWithStats:
         """Get vendor details with statistics."""
-        return crud_vendor.get_with_stats(db=db, vendor_id=vendor_id)
+        return await crud_vendor.get_with_stats(db=db, vendor_id=vendor_id)
 
     @staticmethod
-    def get_top_vendors(
-        db: Session,
+    async def get_top_vendors(
+        db: AsyncSession,
         skip: int = 0,
         limit: int = 10
     ) -> List[schemas.VendorWithStats]:
-        """Get list of top vendors by rating."""
-        return crud_vendor.get_multi_with_stats(
+        """Get list of top vendors by rating, read from the denormalised columns."""
+        return await crud_vendor.get_multi_with_stats(
             db=db,
             skip=skip,
             limit=limit,
@@ -102,29 +115,29 @@ class VendorService:
         )
 
     @staticmethod
-    def search_vendors(
-        db: Session,
+    async def search_vendors(
+        db: AsyncSession,
         query: str,
         skip: int = 0,
         limit: int = 10
     ) -> List[schemas.Vendor]:
         """Search vendors by name or description."""
-        return crud_vendor.search(
+        return await crud_vendor.get_multi(
             db=db,
-            query=query,
+            search=query,
             skip=skip,
             limit=limit
         )
 
     @staticmethod
-    def get_vendor_expenses(
-        db: Session,
+    async def get_vendor_expenses(
+        db: AsyncSession,
         vendor_id: int,
         skip: int = 0,
         limit: int = 100
     ) -> List[schemas.Expense]:
         """Get list of expenses for a vendor."""
-        return crud_expense.get_by_vendor_id(
+        return await crud_expense.get_by_vendor_id(
             db=db,
             vendor_id=vendor_id,
             skip=skip,
@@ -0,0 +1,91 @@
+"""
+Import-time profile and cold-start measurement of app.main.
+
+Each measurement runs in a fresh interpreter, so nothing is cached in
+sys.modules. The profile uses ``python -X importtime`` and lists the slowest
+imports by cumulative time.
+
+Usage (from backend/):
+    python -m tests.benchmarks.import_time [--module app.main] [--top 25]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from dataclasses import dataclass
+from typing import List, Set
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+COLD_START_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+print(json.dumps({{
+    "seconds": seconds,
+    "modules": sorted({{name.split(".")[0] for name in sys.modules}})
+}}))
+"""
+
+@dataclass
+class ColdStart:
+    seconds: float
+    modules: Set[str]
+
+@dataclass
+class ImportTiming:
+    module: str
+    self_us: int
+    cumulative_us: int
+
+def _run(args: List[str]) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *args],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+
+def measure_cold_start(module: str = "app.main", repeats: int = 3) -> ColdStart:
+    """
+    Time ``import module`` in fresh interpreters; the fastest run is kept to
+    filter out noise. Also returns the top-level packages it loaded.
+    """
+    best = None
+    for _ in range(repeats):
+        output = _run(["-c", COLD_START_SCRIPT.format(module=module)]).stdout
+        data = json.loads(output.strip().splitlines()[-1])
+        if best is None or data["seconds"] < best.seconds:
+            best = ColdStart(seconds=data["seconds"], modules=set(data["modules"]))
+    return best
+
+def profile_imports(module: str = "app.main") -> List[ImportTiming]:
+    """
+    Per-module import times reported by ``-X importtime``, slowest first.
+    """
+    stderr = _run(["-X", "importtime", "-c", f"import {module}"]).stderr
+    timings = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        timings.append(ImportTiming(name.strip(), int(self_us), int(cumulative_us)))
+    return sorted(timings, key=lambda timing: timing.cumulative_us, reverse=True)
+
+def main(module: str, top: int):
+    cold_start = measure_cold_start(module)
+    print(f"import {module}: {cold_start.seconds:.3f}s, {len(cold_start.modules)} top-level packages\n")
+    print(f"{'cumulative':>12} {'self':>10}  module")
+    for timing in profile_imports(module)[:top]:
+        print(f"{timing.cumulative_us / 1000:10.1f}ms {timing.self_us / 1000:8.1f}ms  {timing.module}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--top", type=int, default=25)
+    args = parser.parse_args()
+    main(args.module, args.top)
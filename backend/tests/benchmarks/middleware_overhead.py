@@ -0,0 +1,106 @@
+"""
+Per-request overhead of the HTTP middleware stack.
+
+Drives a small FastAPI app directly through the ASGI interface (no server,
+no sockets) and reports the mean time per request for:
+
+* the bare app,
+* the pure ASGI stack (PrometheusMiddleware, LoggingMiddleware, ErrorHandlingMiddleware),
+* the same number of pass-through BaseHTTPMiddleware layers, for comparison.
+
+Usage (from backend/):
+    python -m tests.benchmarks.middleware_overhead [--requests 20000]
+"""
+
+import argparse
+import asyncio
+import time
+
+from fastapi import FastAPI
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.core.middleware import ErrorHandlingMiddleware, LoggingMiddleware
+from app.core.monitoring import PrometheusMiddleware
+
+ASGI_STACK = (PrometheusMiddleware, LoggingMiddleware, ErrorHandlingMiddleware)
+
+class PassThroughMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        return await call_next(request)
+
+def build_app(*middleware) -> FastAPI:
+    app = FastAPI()
+    for middleware_class in middleware:
+        app.add_middleware(middleware_class)
+
+    @app.get("/properties/{property_id}")
+    async def get_property(property_id: int):
+        return {"id": property_id}
+
+    return app
+
+async def run(app, requests: int) -> float:
+    disconnected = asyncio.Event()
+
+    def receiver():
+        # Like a real server: the body once, then block until the client goes away
+        sent = False
+
+        async def receive():
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+        return receive
+
+    async def send(message):
+        pass
+
+    def scope(i: int):
+        path = f"/properties/{i}"
+        return {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "root_path": "",
+            "query_string": b"",
+            "headers": [],
+            "client": ("bench", 1),
+            "server": ("bench", 80),
+        }
+
+    # Warm up routing and the middleware stack
+    for i in range(min(requests, 500)):
+        await app(scope(i), receiver(), send)
+
+    start = time.perf_counter()
+    for i in range(requests):
+        await app(scope(i), receiver(), send)
+    return (time.perf_counter() - start) / requests
+
+async def main(requests: int):
+    results = {
+        "bare app": await run(build_app(), requests),
+        "pure ASGI stack": await run(build_app(*ASGI_STACK), requests),
+        "BaseHTTPMiddleware x3": await run(
+            build_app(*[PassThroughMiddleware] * len(ASGI_STACK)), requests
+        ),
+    }
+    baseline = results["bare app"]
+    for name, seconds in results.items():
+        print(
+            f"{name:<24} {seconds * 1e6:8.1f} us/request "
+            f"(+{(seconds - baseline) * 1e6:.1f} us)"
+        )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests))
@@ -0,0 +1,290 @@
+"""
+Benchmarks for the hot endpoints and services.
+
+Every case runs repeatedly against a portfolio generated with
+``tests.benchmarks.portfolio`` and reports p50/p95/p99 latency and the
+number of SQL queries per call. Results are written as JSON so that runs
+can be compared between commits. ``test_suite`` runs them under pytest
+with ``-m benchmark``; they are deselected by default.
+
+Usage (from backend/):
+    python -m tests.benchmarks.suite run [--iterations 50] [--only reports] [--output FILE]
+    python -m tests.benchmarks.suite compare OLD.json NEW.json
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from tests.benchmarks.portfolio import BENCHMARK_USER_ID, CITIES, Portfolio, load_portfolio
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(BENCHMARKS_DIR, "results")
+SERVER_TIMING_QUERIES = re.compile(r'desc="(\d+) queries"')
+# Slower by more than this fraction is flagged by ``compare``
+REGRESSION_THRESHOLD = 0.10
+
+@dataclass
+class BenchmarkContext:
+    portfolio: Portfolio
+    db: Any
+    client: Any
+    random: random.Random
+    tmpdir: str
+
+@dataclass
+class BenchmarkCase:
+    name: str
+    run: Callable[[BenchmarkContext], Awaitable[Optional[int]]]
+    # Cases that write roll back after every call so each one sees the same data
+    mutates: bool = False
+
+CASES: List[BenchmarkCase] = []
+
+def case(name: str, mutates: bool = False):
+    def decorator(func):
+        CASES.append(BenchmarkCase(name, func, mutates))
+        return func
+    return decorator
+
+async def _get(ctx: BenchmarkContext, path: str) -> int:
+    response = await ctx.client.get(path)
+    response.raise_for_status()
+    # Requests run under their own collector; the middleware reports the count
+    match = SERVER_TIMING_QUERIES.search(response.headers.get("server-timing", ""))
+    return int(match.group(1)) if match else 0
+
+# Endpoints
+
+@case("http.properties.list")
+async def http_properties_list(ctx: BenchmarkContext):
+    from app.core.config import settings
+
+    return await _get(ctx, f"{settings.API_V1_STR}/properties/?skip=0&limit=50")
+
+@case("http.properties.detail")
+async def http_properties_detail(ctx: BenchmarkContext):
+    from app.core.config import settings
+
+    property_id = ctx.random.choice(ctx.portfolio.property_ids)
+    return await _get(ctx, f"{settings.API_V1_STR}/properties/{property_id}")
+
+@case("http.tenants.list")
+async def http_tenants_list(ctx: BenchmarkContext):
+    from app.core.config import settings
+
+    return await _get(ctx, f"{settings.API_V1_STR}/tenants/?skip=0&limit=50")
+
+# Services
+
+@case("service.properties.list")
+async def service_properties_list(ctx: BenchmarkContext):
+    from app.services.property_service import PropertyService
+
+    await PropertyService(ctx.db).get_properties(user_id=BENCHMARK_USER_ID, limit=100)
+
+@case("service.properties.search")
+async def service_properties_search(ctx: BenchmarkContext):
+    from app.services.property_service import PropertyService
+
+    await PropertyService(ctx.db).search_properties(ctx.random.choice(CITIES)[:4], limit=100)
+
+@case("service.reports.late_payments")
+async def service_late_payments_report(ctx: BenchmarkContext):
+    from app.services.reports import PaymentReportService
+
+    await PaymentReportService.generate_late_payments_report(ctx.db)
+
+@case("service.reports.payment_history")
+async def service_payment_history(ctx: BenchmarkContext):
+    from app.services.reports import PaymentReportService
+
+    contract_id = ctx.random.choice(ctx.portfolio.contract_ids)
+    await PaymentReportService.generate_payment_history(ctx.db, contract_id)
+
+@case("service.reports.payment_analytics")
+async def service_payment_analytics(ctx: BenchmarkContext):
+    from app.services.reports import PaymentReportService
+
+    await PaymentReportService.generate_payment_analytics(ctx.db)
+
+@case("service.late_fees.update", mutates=True)
+async def service_late_fee_run(ctx: BenchmarkContext):
+    from app.services.late_fee_service import LateFeeService
+
+    await LateFeeService.update_late_payments(ctx.db, ctx.portfolio.user_ids[0])
+
+@case("service.receipts.pdf")
+async def service_receipt_pdf(ctx: BenchmarkContext):
+    from app.models.payment import Payment
+    from app.services.receipts import ReceiptService
+
+    payment = await ctx.db.get(Payment, ctx.random.choice(ctx.portfolio.payment_ids))
+    await ReceiptService.generate_receipt_pdf(
+        ctx.db,
+        payment,
+        output_path=os.path.join(ctx.tmpdir, "receipt.pdf")
+    )
+
+# Measurement
+
+def percentile(values: List[float], pct: float) -> float:
+    """
+    Nearest-rank percentile.
+    """
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+async def _reset(ctx: BenchmarkContext):
+    await ctx.db.rollback()
+
+async def measure(case: BenchmarkCase, ctx: BenchmarkContext, iterations: int, warmup: int) -> Dict[str, Any]:
+    from app.core.sql_instrumentation import MODE_SAMPLE, track_queries
+
+    latencies: List[float] = []
+    queries: List[int] = []
+    try:
+        for _ in range(warmup):
+            await case.run(ctx)
+            if case.mutates:
+                await _reset(ctx)
+
+        for _ in range(iterations):
+            with track_queries(mode=MODE_SAMPLE) as stats:
+                start = time.perf_counter()
+                reported = await case.run(ctx)
+                latencies.append(time.perf_counter() - start)
+            queries.append(reported if reported is not None else stats.count)
+            if case.mutates:
+                await _reset(ctx)
+    except Exception as e:
+        await _reset(ctx)
+        return {"error": f"{type(e).__name__}: {e}"}
+
+    return {
+        "iterations": iterations,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "mean_ms": sum(latencies) / len(latencies) * 1000,
+        "queries_mean": sum(queries) / len(queries),
+        "queries_max": max(queries),
+    }
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BENCHMARKS_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+async def run_suite(iterations: int, warmup: int, only: Optional[str], seed: int) -> Dict[str, Any]:
+    from httpx import AsyncClient
+    from app.core.database import SessionLocal, engine
+    from app.core.security import get_current_user
+    from app.core.sql_instrumentation import install_sql_instrumentation
+    from app.core.test_auth import create_test_token, get_test_user
+    from app.main import app
+
+    install_sql_instrumentation(engine)
+    app.dependency_overrides[get_current_user] = get_test_user
+
+    cases = [c for c in CASES if only is None or only in c.name]
+    results: Dict[str, Any] = {}
+    try:
+        async with SessionLocal() as db, AsyncClient(
+            app=app,
+            base_url="http://benchmark",
+            headers={"Authorization": f"Bearer {create_test_token()}"}
+        ) as client:
+            portfolio = await load_portfolio(db)
+            if not portfolio.property_ids:
+                raise SystemExit("The database is empty; run `python -m tests.benchmarks.portfolio` first")
+
+            with tempfile.TemporaryDirectory() as tmpdir:
+                ctx = BenchmarkContext(portfolio, db, client, random.Random(seed), tmpdir)
+                for benchmark in cases:
+                    results[benchmark.name] = await measure(benchmark, ctx, iterations, warmup)
+                    print(_format_result(benchmark.name, results[benchmark.name]))
+    finally:
+        app.dependency_overrides.clear()
+
+    return {
+        "commit": _git_commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "portfolio": portfolio.counts,
+        "results": results,
+    }
+
+def _format_result(name: str, result: Dict[str, Any]) -> str:
+    if "error" in result:
+        return f"{name:<36} ERROR {result['error']}"
+    return (
+        f"{name:<36} p50 {result['p50_ms']:8.2f}ms  p95 {result['p95_ms']:8.2f}ms  "
+        f"p99 {result['p99_ms']:8.2f}ms  queries {result['queries_mean']:6.1f}"
+    )
+
+def compare(old: Dict[str, Any], new: Dict[str, Any]) -> bool:
+    """
+    Print the change of every case present in both runs. Returns False on regressions.
+    """
+    print(f"{old.get('commit')} -> {new.get('commit')}")
+    ok = True
+    for name, after in new["results"].items():
+        before = old["results"].get(name)
+        if before is None or "error" in before or "error" in after:
+            continue
+        change = (after["p95_ms"] - before["p95_ms"]) / before["p95_ms"] if before["p95_ms"] else 0.0
+        regressed = change > REGRESSION_THRESHOLD or after["queries_mean"] > before["queries_mean"]
+        ok = ok and not regressed
+        print(
+            f"{'!' if regressed else ' '} {name:<36} p95 {before['p95_ms']:8.2f} -> {after['p95_ms']:8.2f}ms "
+            f"({change:+.0%})  queries {before['queries_mean']:.1f} -> {after['queries_mean']:.1f}"
+        )
+    return ok
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run")
+    run_parser.add_argument("--iterations", type=int, default=50)
+    run_parser.add_argument("--warmup", type=int, default=3)
+    run_parser.add_argument("--only", help="Run only the cases whose name contains this text")
+    run_parser.add_argument("--seed", type=int, default=42)
+    run_parser.add_argument("--output", help="Defaults to tests/benchmarks/results/<commit>.json")
+
+    compare_parser = commands.add_parser("compare")
+    compare_parser.add_argument("old")
+    compare_parser.add_argument("new")
+
+    args = parser.parse_args()
+    if args.command == "compare":
+        with open(args.old) as old, open(args.new) as new:
+            sys.exit(0 if compare(json.load(old), json.load(new)) else 1)
+
+    report = asyncio.run(run_suite(args.iterations, args.warmup, args.only, args.seed))
+    output = args.output or os.path.join(RESULTS_DIR, f"{report['commit'] or 'local'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+import json
+
+import pytest
+
+from tests.benchmarks.suite import compare, run_suite
+
+pytestmark = pytest.mark.benchmark
+
+@pytest.fixture(scope="module")
+async def report():
+    try:
+        return await run_suite(iterations=5, warmup=1, only=None, seed=42)
+    except SystemExit as e:
+        pytest.skip(str(e))
+
+async def test_every_case_runs(report):
+    """Test that every benchmark case completes against the generated portfolio."""
+    errors = {name: result["error"] for name, result in report["results"].items() if "error" in result}
+    assert errors == {}
+
+async def test_report_is_comparable(report, tmp_path):
+    """Test that a report round-trips through JSON and compares cleanly with itself."""
+    path = tmp_path / "run.json"
+    path.write_text(json.dumps(report))
+    saved = json.loads(path.read_text())
+
+    assert compare(saved, saved)
@@ -14,6 +14,7 @@ from selenium.webdriver.chrome.options import Options
 
 from app.core.settings import Settings
 from app.core.database import get_db
+from app.core.sql_instrumentation import install_sql_instrumentation
 from app.main import app
 from app.models.base import Base
 from app.core.test_auth import create_test_token, get_test_user
@@ -41,6 +42,7 @@ async def db_engine():
         poolclass=NullPool,
         echo=settings.debug
     )
+    install_sql_instrumentation(engine)
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
         await conn.run_sync(Base.metadata.create_all)
@@ -0,0 +1,82 @@
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.dialects import postgresql
+
+from app.models.expense import Expense, ExpenseStatus
+from app.services.aggregation_service import (
+    FACTS,
+    AggregationService,
+    build_aggregation_query,
+    grouping_mask,
+    parse_grouping_sets,
+    split_grouping_sets
+)
+
+def row(**values):
+    return SimpleNamespace(_mapping=values)
+
+@pytest.mark.unit
+def test_parse_grouping_sets():
+    """Test grouping parsing, deduplication and unknown dimensions."""
+    fact = FACTS["expenses"]
+    assert parse_grouping_sets(fact, ["", "property", "property, month", "total", "property"]) == [
+        (), ("property",), ("property", "month")
+    ]
+    # El mismo conjunto en otro orden se descarta; se conserva el orden pedido
+    assert parse_grouping_sets(fact, ["month,property", "property,month"]) == [("month", "property")]
+    with pytest.raises(HTTPException) as exc:
+        parse_grouping_sets(fact, ["property,colour"])
+    assert exc.value.status_code == 400
+
+@pytest.mark.unit
+def test_single_grouping_sets_query():
+    """Test that all groupings are computed by one GROUPING SETS query."""
+    fact = FACTS["expenses"]
+    grouping_sets = parse_grouping_sets(fact, ["", "vendor", "property,quarter"])
+    stmt, dimensions = build_aggregation_query(fact, grouping_sets, ["sum", "count"])
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+
+    assert dimensions == ["vendor", "property", "quarter"]
+    assert "GROUPING SETS((), (expenses.vendor_id), (expenses.property_id, date_trunc('quarter'" in sql
+    assert sql.count("FROM expenses") == 1
+
+@pytest.mark.unit
+def test_split_grouping_sets():
+    """Test that result rows are routed to their grouping by GROUPING() mask."""
+    dimensions = ["property", "month"]
+    grouping_sets = [(), ("property",), ("property", "month")]
+    assert [grouping_mask(dimensions, s) for s in grouping_sets] == [3, 1, 0]
+
+    groups = split_grouping_sets([
+        row(property=None, month=None, grouping_id=3, sum=300.0, count=3),
+        row(property=2, month=None, grouping_id=1, sum=100.0, count=1),
+        row(property=1, month=None, grouping_id=1, sum=200.0, count=2),
+        row(property=1, month=date(2024, 3, 1), grouping_id=0, sum=200.0, count=2),
+    ], dimensions, grouping_sets, ["sum", "count"])
+
+    assert groups[0].rows == [{"sum": 300.0, "count": 3}]
+    assert [r["property"] for r in groups[1].rows] == [1, 2]
+    assert groups[2].rows == [{"property": 1, "month": "2024-03", "sum": 200.0, "count": 2}]
+
+@pytest.mark.unit
+async def test_aggregate_expenses(db_session):
+    """Test totals, per-status and per-month aggregates from one call."""
+    for amount, incurred, status in [
+        (100.0, date(2024, 1, 10), ExpenseStatus.PAID),
+        (50.0, date(2024, 1, 20), ExpenseStatus.DRAFT),
+        (30.0, date(2024, 2, 5), ExpenseStatus.PAID),
+    ]:
+        db_session.add(Expense(description="Test", amount=amount, date_incurred=incurred, status=status))
+    await db_session.commit()
+
+    result = await AggregationService.aggregate(
+        db_session, "expenses", ["", "status", "month"], ["sum", "count", "avg"]
+    )
+    total, by_status, by_month = result.groups
+
+    assert total.rows == [{"sum": 180.0, "count": 3, "avg": 60.0}]
+    assert {r["status"]: r["sum"] for r in by_status.rows} == {"paid": 130.0, "draft": 50.0}
+    assert [(r["month"], r["count"]) for r in by_month.rows] == [("2024-01", 2), ("2024-02", 1)]
@@ -0,0 +1,102 @@
+import json
+
+import pytest
+from fastapi import FastAPI
+from prometheus_client import REGISTRY
+
+from app.core.middleware import ErrorHandlingMiddleware, LoggingMiddleware, generate_request_id
+from app.core.monitoring import PrometheusMiddleware
+
+def build_app(*middleware) -> FastAPI:
+    app = FastAPI()
+    for middleware_class in middleware:
+        app.add_middleware(middleware_class)
+
+    @app.get("/properties/{property_id}")
+    async def get_property(property_id: int):
+        return {"id": property_id}
+
+    @app.get("/boom")
+    async def boom():
+        raise RuntimeError("boom")
+
+    return app
+
+async def call(app, path: str):
+    """Send a GET request straight through the ASGI interface."""
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [],
+        "client": ("test", 1),
+        "server": ("test", 80),
+    }
+    await app(scope, receive, send)
+    start = next(m for m in messages if m["type"] == "http.response.start")
+    body = b"".join(m.get("body", b"") for m in messages if m["type"] == "http.response.body")
+    return start["status"], dict(start["headers"]), body
+
+def sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+@pytest.mark.unit
+def test_request_ids_are_unique():
+    """Test that generated request ids never repeat."""
+    ids = {generate_request_id() for _ in range(1000)}
+    assert len(ids) == 1000
+
+@pytest.mark.unit
+async def test_prometheus_labels_by_route_template():
+    """Test that metrics use the route template instead of the raw path."""
+    app = build_app(PrometheusMiddleware)
+    labels = {"method": "GET", "endpoint": "/properties/{property_id}", "status": "200"}
+    before = sample("http_requests_total", **labels)
+
+    await call(app, "/properties/1")
+    await call(app, "/properties/2")
+
+    assert sample("http_requests_total", **labels) == before + 2
+    assert sample("http_requests_total", method="GET", endpoint="/properties/1", status="200") == 0
+    unmatched = {"method": "GET", "endpoint": "<unmatched>", "status": "404"}
+    before = sample("http_requests_total", **unmatched)
+    await call(app, "/nowhere")
+    assert sample("http_requests_total", **unmatched) == before + 1
+
+@pytest.mark.unit
+async def test_logging_middleware_adds_headers():
+    """Test the request id and process time headers."""
+    app = build_app(LoggingMiddleware)
+
+    status, headers, body = await call(app, "/properties/7")
+
+    assert status == 200
+    assert json.loads(body) == {"id": 7}
+    assert headers[b"x-request-id"]
+    assert float(headers[b"x-process-time"]) >= 0
+
+@pytest.mark.unit
+async def test_error_handling_middleware_returns_json():
+    """Test that unhandled errors become a 500 JSON response."""
+    app = build_app(ErrorHandlingMiddleware)
+
+    status, headers, body = await call(app, "/boom")
+
+    assert status == 500
+    payload = json.loads(body)
+    assert payload["detail"] == "Internal server error"
+    assert payload["request_id"]
@@ -0,0 +1,71 @@
+import threading
+from datetime import date
+
+import pytest
+
+from app.core.sql_instrumentation import MODE_SAMPLE, track_queries
+from app.crud.expense import expense as crud_expense
+from app.crud.vendor import vendor as crud_vendor
+from app.models.expense import Expense, ExpenseType
+from app.models.property import Property, PropertyType
+from app.services.reports import PaymentReportService
+
+@pytest.fixture
+async def vendor(db_session):
+    return await crud_vendor.create(db_session, obj_in={"name": "Plomería Central", "business_type": "plumbing"})
+
+@pytest.mark.unit
+async def test_async_crud_roundtrip(db_session, vendor):
+    """Test create, get, update and remove through the async CRUD base."""
+    assert (await crud_vendor.get(db_session, id=vendor.id)).name == "Plomería Central"
+
+    updated = await crud_vendor.update(db_session, db_obj=vendor, obj_in={"is_verified": True})
+    assert updated.is_verified is True
+
+    assert [v.id for v in await crud_vendor.get_multi(db_session, search="plomer")] == [vendor.id]
+
+    await crud_vendor.remove(db_session, id=vendor.id)
+    assert await crud_vendor.get(db_session, id=vendor.id) is None
+
+@pytest.mark.unit
+async def test_property_summary_uses_one_query(db_session):
+    """Test that the per-property expense summary does not issue a query per property."""
+    today = date.today()
+    for i in range(5):
+        property = Property(
+            name=f"Propiedad {i}",
+            property_type=PropertyType.RESIDENTIAL,
+            user_id="test_user_id"
+        )
+        db_session.add(property)
+        await db_session.flush()
+        for expense_type in (ExpenseType.MAINTENANCE, ExpenseType.UTILITIES):
+            db_session.add(Expense(
+                property_id=property.id,
+                amount=100.0,
+                expense_type=expense_type,
+                date_incurred=today
+            ))
+    await db_session.commit()
+
+    with track_queries(mode=MODE_SAMPLE) as stats:
+        summaries = await crud_expense.get_by_property(db_session, start_date=today, end_date=today)
+
+    assert stats.count == 1
+    assert len(summaries) >= 5
+    assert all(len(summary.categories) == 2 for summary in summaries[-5:])
+
+@pytest.mark.unit
+async def test_excel_export_runs_in_threadpool(monkeypatch):
+    """Test that building the Excel file does not run on the event loop thread."""
+    loop_thread = threading.get_ident()
+    threads = []
+
+    def fake_build(data, sheet_name):
+        threads.append(threading.get_ident())
+        return sheet_name
+
+    monkeypatch.setattr(PaymentReportService, "_build_excel", staticmethod(fake_build))
+
+    assert await PaymentReportService.export_to_excel([], "Pagos") == "Pagos"
+    assert threads and threads[0] != loop_thread
@@ -0,0 +1,64 @@
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from app.crud.audit_log import audit_log as crud_audit_log, decode_cursor, encode_cursor
+from app.models.audit_log import AuditLog
+from app.models.user import User
+from app.services.audit_retention import add_months, partition_month, partition_name
+
+@pytest.fixture
+async def test_user(db_session):
+    user = User(email="auditor@example.com", hashed_password="x")
+    db_session.add(user)
+    await db_session.commit()
+    return user
+
+@pytest.mark.unit
+def test_partition_names_roundtrip():
+    """Test month arithmetic and partition naming across a year boundary."""
+    assert add_months(date(2024, 11, 1), 3) == date(2025, 2, 1)
+    assert add_months(date(2024, 1, 1), -1) == date(2023, 12, 1)
+    assert partition_name(date(2025, 2, 1)) == "audit_log_p202502"
+    assert partition_month("audit_log_p202502") == date(2025, 2, 1)
+    assert partition_month("audit_log_default") is None
+
+@pytest.mark.unit
+def test_cursor_roundtrip():
+    """Test that a page cursor encodes the (performed_at, id) keyset."""
+    performed_at = datetime(2024, 5, 3, 10, 30, 15, 123456)
+    cursor = encode_cursor(SimpleNamespace(performed_at=performed_at, id=42))
+
+    assert decode_cursor(cursor) == (performed_at, 42)
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+@pytest.mark.unit
+async def test_entity_history_keyset_paging(db_session, test_user):
+    """Test that paging the history returns every entry once, newest first."""
+    start = datetime(2024, 5, 1, 12, 0, 0)
+    for i in range(7):
+        db_session.add(AuditLog(
+            entity_type="payment",
+            entity_id=1,
+            action="update",
+            performed_by=test_user.id,
+            # Two entries per instant to exercise the id tie-breaker
+            performed_at=start + timedelta(seconds=i // 2)
+        ))
+    await db_session.commit()
+
+    seen, cursor = [], None
+    while True:
+        page, cursor = await crud_audit_log.get_entity_history(
+            db_session, entity_type="payment", entity_id=1, cursor=cursor, limit=3
+        )
+        seen.extend(page)
+        if cursor is None:
+            break
+
+    assert len(seen) == 7
+    assert len({entry.id for entry in seen}) == 7
+    keys = [(entry.performed_at, entry.id) for entry in seen]
+    assert keys == sorted(keys, reverse=True)
@@ -0,0 +1,107 @@
+import asyncio
+import pytest
+
+from app.services.audit_writer import AuditWriter
+
+class FakeSession:
+    def __init__(self, database):
+        self.database = database
+        self.pending = []
+        self.commits = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, statement, rows):
+        if self.database.fail:
+            raise ConnectionError("database is down")
+        self.pending.extend(rows)
+
+    async def commit(self):
+        self.commits += 1
+        self.database.batches.append(self.pending)
+        self.pending = []
+
+class FakeDatabase:
+    def __init__(self):
+        self.batches = []
+        self.fail = False
+
+    def session(self):
+        return FakeSession(self)
+
+def make_entry(entity_id: int, action: str = "update"):
+    return {
+        "entity_type": "expense",
+        "entity_id": entity_id,
+        "action": action,
+        "changes": {"amount": {"old": 10, "new": 20}},
+        "performed_by": 1,
+        "ip_address": None,
+        "user_agent": None
+    }
+
+def make_writer(tmp_path, **kwargs):
+    database = FakeDatabase()
+    options = dict(batch_size=100, flush_interval=0.05, spill_path=str(tmp_path / "audit_spill.jsonl"))
+    options.update(kwargs)
+    return AuditWriter(session_factory=database.session, **options), database
+
+@pytest.mark.unit
+async def test_entries_are_written_in_one_batch(tmp_path):
+    """Test that entries queued within the flush interval share one insert."""
+    writer, database = make_writer(tmp_path)
+    for i in range(30):
+        await writer.submit(make_entry(i))
+    assert database.batches == []
+
+    await asyncio.sleep(0.1)
+
+    assert len(database.batches) == 1
+    assert [row["entity_id"] for row in database.batches[0]] == list(range(30))
+    assert writer.pending == 0
+
+@pytest.mark.unit
+async def test_full_batch_is_flushed_early(tmp_path):
+    """Test that reaching the batch size writes without waiting for the timer."""
+    writer, database = make_writer(tmp_path, batch_size=10, flush_interval=60)
+    for i in range(25):
+        await writer.submit(make_entry(i))
+
+    assert [len(batch) for batch in database.batches] == [10, 10]
+    assert writer.pending == 5
+
+    await writer.close()
+    assert [len(batch) for batch in database.batches] == [10, 10, 5]
+
+@pytest.mark.unit
+async def test_failed_batches_are_spilled_and_replayed(tmp_path):
+    """Test that entries survive a database outage through the spill file."""
+    writer, database = make_writer(tmp_path, flush_interval=60)
+    database.fail = True
+    for i in range(3):
+        await writer.submit(make_entry(i))
+    await writer.close()
+    assert database.batches == []
+    assert (tmp_path / "audit_spill.jsonl").exists()
+
+    database.fail = False
+    assert await writer.recover() == 3
+    assert [row["entity_id"] for row in database.batches[0]] == [0, 1, 2]
+    assert not (tmp_path / "audit_spill.jsonl").exists()
+    assert await writer.recover() == 0
+
+@pytest.mark.unit
+async def test_sync_write_commits_in_callers_session(tmp_path):
+    """Test that a synchronous write is committed before returning."""
+    writer, database = make_writer(tmp_path)
+    db = database.session()
+
+    await writer.write(db, make_entry(1, action="delete"))
+
+    assert db.commits == 1
+    assert database.batches[0][0]["action"] == "delete"
+    assert writer.pending == 0
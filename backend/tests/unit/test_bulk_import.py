@@ -0,0 +1,77 @@
+import pytest
+from sqlalchemy import func, select
+
+from app.models.tenant import Tenant
+from app.services.bulk_import import BulkImportService, _Importer, ENTITIES, iter_csv, iter_lines, iter_ndjson
+
+async def chunked(data: bytes, size: int = 7):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+async def collect(rows):
+    return [row async for row in rows]
+
+@pytest.mark.unit
+async def test_csv_rows_across_chunks():
+    """Test CSV parsing with chunks split mid-line and quoted newlines."""
+    data = (
+        'first_name,last_name,notes\n'
+        'Ana,"Pérez",\n'
+        '\n'
+        'Luis,"Gómez\nRuiz","{""vip"": true}"\n'
+        'Solo,una\n'
+    ).encode()
+    rows = await collect(iter_csv(iter_lines(chunked(data))))
+
+    assert rows[0] == (1, {"first_name": "Ana", "last_name": "Pérez"}, None)
+    assert rows[1] == (2, {"first_name": "Luis", "last_name": "Gómez\nRuiz", "notes": {"vip": True}}, None)
+    assert rows[2][0] == 3
+    assert rows[2][2] == "Expected 3 columns, got 2"
+
+@pytest.mark.unit
+async def test_ndjson_rows():
+    """Test NDJSON parsing with blank lines and malformed records."""
+    data = b'{"a": 1}\n\n[1, 2]\n{"a":\n{"a": 2}'
+    rows = await collect(iter_ndjson(iter_lines(chunked(data, 3))))
+
+    assert rows[0] == (1, {"a": 1}, None)
+    assert rows[1] == (2, None, "Each line must be a JSON object")
+    assert rows[2][0] == 3 and rows[2][2].startswith("Invalid JSON")
+    assert rows[3] == (4, {"a": 2}, None)
+
+@pytest.mark.unit
+def test_validation_errors_carry_row_and_field():
+    """Test that schema errors are reported per row and field."""
+    importer = _Importer(None, ENTITIES["tenants"], {})
+    record = importer.validate(1, {
+        "first_name": "Ana", "last_name": "Pérez", "property_id": "1",
+        "lease_start": "2024-01-01", "lease_end": "2024-12-31",
+        "deposit": "500", "monthly_rent": "1000", "payment_day": "5"
+    })
+    invalid = importer.validate(2, {"first_name": "Luis", "payment_day": "40"})
+
+    assert record[-1] == 1
+    assert invalid is None
+    fields = {error.field for error in importer.errors if error.row == 2}
+    assert {"last_name", "property_id", "payment_day"} <= fields
+
+@pytest.mark.unit
+async def test_dry_run_reports_missing_references(db_session):
+    """Test that a dry run reports unknown foreign keys and persists nothing."""
+    data = (
+        "first_name,last_name,property_id,lease_start,lease_end,deposit,monthly_rent,payment_day\n"
+        "Ana,Pérez,999999,2024-01-01,2024-12-31,500,1000,5\n"
+        "Luis,Gómez,999999,2024-01-01,2024-12-31,500,1000,45\n"
+    ).encode()
+    report = await BulkImportService.import_rows(
+        db_session, "tenants", chunked(data, 64), "csv", dry_run=True
+    )
+
+    assert report.total_rows == 2
+    assert report.valid_rows == 0
+    assert report.inserted == 0
+    assert [(error.row, error.field) for error in report.errors] == [
+        (2, "payment_day"), (1, "property_id")
+    ]
+    count = await db_session.execute(select(func.count()).select_from(Tenant))
+    assert count.scalar() == 0
@@ -0,0 +1,28 @@
+import os
+
+import pytest
+
+from tests.benchmarks.import_time import measure_cold_start
+
+# Loaded on first use by the report, receipt, analytics and monitoring code
+LAZY_DEPENDENCIES = {"pandas", "numpy", "fpdf", "reportlab", "qrcode", "sentry_sdk"}
+
+COLD_START_BUDGET_SECONDS = float(os.getenv("COLD_START_BUDGET_SECONDS", "3.0"))
+
+@pytest.fixture(scope="module")
+def cold_start():
+    return measure_cold_start("app.main")
+
+@pytest.mark.unit
+def test_app_import_does_not_load_heavy_dependencies(cold_start):
+    """Test that report, PDF, QR and Sentry packages are not imported at startup."""
+    assert cold_start.modules & LAZY_DEPENDENCIES == set()
+
+@pytest.mark.unit
+def test_cold_start_within_budget(cold_start):
+    """Test that importing app.main stays within the startup budget."""
+    assert cold_start.seconds < COLD_START_BUDGET_SECONDS, (
+        f"import app.main took {cold_start.seconds:.2f}s "
+        f"(budget {COLD_START_BUDGET_SECONDS:.2f}s); "
+        "run `python -m tests.benchmarks.import_time` to find the slow imports"
+    )
@@ -1,7 +1,8 @@
 import pytest
 from datetime import date
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.services.contract_service import ContractService
+from fastapi import HTTPException
+from app.services.contract_service import ContractService, availability_spans
 from app.services.tenant_service import TenantService
 from app.models.contract import Contract, ContractStatus, PaymentMethod, PaymentFrequency
 from app.models.payment import Payment
@@ -176,3 +177,67 @@ async def test_update_payment_method(db_session: AsyncSession, test_contract: Co
     assert updated_contract.payment_method == PaymentMethod.CHECK
     contract = await ContractService.get_contract(db_session, test_contract.id)
     assert contract.payment_method == PaymentMethod.CHECK
+
+@pytest.mark.unit
+def test_availability_spans():
+    """Probar la división de un período en tramos libres y ocupados"""
+    spans = availability_spans(
+        date(2030, 1, 1),
+        date(2030, 4, 30),
+        [(1, date(2029, 12, 1), date(2030, 1, 10)), (2, date(2030, 2, 1), date(2030, 3, 31))]
+    )
+
+    assert [(s.start_date, s.end_date, s.status, s.contract_id) for s in spans] == [
+        (date(2030, 1, 1), date(2030, 1, 10), "occupied", 1),
+        (date(2030, 1, 11), date(2030, 1, 31), "free", None),
+        (date(2030, 2, 1), date(2030, 3, 31), "occupied", 2),
+        (date(2030, 4, 1), date(2030, 4, 30), "free", None),
+    ]
+    assert [s.status for s in availability_spans(date(2030, 1, 1), date(2030, 1, 31), [])] == ["free"]
+
+@pytest.mark.asyncio
+async def test_database_rejects_overlapping_contracts(db_session: AsyncSession, test_tenant: Tenant, test_unit: Unit):
+    """Probar que la base de datos rechaza contratos vigentes solapados"""
+    for number, start, end in [
+        ("CONT-A", date(2030, 1, 1), date(2030, 6, 30)),
+        ("CONT-B", date(2030, 6, 30), date(2030, 12, 31)),
+    ]:
+        db_session.add(Contract(
+            tenant_id=test_tenant.id,
+            unit_id=test_unit.id,
+            contract_number=number,
+            status=ContractStatus.ACTIVE,
+            start_date=start,
+            end_date=end
+        ))
+
+    with pytest.raises(HTTPException) as exc_info:
+        await ContractService.commit_booking(db_session)
+    assert exc_info.value.status_code == 400
+
+@pytest.mark.asyncio
+async def test_units_availability(db_session: AsyncSession, test_tenant: Tenant, test_unit: Unit, test_property: Property):
+    """Probar la disponibilidad de todas las unidades de una propiedad"""
+    free_unit = Unit(property_id=test_property.id, unit_number="A2", unit_type=UnitType.APARTMENT)
+    db_session.add(free_unit)
+    db_session.add(Contract(
+        tenant_id=test_tenant.id,
+        unit_id=test_unit.id,
+        contract_number="CONT-C",
+        status=ContractStatus.ACTIVE,
+        start_date=date(2030, 2, 1),
+        end_date=date(2030, 3, 31)
+    ))
+    await db_session.commit()
+
+    availability = await ContractService.get_units_availability(
+        db_session,
+        start_date=date(2030, 1, 1),
+        end_date=date(2030, 4, 30),
+        property_id=test_property.id
+    )
+
+    by_unit = {a.unit_id: a for a in availability}
+    assert by_unit[free_unit.id].is_available
+    assert not by_unit[test_unit.id].is_available
+    assert [s.status for s in by_unit[test_unit.id].spans] == ["free", "occupied", "free"]
@@ -0,0 +1,89 @@
+import pytest
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.downloads import ROOT_UPLOADS, parse_range, resolve_path, send_file
+
+CONTENT = bytes(range(256)) * 40
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "DOWNLOAD_CHUNK_SIZE", 1000)
+    monkeypatch.setattr(settings, "DOWNLOAD_X_ACCEL_REDIRECT", False)
+    (tmp_path / "docs").mkdir()
+    (tmp_path / "docs" / "contrato.pdf").write_bytes(CONTENT)
+
+    app = FastAPI()
+
+    @app.get("/files/{name}")
+    async def download(name: str, request: Request):
+        return await send_file(request, ROOT_UPLOADS, f"docs/{name}", content_hash="abc123")
+
+    return TestClient(app)
+
+@pytest.mark.unit
+def test_parse_range():
+    """Test single, open-ended, suffix, multiple and malformed ranges."""
+    assert parse_range("bytes=0-99", 1000) == (0, 99)
+    assert parse_range("bytes=900-", 1000) == (900, 999)
+    assert parse_range("bytes=-100", 1000) == (900, 999)
+    assert parse_range("bytes=990-2000", 1000) == (990, 999)
+    assert parse_range("bytes=0-1,5-6", 1000) is None
+    assert parse_range("bytes=abc", 1000) is None
+    assert parse_range("items=0-1", 1000) is None
+    with pytest.raises(HTTPException) as exc:
+        parse_range("bytes=1000-", 1000)
+    assert exc.value.status_code == 416
+
+@pytest.mark.unit
+def test_paths_outside_root_are_not_found(tmp_path, monkeypatch):
+    """Test that relative and absolute paths cannot escape the storage root."""
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path / "uploads"))
+    for path in ("../secret.txt", "/etc/passwd", "a/../../b"):
+        with pytest.raises(HTTPException):
+            resolve_path(ROOT_UPLOADS, path)
+
+@pytest.mark.unit
+def test_full_and_partial_download(client):
+    """Test whole-file and byte-range responses."""
+    response = client.get("/files/contrato.pdf")
+    assert response.status_code == 200
+    assert response.content == CONTENT
+    assert response.headers["etag"] == '"abc123"'
+    assert response.headers["content-type"] == "application/pdf"
+    assert response.headers["accept-ranges"] == "bytes"
+
+    response = client.get("/files/contrato.pdf", headers={"Range": "bytes=1000-2999"})
+    assert response.status_code == 206
+    assert response.content == CONTENT[1000:3000]
+    assert response.headers["content-range"] == f"bytes 1000-2999/{len(CONTENT)}"
+
+    response = client.get("/files/contrato.pdf", headers={"Range": f"bytes={len(CONTENT)}-"})
+    assert response.status_code == 416
+
+@pytest.mark.unit
+def test_conditional_requests(client):
+    """Test If-None-Match revalidation and If-Range with a stale validator."""
+    response = client.get("/files/contrato.pdf", headers={"If-None-Match": '"abc123"'})
+    assert response.status_code == 304
+    assert response.content == b""
+
+    response = client.get("/files/contrato.pdf", headers={"Range": "bytes=0-9", "If-Range": '"old"'})
+    assert response.status_code == 200
+    assert response.content == CONTENT
+
+@pytest.mark.unit
+def test_accel_redirect(client, monkeypatch):
+    """Test that with X-Accel-Redirect the body is left to nginx."""
+    monkeypatch.setattr(settings, "DOWNLOAD_X_ACCEL_REDIRECT", True)
+    response = client.get("/files/contrato.pdf")
+
+    assert response.headers["x-accel-redirect"] == "/_protected/uploads/docs/contrato.pdf"
+    assert response.content == b""
+
+@pytest.mark.unit
+def test_missing_file(client):
+    """Test that a missing file is a 404."""
+    assert client.get("/files/otro.pdf").status_code == 404
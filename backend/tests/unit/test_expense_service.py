@@ -1,12 +1,13 @@
 import pytest
 from datetime import date, datetime
+from sqlalchemy import select
 from decimal import Decimal
 from unittest.mock import Mock, patch
 from fastapi import HTTPException
 
-from app.services.expense_service import expense_service
+from app.services.expense_service import expense_service, recurrence_dates
 from app.schemas.expense import ExpenseCreate, ExpenseUpdate, ExpenseStatus
-from app.models.expense import Expense
+from app.models.expense import Expense, RecurrenceInterval
 from app.models.user import User
 
 @pytest.fixture
@@ -121,3 +122,50 @@ async def test_get_category_summary(db_session, mock_expense):
     if summary:
         assert "category" in summary[0]
         assert "total_amount" in summary[0]
+
+def test_recurrence_dates():
+    """Test due occurrences across month ends and resume points."""
+    anchor = date(2024, 1, 31)
+    assert recurrence_dates(anchor, RecurrenceInterval.MONTHLY, anchor, date(2024, 4, 30)) == [
+        date(2024, 2, 29), date(2024, 3, 31), date(2024, 4, 30)
+    ]
+    # Resuming after the March instance only yields April
+    assert recurrence_dates(anchor, RecurrenceInterval.MONTHLY, date(2024, 3, 31), date(2024, 4, 30)) == [
+        date(2024, 4, 30)
+    ]
+    assert recurrence_dates(date(2024, 1, 1), RecurrenceInterval.WEEKLY, date(2024, 1, 10), date(2024, 1, 29)) == [
+        date(2024, 1, 15), date(2024, 1, 22), date(2024, 1, 29)
+    ]
+    assert recurrence_dates(date(2024, 2, 29), RecurrenceInterval.YEARLY, date(2024, 2, 29), date(2025, 3, 1)) == [
+        date(2025, 2, 28)
+    ]
+
+async def test_generate_recurring_expenses_is_idempotent(db_session):
+    """Test that generation backfills missed instances once."""
+    parent = Expense(
+        description="Cleaning",
+        amount=80.0,
+        date_incurred=date(2024, 1, 15),
+        is_recurring=True,
+        recurrence_interval=RecurrenceInterval.MONTHLY,
+        recurrence_end_date=date(2024, 12, 31)
+    )
+    db_session.add(parent)
+    await db_session.commit()
+
+    first = await expense_service.generate_recurring_expenses(db_session, current_date=date(2024, 4, 20))
+    again = await expense_service.generate_recurring_expenses(db_session, current_date=date(2024, 4, 20))
+
+    # A deleted instance is restored by a backfill
+    result = await db_session.execute(
+        select(Expense).where(Expense.parent_expense_id == parent.id, Expense.date_incurred == date(2024, 3, 15))
+    )
+    await db_session.delete(result.scalar_one())
+    await db_session.commit()
+    backfill = await expense_service.generate_recurring_expenses(
+        db_session, current_date=date(2024, 4, 20), since=date(2024, 1, 1)
+    )
+
+    assert (first.due, first.generated) == (3, 3)
+    assert again.generated == 0
+    assert (backfill.due, backfill.generated) == (3, 1)
@@ -0,0 +1,83 @@
+import hashlib
+import os
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.services.file_storage import FileStorageService, absolute_path, blob_path, request_chunks
+
+async def chunked(data: bytes, size: int = 5):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+@pytest.fixture
+def upload_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "UPLOAD_CHUNK_SIZE", 8)
+    return tmp_path
+
+@pytest.mark.unit
+def test_declared_length_rejected_before_reading():
+    """Test that a Content-Length over the limit is rejected without reading the body."""
+    class StubRequest:
+        headers = {"content-length": "1025"}
+
+        def stream(self):
+            raise AssertionError("body must not be read")
+
+    with pytest.raises(HTTPException) as exc:
+        request_chunks(StubRequest(), max_size=1024)
+    assert exc.value.status_code == 413
+
+@pytest.mark.unit
+async def test_identical_uploads_stored_once(db_session, upload_dir):
+    """Test that the same content uploaded twice shares one stored file."""
+    data = b"factura de fontaneria " * 10
+    first = await FileStorageService.store(db_session, chunked(data), "application/pdf")
+    second = await FileStorageService.store(db_session, chunked(data, 7), "application/pdf")
+    await db_session.commit()
+
+    assert first.id == second.id
+    assert first.sha256 == hashlib.sha256(data).hexdigest()
+    assert first.size == len(data)
+    assert first.path == blob_path(first.sha256)
+    with open(absolute_path(first.path), "rb") as f:
+        assert f.read() == data
+    assert os.listdir(upload_dir / "tmp") == []
+
+@pytest.mark.unit
+async def test_oversized_upload_aborted(db_session, upload_dir):
+    """Test that an upload is cut off as soon as it passes the size limit."""
+    with pytest.raises(HTTPException) as exc:
+        await FileStorageService.store(db_session, chunked(b"x" * 100), max_size=20)
+
+    assert exc.value.status_code == 413
+    assert os.listdir(upload_dir / "tmp") == []
+    assert not (upload_dir / "blobs").exists()
+
+@pytest.mark.unit
+async def test_purge_removes_unreferenced_files(db_session, upload_dir):
+    """Test that stored files without attachments or documents are purged."""
+    stored = await FileStorageService.store(db_session, chunked(b"sin referencias"))
+    await db_session.commit()
+
+    assert await FileStorageService.purge_unreferenced(db_session) >= 1
+    assert not os.path.exists(absolute_path(stored.path))
+
+@pytest.mark.unit
+async def test_orphaned_blobs_swept_after_grace(db_session, upload_dir):
+    """Test that files left by rolled-back uploads are removed once past the grace period."""
+    kept = await FileStorageService.store(db_session, chunked(b"fila confirmada"))
+    kept_path = absolute_path(kept.path)
+    await db_session.commit()
+    orphan = await FileStorageService.store(db_session, chunked(b"fila deshecha"))
+    orphan_path = absolute_path(orphan.path)
+    await db_session.rollback()
+
+    assert await FileStorageService.purge_orphaned_blobs(db_session) == 0
+    assert os.path.exists(orphan_path)
+
+    assert await FileStorageService.purge_orphaned_blobs(db_session, grace=-1) == 1
+    assert not os.path.exists(orphan_path)
+    assert os.path.exists(kept_path)
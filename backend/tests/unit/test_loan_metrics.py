@@ -0,0 +1,72 @@
+import pytest
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+from app.models import Loan, LoanPayment, LoanStatus, PaymentStatus
+from app.services.loan_report_service import (
+    LoanReportService, PAYMENT_TOTALS, loan_metrics_row, projected_payoff_date
+)
+
+AS_OF = date(2024, 6, 30)
+
+@pytest.mark.unit
+def test_projected_payoff_date():
+    """Test payoff projection with and without interest, and when it never pays off."""
+    assert projected_payoff_date(10000, 1000, 0, date(2024, 7, 15), AS_OF) == date(2025, 4, 15)
+    # 100000 al 6% con cuotas de 1000: 139 cuotas
+    assert projected_payoff_date(100000, 1000, 6, date(2024, 1, 31), AS_OF) == date(2035, 7, 31)
+    assert projected_payoff_date(100000, 500, 6, None, AS_OF) is None
+    assert projected_payoff_date(0, 1000, 6, None, AS_OF) is None
+
+@pytest.mark.unit
+def test_loan_without_payments():
+    """Test that a loan with no payments gets zeroed metrics rather than NULLs."""
+    row = SimpleNamespace(
+        id=7, principal_amount=20000, remaining_balance=15000, monthly_payment=500,
+        interest_rate=0, next_payment_date=date(2024, 7, 1),
+        last_payment_date=None, **{name: None for name in PAYMENT_TOTALS}
+    )
+
+    values = loan_metrics_row(row, AS_OF)
+
+    assert values["loan_id"] == 7
+    assert values["payments_due"] == 0 and values["paid_to_date"] == 0
+    assert values["on_time_rate"] == 0.0
+    assert values["loan_progress"] == 25.0
+    assert values["projected_payoff_date"] == date(2026, 12, 1)
+
+@pytest.mark.unit
+async def test_compute_loan_metrics(db_session):
+    """Test on-time rate, days-past-due buckets and totals from one batch run."""
+    loan = Loan(
+        principal_amount=12000, remaining_balance=9000, monthly_payment=1000,
+        interest_rate=0, status=LoanStatus.ACTIVE, next_payment_date=date(2024, 7, 1)
+    )
+    db_session.add(loan)
+    await db_session.flush()
+    db_session.add_all([
+        # A tiempo, 10 días tarde, pendiente desde hace 45 días y una futura
+        LoanPayment(loan_id=loan.id, due_date=date(2024, 3, 1), payment_date=date(2024, 3, 1),
+                    amount=1000, principal_amount=1000, interest_amount=0, late_fee=0,
+                    status=PaymentStatus.COMPLETED),
+        LoanPayment(loan_id=loan.id, due_date=date(2024, 4, 1), payment_date=date(2024, 4, 11),
+                    amount=1050, principal_amount=1000, interest_amount=0, late_fee=50,
+                    status=PaymentStatus.COMPLETED),
+        LoanPayment(loan_id=loan.id, due_date=AS_OF - timedelta(days=45), amount=1000,
+                    status=PaymentStatus.PENDING),
+        LoanPayment(loan_id=loan.id, due_date=date(2024, 7, 1), amount=1000,
+                    status=PaymentStatus.PENDING),
+    ])
+    await db_session.commit()
+
+    assert await LoanReportService.compute_loan_metrics(db_session, as_of=AS_OF) >= 1
+    result = await LoanReportService.get_loan_metrics(db_session, loan.id)
+
+    assert result["metrics"]["payments_due"] == 3
+    assert result["metrics"]["on_time_payments"] == 1
+    assert result["metrics"]["total_paid"] == 2050
+    assert result["metrics"]["total_late_fees"] == 50
+    assert result["days_past_due"] == {
+        "current": 1, "1_30": 1, "31_60": 1, "61_90": 0, "over_90": 0, "max": 45
+    }
+    assert result["metrics"]["projected_payoff_date"] == "2025-03-01"
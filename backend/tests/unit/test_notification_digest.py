@@ -0,0 +1,140 @@
+import asyncio
+from types import SimpleNamespace
+import pytest
+
+from app.services.notification_digest import NotificationDigest
+
+def make_notification(user_id: int, type: str = "expense_created", priority: str = "normal", message: str = "msg"):
+    return SimpleNamespace(user_id=user_id, type=type, priority=priority, message=message)
+
+def make_digest(**kwargs):
+    delivered = []
+
+    async def deliver(notification, channel):
+        delivered.append((notification, channel))
+
+    def merge(notifications):
+        return SimpleNamespace(
+            user_id=notifications[0].user_id,
+            type=notifications[0].type,
+            priority="normal",
+            count=len(notifications)
+        )
+
+    options = dict(windows={}, default_window=0.05, urgent_types=[], max_events=100)
+    options.update(kwargs)
+    return NotificationDigest(deliver=deliver, merge=merge, **options), delivered
+
+@pytest.mark.unit
+async def test_events_are_merged_per_user_and_channel():
+    """Test that events inside a window become one digest per user and channel."""
+    digest, delivered = make_digest()
+    for _ in range(20):
+        await digest.submit(make_notification(1), "email")
+    await digest.submit(make_notification(1), "push")
+    await digest.submit(make_notification(2), "email")
+    assert delivered == []
+
+    await asyncio.sleep(0.1)
+
+    by_key = {(notification.user_id, channel): notification for notification, channel in delivered}
+    assert len(delivered) == 3
+    assert by_key[(1, "email")].count == 20
+    assert not hasattr(by_key[(1, "push")], "count")
+    assert digest.pending == 0
+
+@pytest.mark.unit
+async def test_urgent_notifications_bypass_the_window():
+    """Test that urgent priorities and urgent types are delivered immediately."""
+    digest, delivered = make_digest(urgent_types=["payment_late"])
+    await digest.submit(make_notification(1, priority="urgent"), "email")
+    await digest.submit(make_notification(1, type="payment_late"), "email")
+
+    assert len(delivered) == 2
+    assert digest.pending == 0
+
+@pytest.mark.unit
+async def test_windows_are_configurable_per_type():
+    """Test that a type with a zero window is not buffered."""
+    digest, delivered = make_digest(windows={"vendor_rated": 0}, default_window=60)
+    await digest.submit(make_notification(1, type="vendor_rated"), "email")
+    await digest.submit(make_notification(1), "email")
+
+    assert len(delivered) == 1
+    assert digest.pending == 1
+
+    await digest.flush_all()
+    assert len(delivered) == 2
+
+@pytest.mark.unit
+async def test_full_bucket_is_flushed_early():
+    """Test that a bucket is flushed as soon as it reaches the event limit."""
+    digest, delivered = make_digest(default_window=60, max_events=5)
+    for _ in range(5):
+        await digest.submit(make_notification(1), "email")
+
+    assert len(delivered) == 1
+    assert delivered[0][0].count == 5
+
+@pytest.mark.unit
+async def test_service_stores_one_notification_per_digest(monkeypatch):
+    """Test that coalesced events are written and counted once per digest."""
+    from contextlib import asynccontextmanager
+    from app.core.config import settings
+    from app.schemas.notification import NotificationChannel, NotificationStatus, NotificationType
+    from app.services import notification_service as service_module
+
+    events = []
+
+    class FakeSession:
+        def add(self, obj):
+            events.append(("add", obj.title))
+
+        async def commit(self):
+            events.append("commit")
+
+    class RecordingCounter:
+        async def increment(self, db, user_id: int, amount: int = 1):
+            events.append(("increment", user_id))
+
+    class RecordingCrud:
+        async def update_notification_status(self, db, notification_id, status):
+            events.append(("status", status))
+
+    async def sent(notification, channel):
+        events.append(("send", channel))
+        return True
+
+    async def channels(self, db, notification):
+        return [NotificationChannel.EMAIL, NotificationChannel.PUSH]
+
+    monkeypatch.setattr(settings, "NOTIFICATION_DIGEST_ENABLED", True)
+    monkeypatch.setattr(service_module, "Notification", lambda **fields: SimpleNamespace(id=None, **fields))
+    monkeypatch.setattr(service_module, "SessionLocal", asynccontextmanager(lambda: _session(FakeSession())))
+    monkeypatch.setattr(service_module, "unread_counter", RecordingCounter())
+    monkeypatch.setattr(service_module, "notification_crud", RecordingCrud())
+    monkeypatch.setattr(service_module.NotificationService, "_get_user_channels", channels)
+    monkeypatch.setattr(service_module.NotificationService, "_send_through_channel", staticmethod(sent))
+
+    service = service_module.NotificationService()
+    service.digest.windows = {}
+    service.digest.default_window = 60
+    for index in range(3):
+        notification = SimpleNamespace(
+            id=None, user_id=7, type=NotificationType.EXPENSE_CREATED, title="New Expense",
+            message=f"expense {index}", priority="normal", reference_id=index,
+            reference_type="expense", data={}
+        )
+        assert await service._send_coalesced(object(), notification)
+
+    assert events == []
+    await service.digest.flush_all()
+
+    assert events == [
+        ("add", "New Expense (3)"), "commit", ("increment", 7),
+        ("send", NotificationChannel.EMAIL), ("send", NotificationChannel.PUSH),
+        ("status", NotificationStatus.SENT)
+    ]
+
+async def _session(session):
+    yield session
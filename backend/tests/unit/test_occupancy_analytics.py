@@ -0,0 +1,67 @@
+from datetime import date
+
+import pytest
+
+from app.services.occupancy_analytics import Portfolio, compute_occupancy
+
+def make_portfolio():
+    # Property 1: unit 10 occupied 2024-01-11..2024-02-10, unit 11 always vacant.
+    # Property 2: unit 20 occupied for the whole period by a longer contract.
+    return Portfolio(
+        start_date=date(2024, 1, 1),
+        end_date=date(2024, 2, 29),
+        unit_ids=[10, 11, 20],
+        property_ids=[1, 1, 2],
+        base_rents=[365.0, 730.0, 1000.0],
+        contracts=[
+            (0, date(2024, 1, 11), date(2024, 2, 10)),
+            (2, date(2023, 6, 1), date(2024, 12, 31)),
+        ]
+    )
+
+@pytest.mark.unit
+def test_unit_occupancy_and_lost_rent():
+    """Test occupied and vacant days, turnover and lost rent per unit."""
+    result = compute_occupancy(make_portfolio())
+    units = {unit["unit_id"]: unit for unit in result["units"]}
+
+    assert result["days"] == 60
+    assert units[10]["occupied_days"] == 31
+    assert units[10]["vacancy_days"] == 29
+    assert (units[10]["move_ins"], units[10]["move_outs"]) == (1, 1)
+    # 365 a month is 12 a day
+    assert units[10]["lost_rent"] == pytest.approx(29 * 12)
+    assert units[11]["occupancy_rate"] == 0.0
+    assert units[11]["lost_rent"] == pytest.approx(60 * 24)
+    assert units[20]["occupancy_rate"] == 100.0
+    assert (units[20]["move_ins"], units[20]["move_outs"]) == (0, 0)
+
+@pytest.mark.unit
+def test_property_and_monthly_aggregates():
+    """Test per-property, per-month and daily aggregation."""
+    result = compute_occupancy(make_portfolio(), include_daily=True)
+    properties = {p["property_id"]: p for p in result["properties"]}
+
+    first = properties[1]
+    assert first["units"] == 2
+    assert first["occupancy_rate"] == round(31 / 120 * 100, 2)
+    assert first["turnover_rate"] == 50.0
+    # January: 21 occupied days out of 2 x 31; February: 10 out of 2 x 29
+    assert first["monthly"] == [
+        {"month": "2024-01", "occupancy_rate": round(21 / 62 * 100, 2)},
+        {"month": "2024-02", "occupancy_rate": round(10 / 58 * 100, 2)},
+    ]
+    assert first["daily"][9:11] == [0, 1]
+
+    assert result["portfolio"]["units"] == 3
+    assert result["portfolio"]["occupied_days"] == 91
+    assert len(result["portfolio"]["daily"]) == 60
+
+@pytest.mark.unit
+def test_empty_portfolio():
+    """Test that a portfolio without units yields zeroed metrics."""
+    result = compute_occupancy(Portfolio(start_date=date(2024, 1, 1), end_date=date(2024, 1, 31)))
+
+    assert result["portfolio"]["occupancy_rate"] == 0.0
+    assert result["properties"] == []
+    assert result["units"] == []
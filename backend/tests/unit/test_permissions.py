@@ -0,0 +1,85 @@
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.security import HTTPAuthorizationCredentials
+from fastapi.testclient import TestClient
+
+from app.core import security
+from app.core.config import settings
+from app.core.permissions import PermissionMatrix, get_all_permissions_for_roles
+from app.core.test_auth import create_test_token
+
+@pytest.fixture
+def matrix():
+    return PermissionMatrix({
+        "manager": ["property:read", "property:write"],
+        "viewer": ["property:read"],
+    })
+
+@pytest.mark.unit
+def test_roles_compile_to_bitmasks(matrix):
+    """Test that role grants and direct permissions combine into one mask."""
+    required = matrix.require(["property:read", "property:write"])
+
+    assert PermissionMatrix.allows(matrix.for_roles(["manager"]), required)
+    assert not PermissionMatrix.allows(matrix.for_roles(["viewer"]), required)
+    assert PermissionMatrix.allows(matrix.resolve(["viewer"], ["property:write"]), required)
+    assert matrix.names(matrix.for_roles(["viewer", "unknown"])) == {"property:read"}
+
+@pytest.mark.unit
+def test_unknown_permission_is_never_granted(matrix):
+    """Test that a requirement nobody grants cannot be met by an empty mask."""
+    required = matrix.require(["admin:read"])
+
+    assert required != 0
+    assert not PermissionMatrix.allows(matrix.resolve(["manager"], ["anything"]), required)
+
+@pytest.mark.unit
+def test_role_permission_helpers():
+    """Test that the set-based helpers still return permission names."""
+    assert get_all_permissions_for_roles(["tenant", "viewer"]) == {
+        "read_property", "create_maintenance_request", "view_own_payments",
+        "update_profile", "view_reports"
+    }
+
+@pytest.mark.unit
+def test_check_permissions_uses_claims_and_roles():
+    """Test route checks against explicit permissions and role claims."""
+    claims = {}
+    app = FastAPI()
+    app.dependency_overrides[security.get_current_user] = lambda: claims
+
+    @app.get("/contracts")
+    async def contracts(_=Depends(security.check_permissions(["contract:read", "contract:write"]))):
+        return {"ok": True}
+
+    client = TestClient(app)
+    claims.update(permissions=["contract:read"])
+    assert client.get("/contracts").status_code == 403
+    claims.update(permissions=["contract:read", "contract:write"])
+    assert client.get("/contracts").status_code == 200
+    claims.update(permissions=[], roles=["property_manager"])
+    assert client.get("/contracts").status_code == 200
+
+@pytest.mark.unit
+async def test_token_resolved_once(monkeypatch):
+    """Test that a token is verified and resolved once, then served from cache."""
+    monkeypatch.setattr(settings, "ENVIRONMENT", "test")
+    monkeypatch.setattr(security, "_token_cache", security.LocalLRUCache(max_entries=8, ttl=60))
+    calls = 0
+    verify = security.get_test_user
+
+    async def counting_get_test_user(credentials):
+        nonlocal calls
+        calls += 1
+        return await verify(credentials)
+
+    monkeypatch.setattr(security, "get_test_user", counting_get_test_user)
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=create_test_token())
+
+    first = await security.get_current_user(credentials)
+    second = await security.get_current_user(credentials)
+
+    assert calls == 1
+    assert second is first
+    required = security.token_permissions.require(["property:delete"])
+    assert PermissionMatrix.allows(first.permission_mask, required)
@@ -0,0 +1,57 @@
+import shutil
+
+import pytest
+
+from app.services.previews import render_derivatives
+
+Image = pytest.importorskip("PIL.Image")
+
+def render(tmp_path, source):
+    thumbnail, preview = tmp_path / "thumb.jpg", tmp_path / "preview.jpg"
+    rendered = render_derivatives(str(source), str(thumbnail), str(preview), 64, 256, timeout=30)
+    return rendered, thumbnail, preview
+
+@pytest.mark.unit
+def test_image_derivatives_fit_configured_sizes(tmp_path):
+    """Test that thumbnail and preview keep the aspect ratio within their limits."""
+    source = tmp_path / "factura.png"
+    Image.new("RGBA", (1200, 600), (200, 30, 30, 255)).save(source)
+
+    rendered, thumbnail, preview = render(tmp_path, source)
+
+    assert rendered
+    with Image.open(preview) as image:
+        assert image.format == "JPEG"
+        assert image.size == (256, 128)
+    with Image.open(thumbnail) as image:
+        assert image.size == (64, 32)
+
+@pytest.mark.unit
+def test_unsupported_file(tmp_path):
+    """Test that files that are neither images nor PDFs are skipped."""
+    source = tmp_path / "notas.txt"
+    source.write_text("sin vista previa")
+
+    rendered, thumbnail, preview = render(tmp_path, source)
+
+    assert not rendered
+    assert not thumbnail.exists() and not preview.exists()
+
+@pytest.mark.unit
+@pytest.mark.skipif(shutil.which("pdftoppm") is None, reason="poppler-utils not installed")
+def test_pdf_first_page(tmp_path):
+    """Test that a PDF gets a preview of its first page."""
+    from fpdf import FPDF
+
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_font("helvetica", size=24)
+    pdf.cell(text="Contrato de arrendamiento")
+    source = tmp_path / "contrato.pdf"
+    pdf.output(str(source))
+
+    rendered, thumbnail, preview = render(tmp_path, source)
+
+    assert rendered
+    with Image.open(preview) as image:
+        assert max(image.size) == 256
@@ -0,0 +1,99 @@
+import asyncio
+import json
+import pytest
+
+from app.core.pubsub import InMemoryBroker, InMemoryPubSub
+from app.core.websocket import NotificationWebsocketManager
+from app.services.notification_manager import NotificationManager
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, data: str):
+        self.sent.append(data)
+
+    async def close(self, code: int = 1000):
+        pass
+
+class FakeNotification:
+    def model_dump_json(self) -> str:
+        return json.dumps({"id": 1, "title": "Test"})
+
+async def drain():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+@pytest.mark.unit
+async def test_subscriptions_are_reference_counted():
+    """Test that the backend subscribes once per channel and unsubscribes after the last listener."""
+    broker = InMemoryBroker()
+    bus = InMemoryPubSub(broker)
+    received = []
+
+    await bus.subscribe("channel", lambda channel, message: received.append(message))
+    await bus.subscribe("channel", lambda channel, message: received.append(message))
+    await bus.publish("channel", "first")
+    assert received == ["first"]
+
+    await bus.unsubscribe("channel")
+    assert "channel" in broker.subscribers
+    await bus.unsubscribe("channel")
+    assert "channel" not in broker.subscribers
+
+    await bus.publish("channel", "second")
+    assert received == ["first"]
+
+@pytest.mark.unit
+async def test_notification_reaches_user_on_another_worker():
+    """Test that a notification sent on one worker is delivered by the worker holding the socket."""
+    broker = InMemoryBroker()
+    worker_a = NotificationWebsocketManager(bus=InMemoryPubSub(broker))
+    worker_b = NotificationWebsocketManager(bus=InMemoryPubSub(broker))
+    websocket = FakeWebSocket()
+    await worker_b.connect(websocket, 1)
+
+    await worker_a.send_notification(1, FakeNotification())
+    await drain()
+
+    assert websocket.sent == [json.dumps({"id": 1, "title": "Test"})]
+
+@pytest.mark.unit
+async def test_broadcast_only_reaches_subscribed_workers():
+    """Test that per-user channels keep messages away from workers without the user."""
+    broker = InMemoryBroker()
+    worker_a = NotificationWebsocketManager(bus=InMemoryPubSub(broker))
+    worker_b = NotificationWebsocketManager(bus=InMemoryPubSub(broker))
+    first, second = FakeWebSocket(), FakeWebSocket()
+    await worker_a.connect(first, 1)
+    await worker_b.connect(second, 2)
+
+    await worker_a.broadcast_notification([1], FakeNotification())
+    await drain()
+
+    assert len(first.sent) == 1
+    assert second.sent == []
+    assert broker.subscribers[worker_a.user_channel(1)] == {worker_a.bus}
+
+    worker_b.disconnect(second, 2)
+    await drain()
+    assert worker_b.user_channel(2) not in broker.subscribers
+
+@pytest.mark.unit
+async def test_notification_manager_delivers_across_workers():
+    """Test that the legacy notification manager publishes through the bus."""
+    broker = InMemoryBroker()
+    worker_a = NotificationManager(bus=InMemoryPubSub(broker))
+    worker_b = NotificationManager(bus=InMemoryPubSub(broker))
+    first, second = FakeWebSocket(), FakeWebSocket()
+    await worker_a.connect(first, 1)
+    await worker_b.connect(second, 2)
+
+    await worker_a.send_notification(2, {"title": "Hola"})
+    await worker_b.broadcast({"title": "Todos"}, exclude_user=2)
+
+    assert [json.loads(message) for message in second.sent] == [{"title": "Hola"}]
+    assert [json.loads(message) for message in first.sent] == [{"title": "Todos"}]
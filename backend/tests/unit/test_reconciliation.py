@@ -0,0 +1,109 @@
+from datetime import date
+
+import pytest
+
+from app.models.reconciliation import ReconciliationStatus
+from app.services.reconciliation import (
+    PendingPayment,
+    StatementLine,
+    match_lines,
+    parse_csv_statement,
+    parse_ofx_statement
+)
+
+OFX = """OFXHEADER:100
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>
+<STMTTRN>
+<TRNTYPE>CREDIT
+<DTPOSTED>20240105120000[-5:EST]
+<TRNAMT>1200.00
+<FITID>TX-1
+<NAME>ANA PEREZ
+<MEMO>Renta enero
+</STMTTRN>
+<STMTTRN>
+<TRNTYPE>DEBIT
+<DTPOSTED>20240106
+<TRNAMT>-35.50
+<FITID>TX-2
+</STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+"""
+
+def line(number, amount, day, reference=None, description=None):
+    return StatementLine(number, date(2024, 1, day), amount, reference, description)
+
+@pytest.mark.unit
+def test_parse_csv_statement():
+    """Test CSV parsing with localized headers, amounts and dates."""
+    content = (
+        "Fecha;Importe;Concepto;Referencia\n"
+        "05/01/2024;1.200,00;Transferencia Ana Perez;PAY-001\n"
+        "06/01/2024;-35,50;Comision;\n"
+        "no es fecha;10,00;;\n"
+    )
+    lines, errors = parse_csv_statement(content)
+
+    assert len(lines) == 1
+    assert lines[0].transaction_date == date(2024, 1, 5)
+    assert lines[0].amount == 1200.0
+    assert lines[0].reference == "PAY-001"
+    assert errors == ["Line 3: Invalid date: no es fecha"]
+
+@pytest.mark.unit
+def test_parse_ofx_statement():
+    """Test that OFX credits are parsed and debits dropped."""
+    lines, errors = parse_ofx_statement(OFX)
+
+    assert errors == []
+    assert len(lines) == 1
+    assert lines[0].transaction_date == date(2024, 1, 5)
+    assert lines[0].bank_transaction_id == "TX-1"
+    assert lines[0].description == "ANA PEREZ Renta enero"
+
+@pytest.mark.unit
+def test_match_by_reference_amount_and_window():
+    """Test matching by reference, then by amount within the date window."""
+    payments = [
+        PendingPayment(1, 1200.0, date(2024, 1, 5), "PAY-001", "Ana Perez"),
+        PendingPayment(2, 900.0, date(2024, 1, 3), None, "Luis Gomez"),
+        PendingPayment(3, 900.0, date(2024, 2, 3), None, "Luis Gomez"),
+    ]
+    results = match_lines([
+        line(1, 1200.0, 8, description="Transf pay001"),
+        line(2, 900.0, 6),
+        line(3, 750.0, 6),
+    ], payments, window_days=5)
+
+    assert [(r.status, r.payment_id) for r in results] == [
+        ("matched", 1),
+        ("matched", 2),
+        (ReconciliationStatus.UNMATCHED, None),
+    ]
+
+@pytest.mark.unit
+def test_ambiguous_lines_use_tenant_and_claim_once():
+    """Test tenant tie-breaking and that a payment is matched only once."""
+    payments = [
+        PendingPayment(1, 800.0, date(2024, 1, 5), None, "Ana Perez"),
+        PendingPayment(2, 800.0, date(2024, 1, 5), None, "Luis Gomez"),
+        PendingPayment(3, 500.0, date(2024, 1, 5), "REF-9", "Eva Ruiz"),
+    ]
+    results = match_lines([
+        line(1, 800.0, 5, description="TRANSFERENCIA DE LUIS GOMEZ"),
+        line(2, 800.0, 5, description="Transferencia"),
+        line(3, 800.0, 5),
+        line(4, 500.0, 5, reference="REF-9"),
+        line(5, 500.0, 5, reference="REF-9"),
+        line(6, 450.0, 5, reference="REF-9"),
+    ], payments, window_days=3)
+
+    assert (results[0].status, results[0].payment_id) == ("matched", 2)
+    # Only payment 1 is left once payment 2 is claimed
+    assert (results[1].status, results[1].payment_id) == ("matched", 1)
+    assert results[2].status == ReconciliationStatus.UNMATCHED
+    assert (results[3].status, results[3].payment_id) == ("matched", 3)
+    assert results[4].status == ReconciliationStatus.AMBIGUOUS
+    assert results[4].reason == "Payment already matched by another line"
+    assert results[5].status == ReconciliationStatus.AMBIGUOUS
+    assert results[5].candidates == [3]
@@ -0,0 +1,163 @@
+import pytest
+from fastapi import APIRouter, Depends, FastAPI, HTTPException, Response, Security
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from fastapi.testclient import TestClient
+
+from app.core import response_cache as response_cache_module
+from app.core.response_cache import (
+    CachedRoute,
+    InMemoryResponseStore,
+    ResponseCache,
+    ResponseCachePolicy,
+    cache_response,
+    compute_etag,
+    etag_matches,
+)
+
+class FakeQueryParams:
+    def __init__(self, items):
+        self.items = items
+
+    def multi_items(self):
+        return list(self.items)
+
+class FakeURL:
+    def __init__(self, path: str):
+        self.path = path
+
+class FakeRequest:
+    def __init__(self, path: str, path_params=None, query=(), headers=None):
+        self.url = FakeURL(path)
+        self.path_params = path_params or {}
+        self.query_params = FakeQueryParams(query)
+        self.headers = headers or {}
+
+class CountingEndpoint:
+    def __init__(self, body: bytes = b'{"id": 42}'):
+        self.body = body
+        self.calls = 0
+
+    async def __call__(self, request):
+        self.calls += 1
+        return Response(content=self.body, media_type="application/json")
+
+POLICY = ResponseCachePolicy(tags=("property:{property_id}", "properties"), ttl=60)
+
+def property_request(**kwargs):
+    return FakeRequest(
+        "/properties/42",
+        path_params={"property_id": 42},
+        headers=kwargs.pop("headers", {"authorization": "Bearer a"}),
+        **kwargs
+    )
+
+@pytest.mark.unit
+def test_etag_matching():
+    """Test strong ETags and If-None-Match parsing."""
+    etag = compute_etag(b"body")
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", W/{etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('"other"', etag)
+    assert not etag_matches(None, etag)
+
+@pytest.mark.unit
+async def test_second_request_is_served_from_cache():
+    """Test that a cached response skips the endpoint and keeps its ETag."""
+    cache = ResponseCache(store=InMemoryResponseStore())
+    endpoint = CountingEndpoint()
+
+    first = await cache.serve(property_request(), "/properties/{property_id}", POLICY, endpoint)
+    second = await cache.serve(property_request(), "/properties/{property_id}", POLICY, endpoint)
+
+    assert endpoint.calls == 1
+    assert second.body == b'{"id": 42}'
+    assert first.headers["etag"] == second.headers["etag"] == compute_etag(b'{"id": 42}')
+
+@pytest.mark.unit
+async def test_if_none_match_returns_304():
+    """Test that a matching If-None-Match is answered with 304 and no body."""
+    cache = ResponseCache(store=InMemoryResponseStore())
+    endpoint = CountingEndpoint()
+    etag = compute_etag(endpoint.body)
+
+    response = await cache.serve(
+        property_request(headers={"authorization": "Bearer a", "if-none-match": etag}),
+        "/properties/{property_id}",
+        POLICY,
+        endpoint
+    )
+
+    assert response.status_code == 304
+    assert response.body == b""
+
+@pytest.mark.unit
+async def test_entries_are_per_user_and_query():
+    """Test that different callers and query strings do not share entries."""
+    cache = ResponseCache(store=InMemoryResponseStore())
+    endpoint = CountingEndpoint()
+
+    await cache.serve(property_request(), "/properties/{property_id}", POLICY, endpoint)
+    await cache.serve(
+        property_request(headers={"authorization": "Bearer b"}),
+        "/properties/{property_id}",
+        POLICY,
+        endpoint
+    )
+    await cache.serve(property_request(query=[("expand", "units")]), "/properties/{property_id}", POLICY, endpoint)
+
+    assert endpoint.calls == 3
+
+@pytest.mark.unit
+async def test_invalidation_drops_only_tagged_entries():
+    """Test that invalidating an entity tag drops exactly its responses."""
+    cache = ResponseCache(store=InMemoryResponseStore())
+    endpoint = CountingEndpoint()
+    other = FakeRequest("/properties/7", path_params={"property_id": 7}, headers={"authorization": "Bearer a"})
+
+    await cache.serve(property_request(), "/properties/{property_id}", POLICY, endpoint)
+    await cache.serve(other, "/properties/{property_id}", POLICY, endpoint)
+    await cache.invalidate("property:42")
+    await cache.serve(property_request(), "/properties/{property_id}", POLICY, endpoint)
+    await cache.serve(other, "/properties/{property_id}", POLICY, endpoint)
+
+    assert endpoint.calls == 3
+
+@pytest.mark.unit
+def test_cache_hits_rerun_auth_dependencies(monkeypatch):
+    """Test that a revoked token is rejected even when its response is cached."""
+    monkeypatch.setattr(response_cache_module, "response_cache", ResponseCache(store=InMemoryResponseStore()))
+    revoked = set()
+    calls = {"auth": 0, "db": 0, "endpoint": 0}
+
+    async def current_user(credentials: HTTPAuthorizationCredentials = Security(HTTPBearer())):
+        calls["auth"] += 1
+        if credentials.credentials in revoked:
+            raise HTTPException(status_code=401, detail="Token revoked")
+        return credentials.credentials
+
+    async def get_db():
+        calls["db"] += 1
+
+    router = APIRouter(route_class=CachedRoute)
+
+    @router.get("/properties/{property_id}")
+    @cache_response("property:{property_id}")
+    async def read_property(property_id: int, db=Depends(get_db), user: str = Depends(current_user)):
+        calls["endpoint"] += 1
+        return {"id": property_id}
+
+    app = FastAPI()
+    app.include_router(router)
+    client = TestClient(app)
+    headers = {"Authorization": "Bearer a"}
+
+    first = client.get("/properties/42", headers=headers)
+    assert client.get("/properties/42", headers=headers).status_code == 200
+    assert calls == {"auth": 2, "db": 1, "endpoint": 1}
+
+    revoked.add("a")
+    assert client.get("/properties/42", headers=headers).status_code == 401
+    not_modified = client.get("/properties/42", headers={**headers, "If-None-Match": first.headers["etag"]})
+    assert not_modified.status_code == 401
+    assert calls["endpoint"] == 1
@@ -0,0 +1,136 @@
+from contextlib import asynccontextmanager
+from datetime import datetime
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.core.config import settings
+from app.services import scheduler_service
+from app.services.scheduler_service import SchedulerService
+
+class FakeLockConnection:
+    def __init__(self, acquired: bool):
+        self.acquired = acquired
+        self.statements = []
+        # Tabla scheduled_job_runs: nombre -> último periodo completado
+        self.runs = {}
+        self.pending = {}
+
+    async def execute(self, statement, params=None):
+        self.statements.append(str(statement))
+        result = MagicMock()
+        if getattr(statement, "is_select", False):
+            name = next(iter(statement.compile().params.values()))
+            result.scalar.return_value = self.runs.get(name)
+        elif getattr(statement, "is_insert", False):
+            values = statement.compile().params
+            self.pending[values["name"]] = values["period"]
+        else:
+            result.scalar.return_value = self.acquired
+        return result
+
+    async def commit(self):
+        self.runs.update(self.pending)
+        self.pending.clear()
+
+@pytest.fixture
+def lock_connection(monkeypatch):
+    connection = FakeLockConnection(acquired=True)
+    engine = MagicMock()
+    engine.connect = asynccontextmanager(lambda: _yield(connection))
+    monkeypatch.setattr(scheduler_service, "engine", engine)
+    monkeypatch.setattr(scheduler_service, "SessionLocal", asynccontextmanager(lambda: _yield(object())))
+    return connection
+
+async def _yield(value):
+    yield value
+
+@pytest.mark.unit
+async def test_failing_job_does_not_stop_the_rest(lock_connection, monkeypatch):
+    """Test that every daily job runs even when an earlier one raises."""
+    ran = []
+
+    async def broken(db):
+        ran.append("broken")
+        raise RuntimeError("db.query no existe en AsyncSession")
+
+    async def recurring(db):
+        ran.append("recurring")
+        return 3
+
+    monkeypatch.setattr(
+        SchedulerService, "daily_jobs",
+        staticmethod(lambda: [("broken", broken), ("recurring", recurring)])
+    )
+
+    await SchedulerService.run_daily_tasks()
+
+    assert ran == ["broken", "recurring"]
+    # El bloqueo se libera también cuando la tarea falla
+    assert sum("pg_advisory_unlock" in s for s in lock_connection.statements) == 2
+
+@pytest.mark.unit
+async def test_job_locked_by_another_worker_is_skipped(lock_connection):
+    """Test that a job is skipped when another worker holds its lock."""
+    lock_connection.acquired = False
+    ran = []
+
+    async def job(db):
+        ran.append(db)
+
+    assert not await SchedulerService.run_job("recurring_expenses", job, "2024-07-31")
+    assert ran == []
+
+@pytest.mark.unit
+async def test_job_already_run_for_the_period_is_skipped(lock_connection):
+    """Test that a worker arriving after the job finished does not run it again."""
+    ran = []
+
+    async def job(db):
+        ran.append(db)
+
+    assert await SchedulerService.run_job("recurring_expenses", job, "2024-07-31")
+    assert not await SchedulerService.run_job("recurring_expenses", job, "2024-07-31")
+    assert await SchedulerService.run_job("recurring_expenses", job, "2024-08-01")
+
+    assert len(ran) == 2
+    assert lock_connection.runs == {"recurring_expenses": "2024-08-01"}
+
+@pytest.mark.unit
+async def test_failed_job_is_not_marked_as_run(lock_connection):
+    """Test that a failed job can be retried in the same period."""
+    async def broken(db):
+        raise RuntimeError("conexión perdida")
+
+    assert not await SchedulerService.run_job("late_fees", broken, "2024-07-31")
+    assert lock_connection.runs == {}
+
+@pytest.mark.unit
+def test_next_run(monkeypatch):
+    """Test that the next daily run is today before the hour and tomorrow after it."""
+    monkeypatch.setattr(settings, "SCHEDULER_DAILY_HOUR", 3)
+
+    assert SchedulerService.next_run(datetime(2024, 7, 31, 1, 30)) == datetime(2024, 7, 31, 3)
+    assert SchedulerService.next_run(datetime(2024, 7, 31, 3)) == datetime(2024, 8, 1, 3)
+
+@pytest.mark.unit
+async def test_loan_metrics_run_after_failed_monthly_jobs(lock_connection, monkeypatch):
+    """Test that loan metrics are computed even if the earlier monthly jobs fail."""
+    ran = []
+
+    async def failing(db):
+        raise RuntimeError("partición bloqueada")
+
+    async def loan_metrics(db):
+        ran.append("loan_metrics")
+        return 12
+
+    monkeypatch.setattr(SchedulerService, "monthly_jobs", staticmethod(lambda: [
+        ("loan_statuses", failing),
+        ("audit_retention", failing),
+        ("loan_metrics", loan_metrics),
+    ]))
+
+    await SchedulerService.run_monthly_tasks()
+
+    assert ran == ["loan_metrics"]
@@ -0,0 +1,75 @@
+import pytest
+
+from app.core.sql_instrumentation import (
+    NPlusOneError,
+    SQLInstrumentationMiddleware,
+    _after_cursor_execute,
+    _before_cursor_execute,
+    current_query_stats,
+    track_queries,
+)
+
+class FakeConnection:
+    def __init__(self):
+        self.info = {}
+
+def execute(conn, statement: str):
+    """Fire the engine hooks the way SQLAlchemy does around a cursor call."""
+    _before_cursor_execute(conn, None, statement, {}, None, False)
+    _after_cursor_execute(conn, None, statement, {}, None, False)
+
+@pytest.mark.unit
+def test_queries_outside_a_request_are_ignored():
+    """Test that the hooks are inert without an active collector."""
+    conn = FakeConnection()
+    execute(conn, "SELECT 1")
+    assert current_query_stats() is None
+    assert conn.info == {}
+
+@pytest.mark.unit
+def test_track_queries_counts_statements():
+    """Test query counting and the Server-Timing value."""
+    conn = FakeConnection()
+    with track_queries(mode="sample") as stats:
+        execute(conn, "SELECT * FROM properties")
+        execute(conn, "SELECT * FROM tenants")
+
+    assert stats.count == 2
+    assert stats.duration >= 0
+    assert stats.server_timing().endswith('desc="2 queries"')
+    assert current_query_stats() is None
+
+@pytest.mark.unit
+def test_strict_mode_raises_on_repeated_statement():
+    """Test that strict mode fails on an N+1 pattern."""
+    conn = FakeConnection()
+    with track_queries(mode="strict") as stats:
+        with pytest.raises(NPlusOneError):
+            for _ in range(stats.threshold):
+                execute(conn, "SELECT * FROM payments WHERE contract_id = %(id)s")
+
+    assert len(stats.findings) == 1
+    assert stats.findings[0].count == stats.threshold
+
+@pytest.mark.unit
+async def test_middleware_adds_server_timing_header():
+    """Test that the middleware reports the queries of the request."""
+    conn = FakeConnection()
+
+    async def app(scope, receive, send):
+        execute(conn, "SELECT * FROM vendors")
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": "/vendors"}
+    await SQLInstrumentationMiddleware(app)(scope, None, send)
+
+    headers = dict(messages[0]["headers"])
+    assert headers[b"server-timing"].startswith(b"db;dur=")
+    assert b'desc="1 queries"' in headers[b"server-timing"]
+    assert current_query_stats() is None
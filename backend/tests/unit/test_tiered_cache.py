@@ -0,0 +1,73 @@
+import asyncio
+import pytest
+
+from app.core.pubsub import InMemoryBroker, InMemoryPubSub
+from app.core.tiered_cache import LocalLRUCache, TwoTierCache
+
+def make_cache(broker: InMemoryBroker, **kwargs) -> TwoTierCache:
+    return TwoTierCache("test", remote=False, bus=InMemoryPubSub(broker), **kwargs)
+
+@pytest.mark.unit
+def test_local_cache_evicts_least_recently_used():
+    """Test that the local tier is bounded and keeps recently used keys."""
+    cache = LocalLRUCache(max_entries=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert len(cache) == 2
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+@pytest.mark.unit
+async def test_concurrent_misses_share_one_load():
+    """Test that concurrent misses for a key run the loader only once."""
+    cache = make_cache(InMemoryBroker())
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"value": 42}
+
+    results = await asyncio.gather(*(cache.get_or_load("key", loader) for _ in range(10)))
+
+    assert calls == 1
+    assert results == [{"value": 42}] * 10
+    assert await cache.get("key") == {"value": 42}
+
+@pytest.mark.unit
+async def test_failed_load_is_not_cached():
+    """Test that a loader error propagates to every waiter and is not cached."""
+    cache = make_cache(InMemoryBroker())
+
+    async def loader():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    results = await asyncio.gather(
+        *(cache.get_or_load("key", loader) for _ in range(3)),
+        return_exceptions=True
+    )
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert await cache.get("key") is None
+
+@pytest.mark.unit
+async def test_writes_invalidate_other_workers():
+    """Test that a write on one worker evicts the local copy on another."""
+    broker = InMemoryBroker()
+    worker_a = make_cache(broker)
+    worker_b = make_cache(broker)
+    await worker_a.set("key", "old")
+    await worker_b.set("key", "old")
+
+    await worker_a.set("key", "new")
+    assert await worker_a.get("key") == "new"
+    assert await worker_b.get("key") is None
+
+    await worker_b.set("key", "newer")
+    await worker_b.delete("key")
+    assert await worker_a.get("key") is None
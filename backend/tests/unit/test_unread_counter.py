@@ -0,0 +1,100 @@
+import pytest
+
+from app.core.unread_counter import InMemoryUnreadCounterStore, UnreadNotificationCounter
+
+class FakeWebsocketManager:
+    def __init__(self):
+        self.pushed = []
+
+    async def send_unread_count(self, user_id: int, count: int):
+        self.pushed.append((user_id, count))
+
+class FakeLoader:
+    def __init__(self, count: int):
+        self.count = count
+        self.calls = 0
+
+    async def __call__(self, db, user_id: int) -> int:
+        self.calls += 1
+        return self.count
+
+def make_counter(db_count: int):
+    loader = FakeLoader(db_count)
+    ws_manager = FakeWebsocketManager()
+    counter = UnreadNotificationCounter(
+        store=InMemoryUnreadCounterStore(),
+        ws_manager=ws_manager,
+        count_loader=loader,
+        ttl=60
+    )
+    return counter, loader, ws_manager
+
+@pytest.mark.unit
+async def test_missing_counter_is_rebuilt_from_database():
+    """Test that the first read reconciles the counter with the database once."""
+    counter, loader, ws_manager = make_counter(db_count=3)
+
+    assert await counter.get(None, 1) == 3
+    assert await counter.get(None, 1) == 3
+    assert loader.calls == 1
+    assert ws_manager.pushed == []
+
+@pytest.mark.unit
+async def test_changes_update_counter_and_push():
+    """Test that increments and decrements are applied without querying the database."""
+    counter, loader, ws_manager = make_counter(db_count=2)
+    await counter.get(None, 1)
+
+    await counter.increment(None, 1)
+    await counter.decrement(None, 1, 2)
+
+    assert await counter.get(None, 1) == 1
+    assert loader.calls == 1
+    assert ws_manager.pushed == [(1, 3), (1, 1)]
+
+@pytest.mark.unit
+async def test_change_on_missing_counter_reconciles():
+    """Test that a change to an unknown counter rebuilds it from the database."""
+    counter, loader, ws_manager = make_counter(db_count=5)
+
+    assert await counter.increment(None, 7) == 5
+    assert ws_manager.pushed == [(7, 5)]
+
+@pytest.mark.unit
+async def test_counter_never_goes_negative():
+    """Test that decrements clamp the counter at zero."""
+    counter, _, _ = make_counter(db_count=1)
+    await counter.get(None, 1)
+
+    assert await counter.decrement(None, 1, 3) == 0
+
+@pytest.mark.unit
+async def test_service_counts_notification_after_commit(monkeypatch):
+    """Test that a sent notification is counted once, after its row is committed."""
+    from types import SimpleNamespace
+    from app.schemas.notification import NotificationChannel
+    from app.services import notification_service as service_module
+
+    events = []
+
+    class FakeSession:
+        def add(self, obj):
+            events.append("add")
+
+        async def commit(self):
+            events.append("commit")
+            notification.id = 10
+
+    class RecordingCounter:
+        async def increment(self, db, user_id: int, amount: int = 1):
+            events.append(("increment", user_id))
+
+    monkeypatch.setattr(service_module, "unread_counter", RecordingCounter())
+    notification = SimpleNamespace(id=None, user_id=4, channels=None)
+    channels = [NotificationChannel.EMAIL, NotificationChannel.PUSH]
+
+    await service_module.NotificationService._store(FakeSession(), notification, channels)
+    await service_module.NotificationService._store(FakeSession(), notification, channels)
+
+    assert events == ["add", "commit", ("increment", 4)]
+    assert notification.channels == ["email", "push"]
@@ -0,0 +1,75 @@
+from datetime import date
+
+import pytest
+
+from app.core.sql_instrumentation import MODE_SAMPLE, track_queries
+from app.crud.vendor import vendor as crud_vendor
+from app.models.expense import Expense, ExpenseType
+from app.models.property import Property, PropertyType
+
+@pytest.fixture
+async def vendor(db_session):
+    return await crud_vendor.create(db_session, obj_in={"name": "Electricidad Norte", "business_type": "electrical"})
+
+@pytest.mark.unit
+async def test_rating_updates_running_totals(db_session, vendor):
+    """Test that each rating updates count, sum and average without rescanning."""
+    with track_queries(mode=MODE_SAMPLE) as first:
+        await crud_vendor.update_rating(db_session, vendor_id=vendor.id, rating=5, rated_by=None)
+    with track_queries(mode=MODE_SAMPLE) as second:
+        rated = await crud_vendor.update_rating(db_session, vendor_id=vendor.id, rating=2, rated_by=None)
+
+    assert (rated.rating_count, rated.rating_sum) == (2, 7)
+    assert rated.average_rating == pytest.approx(3.5)
+    assert rated.rating == 4
+    assert second.count == first.count
+
+@pytest.mark.unit
+async def test_rating_unknown_vendor(db_session):
+    """Test that rating a missing vendor returns None."""
+    assert await crud_vendor.update_rating(db_session, vendor_id=999999, rating=3, rated_by=None) is None
+
+@pytest.mark.unit
+async def test_expense_changes_maintain_vendor_stats(db_session, vendor):
+    """Test that inserting, updating and deleting expenses keeps vendor stats in step."""
+    property = Property(name="Edificio Sur", property_type=PropertyType.RESIDENTIAL, user_id="test_user_id")
+    db_session.add(property)
+    await db_session.flush()
+    older = Expense(
+        property_id=property.id, vendor_id=vendor.id, amount=100.0,
+        expense_type=ExpenseType.MAINTENANCE, date_incurred=date(2024, 1, 10)
+    )
+    newer = Expense(
+        property_id=property.id, vendor_id=vendor.id, amount=50.0,
+        expense_type=ExpenseType.MAINTENANCE, date_incurred=date(2024, 3, 5)
+    )
+    db_session.add_all([older, newer])
+    await db_session.commit()
+
+    stats = await crud_vendor.get_with_stats(db_session, vendor_id=vendor.id)
+    assert (stats.total_expenses, stats.total_amount) == (2, 150.0)
+    assert stats.average_expense == pytest.approx(75.0)
+    assert stats.last_expense_date == date(2024, 3, 5)
+
+    newer.amount = 80.0
+    await db_session.commit()
+    await db_session.delete(newer)
+    await db_session.commit()
+    await db_session.refresh(vendor)
+
+    assert (vendor.expense_count, vendor.expense_total) == (1, 100.0)
+    assert vendor.last_expense_date == date(2024, 1, 10)
+
+@pytest.mark.unit
+async def test_top_vendors_ordered_by_average(db_session):
+    """Test that top vendors come back by average rating, unrated last."""
+    unrated = await crud_vendor.create(db_session, obj_in={"name": "Sin valorar"})
+    low = await crud_vendor.create(db_session, obj_in={"name": "Regular"})
+    high = await crud_vendor.create(db_session, obj_in={"name": "Excelente"})
+    await crud_vendor.update_rating(db_session, vendor_id=low.id, rating=2, rated_by=None)
+    await crud_vendor.update_rating(db_session, vendor_id=high.id, rating=5, rated_by=None)
+
+    top = await crud_vendor.get_multi_with_stats(db_session, limit=1000)
+    ids = [v.id for v in top]
+
+    assert ids.index(high.id) < ids.index(low.id) < ids.index(unrated.id)
@@ -0,0 +1,97 @@
+import asyncio
+import json
+import pytest
+
+from app.core.pubsub import InMemoryPubSub
+from app.core.websocket import NotificationWebsocketManager, SLOW_CONSUMER_CLOSE_CODE
+
+class FakeWebSocket:
+    def __init__(self, delay: float = 0):
+        self.delay = delay
+        self.sent = []
+        self.accepted = False
+        self.close_code = None
+
+    async def accept(self):
+        self.accepted = True
+
+    async def send_text(self, data: str):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.sent.append(data)
+
+    async def close(self, code: int = 1000):
+        self.close_code = code
+
+class FakeNotification:
+    def __init__(self):
+        self.calls = 0
+
+    def model_dump_json(self) -> str:
+        self.calls += 1
+        return json.dumps({"id": 1, "title": "Test"})
+
+async def drain():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+@pytest.mark.unit
+async def test_broadcast_serializes_once():
+    """Test that a broadcast serializes the notification only once."""
+    manager = NotificationWebsocketManager(max_queue_size=10, send_timeout=1, bus=InMemoryPubSub())
+    sockets = {user_id: FakeWebSocket() for user_id in range(3)}
+    for user_id, websocket in sockets.items():
+        await manager.connect(websocket, user_id)
+
+    notification = FakeNotification()
+    await manager.broadcast_notification(set(sockets), notification)
+    await drain()
+
+    assert notification.calls == 1
+    for websocket in sockets.values():
+        assert websocket.sent == [json.dumps({"id": 1, "title": "Test"})]
+
+@pytest.mark.unit
+async def test_slow_client_does_not_block_others():
+    """Test that a slow connection does not delay delivery to fast ones."""
+    manager = NotificationWebsocketManager(max_queue_size=10, send_timeout=5, bus=InMemoryPubSub())
+    slow = FakeWebSocket(delay=1)
+    fast = FakeWebSocket()
+    await manager.connect(slow, 1)
+    await manager.connect(fast, 2)
+
+    await manager.broadcast_notification({1, 2}, FakeNotification())
+    await drain()
+
+    assert len(fast.sent) == 1
+    assert slow.sent == []
+    manager.disconnect(slow, 1)
+
+@pytest.mark.unit
+async def test_full_queue_drops_connection():
+    """Test that a connection whose queue overflows is dropped."""
+    manager = NotificationWebsocketManager(max_queue_size=2, send_timeout=5, bus=InMemoryPubSub())
+    slow = FakeWebSocket(delay=1)
+    await manager.connect(slow, 1)
+
+    for _ in range(4):
+        await manager.send_notification(1, FakeNotification())
+    await drain()
+
+    assert 1 not in manager.active_connections
+    assert slow.close_code == SLOW_CONSUMER_CLOSE_CODE
+
+@pytest.mark.unit
+async def test_unread_count_is_coalesced():
+    """Test that pending unread count updates collapse into the latest value."""
+    manager = NotificationWebsocketManager(max_queue_size=2, send_timeout=5, bus=InMemoryPubSub())
+    websocket = FakeWebSocket()
+    await manager.connect(websocket, 1)
+
+    for count in range(10):
+        await manager.send_unread_count(1, count)
+    await drain()
+
+    assert 1 in manager.active_connections
+    assert json.loads(websocket.sent[-1]) == {"type": "unread_count", "count": 9}
+    assert len(websocket.sent) <= 2